@@ -0,0 +1,296 @@
+"""Engagement analytics: daily activity, solves by topic and signup cohorts.
+
+``roll_up`` folds new rows from three sources into small summary tables:
+
+* ``user`` signups, into ``DailyActivity.signups``;
+* ``submission`` solves, into ``DailyActivity.solves`` and ``TopicSolves``
+  (by the challenge's topic and difficulty when the solve is folded);
+* ``puzzle_completion`` rows, into ``DailyActivity.puzzles``.
+
+A solve or a puzzle makes the user active that UTC day. The first
+activity of a (user, day) adds a ``UserActivityDay`` row and counts toward
+``DailyActivity.active_users``. The first activity of a (user, week) counts
+toward ``CohortActivity`` for the user's signup week.
+
+Each source keeps a ``RollupWatermark`` (``analytics:<table>``, or
+``analytics:<table>@<shard>`` per progress shard, since ids repeat across
+shards). Batches claim their id range with the same compare-and-set as the
+XP rollups, so a run only reads rows it has not folded and two runs never
+fold a row twice. Rows younger than ``settle_seconds`` wait for the next
+run, in case a lower id commits late.
+
+Weekly active users cannot be summed from daily counts. New activity on a
+day clears ``weekly_active_users`` for that day and the six after it. The
+end of each run recounts the cleared days from ``UserActivityDay``.
+
+``report`` reads only the summary tables, so the admin page costs the same
+at ten thousand or ten million submissions.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+from flask import current_app
+from sqlalchemy import bindparam, delete, func, select, tuple_, update
+
+from extensions import db
+from models import (
+    Challenge,
+    CohortActivity,
+    DailyActivity,
+    PuzzleCompletion,
+    RollupWatermark,
+    Submission,
+    TopicSolves,
+    User,
+    UserActivityDay,
+)
+from xp_ledger import claim, period_start, watermark
+
+WATERMARK_PREFIX = "analytics:"
+BATCH_SIZE = 5000
+REPORT_DAYS = 30
+REPORT_COHORTS = 8
+
+
+def _utc(value: datetime) -> datetime:
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _week(day: date) -> date:
+    return period_start("week", day)
+
+
+def _add(model, column: str, counts: dict):
+    """Add ``counts`` (primary key tuple -> amount) to ``column``, inserting missing rows."""
+    if not counts:
+        return
+    table = model.__table__
+    keys = list(table.primary_key.columns)
+    existing = set(db.session.execute(select(*keys).where(tuple_(*keys).in_(list(counts)))).all())
+    updates = [
+        {**{f"k{i}": part for i, part in enumerate(key)}, "amount": amount}
+        for key, amount in counts.items() if key in existing
+    ]
+    inserts = [
+        {**{col.name: part for col, part in zip(keys, key)}, column: amount}
+        for key, amount in counts.items() if key not in existing
+    ]
+    if updates:
+        db.session.execute(
+            table.update()
+            .where(*(col == bindparam(f"k{i}") for i, col in enumerate(keys)))
+            .values({column: table.c[column] + bindparam("amount")}),
+            updates,
+        )
+    if inserts:
+        db.session.execute(table.insert(), inserts)
+
+
+def _record_activity(pairs: set):
+    """Fold ``(user_id, day)`` activity: distinct daily users, cohort weeks and stale weekly counts."""
+    users = {user_id for user_id, _ in pairs}
+    earliest = _week(min(day for _, day in pairs))
+    latest = max(day for _, day in pairs)
+    seen = set(db.session.execute(
+        select(UserActivityDay.user_id, UserActivityDay.day)
+        .where(UserActivityDay.user_id.in_(users), UserActivityDay.day.between(earliest, latest))
+    ).all())
+    new = sorted(pairs - seen)
+    if not new:
+        return
+    db.session.execute(UserActivityDay.__table__.insert(), [{"user_id": u, "day": d} for u, d in new])
+
+    daily = defaultdict(int)
+    for _, day in new:
+        daily[(day,)] += 1
+    _add(DailyActivity, "active_users", daily)
+
+    signed_up = dict(db.session.execute(
+        select(User.id, User.created_at).where(User.id.in_({user_id for user_id, _ in new}))
+    ).all())
+    weeks = {day: _week(day) for day in {day for _, day in seen} | {day for _, day in new}}
+    active_weeks = {(user_id, weeks[day]) for user_id, day in seen}
+    cohorts = defaultdict(int)
+    for user_id, day in new:
+        week = weeks[day]
+        if (user_id, week) in active_weeks or user_id not in signed_up:
+            continue
+        active_weeks.add((user_id, week))
+        cohorts[(_week(_utc(signed_up[user_id]).date()), week)] += 1
+    _add(CohortActivity, "users", cohorts)
+
+    today = datetime.utcnow().date()
+    active_days = {day for _, day in new}
+    stale = {day + timedelta(days=offset) for day in active_days for offset in range(7)}
+    stale = {day for day in stale if day <= today} | active_days
+    _add(DailyActivity, "active_users", {(day,): 0 for day in stale})
+    db.session.execute(
+        update(DailyActivity).where(DailyActivity.day.in_(stale)).values(weekly_active_users=None)
+    )
+
+
+def _fold_signups(rows):
+    signups = defaultdict(int)
+    for row in rows:
+        signups[(_utc(row.created_at).date(),)] += 1
+    _add(DailyActivity, "signups", signups)
+
+
+def _fold_solves(rows):
+    challenges = {
+        row.id: (row.topic or "", row.difficulty or "")
+        for row in db.session.execute(
+            select(Challenge.id, Challenge.topic, Challenge.difficulty)
+            .where(Challenge.id.in_({row.challenge_id for row in rows}))
+        )
+    }
+    solves, topics = defaultdict(int), defaultdict(int)
+    for row in rows:
+        day = row.timestamp.date()
+        solves[(day,)] += 1
+        topics[(day, *challenges.get(row.challenge_id, ("", "")))] += 1
+    _add(DailyActivity, "solves", solves)
+    _add(TopicSolves, "solves", topics)
+    _record_activity({(row.user_id, row.timestamp.date()) for row in rows})
+
+
+def _fold_puzzles(rows):
+    puzzles = defaultdict(int)
+    for row in rows:
+        puzzles[(row.completed_at.date(),)] += 1
+    _add(DailyActivity, "puzzles", puzzles)
+    _record_activity({(row.user_id, row.completed_at.date()) for row in rows})
+
+
+SOURCES = (
+    (User, (User.id, User.created_at), "created_at", _fold_signups),
+    (Submission, (Submission.id, Submission.user_id, Submission.challenge_id, Submission.timestamp),
+     "timestamp", _fold_solves),
+    (PuzzleCompletion, (PuzzleCompletion.id, PuzzleCompletion.user_id, PuzzleCompletion.completed_at),
+     "completed_at", _fold_puzzles),
+)
+
+
+def _feeds():
+    """``(watermark name, engine or None for the session, model, columns, time column, fold)`` per source."""
+    shards = current_app.extensions["shards"]
+    for model, columns, time_column, fold in SOURCES:
+        name = WATERMARK_PREFIX + model.__tablename__
+        if shards and getattr(model, "__shard_key__", None):
+            for index, engine in enumerate(shards.engines):
+                yield f"{name}@{index}", engine, model, columns, time_column, fold
+        else:
+            yield name, None, model, columns, time_column, fold
+
+
+def _fold_batch(name, engine, model, columns, time_column, fold, batch_size, settle_seconds) -> int:
+    start_id = watermark(name).last_id
+    stmt = select(*columns).where(model.id > start_id).order_by(model.id).limit(batch_size)
+    if engine is None:
+        rows = db.session.connection().execute(stmt).all()
+    else:
+        with engine.connect() as conn:
+            rows = conn.execute(stmt).all()
+    cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    folded = []
+    for row in rows:
+        at = getattr(row, time_column)
+        if at is None or (settle_seconds and _utc(at) > cutoff):
+            break
+        folded.append(row)
+    if not folded:
+        db.session.rollback()
+        return 0
+    if not claim(name, start_id, folded[-1].id):
+        db.session.rollback()  # another runner folded this range first
+        return 0
+    fold(folded)
+    db.session.commit()
+    return len(folded)
+
+
+def refresh_weekly_active() -> int:
+    """Recount ``weekly_active_users`` for the days that new activity cleared; returns how many."""
+    days = db.session.scalars(select(DailyActivity.day).where(DailyActivity.weekly_active_users.is_(None))).all()
+    for day in days:
+        count = db.session.execute(
+            select(func.count(func.distinct(UserActivityDay.user_id)))
+            .where(UserActivityDay.day.between(day - timedelta(days=6), day))
+        ).scalar()
+        db.session.execute(
+            update(DailyActivity).where(DailyActivity.day == day).values(weekly_active_users=count)
+        )
+    db.session.commit()
+    return len(days)
+
+
+def roll_up(batch_size: int = BATCH_SIZE, settle_seconds: float = 0.0) -> dict[str, int]:
+    """Fold every source's new rows; returns rows folded per watermark."""
+    folded = {}
+    for name, engine, model, columns, time_column, fold in _feeds():
+        total = 0
+        while True:
+            count = _fold_batch(name, engine, model, columns, time_column, fold, batch_size, settle_seconds)
+            total += count
+            if count < batch_size:
+                break
+        folded[name] = total
+    refresh_weekly_active()
+    return folded
+
+
+def reset():
+    """Empty the summary tables and watermarks so the next ``roll_up`` starts over."""
+    for model in (DailyActivity, TopicSolves, CohortActivity, UserActivityDay):
+        db.session.execute(delete(model))
+    db.session.execute(delete(RollupWatermark).where(RollupWatermark.name.startswith(WATERMARK_PREFIX)))
+    db.session.commit()
+
+
+def report(today: date | None = None, days: int = REPORT_DAYS, cohorts: int = REPORT_COHORTS) -> dict:
+    """Everything the admin analytics page shows, read from the summary tables only."""
+    today = today or datetime.utcnow().date()
+    since = today - timedelta(days=days - 1)
+    first_cohort = _week(today) - timedelta(weeks=cohorts - 1)
+    rows = db.session.execute(
+        select(DailyActivity).where(DailyActivity.day >= min(since, first_cohort)).order_by(DailyActivity.day.desc())
+    ).scalars().all()
+    daily = [row for row in rows if row.day >= since]
+
+    topics, difficulties = defaultdict(int), defaultdict(int)
+    for topic, difficulty, solves in db.session.execute(
+        select(TopicSolves.topic, TopicSolves.difficulty, func.sum(TopicSolves.solves))
+        .where(TopicSolves.day >= since)
+        .group_by(TopicSolves.topic, TopicSolves.difficulty)
+    ):
+        topics[topic] += solves
+        difficulties[difficulty] += solves
+
+    sizes = defaultdict(int)
+    for row in rows:
+        sizes[_week(row.day)] += row.signups
+    active = {
+        (row.cohort_start, row.week_start): row.users
+        for row in db.session.execute(select(CohortActivity).where(CohortActivity.cohort_start >= first_cohort)).scalars()
+    }
+    grid = []
+    for index in range(cohorts):
+        start = first_cohort + timedelta(weeks=index)
+        weeks = []
+        for offset in range(cohorts - index):
+            users = active.get((start, start + timedelta(weeks=offset)), 0)
+            weeks.append({"users": users, "share": users / sizes[start] if sizes[start] else None})
+        grid.append({"start": start, "signups": sizes[start], "weeks": weeks})
+
+    updated_at = db.session.execute(
+        select(func.max(RollupWatermark.updated_at)).where(RollupWatermark.name.startswith(WATERMARK_PREFIX))
+    ).scalar()
+    return {
+        "today": daily[0] if daily and daily[0].day == today else None,
+        "daily": daily,
+        "topics": sorted(topics.items(), key=lambda item: (-item[1], item[0])),
+        "difficulties": sorted(difficulties.items(), key=lambda item: (-item[1], item[0])),
+        "cohorts": grid,
+        "weeks": cohorts,
+        "updated_at": updated_at,
+    }
@@ -0,0 +1,46 @@
+from .cli import assets_cli
+from .compression import compress_static, init_compression, send_static
+from .images import build_image_variants, init_images
+from .templates import init_templates, precompile_templates, template_load_report
+from .pipeline import (
+    IMMUTABLE_CACHE_CONTROL,
+    build_assets,
+    init_pipeline,
+    is_fingerprinted,
+    minify_css,
+    minify_js,
+)
+
+
+def init_assets(app):
+    """Attach compression, fingerprinted static URLs, the template bytecode cache and ``flask assets``."""
+    init_templates(app)
+    init_compression(app)
+    init_pipeline(app)
+    init_images(app)
+
+    def static(filename):
+        response = send_static(app, filename)
+        if is_fingerprinted(app, filename):
+            # Content-hashed names never change, so browsers need not revalidate.
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    app.view_functions["static"] = static
+    app.cli.add_command(assets_cli)
+
+
+__all__ = [
+    "build_assets",
+    "build_image_variants",
+    "compress_static",
+    "init_assets",
+    "init_compression",
+    "init_images",
+    "init_pipeline",
+    "init_templates",
+    "minify_css",
+    "minify_js",
+    "precompile_templates",
+    "template_load_report",
+]
@@ -0,0 +1,83 @@
+import os
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from .compression import brotli, compress_static
+from .images import build_image_variants
+from .pipeline import DIST_DIR, build_assets, set_manifest
+from .templates import precompile_templates, template_load_report
+
+assets_cli = AppGroup("assets", help="Build static asset artifacts.")
+
+
+@assets_cli.command("compress")
+@click.option("--min-size", default=256, show_default=True, help="Skip files smaller than this (bytes).")
+def compress_command(min_size):
+    """Write precompressed .gz/.br siblings next to static files."""
+    written = compress_static(current_app.static_folder, min_size=min_size)
+    for path, encoding, original, compressed in written:
+        rel = path.replace(current_app.static_folder, "static", 1)
+        click.echo(f"{encoding:>4}  {rel}  {original} -> {compressed} bytes")
+    if brotli is None:
+        click.echo("brotli is not installed; only gzip siblings were written.")
+    click.echo(f"{len(written)} sibling(s) written.")
+
+
+@assets_cli.command("build")
+@click.option("--no-minify", is_flag=True, help="Fingerprint files without minifying CSS/JS.")
+@click.option("--no-compress", is_flag=True, help="Skip writing .gz/.br siblings for dist files.")
+def build_command(no_minify, no_compress):
+    """Minify, fingerprint and precompress static files into static/dist."""
+    static_folder = current_app.static_folder
+    manifest, removed = build_assets(static_folder, minify=not no_minify)
+    set_manifest(current_app, manifest)
+    for source, target in sorted(manifest.items()):
+        click.echo(f"{source} -> {target}")
+    for path in removed:
+        click.echo(f"removed stale {os.path.relpath(path, static_folder)}")
+    if not no_compress:
+        written = compress_static(os.path.join(static_folder, DIST_DIR))
+        click.echo(f"{len(written)} compressed sibling(s) written.")
+    click.echo(f"{len(manifest)} asset(s) in manifest, {len(removed)} stale file(s) removed.")
+
+
+@assets_cli.command("images")
+def images_command():
+    """Generate responsive AVIF/WebP/PNG/JPEG variants of the source images."""
+    try:
+        manifest = build_image_variants(current_app.static_folder)
+    except RuntimeError as exc:
+        raise click.ClickException(str(exc))
+    current_app.extensions["image_variants"] = manifest
+    current_app.jinja_env.globals["image_set"] = manifest.get
+    budget = current_app.config["IMAGE_SIZE_BUDGET_KB"] * 1024
+    for name, entry in manifest.items():
+        for fmt, variants in entry["variants"].items():
+            for variant in variants:
+                flag = "  OVER BUDGET" if variant["bytes"] > budget else ""
+                click.echo(f"{variant['file']:<28} {variant['width']:>5}w {variant['bytes']:>8} bytes{flag}")
+
+
+@assets_cli.command("templates")
+@click.option("--report", is_flag=True, help="Compare cold (from source) and warm (bytecode) first-hit load time.")
+@click.option("--repeat", default=3, show_default=True, help="Best of N loads per template for --report.")
+def templates_command(report, repeat):
+    """Precompile every template into the Jinja bytecode cache."""
+    if not report:
+        timings = precompile_templates(current_app)
+        total = sum(timings.values()) * 1000
+        click.echo(f"{len(timings)} template(s) precompiled in {total:.1f} ms.")
+        return
+    rows = template_load_report(current_app, repeat=repeat)
+    click.echo(f"{'template':<44} {'cold ms':>9} {'warm ms':>9} {'speedup':>8}")
+    for name, cold, warm in rows:
+        if warm is None:
+            click.echo(f"{name:<44} {cold * 1000:>9.2f} {'-':>9} {'-':>8}")
+        else:
+            click.echo(f"{name:<44} {cold * 1000:>9.2f} {warm * 1000:>9.2f} {cold / warm:>7.1f}x")
+    cold_total = sum(row[1] for row in rows) * 1000
+    warm_total = sum(row[2] or 0 for row in rows) * 1000
+    click.echo(f"{'total':<44} {cold_total:>9.2f} {warm_total:>9.2f}")
+
@@ -0,0 +1,153 @@
+import gzip
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/javascript",
+    "application/json",
+    "image/svg+xml",
+    "text/css",
+    "text/csv",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+    "text/xml",
+}
+COMPRESSIBLE_EXTENSIONS = {".css", ".csv", ".html", ".js", ".json", ".svg", ".txt", ".xml"}
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def available_encodings() -> list[str]:
+    """Encodings this process can produce, most preferred first."""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+
+def negotiate_encoding(offered: list[str]) -> str | None:
+    """Pick the best of ``offered`` that the client accepts, honouring q-values."""
+    accepted = request.accept_encodings
+    best, best_quality = None, 0
+    for encoding in offered:
+        quality = accepted[encoding]
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_bytes(data: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _suffix_etag(response, encoding: str):
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+
+
+def init_compression(app):
+    """Compress dynamic responses above ``COMPRESS_MIN_SIZE``."""
+    app.config.setdefault("COMPRESS_ENABLED", True)
+    app.config.setdefault("COMPRESS_MIN_SIZE", 500)
+    app.config.setdefault("COMPRESS_LEVEL", 6)
+    app.config.setdefault("COMPRESS_BR_LEVEL", 5)
+
+    @app.after_request
+    def compress_response(response):
+        if not app.config["COMPRESS_ENABLED"]:
+            return response
+        if (
+            response.direct_passthrough
+            or response.is_streamed
+            or not 200 <= response.status_code < 300
+            or response.status_code == 204
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        data = response.get_data()
+        if len(data) < app.config["COMPRESS_MIN_SIZE"]:
+            return response
+        encoding = negotiate_encoding(available_encodings())
+        if encoding is None:
+            return response
+        level = app.config["COMPRESS_BR_LEVEL"] if encoding == "br" else app.config["COMPRESS_LEVEL"]
+        response.set_data(compress_bytes(data, encoding, level))
+        response.headers["Content-Encoding"] = encoding
+        _suffix_etag(response, encoding)
+        return response
+
+
+def send_static(app, filename):
+    """Serve ``name.br``/``name.gz`` written by ``flask assets compress`` when accepted."""
+    static_folder = app.static_folder
+    # No stat outside the folder: a name that escapes it gets the plain 404.
+    path = safe_join(static_folder, filename)
+    offered = [
+        encoding
+        for encoding, suffix in ENCODING_SUFFIXES.items()
+        if path is not None and os.path.isfile(path + suffix)
+    ]
+    encoding = negotiate_encoding(offered) if offered else None
+    if encoding is None:
+        response = app.send_static_file(filename)
+    else:
+        mimetype, _ = mimetypes.guess_type(filename)
+        response = send_from_directory(
+            static_folder,
+            filename + ENCODING_SUFFIXES[encoding],
+            mimetype=mimetype or "application/octet-stream",
+            max_age=app.get_send_file_max_age(filename),
+        )
+        response.headers["Content-Encoding"] = encoding
+    if offered:
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def compress_static(static_folder: str, min_size: int = 256, gzip_level: int = 9, br_level: int = 11):
+    """Write ``.gz`` (and ``.br`` when brotli is installed) siblings for static files.
+
+    Siblings newer than their source are left alone; siblings that would not
+    be smaller than the original are removed so they are never served.
+    Returns a list of ``(path, encoding, original_size, compressed_size)``.
+    """
+    written = []
+    for root, _dirs, files in os.walk(static_folder):
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+                continue
+            path = os.path.join(root, name)
+            size = os.path.getsize(path)
+            if size < min_size:
+                continue
+            mtime = os.path.getmtime(path)
+            data = None
+            for encoding in available_encodings():
+                target = path + ENCODING_SUFFIXES[encoding]
+                if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+                    continue
+                if data is None:
+                    with open(path, "rb") as fh:
+                        data = fh.read()
+                level = br_level if encoding == "br" else gzip_level
+                compressed = compress_bytes(data, encoding, level)
+                if len(compressed) >= size:
+                    if os.path.exists(target):
+                        os.remove(target)
+                    continue
+                tmp = target + ".tmp"
+                with open(tmp, "wb") as fh:
+                    fh.write(compressed)
+                os.replace(tmp, target)
+                written.append((path, encoding, size, len(compressed)))
+    return written
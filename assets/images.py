@@ -0,0 +1,125 @@
+import json
+import os
+
+SOURCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "source", "images")
+OUTPUT_SUBDIR = "images"
+VARIANTS_MANIFEST = "variants.json"
+DEFAULT_WIDTHS = (320, 640, 960, 1280)
+DEFAULT_IMAGE_BUDGET_KB = 200
+
+# Widths per source image (stem). The logo is drawn at 26px in the navbar and
+# used as the favicon, so it never needs the large hero sizes.
+IMAGE_WIDTHS = {
+    "logo": (32, 64, 128, 192),
+    "hero": (480, 768, 1024, 1280),
+}
+QUALITY = {"avif": 55, "webp": 78, "jpeg": 80}
+FALLBACK_FORMATS = {"png": "png", "jpg": "jpeg", "jpeg": "jpeg"}
+
+
+def _pillow():
+    # Imported on demand: Pillow is a build-time only dependency
+    # (requirements-dev.txt) and would otherwise slow down every worker boot.
+    try:
+        from PIL import Image, features
+    except ImportError:
+        return None, None
+    return Image, features
+
+
+def modern_formats() -> list[str]:
+    """Next-gen formats the installed Pillow can encode, best first."""
+    _image, features = _pillow()
+    formats = []
+    if features is not None and features.check("avif"):
+        formats.append("avif")
+    if features is not None and features.check("webp"):
+        formats.append("webp")
+    return formats
+
+
+def _save(image, path: str, fmt: str):
+    options = {}
+    if fmt == "avif":
+        options = {"quality": QUALITY["avif"]}
+    elif fmt == "webp":
+        options = {"quality": QUALITY["webp"], "method": 6}
+    elif fmt == "jpeg":
+        options = {"quality": QUALITY["jpeg"], "optimize": True, "progressive": True}
+    elif fmt == "png":
+        options = {"optimize": True}
+    tmp = f"{path}.tmp"
+    image.save(tmp, format=fmt.upper(), **options)
+    os.replace(tmp, path)
+
+
+def build_image_variants(static_folder: str, source_dir: str = SOURCE_DIR):
+    """Resize every source image into width variants under ``static/images``.
+
+    Each width is written as AVIF/WebP (when Pillow supports them) plus a
+    PNG/JPEG fallback in the source's own format. Variants from earlier builds
+    that are no longer produced are deleted. Returns the variants manifest,
+    which is also written to ``static/images/variants.json``.
+    """
+    Image, _features = _pillow()
+    if Image is None:
+        raise RuntimeError("Pillow is required to build image variants (pip install -r requirements-dev.txt).")
+    out_dir = os.path.join(static_folder, OUTPUT_SUBDIR)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+    produced = {VARIANTS_MANIFEST}
+
+    for name in sorted(os.listdir(source_dir)):
+        stem, ext = os.path.splitext(name)
+        fallback = FALLBACK_FORMATS.get(ext.lower().lstrip("."))
+        if fallback is None:
+            continue
+        with Image.open(os.path.join(source_dir, name)) as original:
+            original.load()
+            src_w, src_h = original.size
+            widths = sorted({min(w, src_w) for w in IMAGE_WIDTHS.get(stem, DEFAULT_WIDTHS)})
+            entry = {"width": src_w, "height": src_h, "fallback": fallback, "variants": {}}
+            for width in widths:
+                height = round(src_h * width / src_w)
+                resized = original.resize((width, height), Image.LANCZOS)
+                for fmt in modern_formats() + [fallback]:
+                    image = resized
+                    if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+                        image = image.convert("RGB")
+                    filename = f"{stem}-{width}.{'jpg' if fmt == 'jpeg' else fmt}"
+                    _save(image, os.path.join(out_dir, filename), fmt)
+                    produced.add(filename)
+                    entry["variants"].setdefault(fmt, []).append(
+                        {
+                            "file": f"{OUTPUT_SUBDIR}/{filename}",
+                            "width": width,
+                            "height": height,
+                            "bytes": os.path.getsize(os.path.join(out_dir, filename)),
+                        }
+                    )
+            manifest[stem] = entry
+
+    for filename in os.listdir(out_dir):
+        if filename not in produced and os.path.isfile(os.path.join(out_dir, filename)):
+            os.remove(os.path.join(out_dir, filename))
+
+    with open(os.path.join(out_dir, VARIANTS_MANIFEST), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+    return manifest
+
+
+def load_image_manifest(static_folder: str) -> dict:
+    try:
+        with open(os.path.join(static_folder, OUTPUT_SUBDIR, VARIANTS_MANIFEST), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def init_images(app):
+    """Expose ``image_set(name)`` to templates for ``<picture>`` markup."""
+    app.config.setdefault("IMAGE_SIZE_BUDGET_KB", DEFAULT_IMAGE_BUDGET_KB)
+    manifest = load_image_manifest(app.static_folder)
+    app.extensions["image_variants"] = manifest
+    app.jinja_env.globals["image_set"] = manifest.get
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import posixpath
+import re
+
+DIST_DIR = "dist"
+MANIFEST_NAME = "manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+SKIP_SUFFIXES = (".gz", ".br", ".tmp")
+
+_CSS_TOKENS = re.compile(
+    r"""(?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')"""
+    r"""|(?P<comment>/\*.*?\*/)"""
+    r"""|(?P<space>\s+)""",
+    re.S,
+)
+_CSS_TIGHT = re.compile(r"\s*([{};,>])\s*")
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+
+def minify_css(source: str) -> str:
+    """Strip comments and redundant whitespace, leaving string literals intact."""
+    out = []
+    for chunk in _split_css(source):
+        if chunk.startswith(("'", '"')):
+            out.append(chunk)
+        else:
+            chunk = _CSS_TIGHT.sub(r"\1", chunk)
+            out.append(chunk.replace(": ", ":"))
+    return "".join(out).replace(";}", "}").strip()
+
+
+def _split_css(source: str):
+    """Yield string literals verbatim and everything else comment-free and collapsed."""
+    pos, buf = 0, []
+    for match in _CSS_TOKENS.finditer(source):
+        buf.append(source[pos:match.start()])
+        pos = match.end()
+        if match.group("string"):
+            yield "".join(buf)
+            buf = []
+            yield match.group("string")
+        elif match.group("space"):
+            buf.append(" ")
+    buf.append(source[pos:])
+    yield "".join(buf)
+
+
+def minify_js(source: str) -> str:
+    """Conservative line-level JS minification.
+
+    Drops blank lines, indentation and whole-line comments but keeps line
+    breaks so automatic semicolon insertion behaves exactly as before. Lines
+    inside multi-line template literals are copied untouched.
+    """
+    out = []
+    in_template = False
+    in_comment = False
+    for line in source.splitlines():
+        if in_template:
+            out.append(line)
+            in_template = _toggles_template(line, in_template)
+            continue
+        stripped = line.strip()
+        if in_comment:
+            if "*/" in stripped:
+                in_comment = False
+                stripped = stripped.split("*/", 1)[1].strip()
+            else:
+                continue
+        if stripped.startswith("/*") and "`" not in stripped:
+            if "*/" not in stripped:
+                in_comment = True
+                continue
+            stripped = stripped.split("*/", 1)[1].strip()
+        if not stripped or stripped.startswith("//"):
+            continue
+        out.append(stripped)
+        in_template = _toggles_template(stripped, in_template)
+    return "\n".join(out) + "\n"
+
+
+def _toggles_template(line: str, in_template: bool) -> bool:
+    count = len(re.findall(r"(?<!\\)`", line))
+    return in_template ^ (count % 2 == 1)
+
+
+def _fingerprint(rel_path: str, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    stem, ext = posixpath.splitext(rel_path)
+    return posixpath.join(DIST_DIR, f"{stem}.{digest}{ext}")
+
+
+def _rewrite_css_urls(css: str, source_rel: str, target_rel: str, manifest: dict) -> str:
+    """Point relative ``url()`` references at their fingerprinted files."""
+
+    def replace(match):
+        quote, ref = match.group(1), match.group(2).strip()
+        if ref.startswith(("data:", "http:", "https:", "//", "/", "#")):
+            return match.group(0)
+        path, _, suffix = ref.partition("?")
+        resolved = posixpath.normpath(posixpath.join(posixpath.dirname(source_rel), path))
+        if resolved not in manifest:
+            return match.group(0)
+        new_ref = posixpath.relpath(manifest[resolved], posixpath.dirname(target_rel))
+        if suffix:
+            new_ref = f"{new_ref}?{suffix}"
+        return f"url({quote}{new_ref}{quote})"
+
+    return _CSS_URL.sub(replace, css)
+
+
+def _source_files(static_folder: str):
+    for root, dirs, files in os.walk(static_folder):
+        rel_root = os.path.relpath(root, static_folder)
+        if rel_root == DIST_DIR or rel_root.startswith(DIST_DIR + os.sep):
+            dirs[:] = []
+            continue
+        dirs.sort()
+        for name in sorted(files):
+            if name.startswith(".") or name.endswith(SKIP_SUFFIXES):
+                continue
+            rel = os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, "/")
+            yield rel, os.path.join(root, name)
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def build_assets(static_folder: str, minify: bool = True):
+    """Fingerprint every static file into ``static/dist`` and write the manifest.
+
+    CSS and JS are minified first so the hash reflects what is shipped. Files
+    in ``dist`` that the new manifest no longer references (plus their
+    compressed siblings) are deleted. Returns ``(manifest, removed_paths)``.
+    """
+    dist_root = os.path.join(static_folder, DIST_DIR)
+    sources = list(_source_files(static_folder))
+    manifest = {}
+    payloads = {}
+
+    # Non-CSS first so stylesheets can reference fingerprinted images/fonts.
+    ordered = sorted(sources, key=lambda item: item[0].endswith(".css"))
+    for rel, path in ordered:
+        with open(path, "rb") as fh:
+            data = fh.read()
+        if rel.endswith(".css"):
+            css = data.decode("utf-8")
+            if minify:
+                css = minify_css(css)
+            # Rewrite against a provisional target; the dist/ depth is identical.
+            css = _rewrite_css_urls(css, rel, posixpath.join(DIST_DIR, rel), manifest)
+            data = css.encode("utf-8")
+        elif rel.endswith(".js") and minify:
+            data = minify_js(data.decode("utf-8")).encode("utf-8")
+        target = _fingerprint(rel, data)
+        manifest[rel] = target
+        payloads[target] = data
+
+    for target, data in payloads.items():
+        out_path = os.path.join(static_folder, target)
+        if not os.path.exists(out_path):
+            _write_atomic(out_path, data)
+    _write_atomic(
+        os.path.join(dist_root, MANIFEST_NAME),
+        json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"),
+    )
+
+    keep = {os.path.normpath(os.path.join(static_folder, t)) for t in payloads}
+    keep.add(os.path.normpath(os.path.join(dist_root, MANIFEST_NAME)))
+    removed = []
+    for root, _dirs, files in os.walk(dist_root, topdown=False):
+        for name in files:
+            path = os.path.normpath(os.path.join(root, name))
+            original = path[:-3] if path.endswith((".gz", ".br")) else path
+            if original not in keep:
+                os.remove(path)
+                removed.append(path)
+        if root != dist_root and not os.listdir(root):
+            os.rmdir(root)
+    return manifest, removed
+
+
+def load_manifest(static_folder: str) -> dict:
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def set_manifest(app, manifest: dict):
+    app.extensions["asset_manifest"] = manifest
+    app.extensions["asset_fingerprints"] = frozenset(manifest.values())
+
+
+def init_pipeline(app):
+    """Rewrite ``url_for('static', ...)`` to fingerprinted names from the manifest."""
+    app.config.setdefault("ASSET_MANIFEST_ENABLED", True)
+    set_manifest(app, load_manifest(app.static_folder) if app.config["ASSET_MANIFEST_ENABLED"] else {})
+
+    @app.url_defaults
+    def fingerprinted_static(endpoint, values):
+        if endpoint != "static":
+            return
+        manifest = app.extensions["asset_manifest"]
+        filename = values.get("filename")
+        if filename in manifest:
+            values["filename"] = manifest[filename]
+
+
+def is_fingerprinted(app, filename: str) -> bool:
+    return filename in app.extensions.get("asset_fingerprints", ())
@@ -0,0 +1,155 @@
+"""Time the engagement rollups and the admin analytics page at 10M submissions.
+
+Usage: python benchmarks/analytics_rollups.py [--submissions 10000000] [--users 200000] [--days 365]
+
+This seeds a throwaway SQLite database (WAL) with ``--users`` users who
+signed up over ``--days`` days. It adds ``--submissions`` solves and a
+tenth as many puzzle completions, spread over the same days in id order.
+It then times:
+
+* ``live queries``: what the page would cost without rollups. That is
+  30 days of daily and 7-day distinct active users, and solves by topic,
+  computed from ``submission`` and ``puzzle_completion``.
+* ``backfill``: the first ``analytics.roll_up()`` over all history.
+* ``incremental``: a later run after another minute of traffic (2,000
+  solves).
+* ``page``: the median ``GET /admin/analytics`` over ``--repeat`` requests.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import text  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+import analytics  # noqa: E402
+from extensions import db  # noqa: E402
+from factory import create_app  # noqa: E402
+
+SEED_BATCH = 200_000
+TOPICS = ("strings", "arrays", "math", "dp", "sql", "regex", "graphs", "search/sort")
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+LIVE_DAILY = """
+SELECT d.day,
+       (SELECT COUNT(DISTINCT user_id) FROM (
+            SELECT user_id FROM submission WHERE date(timestamp) = d.day
+            UNION SELECT user_id FROM puzzle_completion WHERE date(completed_at) = d.day)),
+       (SELECT COUNT(DISTINCT user_id) FROM (
+            SELECT user_id FROM submission WHERE date(timestamp) BETWEEN date(d.day, '-6 days') AND d.day
+            UNION SELECT user_id FROM puzzle_completion
+            WHERE date(completed_at) BETWEEN date(d.day, '-6 days') AND d.day))
+FROM (SELECT DISTINCT date(timestamp) AS day FROM submission WHERE timestamp >= :since) AS d
+"""
+LIVE_TOPICS = """
+SELECT c.topic, c.difficulty, COUNT(*) FROM submission s JOIN challenge c ON c.id = s.challenge_id
+WHERE s.timestamp >= :since GROUP BY c.topic, c.difficulty
+"""
+
+
+def seed(path: str, users: int, submissions: int, days: int, end: datetime):
+    rng = random.Random(5)
+    start = end - timedelta(days=days)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executemany(
+        "INSERT INTO challenge (id, title, prompt, status, topic, difficulty) VALUES (?, ?, 'x', 'published', ?, ?)",
+        [(i, f"Challenge {i}", TOPICS[i % len(TOPICS)], DIFFICULTIES[i % 3]) for i in range(1, 201)],
+    )
+    conn.execute(
+        "INSERT INTO user (id, username, password_hash, active, show_on_leaderboard, is_admin, xp, streak, created_at) "
+        "VALUES (1, 'admin', ?, 1, 1, 1, 0, 0, ?)",
+        (generate_password_hash("pw"), start.isoformat(" ")),
+    )
+    conn.executemany(
+        "INSERT INTO user (id, username, active, show_on_leaderboard, is_admin, xp, streak, created_at) "
+        "VALUES (?, ?, 1, 1, 0, 0, 0, ?)",
+        [(i, f"user{i}", (start + timedelta(seconds=days * 86400 * i / users)).isoformat(" ")) for i in range(2, users + 1)],
+    )
+    step = days * 86400 / submissions
+    for first in range(0, submissions, SEED_BATCH):
+        rows, puzzles = [], []
+        for n in range(first, min(first + SEED_BATCH, submissions)):
+            at = (start + timedelta(seconds=n * step)).isoformat(" ")
+            # Users can only be active after signing up.
+            user_id = rng.randint(2, max(2, int(users * n / submissions)))
+            rows.append((user_id, rng.randint(1, 200), at))
+            if n % 10 == 0:
+                puzzles.append((user_id, f"puzzle_{n}", at))
+        conn.executemany("INSERT INTO submission (user_id, challenge_id, timestamp) VALUES (?, ?, ?)", rows)
+        conn.executemany("INSERT INTO puzzle_completion (user_id, puzzle_name, completed_at) VALUES (?, ?, ?)", puzzles)
+        conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--submissions", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=200_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+            "CATALOG_SNAPSHOT_PATH": os.path.join(tmp, "catalog.snapshot"),
+        })
+        end = datetime.utcnow().replace(microsecond=0) - timedelta(minutes=5)
+        with app.app_context():
+            db.create_all()
+            db.session.remove()
+            started = time.perf_counter()
+            seed(path, args.users, args.submissions, args.days, end)
+            print(f"seeded {args.users:,} users, {args.submissions:,} submissions in {time.perf_counter() - started:.0f} s")
+
+            since = (end - timedelta(days=29)).date().isoformat()
+            started = time.perf_counter()
+            db.session.execute(text(LIVE_DAILY), {"since": since}).all()
+            db.session.execute(text(LIVE_TOPICS), {"since": since}).all()
+            print(f"{'live queries':<14} {(time.perf_counter() - started) * 1000:>10,.0f} ms")
+            db.session.rollback()
+
+            started = time.perf_counter()
+            folded = sum(analytics.roll_up().values())
+            seconds = time.perf_counter() - started
+            print(f"{'backfill':<14} {seconds * 1000:>10,.0f} ms  ({folded / seconds:,.0f} rows/s)")
+
+            conn = sqlite3.connect(path)
+            conn.executemany(
+                "INSERT INTO submission (user_id, challenge_id, timestamp) VALUES (?, ?, ?)",
+                [(random.randint(2, args.users), random.randint(1, 200),
+                  (end + timedelta(seconds=i * 60 / 2000)).isoformat(" ")) for i in range(2000)],
+            )
+            conn.commit()
+            conn.close()
+            started = time.perf_counter()
+            analytics.roll_up()
+            print(f"{'incremental':<14} {(time.perf_counter() - started) * 1000:>10,.0f} ms  (2,000 new solves)")
+
+            client = app.test_client()
+            client.post("/login", data={"username": "admin", "password": "pw"})
+            client.get("/admin/analytics")
+            samples = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                assert client.get("/admin/analytics").status_code == 200
+                samples.append((time.perf_counter() - started) * 1000)
+            print(f"{'page':<14} {statistics.median(samples):>10.1f} ms  (median of {args.repeat})")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""Compare the memory-mapped catalog snapshot with the ORM read paths it replaces.
+
+Usage: python benchmarks/catalog_snapshot.py [--challenges 50000] [--repeat 50]
+
+This seeds a throwaway SQLite database with published challenges spread over
+12 topics and times three hot reads. Each read is done three ways:
+
+* "orm query": the SQL the views ran before any catalog existed;
+* "cached rows": the previous per-worker tuple of rows, cached on the data
+  version, which still needs one stamp query per request;
+* "snapshot": the mapped file, with no SQL.
+
+The reads are:
+
+* the daily pick: the first published challenge, optionally by difficulty;
+* a dungeon page: one topic's challenges with titles and prompts;
+* topic totals: published challenges per topic.
+
+It also prints the Python heap each worker keeps for the cached rows. The
+snapshot file is shown for comparison: it holds titles and prompts too, but
+the page cache keeps one copy for all workers.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import NamedTuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import func  # noqa: E402
+from sqlalchemy.orm import undefer  # noqa: E402
+
+from caching import current_versions  # noqa: E402
+from catalog import current_catalog  # noqa: E402
+from extensions import db  # noqa: E402
+from factory import create_app  # noqa: E402
+from models import Challenge  # noqa: E402
+
+TOPICS = [f"topic-{i}" for i in range(12)]
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+class Row(NamedTuple):
+    id: int
+    topic: str | None
+    difficulty: str
+
+
+def seed(challenges: int):
+    db.create_all()
+    db.session.execute(
+        Challenge.__table__.insert(),
+        [
+            {
+                "title": f"Challenge {i}",
+                "prompt": f"Prompt {i}: " + "explain the output. " * 20,
+                "topic": TOPICS[i % len(TOPICS)],
+                "difficulty": DIFFICULTIES[i % 3].title(),
+                "status": "published",
+            }
+            for i in range(challenges)
+        ],
+    )
+    db.session.commit()
+
+
+_worker_rows = {}
+
+
+def cached_rows():
+    # The per-worker tuple used before the snapshot: one stamp query per request.
+    token = current_versions.token("challenge")
+    if token not in _worker_rows:
+        _worker_rows.clear()
+        _worker_rows[token] = tuple(
+            Row(id, (topic or "").lower() or None, (difficulty or "").lower())
+            for id, topic, difficulty in db.session.query(Challenge.id, Challenge.topic, Challenge.difficulty)
+            .filter(Challenge.status == "published")
+            .order_by(Challenge.id)
+        )
+    return _worker_rows[token]
+
+
+def orm_daily():
+    return db.session.query(Challenge.id).filter(
+        Challenge.status == "published", func.lower(Challenge.difficulty) == "hard"
+    ).order_by(Challenge.id).first()
+
+
+def orm_dungeon():
+    return [
+        (ch.id, ch.title, ch.prompt)
+        for ch in Challenge.query.options(undefer(Challenge.prompt))
+        .filter(func.lower(Challenge.topic) == "topic-3", Challenge.status == "published")
+        .order_by(Challenge.id)
+    ]
+
+
+def orm_totals():
+    return dict(
+        db.session.query(func.lower(Challenge.topic), func.count(Challenge.id))
+        .filter(Challenge.status == "published")
+        .group_by(func.lower(Challenge.topic))
+        .all()
+    )
+
+
+def cached_daily():
+    return next(r.id for r in cached_rows() if r.difficulty == "hard")
+
+
+def cached_dungeon():
+    ids = [r.id for r in cached_rows() if r.topic == "topic-3"]
+    # Titles and prompts were never cached, so the view still loaded them.
+    return [
+        (ch.id, ch.title, ch.prompt)
+        for ch in Challenge.query.options(undefer(Challenge.prompt)).filter(Challenge.id.in_(ids))
+    ]
+
+
+def cached_totals():
+    totals = {}
+    for row in cached_rows():
+        totals[row.topic] = totals.get(row.topic, 0) + 1
+    return totals
+
+
+def snapshot_daily():
+    return next(r.id for r in current_catalog() if r.difficulty == "hard")
+
+
+def snapshot_dungeon():
+    return [(r.id, r.title, r.prompt) for r in current_catalog().by_topic("topic-3")]
+
+
+def snapshot_totals():
+    return current_catalog().topic_totals()
+
+
+def per_request(app, fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        with app.test_request_context():
+            started = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - started)
+            db.session.remove()
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--challenges", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "CATALOG_SNAPSHOT_PATH": os.path.join(tmp, "catalog.snapshot"),
+        })
+        with app.app_context():
+            seed(args.challenges)
+            app.extensions["catalog"].build()
+
+        print(f"{'read':<14} {'orm query':>12} {'cached rows':>12} {'snapshot':>12}")
+        for name, fns in (
+            ("daily pick", (orm_daily, cached_daily, snapshot_daily)),
+            ("dungeon page", (orm_dungeon, cached_dungeon, snapshot_dungeon)),
+            ("topic totals", (orm_totals, cached_totals, snapshot_totals)),
+        ):
+            cells = [per_request(app, fn, args.repeat) for fn in fns]
+            print(f"{name:<14}" + "".join(f" {ms:>9.2f} ms" for ms in cells))
+
+        _worker_rows.clear()
+        with app.test_request_context():
+            tracemalloc.start()
+            rows = cached_rows()
+            retained, _peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            size = os.path.getsize(app.extensions["catalog"].path)
+            print(f"cached rows: {len(rows)} rows, {retained / 1024:.0f} KiB of heap in every worker")
+            print(f"snapshot: {len(current_catalog())} records, {size / 1024:.0f} KiB file mapped once for all workers")
+            db.session.remove()
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare solution-check latency with and without warm sandbox workers.
+
+Usage: python benchmarks/judge_latency.py [--checks 50]
+
+Rows:
+
+* ``fresh interpreter``: ``python -I`` started for every check, the naive
+  way to isolate a submission.
+* ``warm pool``: ``WorkerPool.call(run_solution, ...)``. The worker already
+  has the runner and common stdlib modules imported, and forks a throwaway
+  child per check.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sandbox import WorkerPool  # noqa: E402
+from sandbox.python_runner import run_solution  # noqa: E402
+
+SOURCE = "import collections\n\ndef solve(s):\n    return s[::-1]\n"
+CASES = [{"args": [word], "expected": word[::-1]} for word in ("hello", "", "racecar!", "stressed")]
+
+_FRESH = r"""
+import json, sys
+spec = json.load(sys.stdin)
+namespace = {}
+exec(spec["source"], namespace)
+print(json.dumps([namespace["solve"](*case["args"]) == case["expected"] for case in spec["cases"]]))
+"""
+
+
+def fresh(checks: int) -> list[float]:
+    samples = []
+    payload = json.dumps({"source": SOURCE, "cases": CASES})
+    for _ in range(checks):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-I", "-c", _FRESH], input=payload, capture_output=True, text=True, check=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def pooled(checks: int) -> list[float]:
+    pool = WorkerPool(size=1, cpu_seconds=1.0, wall_seconds=10, preload=("sandbox.python_runner",))
+    pool.start()
+    try:
+        samples = []
+        for _ in range(checks):
+            started = time.perf_counter()
+            pool.call(run_solution, SOURCE, "solve", CASES)
+            samples.append((time.perf_counter() - started) * 1000)
+        return samples
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'mode':<20} {'median ms':>10} {'p95 ms':>8}")
+    for label, run in (("fresh interpreter", fresh), ("warm pool", pooled)):
+        samples = sorted(run(args.checks))
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{label:<20} {statistics.median(samples):>10.1f} {p95:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Compare full-entity loads with column projections for the list views.
+
+Usage: python benchmarks/list_projection.py [--challenges 50000] [--jokes 5000] [--repeat 20]
+
+This seeds a throwaway SQLite database with large challenges, jokes and users.
+It then runs each list-view query two ways:
+
+* the way the views used to load rows, as full entities with every column;
+* the way they load rows now, as projections of only the columns they render.
+
+For each query it prints the median latency and the peak Python allocation
+(tracemalloc) while the query runs.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import func  # noqa: E402
+from sqlalchemy.orm import undefer_group  # noqa: E402
+
+from blueprints.admin import FUN_CARDS_PER_PAGE, PROMPT_EXCERPT_CHARS  # noqa: E402
+from extensions import db  # noqa: E402
+from factory import create_app  # noqa: E402
+from models import Challenge, Joke, User  # noqa: E402
+
+PROMPT = "Explain what this snippet prints and why. " * 40
+SOLUTION = "def answer():\n    return sorted(set(values))\n" * 30
+HINTS = "Think about ordering and duplicates. " * 20
+
+
+def seed(challenges: int, jokes: int, users: int):
+    db.create_all()
+    db.session.execute(
+        Challenge.__table__.insert(),
+        [
+            {
+                "title": f"Challenge {i}",
+                "prompt": PROMPT,
+                "solution": SOLUTION,
+                "hints": HINTS,
+                "topic": f"topic-{i % 12}",
+                "tags": "python,lists",
+                "status": "published" if i % 3 else "draft",
+            }
+            for i in range(challenges)
+        ],
+    )
+    db.session.execute(
+        Joke.__table__.insert(),
+        [{"text": f"Card {i}: " + "why did the function return? " * 4, "entry_type": "fun"} for i in range(jokes)],
+    )
+    db.session.execute(
+        User.__table__.insert(),
+        [
+            {
+                "username": f"user{i}",
+                "email": f"user{i}@example.com",
+                "password_hash": "x" * 160,
+                "xp": i * 7 % 5000,
+                "streak": i % 30,
+            }
+            for i in range(users)
+        ],
+    )
+    db.session.commit()
+
+
+def measure(query_fn, repeat: int) -> tuple[float, float]:
+    timings = []
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        query_fn()
+        timings.append(time.perf_counter() - started)
+    db.session.expunge_all()
+    tracemalloc.start()
+    query_fn()
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.expunge_all()
+    return statistics.median(timings) * 1000, peak / 1024
+
+
+def admin_challenges_full():
+    Challenge.query.options(undefer_group("content")).order_by(Challenge.id.desc()).paginate(
+        page=1, per_page=25, error_out=False
+    )
+
+
+def admin_challenges_projection():
+    db.session.query(
+        Challenge.id,
+        Challenge.title,
+        Challenge.status,
+        Challenge.tags,
+        Challenge.topic,
+        Challenge.published_at,
+        func.substr(Challenge.prompt, 1, PROMPT_EXCERPT_CHARS + 1).label("prompt_excerpt"),
+    ).order_by(Challenge.id.desc()).paginate(page=1, per_page=25, error_out=False)
+
+
+def fun_cards_full():
+    Joke.query.order_by(Joke.id.desc()).all()
+
+
+def fun_cards_projection():
+    db.session.query(Joke.id, Joke.entry_type, Joke.text).order_by(Joke.id.desc()).paginate(
+        page=1, per_page=FUN_CARDS_PER_PAGE, error_out=False
+    )
+
+
+def leaderboard_query(query):
+    return (
+        query.filter(User.show_on_leaderboard.is_(True))
+        .order_by(User.xp.desc(), User.streak.desc())
+        .limit(50)
+        .all()
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--challenges", type=int, default=50000)
+    parser.add_argument("--jokes", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bench.db')}"})
+        with app.app_context():
+            seed(args.challenges, args.jokes, args.users)
+            cases = (
+                ("admin challenges", admin_challenges_full, admin_challenges_projection),
+                ("admin fun cards", fun_cards_full, fun_cards_projection),
+                (
+                    "leaderboard",
+                    lambda: leaderboard_query(User.query),
+                    lambda: leaderboard_query(db.session.query(User.username, User.xp, User.streak)),
+                ),
+            )
+            print(f"{'view':<18} {'full rows':>22} {'projection':>22}")
+            for name, full, projection in cases:
+                full_ms, full_kb = measure(full, args.repeat)
+                proj_ms, proj_kb = measure(projection, args.repeat)
+                print(
+                    f"{name:<18} {full_ms:>8.2f} ms {full_kb:>7.0f} KiB"
+                    f" {proj_ms:>8.2f} ms {proj_kb:>7.0f} KiB"
+                )
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Compare Gunicorn boot with and without the preloaded, warmed master.
+
+Usage: python benchmarks/prefork_boot.py [--workers 2] [--rounds 3]
+
+For each mode this seeds a throwaway SQLite database and starts Gunicorn.
+It records the time until ``GET /`` first answers and the slowest of the
+first requests each worker serves for a handful of pages. It then reads VmRSS and PSS for every worker
+from /proc. PSS splits shared pages between the processes that map them,
+so it shows what copy-on-write sharing saves. RSS counts shared pages in
+full for every worker. Linux only.
+"""
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ("/", "/leaderboard", "/about", "/api/fun")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _get(url: str, timeout: float = 5.0) -> float:
+    started = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        response.read()
+    return time.perf_counter() - started
+
+
+def _children(pid: int) -> list[int]:
+    kids = []
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as fh:
+                fields = fh.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:
+            kids.append(int(entry))
+    return kids
+
+
+def _memory_kb(pid: int) -> tuple[int, int]:
+    rss = pss = 0
+    with open(f"/proc/{pid}/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1])
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as fh:
+            for line in fh:
+                if line.startswith("Pss:"):
+                    pss = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, pss
+
+
+def run_mode(name: str, conf: str, env: dict, workers: int) -> dict:
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    cmd = [
+        sys.executable, "-m", "gunicorn", "app:app",
+        "--config", conf, "--bind", f"127.0.0.1:{port}",
+        "--workers", str(workers), "--threads", "1",
+    ]
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                _get(base + "/", timeout=1.0)
+                break
+            except OSError:
+                if proc.poll() is not None or time.perf_counter() - started > 60:
+                    raise RuntimeError(f"{name}: gunicorn did not come up")
+                time.sleep(0.01)
+        ttfr = time.perf_counter() - started
+        # Let every worker finish booting, then hit each page once per worker.
+        time.sleep(1.0)
+        first = [_get(base + path) for path in PATHS for _ in range(workers)]
+        memory = [_memory_kb(pid) for pid in _children(proc.pid)]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+    return {
+        "ttfr": ttfr,
+        "slowest_ms": max(first) * 1000,
+        "rss": statistics.mean(m[0] for m in memory) if memory else 0,
+        "pss": statistics.mean(m[1] for m in memory) if memory else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        subprocess.run([sys.executable, "-m", "flask", "--app", "app", "seed"], cwd=ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        plain_conf = os.path.join(tmp, "plain.conf.py")
+        with open(plain_conf, "w") as fh:
+            fh.write("preload_app = False\n")
+        modes = (
+            ("per-worker import", plain_conf),
+            ("preload + warm-up", os.path.join(ROOT, "gunicorn.conf.py")),
+        )
+        print(f"{'mode':<20} {'first response':>15} {'slowest 1st req':>15} {'RSS/worker':>12} {'PSS/worker':>12}")
+        for name, conf in modes:
+            runs = [run_mode(name, conf, env, args.workers) for _ in range(args.rounds)]
+            print(
+                f"{name:<20} {statistics.median(r['ttfr'] for r in runs) * 1000:>12.0f} ms"
+                f" {statistics.median(r['slowest_ms'] for r in runs):>12.2f} ms"
+                f" {statistics.median(r['rss'] for r in runs) / 1024:>9.1f} MB"
+                f" {statistics.median(r['pss'] for r in runs) / 1024:>9.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Time the dashboard's next-challenge pick with and without the recommendation queue.
+
+Usage: python benchmarks/recommend_queue.py [--challenges 50000] [--solved 500] [--repeat 200]
+
+This seeds a throwaway SQLite database with published challenges that have
+calibrated scores, spread over 12 topics and 4 languages. One user has
+solved ``--solved`` of them, about half of those in one topic. It then
+times, as medians over ``--repeat`` calls:
+
+* ``scan``: the pick before the queue existed. It loads the user's solved
+  ids, then walks the catalog easiest first to the first unsolved one.
+  Choosing by topic and language that way would score every challenge.
+* ``queue``: ``recommend.next_challenge``, which reads the head of the
+  precomputed queue.
+* ``refill``: ``recommend.refill``, the rebuild after each solve. It is one
+  query for the user's submissions plus the challenges nearest the target
+  difficulty.
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from catalog import current_catalog  # noqa: E402
+from extensions import db  # noqa: E402
+from factory import create_app  # noqa: E402
+from models import Challenge, Submission, User  # noqa: E402
+from recommend import next_challenge, refill  # noqa: E402
+from services import solved_challenge_ids  # noqa: E402
+
+TOPICS = [f"topic-{i}" for i in range(12)]
+LANGUAGES = ("Python", "JavaScript", "SQL", "General")
+
+
+def seed(challenges: int, solved: int):
+    rng = random.Random(3)
+    db.create_all()
+    db.session.execute(
+        Challenge.__table__.insert(),
+        [
+            {
+                "title": f"Challenge {i}",
+                "prompt": "x",
+                "status": "published",
+                "topic": TOPICS[i % len(TOPICS)],
+                "language": LANGUAGES[i % len(LANGUAGES)],
+                "difficulty_score": round(rng.uniform(0, 100), 1),
+            }
+            for i in range(1, challenges + 1)
+        ],
+    )
+    db.session.add(User(id=1, username="player"))
+    ids = rng.sample(range(1, challenges + 1), solved // 2)
+    ids += [i for i in range(len(TOPICS), challenges + 1, len(TOPICS))][: solved - len(ids)]
+    db.session.execute(Submission.__table__.insert(), [{"user_id": 1, "challenge_id": i} for i in ids])
+    db.session.commit()
+
+
+def median_ms(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def scan():
+    solved = solved_challenge_ids(1)
+    return next(entry for entry in current_catalog().easiest_first() if entry.id not in solved)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--challenges", type=int, default=50_000)
+    parser.add_argument("--solved", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+            "CATALOG_SNAPSHOT_PATH": os.path.join(tmp, "catalog.snapshot"),
+        })
+        with app.app_context():
+            seed(args.challenges, args.solved)
+            current_catalog().easiest_first()  # sort once, as a warm worker has
+            refill(1)
+            print(f"{args.challenges:,} challenges, {args.solved} solved")
+            print(f"{'scan':<8} {median_ms(scan, args.repeat):>8.2f} ms")
+            print(f"{'queue':<8} {median_ms(lambda: next_challenge(1), args.repeat):>8.2f} ms")
+            print(f"{'refill':<8} {median_ms(lambda: refill(1), args.repeat):>8.2f} ms")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
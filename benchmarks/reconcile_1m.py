@@ -0,0 +1,168 @@
+"""Time ``flask xp reconcile`` over a million users, and how long it holds up writers.
+
+Usage: python benchmarks/reconcile_1m.py [--users 1000000] [--batch-size 1000] [--drift 0.01]
+
+This seeds a throwaway SQLite database (WAL, as migrations leave it) with
+``--users`` users and about two submissions, one puzzle completion and a
+tenth of a dungeon completion per user. Their counters match the rows,
+except for a ``--drift`` fraction that is given wrong XP and streaks.
+
+Rows:
+
+* ``per-user ORM``: the obvious loop, one user at a time with four queries
+  each. It runs on ``--sample`` users and the total is extrapolated.
+* ``report``: ``reconcile()``, grouped queries per id range.
+* ``fix``: ``reconcile(fix=True)``. Meanwhile a second connection commits a
+  one-row UPDATE every 5 ms, as a solving user would. The slowest of those
+  commits shows how long a chunk kept writers waiting.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import func, select, text  # noqa: E402
+
+from extensions import db  # noqa: E402
+from factory import create_app  # noqa: E402
+from models import Dungeon, DungeonCompletion, PuzzleCompletion, Submission, User  # noqa: E402
+from puzzles.data import DEFAULT_PUZZLE_XP  # noqa: E402
+from reconcile import CHALLENGE_XP, reconcile  # noqa: E402
+
+SEED_BATCH = 50_000
+TODAY = datetime(2026, 10, 14, 12)
+
+
+def seed(path: str, users: int, drift: float):
+    rng = random.Random(7)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executemany(
+        "INSERT INTO challenge (id, title, prompt, status) VALUES (?, ?, 'x', 'published')",
+        [(i, f"Challenge {i}") for i in range(1, 41)],
+    )
+    conn.executemany(
+        "INSERT INTO dungeon (id, name, topic, reward_xp) VALUES (?, ?, ?, ?)",
+        [(i, f"Dungeon {i}", f"topic-{i}", 50 + 25 * i) for i in range(1, 5)],
+    )
+    for start in range(1, users + 1, SEED_BATCH):
+        user_rows, submissions, puzzles, dungeons = [], [], [], []
+        for user_id in range(start, min(start + SEED_BATCH, users + 1)):
+            solves = rng.randint(0, 4)
+            days_ago = sorted(rng.sample(range(30), solves), reverse=True)
+            for challenge_id, ago in zip(rng.sample(range(1, 41), solves), days_ago):
+                submissions.append((user_id, challenge_id, (TODAY - timedelta(days=ago)).isoformat(" ")))
+            xp = CHALLENGE_XP * solves
+            if rng.random() < 0.7:
+                puzzles.append((user_id, "bit_flipper_lvl_1"))
+                xp += DEFAULT_PUZZLE_XP
+            if rng.random() < 0.1:
+                dungeon_id = rng.randint(1, 4)
+                dungeons.append((user_id, dungeon_id))
+                xp += 50 + 25 * dungeon_id
+            streak = 0
+            if days_ago:
+                streak, day = 1, days_ago[-1]
+                while day + 1 in days_ago:
+                    streak, day = streak + 1, day + 1
+            if rng.random() < drift:
+                xp, streak = xp + rng.randint(1, 200), streak + 1
+            user_rows.append((user_id, f"user{user_id}", xp, streak))
+        conn.executemany(
+            "INSERT INTO user (id, username, xp, streak, active, show_on_leaderboard, is_admin, created_at) "
+            "VALUES (?, ?, ?, ?, 1, 1, 0, CURRENT_TIMESTAMP)",
+            user_rows,
+        )
+        conn.executemany("INSERT INTO submission (user_id, challenge_id, timestamp) VALUES (?, ?, ?)", submissions)
+        conn.executemany("INSERT INTO puzzle_completion (user_id, puzzle_name) VALUES (?, ?)", puzzles)
+        conn.executemany("INSERT INTO dungeon_completion (user_id, dungeon_id) VALUES (?, ?)", dungeons)
+        conn.commit()
+    conn.close()
+
+
+def per_user_orm(sample: int) -> float:
+    """Seconds for ``sample`` users the obvious way: load each user and count its rows."""
+    rewards = dict(db.session.execute(select(Dungeon.id, Dungeon.reward_xp)).all())
+    started = time.perf_counter()
+    for user in User.query.order_by(User.id).limit(sample):
+        solves = Submission.query.filter_by(user_id=user.id).count()
+        days = {row[0] for row in db.session.query(func.date(Submission.timestamp)).filter_by(user_id=user.id)}
+        puzzles = PuzzleCompletion.query.filter_by(user_id=user.id).count()
+        dungeon_xp = sum(rewards[c.dungeon_id] for c in DungeonCompletion.query.filter_by(user_id=user.id))
+        _ = (CHALLENGE_XP * solves + DEFAULT_PUZZLE_XP * puzzles + dungeon_xp, len(days))
+    db.session.rollback()
+    return time.perf_counter() - started
+
+
+def writer(path: str, users: int, stop: threading.Event, latencies: list):
+    conn = sqlite3.connect(path, timeout=60)
+    rng = random.Random(11)
+    while not stop.is_set():
+        started = time.perf_counter()
+        conn.execute("UPDATE user SET last_login = CURRENT_TIMESTAMP WHERE id = ?", (rng.randint(1, users),))
+        conn.commit()
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(0.005)
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--drift", type=float, default=0.01)
+    parser.add_argument("--sample", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+            "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 60}},
+            "CATALOG_SNAPSHOT_PATH": os.path.join(tmp, "catalog.snapshot"),
+        })
+        with app.app_context():
+            db.create_all()
+            db.session.remove()
+            started = time.perf_counter()
+            seed(path, args.users, args.drift)
+            rows = db.session.execute(text("SELECT COUNT(*) FROM submission")).scalar()
+            print(f"seeded {args.users:,} users, {rows:,} submissions in {time.perf_counter() - started:.0f} s")
+
+            print(f"{'mode':<14} {'seconds':>9} {'users/s':>10} {'mismatched':>11} {'longest chunk':>14}")
+            seconds = per_user_orm(args.sample) * args.users / args.sample
+            print(f"{'per-user ORM':<14} {seconds:>9.0f} {args.users / seconds:>10,.0f} {'-':>11} {'-':>14}  (extrapolated)")
+
+            started = time.perf_counter()
+            report = reconcile(batch_size=args.batch_size, settle_seconds=0)
+            seconds = time.perf_counter() - started
+            print(f"{'report':<14} {seconds:>9.1f} {args.users / seconds:>10,.0f} {report.mismatched:>11,} "
+                  f"{report.longest_chunk_ms:>11.0f} ms")
+
+            stop, latencies = threading.Event(), []
+            thread = threading.Thread(target=writer, args=(path, args.users, stop, latencies))
+            thread.start()
+            started = time.perf_counter()
+            report = reconcile(fix=True, batch_size=args.batch_size, settle_seconds=0)
+            seconds = time.perf_counter() - started
+            stop.set()
+            thread.join()
+            print(f"{'fix':<14} {seconds:>9.1f} {args.users / seconds:>10,.0f} {report.mismatched:>11,} "
+                  f"{report.longest_chunk_ms:>11.0f} ms")
+            latencies.sort()
+            print(f"concurrent writer: {len(latencies):,} commits, p99 {latencies[int(len(latencies) * 0.99)]:.1f} ms, "
+                  f"max {latencies[-1]:.1f} ms; {report.fixed:,} fixed, {report.conflicts} conflicts")
+            db.session.remove()
+            db.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
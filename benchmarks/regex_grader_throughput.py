@@ -0,0 +1,116 @@
+"""Measure Regex Rescue grading throughput through the sandbox pool.
+
+Usage: python benchmarks/regex_grader_throughput.py [--grades 2000] [--threads 8]
+
+Rows:
+
+* ``in-thread``: ``re`` in the calling thread. This is the speed limit, and
+  it is unsafe: one pathological pattern stalls the thread.
+* ``spawn per grade``: a fresh process for every pattern, the naive way to
+  isolate matching. Only ``--grades // 20`` are run, since each one pays for
+  interpreter start-up.
+* ``pool N``: ``--threads`` request threads sharing N warm workers. ``same``
+  sends one popular answer, so the worker's compiled-pattern cache hits;
+  ``unique`` makes every pattern distinct, so every call compiles.
+* ``pool N + redos``: as ``same``, but 1 in 50 patterns is catastrophic and
+  burns the whole CPU budget before it is rejected.
+
+Extra workers only pay off with free cores; on one CPU they add context
+switches and the single-worker pool is fastest.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sandbox import CpuLimitExceeded, WorkerPool  # noqa: E402
+from sandbox.regex import find_all  # noqa: E402
+
+TEXT = "Order 66 was executed at 14:00."
+CPU_SECONDS = 0.25
+
+
+def patterns(kind: str, count: int):
+    for i in range(count):
+        if kind == "redos" and i % 50 == 0:
+            yield r"((\w|\s)*)*!"
+        elif kind == "unique":
+            yield rf"\d+(?#{i})"
+        else:
+            yield r"\d+"
+
+
+def in_thread(count: int) -> float:
+    started = time.perf_counter()
+    for pattern in patterns("same", count):
+        find_all(pattern, TEXT)
+    return count / (time.perf_counter() - started)
+
+
+def _spawned(conn, pattern):
+    conn.send(find_all(pattern, TEXT))
+
+
+def spawn_per_grade(count: int) -> float:
+    context = multiprocessing.get_context("spawn")
+    started = time.perf_counter()
+    for pattern in patterns("same", count):
+        parent, child = context.Pipe()
+        proc = context.Process(target=_spawned, args=(child, pattern))
+        proc.start()
+        parent.recv()
+        proc.join()
+    return count / (time.perf_counter() - started)
+
+
+def pooled(workers: int, threads: int, kind: str, count: int) -> float:
+    pool = WorkerPool(size=workers, cpu_seconds=CPU_SECONDS, checkout_timeout=60)
+    pool.start()
+    work = list(patterns(kind, count))
+    lock = threading.Lock()
+
+    def run():
+        while True:
+            with lock:
+                if not work:
+                    return
+                pattern = work.pop()
+            try:
+                pool.call(find_all, pattern, TEXT)
+            except CpuLimitExceeded:
+                pass
+
+    try:
+        started = time.perf_counter()
+        runners = [threading.Thread(target=run) for _ in range(threads)]
+        for runner in runners:
+            runner.start()
+        for runner in runners:
+            runner.join()
+        return count / (time.perf_counter() - started)
+    finally:
+        pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grades", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    print(f"{'mode':<24} {'grades/s':>10}")
+    print(f"{'in-thread':<24} {in_thread(args.grades):>10.0f}")
+    print(f"{'spawn per grade':<24} {spawn_per_grade(max(1, args.grades // 20)):>10.1f}")
+    for workers in (1, 2, 4):
+        for kind in ("same", "unique", "redos"):
+            label = f"pool {workers} {kind}" if kind != "redos" else f"pool {workers} + redos"
+            print(f"{label:<24} {pooled(workers, args.threads, kind, args.grades):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
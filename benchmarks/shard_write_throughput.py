@@ -0,0 +1,114 @@
+"""Measure submission write throughput with 1, 2, 4 and 8 progress shards.
+
+Usage: python benchmarks/shard_write_throughput.py [--writers 8] [--commits 300]
+
+Each run creates throwaway SQLite databases: the primary, with users and
+challenges, and N shard files (none for the unsharded baseline). It then
+starts ``--writers`` processes. Each process commits ``--commits``
+submissions for its own users, one per transaction, as the submit view does.
+SQLite allows one writer per file, so with one database every commit queues
+behind the others. Spread over shards, users who hash to different files
+commit in parallel.
+
+Only the submission insert is timed. The XP update that the view also makes
+goes to the user table on the primary, which sharding does not split.
+Without shards each commit also bumps the ``submission`` stamp row on the
+primary; sharded tables are not stamped, so that row stops being a shared
+lock. Gains beyond one shard need free cores: on a single CPU the writers
+are bound by Python, not by SQLite's write lock.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sqlalchemy import text  # noqa: E402
+
+from extensions import db  # noqa: E402
+from factory import create_app  # noqa: E402
+from models import Challenge, Submission, User  # noqa: E402
+
+USERS_PER_WRITER = 16
+
+
+def make_app(folder: str, shards: int):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(folder, 'primary.db')}",
+        "SQLALCHEMY_ENGINE_OPTIONS": {"connect_args": {"timeout": 60}},
+        "SHARD_DATABASE_URIS": [f"sqlite:///{os.path.join(folder, f'shard{i}.db')}" for i in range(shards)],
+        "CATALOG_SNAPSHOT_PATH": os.path.join(folder, "catalog.snapshot"),
+    })
+
+
+def seed(app, writers: int):
+    with app.app_context():
+        db.create_all()
+        # Match production, where migrations switch the primary to WAL.
+        with db.engine.begin() as conn:
+            conn.execute(text("PRAGMA journal_mode=WAL"))
+        app.extensions["shards"].create_tables()
+        db.session.execute(
+            User.__table__.insert(),
+            [
+                {"username": f"user{i}", "email": f"user{i}@example.com", "password_hash": "x"}
+                for i in range(writers * USERS_PER_WRITER)
+            ],
+        )
+        db.session.add(Challenge(title="Challenge", prompt="Prompt", status="published"))
+        db.session.commit()
+        db.engine.dispose()
+        app.extensions["shards"].dispose()
+
+
+def write(folder: str, shards: int, writer: int, commits: int, start):
+    app = make_app(folder, shards)
+    users = range(writer * USERS_PER_WRITER + 1, (writer + 1) * USERS_PER_WRITER + 1)
+    with app.app_context():
+        start.wait()
+        for i in range(commits):
+            db.session.add(Submission(user_id=users[i % len(users)], challenge_id=1))
+            db.session.commit()
+        db.session.remove()
+
+
+def run(shards: int, writers: int, commits: int) -> float:
+    with tempfile.TemporaryDirectory() as folder:
+        seed(make_app(folder, shards), writers)
+        start = multiprocessing.Barrier(writers + 1)
+        procs = [
+            multiprocessing.Process(target=write, args=(folder, shards, w, commits, start))
+            for w in range(writers)
+        ]
+        for proc in procs:
+            proc.start()
+        start.wait()
+        started = time.perf_counter()
+        for proc in procs:
+            proc.join()
+        elapsed = time.perf_counter() - started
+        if any(proc.exitcode for proc in procs):
+            raise SystemExit("a writer failed")
+    return writers * commits / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--commits", type=int, default=300)
+    args = parser.parse_args()
+
+    print(f"{'shards':<10} {'commits/s':>10}")
+    baseline = run(0, args.writers, args.commits)
+    print(f"{'none':<10} {baseline:>10.0f}")
+    for shards in (1, 2, 4, 8):
+        rate = run(shards, args.writers, args.commits)
+        print(f"{shards:<10} {rate:>10.0f}   x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+from puzzles import puzzles_bp
+
+from .admin import admin_bp
+from .api import api_bp
+from .auth import auth_bp
+from .dashboard import dashboard_bp
+from .dungeons import dungeons_bp
+
+BLUEPRINTS = (auth_bp, dashboard_bp, dungeons_bp, puzzles_bp, admin_bp, api_bp)
+
+
+def register_blueprints(app):
+    for blueprint in BLUEPRINTS:
+        app.register_blueprint(blueprint)
+
+
+__all__ = [
+    "BLUEPRINTS",
+    "admin_bp",
+    "api_bp",
+    "auth_bp",
+    "dashboard_bp",
+    "dungeons_bp",
+    "puzzles_bp",
+    "register_blueprints",
+]
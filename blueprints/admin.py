@@ -0,0 +1,999 @@
+import csv
+import io
+import json
+import secrets
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from flask import Blueprint, Response, current_app, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+from sqlalchemy import func, or_
+from sqlalchemy.orm import undefer, undefer_group
+from werkzeug.exceptions import abort
+from werkzeug.security import generate_password_hash
+
+import analytics
+from caching import conditional, current_cache, current_fragments, current_versions
+from extensions import db
+from judge import parse_test_cases
+from models import AuditLog, Challenge, ChallengeStats, Joke, Message, Submission, TowerDefenseScore, User
+from replicas import replica_read
+from sharding import count_rows, sharded_models, user_rows
+from services import add_audit_log, admin_required, normalize_tags, normalize_topic
+from xp_ledger import award_xp
+
+admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
+
+
+# ---- Admin: Users
+def _guard_admin():
+    if not admin_required():
+        abort(403)
+
+
+def _export_validators(*tables):
+    """Conditional GET validators for admin CSV exports over ``tables``."""
+    def validators(*args, **kwargs):
+        _guard_admin()
+        return (
+            (request.path, request.query_string.decode("utf-8"), current_versions.token(*tables)),
+            current_versions.last_modified(*tables),
+        )
+    return validators
+
+
+def _parse_int_or_none(raw):
+    if raw is None or str(raw).strip() == "":
+        return 0
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return None
+
+
+CHALLENGE_STATUSES = {"draft", "published"}
+PROMPT_EXCERPT_CHARS = 120
+FUN_CARDS_PER_PAGE = 50
+
+
+def _challenge_dedupe_key(cleaned: dict):
+    return (cleaned["title"].strip().lower(), cleaned["prompt"].strip().lower())
+
+
+def _admin_challenge_query(search: str, status_filter: str, tag_filter: str, query=None):
+    query = Challenge.query if query is None else query
+    if search:
+        like = f"%{search.lower()}%"
+        query = query.filter(func.lower(Challenge.title).like(like))
+    if status_filter in CHALLENGE_STATUSES:
+        query = query.filter(Challenge.status == status_filter)
+    if tag_filter:
+        query = query.filter(func.lower(Challenge.tags).like(f"%{tag_filter.lower()}%"))
+    return query
+
+
+def _validate_challenge_row(row: dict):
+    """Clean and validate a row coming from CSV/import payload."""
+    def _clean(val):
+        return (val or "").strip()
+
+    title = _clean(row.get("title"))
+    prompt = _clean(row.get("prompt"))
+    hints = _clean(row.get("hints"))
+    solution = _clean(row.get("solution"))
+    language = _clean(row.get("language") or "General") or "General"
+    difficulty = _clean(row.get("difficulty") or "Easy") or "Easy"
+    topic = normalize_topic(row.get("topic"))
+    tags = normalize_tags(row.get("tags", ""))
+    status = (_clean(row.get("status")) or "draft").lower()
+    pub_raw = _clean(row.get("published_at"))
+
+    errors = []
+    if not title:
+        errors.append("Title is required.")
+    if not prompt:
+        errors.append("Prompt is required.")
+    if len(title) > 200:
+        errors.append("Title exceeds 200 characters.")
+    if len(language) > 40:
+        errors.append("Language exceeds 40 characters.")
+    if len(difficulty) > 30:
+        errors.append("Difficulty exceeds 30 characters.")
+    if topic and len(topic) > 60:
+        errors.append("Topic exceeds 60 characters.")
+    if status not in CHALLENGE_STATUSES:
+        errors.append("Status must be draft or published.")
+
+    parsed_published_at = None
+    if pub_raw:
+        try:
+            parsed_published_at = datetime.strptime(pub_raw, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        except ValueError:
+            errors.append("published_at must be YYYY-MM-DD.")
+
+    cleaned = {
+        "title": title,
+        "prompt": prompt,
+        "hints": hints,
+        "solution": solution,
+        "language": language,
+        "difficulty": difficulty,
+        "topic": topic,
+        "tags": tags,
+        "status": status if status in CHALLENGE_STATUSES else "draft",
+        "published_at": parsed_published_at,
+        "published_at_raw": pub_raw,
+    }
+    return cleaned, errors
+
+
+def _prepare_challenge_preview(rows):
+    preview = []
+    for idx, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            row = {}
+        cleaned, errors = _validate_challenge_row(row)
+        preview.append(
+            {
+                "index": idx,
+                "data": cleaned,
+                "errors": errors,
+                "is_valid": len(errors) == 0,
+            }
+        )
+    return preview
+
+
+@admin_bp.route("/users")
+@replica_read
+@login_required
+def admin_users():
+    _guard_admin()
+    search = request.args.get("search", "").strip()
+    is_admin_filter = request.args.get("is_admin", "all")
+    active_filter = request.args.get("active", "all")
+    page = request.args.get("page", 1, type=int)
+
+    query = User.query
+    if search:
+        like = f"%{search.lower()}%"
+        query = query.filter(
+            or_(
+                func.lower(User.username).like(like),
+                func.lower(User.email).like(like),
+            )
+        )
+
+    if is_admin_filter == "admins":
+        query = query.filter(User.is_admin.is_(True))
+    elif is_admin_filter == "users":
+        query = query.filter(User.is_admin.is_(False))
+
+    if active_filter == "active":
+        query = query.filter(User.active.is_(True))
+    elif active_filter == "inactive":
+        query = query.filter(User.active.is_(False))
+
+    pagination = query.order_by(User.created_at.desc(), User.id.desc()).paginate(
+        page=page, per_page=25, error_out=False
+    )
+    return render_template(
+        "admin/users.html",
+        users=pagination.items,
+        pagination=pagination,
+        search=search,
+        is_admin_filter=is_admin_filter,
+        active_filter=active_filter,
+    )
+
+
+@admin_bp.route("/users/<int:user_id>")
+@login_required
+def admin_user_detail(user_id):
+    _guard_admin()
+    user = User.query.get_or_404(user_id)
+    solves_count = user_rows(Submission, user.id).count()
+    logs = (
+        AuditLog.query.filter_by(target_user_id=user.id)
+        .order_by(AuditLog.created_at.desc())
+        .limit(20)
+        .all()
+    )
+    return render_template(
+        "admin/user_detail.html",
+        user=user,
+        solves_count=solves_count,
+        logs=logs,
+    )
+
+
+@admin_bp.post("/users/<int:user_id>/toggle_active")
+@login_required
+def admin_toggle_user_active(user_id):
+    _guard_admin()
+    user = User.query.get_or_404(user_id)
+    user.active = not user.active
+    add_audit_log(
+        current_user.id,
+        user.id,
+        "toggle_active",
+        {"active": user.active},
+    )
+    db.session.commit()
+    flash(f"User {user.username} is now {'active' if user.active else 'deactivated'}.")
+    return redirect(url_for("admin.admin_user_detail", user_id=user.id))
+
+
+@admin_bp.post("/users/<int:user_id>/toggle_admin")
+@login_required
+def admin_toggle_user_admin(user_id):
+    _guard_admin()
+    user = User.query.get_or_404(user_id)
+    user.is_admin = not user.is_admin
+    add_audit_log(
+        current_user.id,
+        user.id,
+        "toggle_is_admin",
+        {"is_admin": user.is_admin},
+    )
+    db.session.commit()
+    flash(f"Updated admin status for {user.username}.")
+    return redirect(url_for("admin.admin_user_detail", user_id=user.id))
+
+
+@admin_bp.post("/users/<int:user_id>/reset_password")
+@login_required
+def admin_reset_user_password(user_id):
+    _guard_admin()
+    user = User.query.get_or_404(user_id)
+    new_pw = secrets.token_urlsafe(8)
+    user.password_hash = generate_password_hash(new_pw)
+    add_audit_log(
+        current_user.id,
+        user.id,
+        "reset_password",
+        {"generated": True},
+    )
+    db.session.commit()
+    flash(f"Temporary password for {user.username}: {new_pw}")
+    return redirect(url_for("admin.admin_user_detail", user_id=user.id))
+
+
+@admin_bp.post("/users/<int:user_id>/adjust_stats")
+@login_required
+def admin_adjust_user_stats(user_id):
+    _guard_admin()
+    user = User.query.get_or_404(user_id)
+    dx = _parse_int_or_none(request.form.get("delta_xp"))
+    ds = _parse_int_or_none(request.form.get("delta_streak"))
+    reason = (request.form.get("reason") or "").strip()
+
+    if dx is None or ds is None:
+        flash("XP and streak adjustments must be numbers (use 0 for no change).")
+        return redirect(url_for("admin.admin_user_detail", user_id=user.id))
+
+    applied_xp = award_xp(user, dx, "admin")
+    streak_before = user.streak or 0
+    user.streak = max(0, streak_before + ds)
+    add_audit_log(
+        current_user.id,
+        user.id,
+        "adjust_stats",
+        # The applied changes (after clamping at zero) let `flask xp reconcile` replay them.
+        {
+            "delta_xp": dx,
+            "delta_streak": ds,
+            "applied_xp": applied_xp,
+            "applied_streak": user.streak - streak_before,
+            "reason": reason,
+        },
+    )
+    db.session.commit()
+    flash("Stats updated.")
+    return redirect(url_for("admin.admin_user_detail", user_id=user.id))
+
+@admin_bp.post("/users/<int:user_id>/update_profile")
+@login_required
+def admin_update_user_profile(user_id):
+    _guard_admin()
+    user = User.query.get_or_404(user_id)
+    new_username = (request.form.get("username") or "").strip()
+    show_on_leaderboard = request.form.get("show_on_leaderboard") == "on"
+
+    if not new_username:
+        flash("Username cannot be empty.")
+        return redirect(url_for("admin.admin_user_detail", user_id=user.id))
+    if len(new_username) > 80:
+        flash("Username cannot exceed 80 characters.")
+        return redirect(url_for("admin.admin_user_detail", user_id=user.id))
+
+    existing = (
+        User.query.filter(func.lower(User.username) == new_username.lower(), User.id != user.id)
+        .first()
+    )
+    if existing:
+        flash("That username is already in use.")
+        return redirect(url_for("admin.admin_user_detail", user_id=user.id))
+
+    old_username = user.username
+    old_visibility = bool(user.show_on_leaderboard)
+    user.username = new_username
+    user.show_on_leaderboard = show_on_leaderboard
+    add_audit_log(
+        current_user.id,
+        user.id,
+        "update_profile",
+        {
+            "old_username": old_username,
+            "new_username": user.username,
+            "old_show_on_leaderboard": old_visibility,
+            "new_show_on_leaderboard": bool(user.show_on_leaderboard),
+        },
+    )
+    if (user.username, bool(user.show_on_leaderboard)) != (old_username, old_visibility):
+        # The tower-defense leaderboard's ETag follows its score table only.
+        current_versions.bump(db.session.connection(), {TowerDefenseScore.__tablename__})
+    db.session.commit()
+    flash(f"Updated profile settings for {user.username}.")
+    return redirect(url_for("admin.admin_user_detail", user_id=user.id))
+
+
+# ---- Admin: challenges
+@admin_bp.route("/challenges")
+@replica_read
+@login_required
+def admin_challenges():
+    _guard_admin()
+    search = request.args.get("search", "").strip()
+    status_filter = request.args.get("status", "all").lower()
+    tag_filter = request.args.get("tag", "").strip()
+    page = request.args.get("page", 1, type=int)
+
+    # Only the columns the list renders, plus a prompt excerpt cut in SQL.
+    columns = db.session.query(
+        Challenge.id,
+        Challenge.title,
+        Challenge.status,
+        Challenge.tags,
+        Challenge.topic,
+        Challenge.published_at,
+        func.substr(Challenge.prompt, 1, PROMPT_EXCERPT_CHARS + 1).label("prompt_excerpt"),
+        Challenge.difficulty,
+        Challenge.difficulty_score,
+        ChallengeStats.viewers,
+        ChallengeStats.solvers,
+        ChallengeStats.median_solve_seconds,
+    ).outerjoin(ChallengeStats, ChallengeStats.challenge_id == Challenge.id)
+    query = _admin_challenge_query(search, status_filter, tag_filter, columns)
+    pagination = query.order_by(Challenge.id.desc()).paginate(
+        page=page, per_page=25, error_out=False
+    )
+    status_counts = dict(
+        db.session.query(Challenge.status, func.count(Challenge.id))
+        .group_by(Challenge.status)
+        .all()
+    )
+    export_url = url_for(
+        "admin.admin_challenges_export",
+        search=search,
+        status=status_filter,
+        tag=tag_filter,
+    )
+    return render_template(
+        "admin/challenges_list.html",
+        challenges=pagination.items,
+        pagination=pagination,
+        search=search,
+        status_filter=status_filter,
+        tag_filter=tag_filter,
+        status_counts=status_counts,
+        export_url=export_url,
+    )
+
+
+@admin_bp.route("/challenge/new", methods=["GET", "POST"])
+@login_required
+def admin_add_challenge():
+    if not admin_required():
+        flash("Admin only.")
+        return redirect(url_for("dashboard.index"))
+    if request.method == "POST":
+        status = (request.form.get("status") or "draft").strip().lower()
+        if status not in CHALLENGE_STATUSES:
+            status = "draft"
+        tags = normalize_tags(request.form.get("tags", ""))
+        published_at = datetime.now(timezone.utc) if status == "published" else None
+        test_cases = request.form.get("test_cases", "").strip()
+        try:
+            parse_test_cases(test_cases)
+        except ValueError as exc:
+            flash(str(exc))
+            return render_template("admin_add_challenge.html")
+        ch = Challenge(
+            title=request.form["title"].strip(),
+            prompt=request.form["prompt"].strip(),
+            solution=request.form.get("solution", "").strip(),
+            hints=request.form.get("hints", "").strip(),
+            test_cases=test_cases or None,
+            language=request.form.get("language", "General").strip(),
+            difficulty=request.form.get("difficulty", "Easy").strip(),
+            topic=normalize_topic(request.form.get("topic", "")),
+            tags=tags,
+            status=status,
+            published_at=published_at,
+            added_by=current_user.id,
+        )
+        db.session.add(ch)
+        db.session.commit()
+        flash("Challenge added.")
+        return redirect(url_for("admin.admin_add_challenge"))
+    return render_template("admin_add_challenge.html")
+
+
+@admin_bp.route("/challenge/<int:challenge_id>/edit", methods=["GET", "POST"])
+@login_required
+def admin_edit_challenge(challenge_id):
+    if not admin_required():
+        flash("Admin only.")
+        return redirect(url_for("dashboard.index"))
+    ch = Challenge.query.options(undefer_group("content")).get_or_404(challenge_id)
+    if request.method == "POST":
+        status = (request.form.get("status") or "draft").strip().lower()
+        if status not in CHALLENGE_STATUSES:
+            status = "draft"
+        tags = normalize_tags(request.form.get("tags", ""))
+        test_cases = request.form.get("test_cases", "").strip()
+        try:
+            parse_test_cases(test_cases)
+        except ValueError as exc:
+            flash(str(exc))
+            return render_template("admin_edit_challenge.html", challenge=ch, test_cases=test_cases)
+        
+        # Only update published_at if status is changing to "published"
+        if status == "published" and ch.status != "published":
+            ch.published_at = datetime.now(timezone.utc)
+        elif status == "draft":
+            ch.published_at = None
+        
+        ch.title = request.form["title"].strip()
+        ch.prompt = request.form["prompt"].strip()
+        ch.solution = request.form.get("solution", "").strip()
+        ch.hints = request.form.get("hints", "").strip()
+        ch.test_cases = test_cases or None
+        ch.language = request.form.get("language", "General").strip()
+        ch.difficulty = request.form.get("difficulty", "Easy").strip()
+        ch.topic = normalize_topic(request.form.get("topic", ""))
+        ch.tags = tags
+        ch.status = status
+        
+        db.session.commit()
+        flash("Challenge updated.")
+        return redirect(url_for("admin.admin_challenges"))
+    return render_template("admin_edit_challenge.html", challenge=ch)
+
+
+
+@admin_bp.route("/challenges/import", methods=["GET", "POST"])
+@login_required
+def admin_import_challenges():
+    if not admin_required():
+        flash("Admin only.")
+        return redirect(url_for("dashboard.index"))
+    if request.method == "POST":
+        payload = request.form.get("payload")
+        if payload:
+            try:
+                raw_rows = json.loads(payload)
+            except json.JSONDecodeError:
+                flash("Upload payload could not be read. Please re-upload the CSV.")
+                return redirect(url_for("admin.admin_import_challenges"))
+            if not isinstance(raw_rows, list):
+                flash("Upload payload was malformed. Please re-upload the CSV.")
+                return redirect(url_for("admin.admin_import_challenges"))
+
+            preview_rows = _prepare_challenge_preview(raw_rows)
+            valid_rows = [row for row in preview_rows if row["is_valid"]]
+            invalid_count = len(preview_rows) - len(valid_rows)
+
+            if not valid_rows:
+                flash("No valid rows to import.")
+                return render_template(
+                    "admin/challenges_import_preview.html",
+                    preview_rows=preview_rows,
+                    payload=payload,
+                    source_filename=request.form.get("source_filename"),
+                )
+
+            try:
+                existing_map = {}
+                title_map = defaultdict(list)
+                for ch in Challenge.query.options(undefer(Challenge.prompt)):
+                    key = ((ch.title or "").strip().lower(), (ch.prompt or "").strip().lower())
+                    existing_map[key] = ch
+                    title_key = (ch.title or "").strip().lower()
+                    if title_key:
+                        title_map[title_key].append(ch)
+
+                seen = set()
+                imported = 0
+                updated = 0
+                skipped_dupes = 0
+                for row in valid_rows:
+                    data = row["data"]
+                    key = _challenge_dedupe_key(data)
+                    if key in seen:
+                        skipped_dupes += 1
+                        continue
+                    seen.add(key)
+
+                    published_at = data["published_at"]
+                    if data["status"] == "published" and not published_at:
+                        published_at = datetime.now(timezone.utc)
+                    if data["status"] == "draft":
+                        published_at = None
+
+                    existing_ch = existing_map.get(key)
+                    if not existing_ch:
+                        title_matches = title_map.get(data["title"].strip().lower(), [])
+                        if len(title_matches) == 1:
+                            existing_ch = title_matches[0]
+                    if existing_ch and existing_ch.published_at and not data["published_at"] and data["status"] == "published":
+                        published_at = existing_ch.published_at
+                    if existing_ch:
+                        existing_ch.title = data["title"]
+                        existing_ch.prompt = data["prompt"]
+                        existing_ch.solution = data["solution"]
+                        existing_ch.hints = data["hints"]
+                        existing_ch.language = data["language"]
+                        existing_ch.difficulty = data["difficulty"]
+                        existing_ch.topic = data["topic"]
+                        existing_ch.tags = data["tags"]
+                        existing_ch.status = data["status"]
+                        existing_ch.published_at = published_at
+                        updated += 1
+                        continue
+
+                    ch = Challenge(
+                        title=data["title"],
+                        prompt=data["prompt"],
+                        solution=data["solution"],
+                        hints=data["hints"],
+                        language=data["language"],
+                        difficulty=data["difficulty"],
+                        topic=data["topic"],
+                        tags=data["tags"],
+                        status=data["status"],
+                        published_at=published_at,
+                        added_by=current_user.id,
+                    )
+                    db.session.add(ch)
+                    imported += 1
+                db.session.commit()
+                flash(
+                    "Imported {} challenges. Updated {} existing. Skipped {} duplicates. "
+                    "Skipped {} invalid rows.".format(imported, updated, skipped_dupes, invalid_count)
+                )
+                return redirect(url_for("admin.admin_challenges"))
+            except Exception as e:
+                db.session.rollback()
+                flash(f"Import failed: {e}")
+                return render_template(
+                    "admin/challenges_import_preview.html",
+                    preview_rows=preview_rows,
+                    payload=payload,
+                    source_filename=request.form.get("source_filename"),
+                )
+
+        file = request.files.get("file")
+        if not file or not file.filename.lower().endswith(".csv"):
+            flash("Please upload a CSV file.")
+            return redirect(url_for("admin.admin_import_challenges"))
+
+        try:
+            stream = io.StringIO(file.stream.read().decode("utf-8-sig"))
+            reader = csv.DictReader(stream)
+            rows = []
+            for row in reader:
+                if not any((v or "").strip() for v in row.values()):
+                    continue
+                cleaned_row = {
+                    (k or "").strip(): (v or "")
+                    for k, v in row.items()
+                    if k is not None
+                }
+                rows.append(cleaned_row)
+
+            if not rows:
+                flash("CSV contained no rows.")
+                return redirect(url_for("admin.admin_import_challenges"))
+
+            preview_rows = _prepare_challenge_preview(rows)
+            payload = json.dumps(rows)
+            return render_template(
+                "admin/challenges_import_preview.html",
+                preview_rows=preview_rows,
+                payload=payload,
+                source_filename=file.filename,
+            )
+        except Exception as e:
+            flash(f"Import failed: {e}")
+            return redirect(url_for("admin.admin_import_challenges"))
+
+    return render_template("admin/challenges_import.html")
+
+
+@admin_bp.route("/challenges/example.csv")
+@login_required
+def download_challenge_csv_example():
+    if not admin_required():
+        flash("Admin only.")
+        return redirect(url_for("dashboard.index"))
+    csv_text = (
+        "title,prompt,hints,solution,language,difficulty,topic,tags,status,published_at\n"
+        "Reverse String,Write a function that reverses a string.,"
+        "Think about slicing or stacks.,Python: s[::-1]; JS: str.split('').reverse().join(''),"
+        "Python,Easy,strings,strings,published,2024-01-01\n"
+    )
+    return (
+        csv_text,
+        200,
+        {
+            "Content-Type": "text/csv; charset=utf-8",
+            "Content-Disposition": 'attachment; filename="challenges_example.csv"',
+        },
+    )
+
+
+@admin_bp.route("/challenges/export.csv")
+@replica_read
+@login_required
+@conditional(_export_validators("challenge"), private=True)
+def admin_challenges_export():
+    _guard_admin()
+    search = request.args.get("search", "").strip()
+    status_filter = request.args.get("status", "all").lower()
+    tag_filter = request.args.get("tag", "").strip()
+
+    challenges = (
+        _admin_challenge_query(search, status_filter, tag_filter)
+        .options(undefer_group("content"))
+        .order_by(Challenge.id.asc())
+        .all()
+    )
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(
+        [
+            "title",
+            "prompt",
+            "hints",
+            "solution",
+            "language",
+            "difficulty",
+            "topic",
+            "tags",
+            "status",
+            "published_at",
+        ]
+    )
+    for ch in challenges:
+        published_at = ch.published_at.strftime("%Y-%m-%d") if ch.published_at else ""
+        writer.writerow(
+            [
+                ch.title,
+                ch.prompt,
+                ch.hints or "",
+                ch.solution or "",
+                ch.language or "General",
+                ch.difficulty or "Easy",
+                ch.topic or "",
+                ch.tags or "",
+                ch.status,
+                published_at,
+            ]
+        )
+
+    csv_data = output.getvalue()
+    output.close()
+    headers = {
+        "Content-Type": "text/csv; charset=utf-8",
+        "Content-Disposition": 'attachment; filename="challenges_export.csv"',
+    }
+    return Response(csv_data, headers=headers)
+
+
+@admin_bp.post("/challenges/<int:challenge_id>/publish")
+@login_required
+def admin_publish_challenge(challenge_id):
+    _guard_admin()
+    ch = Challenge.query.get_or_404(challenge_id)
+    action = request.form.get("action", "publish")
+
+    if action == "unpublish":
+        ch.status = "draft"
+        ch.published_at = None
+        msg = f"Unpublished {ch.title}."
+    else:
+        ch.status = "published"
+        ch.published_at = datetime.now(timezone.utc)
+        msg = f"Published {ch.title}."
+
+    db.session.commit()
+    flash(msg)
+    next_url = request.form.get("next") or url_for("admin.admin_challenges")
+    return redirect(next_url)
+
+# ---- Admin: Fun cards editor
+@admin_bp.route("/fun", methods=["GET", "POST"])
+@replica_read
+@login_required
+def admin_fun_cards():
+    _guard_admin()
+    if request.method == "POST":
+        upload = request.files.get("file")
+        if upload and upload.filename.lower().endswith(".csv"):
+            try:
+                stream = io.StringIO(upload.stream.read().decode("utf-8-sig"))
+                reader = csv.DictReader(stream)
+                count = 0
+                skipped = 0
+                existing = {
+                    ((entry_type or "fun").strip().lower(), (text or "").strip().lower())
+                    for entry_type, text in db.session.query(Joke.entry_type, Joke.text)
+                }
+                seen = set()
+                for row in reader:
+                    text = (row.get("text") or "").strip()
+                    if not text:
+                        continue
+                    entry_type = (row.get("entry_type") or "fun").strip().lower()
+                    if entry_type not in {"fun", "fact"}:
+                        entry_type = "fun"
+                    key = (entry_type, text.lower())
+                    if key in seen or key in existing:
+                        skipped += 1
+                        continue
+                    seen.add(key)
+                    db.session.add(Joke(text=text, entry_type=entry_type))
+                    count += 1
+                db.session.commit()
+                flash(f"Imported {count} fun cards. Skipped {skipped} duplicates.")
+            except Exception as e:
+                db.session.rollback()
+                flash(f"Import failed: {e}")
+            return redirect(url_for("admin.admin_fun_cards"))
+
+        text = (request.form.get("text") or "").strip()
+        entry_type = (request.form.get("entry_type") or "fun").strip().lower()
+        if entry_type not in {"fun", "fact"}:
+            entry_type = "fun"
+        if not text:
+            flash("Text is required.")
+        else:
+            db.session.add(Joke(text=text, entry_type=entry_type))
+            db.session.commit()
+            flash("Fun card added.")
+        return redirect(url_for("admin.admin_fun_cards"))
+
+    page = request.args.get("page", 1, type=int)
+    pagination = (
+        db.session.query(Joke.id, Joke.entry_type, Joke.text)
+        .order_by(Joke.id.desc())
+        .paginate(page=page, per_page=FUN_CARDS_PER_PAGE, error_out=False)
+    )
+    return render_template("admin/fun_cards.html", jokes=pagination.items, pagination=pagination)
+
+
+@admin_bp.post("/fun/<int:joke_id>/delete")
+@login_required
+def admin_delete_fun_card(joke_id):
+    _guard_admin()
+    joke = Joke.query.get_or_404(joke_id)
+    db.session.delete(joke)
+    db.session.commit()
+    flash("Fun card deleted.")
+    return redirect(url_for("admin.admin_fun_cards"))
+
+
+@admin_bp.route("/fun/export.csv")
+@replica_read
+@login_required
+@conditional(_export_validators("joke"), private=True)
+def admin_fun_cards_export():
+    _guard_admin()
+    jokes = Joke.query.order_by(Joke.id.asc()).all()
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["id", "entry_type", "text"])
+    for j in jokes:
+        writer.writerow([j.id, j.entry_type or "fun", j.text])
+    csv_data = output.getvalue()
+    output.close()
+    headers = {
+        "Content-Type": "text/csv; charset=utf-8",
+        "Content-Disposition": 'attachment; filename="fun_cards.csv"',
+    }
+    return Response(csv_data, headers=headers)
+
+
+# ---- Admin: Contact
+def _admin_message_query(status: str, search: str):
+    query = Message.query.filter(Message.deleted_at.is_(None))
+    if status == "read":
+        query = query.filter(Message.is_read.is_(True))
+    elif status == "unread":
+        query = query.filter(Message.is_read.is_(False))
+    if search:
+        like = f"%{search.lower()}%"
+        query = query.filter(
+            or_(
+                func.lower(Message.email).like(like),
+                func.lower(Message.body).like(like),
+            )
+        )
+    return query
+
+
+def _redirect_to_next(next_url: str):
+    if next_url:
+        return redirect(next_url)
+    return redirect(url_for("admin.admin_messages"))
+
+
+@admin_bp.route("/messages")
+@replica_read
+@login_required
+def admin_messages():
+    if not admin_required():
+        abort(403)
+
+    status = request.args.get("status", "all").lower()
+    if status not in {"all", "read", "unread"}:
+        status = "all"
+    search = request.args.get("search", "").strip()
+    page = request.args.get("page", 1, type=int)
+
+    query = _admin_message_query(status, search)
+    pagination = query.order_by(Message.created_at.desc()).paginate(
+        page=page, per_page=20, error_out=False
+    )
+
+    export_url = url_for("admin.admin_messages_export", status=status, search=search)
+    current_url = request.full_path.rstrip("?")
+
+    return render_template(
+        "admin_messages.html",
+        messages=pagination.items,
+        pagination=pagination,
+        status=status,
+        search=search,
+        export_url=export_url,
+        current_url=current_url,
+    )
+
+
+@admin_bp.post("/messages/<int:message_id>/toggle_read")
+@login_required
+def admin_toggle_message(message_id):
+    if not admin_required():
+        abort(403)
+    msg = Message.query.get_or_404(message_id)
+    if msg.deleted_at is None:
+        msg.is_read = not msg.is_read
+        db.session.commit()
+    next_url = request.form.get("next")
+    return _redirect_to_next(next_url)
+
+
+@admin_bp.post("/messages/<int:message_id>/delete")
+@login_required
+def admin_delete_message(message_id):
+    if not admin_required():
+        abort(403)
+    msg = Message.query.get_or_404(message_id)
+    if msg.deleted_at is None:
+        msg.deleted_at = datetime.now(timezone.utc)
+        db.session.commit()
+    next_url = request.form.get("next")
+    return _redirect_to_next(next_url)
+
+
+@admin_bp.post("/messages/bulk")
+@login_required
+def admin_bulk_messages():
+    if not admin_required():
+        abort(403)
+    action = request.form.get("bulk_action")
+    ids = [int(i) for i in request.form.getlist("message_ids") if i.isdigit()]
+    next_url = request.form.get("next")
+
+    if not ids or action not in {"mark_read", "mark_unread", "delete"}:
+        flash("Select messages and an action before submitting.")
+        return _redirect_to_next(next_url)
+
+    messages = Message.query.filter(
+        Message.id.in_(ids), Message.deleted_at.is_(None)
+    ).all()
+
+    if not messages:
+        flash("No messages matched your selection.")
+        return _redirect_to_next(next_url)
+
+    if action == "mark_read":
+        for msg in messages:
+            msg.is_read = True
+    elif action == "mark_unread":
+        for msg in messages:
+            msg.is_read = False
+    elif action == "delete":
+        now = datetime.now(timezone.utc)
+        for msg in messages:
+            msg.deleted_at = now
+
+    db.session.commit()
+    flash("Bulk action completed.")
+    return _redirect_to_next(next_url)
+
+
+@admin_bp.route("/messages/export.csv")
+@replica_read
+@login_required
+@conditional(_export_validators("message"), private=True)
+def admin_messages_export():
+    if not admin_required():
+        abort(403)
+
+    status = request.args.get("status", "all").lower()
+    if status not in {"all", "read", "unread"}:
+        status = "all"
+    search = request.args.get("search", "").strip()
+
+    query = _admin_message_query(status, search)
+    messages = query.order_by(Message.created_at.desc()).all()
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["ID", "Name", "Email", "Body", "Created At", "Status"])
+    for msg in messages:
+        writer.writerow(
+            [
+                msg.id,
+                msg.name,
+                msg.email,
+                msg.body,
+                msg.created_at.isoformat(),
+                "Read" if msg.is_read else "Unread",
+            ]
+        )
+
+    csv_data = output.getvalue()
+    output.close()
+    headers = {
+        "Content-Type": "text/csv; charset=utf-8",
+        "Content-Disposition": "attachment; filename=messages_export.csv",
+    }
+    return Response(csv_data, headers=headers)
+
+# ---- Admin: engagement analytics
+@admin_bp.route("/analytics")
+@replica_read
+@login_required
+def admin_analytics():
+    """Reads only the summary tables that ``flask analytics rollup`` maintains."""
+    _guard_admin()
+    return render_template("admin/analytics.html", **analytics.report())
+
+
+# ---- Admin: cache metrics
+@admin_bp.route("/metrics")
+@login_required
+def admin_metrics():
+    _guard_admin()
+    return {
+        "app_cache_entries": len(current_cache),
+        "fragments": current_fragments.stats(),
+        "progress_rows": {model.__tablename__: count_rows(model) for model in sharded_models()},
+        "shards": len(current_app.extensions["shards"]),
+        "verdict_cache": current_app.extensions["judge"].cache.stats(),
+    }
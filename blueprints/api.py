@@ -0,0 +1,18 @@
+from flask import Blueprint
+
+from caching import conditional_get, current_versions
+from replicas import replica_read
+from services import random_fun
+
+api_bp = Blueprint("api", __name__, url_prefix="/api")
+
+
+@api_bp.route("/fun")
+@replica_read
+def api_fun():
+    # Every request draws a fresh card, so "Show another" changes it. The ETag
+    # names the card drawn, so a client already holding that card gets a 304.
+    # No Last-Modified: the date alone would match a different card.
+    fun = random_fun()
+    not_modified = conditional_get((current_versions.token("joke"), fun["type"], fun["text"]))
+    return not_modified or fun
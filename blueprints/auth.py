@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask_login import login_required, login_user, logout_user
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from extensions import db
+from models import User
+
+auth_bp = Blueprint("auth", __name__)
+
+
+@auth_bp.route("/login", methods=["GET", "POST"])
+def login():
+    if request.method == "POST":
+        username = request.form.get("username", "").strip()
+        password = request.form.get("password", "")
+        user = User.query.filter_by(username=username).first()
+        if user and check_password_hash(user.password_hash, password):
+            if not user.active:
+                flash("This account is deactivated. Contact an admin to restore access.")
+                return redirect(url_for("auth.login"))
+            user.last_login = datetime.now(timezone.utc)
+            db.session.commit()
+            login_user(user, remember=True)
+            return redirect(url_for("dashboard.dashboard"))
+        flash("Invalid credentials.")
+    return render_template("login.html")
+
+@auth_bp.route("/signup", methods=["GET", "POST"])
+def signup():
+    if request.method == "POST":
+        u = request.form.get("username", "").strip()
+        email = request.form.get("email", "").strip() or None
+        pw = request.form.get("password", "")
+        cpw = request.form.get("confirm", "")
+        if not u or not pw:
+            flash("Username and password required.")
+        elif pw != cpw:
+            flash("Passwords do not match.")
+        elif User.query.filter_by(username=u).first():
+            flash("Username already taken.")
+        else:
+            user = User(username=u, email=email, password_hash=generate_password_hash(pw))
+            db.session.add(user)
+            db.session.commit()
+            login_user(user, remember=True)
+            return redirect(url_for("dashboard.dashboard"))
+    return render_template("signup.html")
+
+@auth_bp.route("/logout")
+@login_required
+def logout():
+    logout_user()
+    return redirect(url_for("dashboard.index"))
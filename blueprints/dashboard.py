@@ -0,0 +1,159 @@
+import random
+
+from flask import Blueprint, flash, redirect, render_template, request, session, url_for
+from flask_login import current_user, login_required
+
+from challenge_stats import record_attempt, record_solve, record_view
+from extensions import db
+from judge import MAX_SOURCE_LENGTH, TooManyChecks, check_solution
+from models import Challenge, Message, Submission, User
+from recommend import after_solve
+from replicas import replica_read
+from sandbox import PoolBusy
+from sharding import grouped_counts, user_rows
+from services import (
+    check_and_complete_dungeon,
+    fun_pool,
+    get_daily_challenge_for_user,
+    random_fun,
+    update_streak_and_xp,
+)
+from xp_ledger import Cursor, leaderboard_page, rolled_up_at
+
+dashboard_bp = Blueprint("dashboard", __name__)
+
+
+@dashboard_bp.route("/")
+def index():
+    return render_template("index.html", fun=random_fun())
+
+@dashboard_bp.route("/about")
+def about():
+    return render_template("about.html")
+
+@dashboard_bp.route("/contact", methods=["GET", "POST"])
+def contact():
+    if request.method == "POST":
+        name = request.form.get("name", "").strip()
+        email = request.form.get("email", "").strip()
+        body = request.form.get("message", "").strip()
+
+        if current_user.is_authenticated:
+            if not name:
+                name = current_user.username
+            if not email:
+                email = current_user.email
+        
+        if not (name and email and body):
+            flash(("contact", "Please fill out all fields."))  # stays on contact page
+            return redirect(url_for("dashboard.contact"))
+
+        # persist to DB
+        msg = Message(name=name, email=email, body=body)
+        db.session.add(msg)
+        db.session.commit()
+
+        # show success only on this page
+        flash(("contact", "Message sent successfully! We'll get back to you soon."))
+        return redirect(url_for("dashboard.contact", sent=1))
+
+    return render_template("contact.html")
+
+
+@dashboard_bp.route("/dashboard")
+@login_required
+def dashboard():
+    difficulty = (request.args.get("difficulty") or "").strip()
+    allowed_difficulties = {"easy", "medium", "hard"}
+    difficulty_filter = difficulty.lower() if difficulty.lower() in allowed_difficulties else ""
+    ch = get_daily_challenge_for_user(current_user, difficulty=difficulty_filter or None)
+    if ch is not None and session.get("viewed_challenge") != ch.id:
+        # Reloads of the same challenge skip the first-view lookup.
+        record_view(current_user.id, ch.id)
+        session["viewed_challenge"] = ch.id
+    pool = fun_pool()
+    joke = random.choice(pool)[1] if pool else None
+    return render_template(
+        "dashboard.html",
+        challenge=ch,
+        joke=joke,
+        difficulty_filter=difficulty_filter,
+    )
+
+def _record_solve(ch) -> str:
+    """Store the current user's first solve of ``ch`` and award XP; returns the message to show."""
+    existing = user_rows(Submission, current_user.id).filter_by(challenge_id=ch.id).first()
+    if existing:
+        return "You already solved this one."
+    db.session.add(Submission(user_id=current_user.id, challenge_id=ch.id))
+    record_solve(current_user.id, ch.id)
+    after_solve(current_user.id)
+    update_streak_and_xp(current_user)
+    completed_dungeon = check_and_complete_dungeon(current_user, ch)
+    if completed_dungeon:
+        return f"Challenge solved! You cleared the {completed_dungeon.name} and earned a {completed_dungeon.reward_xp} XP bonus!"
+    return "Great! Challenge marked as solved. +10 XP"
+
+@dashboard_bp.route("/submit/<int:challenge_id>", methods=["POST"])
+@login_required
+def submit_challenge(challenge_id):
+    ch = Challenge.query.get_or_404(challenge_id)
+    if ch.test_cases:
+        flash("This challenge is solved by passing its tests. Use \"Check against tests\".")
+    else:
+        record_attempt(ch.id, passed=True)
+        flash(_record_solve(ch))
+        db.session.commit()
+    return redirect(url_for("dashboard.dashboard"))
+
+@dashboard_bp.route("/challenges/<int:challenge_id>/check", methods=["POST"])
+@login_required
+def check_challenge(challenge_id):
+    """Run a Python solution against the challenge's tests; a pass counts as solving it."""
+    ch = Challenge.query.get_or_404(challenge_id)
+    code = (request.get_json(silent=True) or {}).get("code")
+    if not isinstance(code, str) or not code.strip():
+        return {"error": "Code is required."}, 400
+    if len(code) > MAX_SOURCE_LENGTH:
+        return {"error": f"Solutions are limited to {MAX_SOURCE_LENGTH} characters."}, 400
+    try:
+        verdict = check_solution(ch, code, current_user.id)
+    except TooManyChecks:
+        return {"error": "Your previous check is still running."}, 429, {"Retry-After": "1"}
+    except PoolBusy:
+        return {"error": "The checker is busy. Try again in a moment."}, 503, {"Retry-After": "1"}
+    if verdict is None:
+        return {"error": "This challenge has no tests."}, 404
+    record_attempt(ch.id, passed=verdict["status"] == "passed")
+    if verdict["status"] == "passed":
+        verdict["message"] = _record_solve(ch)
+        verdict["new_xp"] = current_user.xp
+    db.session.commit()
+    return verdict, 200
+
+@dashboard_bp.route("/leaderboard")
+@replica_read
+def leaderboard():
+    users = (
+        db.session.query(User.id, User.username, User.xp, User.streak)
+        .filter(User.show_on_leaderboard.is_(True))
+        .order_by(User.xp.desc(), User.streak.desc())
+        .limit(50)
+        .all()
+    )
+    # Submissions may be spread over shards: count them with one fan-out query.
+    solved = grouped_counts(Submission.user_id, Submission.user_id.in_([u.id for u in users])) if users else {}
+    return render_template("leaderboard.html", users=users, solved=solved)
+
+@dashboard_bp.route("/leaderboard/<any(week, month):period>")
+def period_leaderboard(period):
+    """XP gained this week or month, read from the rollups and paged with a keyset cursor."""
+    # Read-only: `flask xp rollup` from cron folds new events, and the page says when it last ran.
+    rows, next_cursor = leaderboard_page(period, Cursor.decode(request.args.get("after")))
+    return render_template(
+        "leaderboard_period.html",
+        period=period,
+        rows=rows,
+        next_cursor=next_cursor.encode() if next_cursor else None,
+        updated_at=rolled_up_at(),
+    )
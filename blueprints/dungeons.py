@@ -0,0 +1,67 @@
+from flask import Blueprint, flash, redirect, render_template, url_for
+from flask_login import current_user, login_required
+
+from models import Dungeon
+from replicas import replica_read
+from services import published_catalog, published_topic_totals, solved_challenge_ids
+
+dungeons_bp = Blueprint("dungeons", __name__)
+
+
+@dungeons_bp.route("/dungeons")
+@replica_read
+@login_required
+def dungeons_list():
+    """Main exploration page listing all available dungeons."""
+    # Get all dungeons, ordered by unlock XP
+    all_dungeons = Dungeon.query.order_by(Dungeon.unlock_xp).all()
+
+    # Get total published challenges per topic
+    total_challenges_by_topic = published_topic_totals()
+
+    # Get user's solved published challenges per topic. Submissions may live
+    # on a shard, so topics come from the catalog instead of a SQL join.
+    catalog = published_catalog()
+    solved_challenges_by_topic = {}
+    for challenge_id in solved_challenge_ids(current_user.id):
+        entry = catalog.get(challenge_id)
+        if entry is not None:
+            solved_challenges_by_topic[entry.topic_key] = solved_challenges_by_topic.get(entry.topic_key, 0) + 1
+
+    dungeon_data = []
+    for d in all_dungeons:
+        topic_key = (d.topic or "").lower()
+        total = total_challenges_by_topic.get(topic_key, 0)
+        solved = solved_challenges_by_topic.get(topic_key, 0)
+        progress = (solved / total * 100) if total > 0 else 0
+        dungeon_data.append({
+            "dungeon": d,
+            "progress": round(progress),
+            "is_locked": current_user.xp < d.unlock_xp
+        })
+
+    return render_template("dungeons_list.html", dungeon_data=dungeon_data)
+
+@dungeons_bp.route("/dungeons/<int:dungeon_id>")
+@replica_read
+@login_required
+def dungeon_view(dungeon_id):
+    """View a single dungeon and its challenges."""
+    dungeon = Dungeon.query.get_or_404(dungeon_id)
+
+    if current_user.xp < dungeon.unlock_xp:
+        flash("You need more XP to access this dungeon.")
+        return redirect(url_for("dungeons.dungeons_list"))
+
+    # Get challenges for this dungeon's topic
+    topic_key = (dungeon.topic or "").lower()
+    challenges = published_catalog().by_topic(topic_key)
+    solved_ids = solved_challenge_ids(current_user.id)
+
+    # Check if all challenges in this dungeon are solved
+    all_challenges_solved = all(ch.id in solved_ids for ch in challenges)
+
+    return render_template(
+        "dungeon_view.html", dungeon=dungeon, challenges=challenges,
+        solved_ids=solved_ids, all_solved=all_challenges_solved
+    )
@@ -0,0 +1,53 @@
+from flask import current_app
+from werkzeug.local import LocalProxy
+
+from .conditional import conditional, conditional_get, make_etag
+from .fragments import FragmentCache, FragmentCacheExtension
+from .store import AppCache
+from .versions import DataStamp, DataVersions
+
+
+def init_caching(app, db, DataVersion):
+    """Wire the app cache, data version stamps and ``{% cache %}`` into ``app``."""
+    cache = AppCache(
+        max_entries=app.config.get("APP_CACHE_MAX_ENTRIES", 2048),
+        default_ttl=app.config.get("APP_CACHE_TTL", 300),
+    )
+    versions = DataVersions(db, DataVersion)
+    versions.install()
+
+    fragments = FragmentCache(
+        cache,
+        default_ttl=app.config.get("FRAGMENT_CACHE_TTL", 300),
+        enabled=app.config.get("FRAGMENT_CACHE_ENABLED", True),
+    )
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache = fragments
+    app.jinja_env.globals["data_stamp"] = versions.token
+
+    app.extensions["app_cache"] = cache
+    app.extensions["data_versions"] = versions
+    app.extensions["fragment_cache"] = fragments
+    return cache, versions, fragments
+
+
+# Blueprints and services reach the active app's instances through these.
+current_cache = LocalProxy(lambda: current_app.extensions["app_cache"])
+current_versions = LocalProxy(lambda: current_app.extensions["data_versions"])
+current_fragments = LocalProxy(lambda: current_app.extensions["fragment_cache"])
+
+
+__all__ = [
+    "AppCache",
+    "DataStamp",
+    "DataVersions",
+    "FragmentCache",
+    "FragmentCacheExtension",
+    "conditional",
+    "current_cache",
+    "current_fragments",
+    "current_versions",
+    "conditional_get",
+    "init_caching",
+    "make_etag",
+]
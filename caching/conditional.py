@@ -0,0 +1,84 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import Response, after_this_request, request
+
+
+def make_etag(parts) -> str:
+    """Hash validator inputs (version stamps, ids, filters) into an ETag value."""
+    if not isinstance(parts, (list, tuple)):
+        parts = (parts,)
+    raw = "\x1f".join("" if p is None else str(p) for p in parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _http_seconds(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def is_fresh(etag: str, last_modified: datetime | None) -> bool:
+    """True when the client's cached copy matches (If-None-Match wins over dates)."""
+    if request.if_none_match:
+        # Compressed representations carry "<etag>-gzip" / "<etag>-br".
+        return any(
+            request.if_none_match.contains(candidate)
+            for candidate in (etag, f"{etag}-gzip", f"{etag}-br")
+        )
+    if last_modified is not None and request.if_modified_since is not None:
+        return _http_seconds(last_modified) <= request.if_modified_since
+    return False
+
+
+def conditional_get(etag_parts, last_modified: datetime | None = None, private: bool = False):
+    """Answer a conditional GET before any body work happens.
+
+    Returns a ready ``304 Not Modified`` response when the request validators
+    match. Otherwise returns ``None`` and arranges for the eventual 200 response
+    to carry ``ETag``/``Last-Modified`` so the client can revalidate next time.
+    """
+    etag = make_etag(etag_parts)
+    cache_control = "private, no-cache" if private else "no-cache"
+
+    if request.method in {"GET", "HEAD"} and is_fresh(etag, last_modified):
+        response = Response(status=304)
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = _http_seconds(last_modified)
+        response.headers["Cache-Control"] = cache_control
+        return response
+
+    @after_this_request
+    def _stamp_validators(response):
+        if response.status_code == 200:
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = _http_seconds(last_modified)
+            response.headers["Cache-Control"] = cache_control
+        return response
+
+    return None
+
+
+def conditional(validators, private: bool = False):
+    """Decorator form of :func:`conditional_get`.
+
+    ``validators`` receives the view arguments and returns
+    ``(etag_parts, last_modified)``; it must only read version stamps or
+    timestamps so that a 304 costs no template or CSV work.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag_parts, last_modified = validators(*args, **kwargs)
+            not_modified = conditional_get(etag_parts, last_modified, private=private)
+            if not_modified is not None:
+                return not_modified
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
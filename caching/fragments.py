@@ -0,0 +1,111 @@
+import threading
+import time
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+
+class FragmentStats:
+    """Hit/miss counters and render time for one named fragment."""
+
+    __slots__ = ("hits", "misses", "render_seconds")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.render_seconds = 0.0
+
+    def as_dict(self):
+        lookups = self.hits + self.misses
+        avg_render = self.render_seconds / self.misses if self.misses else 0.0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "avg_render_ms": round(avg_render * 1000, 3),
+            # A hit saves roughly what a miss costs to render.
+            "saved_ms": round(self.hits * avg_render * 1000, 3),
+        }
+
+
+class FragmentCache:
+    """Stores rendered template fragments in the app cache and tracks stats."""
+
+    def __init__(self, cache, default_ttl: float = 300, enabled: bool = True):
+        self.cache = cache
+        self.default_ttl = default_ttl
+        self.enabled = enabled
+        self._stats: dict[str, FragmentStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats_for(self, name: str) -> FragmentStats:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = FragmentStats()
+            return stats
+
+    def render(self, key, ttl, render):
+        if isinstance(key, (list, tuple)):
+            parts = tuple(str(p) for p in key)
+        else:
+            parts = (str(key),)
+        if not self.enabled or not parts:
+            return render()
+        stats = self._stats_for(parts[0])
+        cache_key = ("fragment",) + parts
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            stats.hits += 1
+            return Markup(cached)
+        started = time.perf_counter()
+        rendered = render()
+        stats.render_seconds += time.perf_counter() - started
+        stats.misses += 1
+        self.cache.set(cache_key, str(rendered), self.default_ttl if ttl is None else ttl)
+        return rendered
+
+    def after_fork(self):
+        """Start a forked worker with its own lock and empty hit counters."""
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def stats(self) -> dict:
+        with self._lock:
+            items = list(self._stats.items())
+        return {name: stats.as_dict() for name, stats in sorted(items)}
+
+
+class FragmentCacheExtension(Extension):
+    """Adds ``{% cache key, ttl %}...{% endcache %}`` to Jinja templates.
+
+    ``key`` is a single expression: a string or a parenthesised tuple whose
+    first element names the fragment for stats, e.g.
+    ``{% cache ("dungeon-card", d.id, data_stamp("dungeon")), 600 %}``.
+    ``ttl`` is optional and falls back to ``FRAGMENT_CACHE_TTL``.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render_cached", args), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, key, ttl, caller):
+        fragment_cache = self.environment.fragment_cache
+        if fragment_cache is None:
+            return caller()
+        return fragment_cache.render(key, ttl, caller)
@@ -0,0 +1,131 @@
+import hashlib
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from flask import g, has_app_context
+from sqlalchemy import event, insert, inspect, select, update
+
+
+class DataStamp(NamedTuple):
+    """Version stamp for one table: bumped on every flush that touches it."""
+
+    table: str
+    version: int
+    updated_at: datetime | None
+
+    @property
+    def token(self) -> str:
+        micros = 0
+        if self.updated_at is not None:
+            micros = int(_as_utc(self.updated_at).timestamp() * 1_000_000)
+        return f"{self.table}:{self.version}:{micros}"
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything we write is UTC.
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _stamped_change(obj) -> bool:
+    """Whether a flushed update changed a column outside the model's ``__unstamped__``."""
+    skip = getattr(type(obj), "__unstamped__", ())
+    state = inspect(obj)
+    return any(
+        prop.key not in skip and state.attrs[prop.key].history.has_changes()
+        for prop in state.mapper.column_attrs
+    )
+
+
+class DataVersions:
+    """Per-table version stamps kept in the ``data_version`` table.
+
+    Stamps live in the database (not process memory) so every Gunicorn worker
+    agrees on them. They are bumped from a session ``after_flush`` hook inside
+    the same transaction as the write, which makes them safe to embed in cache
+    keys and HTTP validators.
+
+    Only models that set ``__stamped__ = True`` are stamped: the tables behind
+    cached fragments, ETags and the replica-routed lists. Progress tables
+    (submissions, completions, counters, ledgers) are written on every solve
+    and nothing caches on them, so a stamp row would only make every one of
+    those writes wait on the same lock. For the same reason an update that
+    only touches a model's ``__unstamped__`` columns (``User``'s XP, streak
+    and login dates) does not bump its stamp either.
+    """
+
+    def __init__(self, db, model):
+        self.db = db
+        self.model = model
+        self.table = model.__table__
+
+    def install(self):
+        # The listeners sit on the shared scoped session, so a second app built
+        # from the same ``db`` (tests, CLI) must not register them again.
+        if getattr(self.db, "_data_versions_installed", False):
+            return
+        event.listen(self.db.session, "after_flush", self._after_flush)
+        event.listen(self.db.session, "after_commit", self._after_commit)
+        self.db._data_versions_installed = True
+
+    def _after_flush(self, session, flush_context):
+        changed = [*session.new, *session.deleted]
+        changed += [obj for obj in session.dirty if _stamped_change(obj)]
+        tables = {type(obj).__tablename__ for obj in changed if getattr(type(obj), "__stamped__", False)}
+        if tables:
+            self.bump(session.connection(), tables)
+
+    def _after_commit(self, session):
+        if has_app_context():
+            g.pop("_data_stamps", None)
+
+    def bump(self, connection, tables):
+        """Increment the stamp for each table name using ``connection``."""
+        now = datetime.now(timezone.utc)
+        for name in sorted(tables):
+            result = connection.execute(
+                update(self.table)
+                .where(self.table.c.table_name == name)
+                .values(version=self.table.c.version + 1, updated_at=now)
+            )
+            if result.rowcount == 0:
+                connection.execute(
+                    insert(self.table).values(table_name=name, version=1, updated_at=now)
+                )
+        if has_app_context():
+            g.pop("_data_stamps", None)
+            # Read by the replica router to fence this client's next reads.
+            g.setdefault("_data_bumped", set()).update(tables)
+
+    def bump_now(self, *tables):
+        """Bump stamps for writes that bypass the ORM (raw SQL, bulk updates)."""
+        with self.db.engine.begin() as conn:
+            self.bump(conn, tables)
+
+    def stamps(self, *tables) -> dict[str, DataStamp]:
+        memo = g.setdefault("_data_stamps", {}) if has_app_context() else {}
+        missing = [t for t in tables if t not in memo]
+        if missing:
+            rows = self.db.session.execute(
+                select(
+                    self.table.c.table_name,
+                    self.table.c.version,
+                    self.table.c.updated_at,
+                ).where(self.table.c.table_name.in_(missing))
+            ).all()
+            found = {row.table_name: DataStamp(*row) for row in rows}
+            for name in missing:
+                memo[name] = found.get(name, DataStamp(name, 0, None))
+        return {t: memo[t] for t in tables}
+
+    def token(self, *tables) -> str:
+        """Combined stamp for the given tables, suitable for keys and ETags."""
+        parts = [s.token for s in self.stamps(*tables).values()]
+        if len(parts) == 1:
+            return parts[0]
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+    def last_modified(self, *tables) -> datetime | None:
+        stamps = [s.updated_at for s in self.stamps(*tables).values() if s.updated_at]
+        return _as_utc(max(stamps, key=_as_utc)) if stamps else None
@@ -0,0 +1,410 @@
+"""Read-only snapshot of the published challenge catalog, shared by all workers.
+
+The snapshot is one file holding fixed-width records sorted by challenge id,
+followed by a heap of UTF-8 text::
+
+    header   magic (8 bytes), record count (u32), challenge data version (u64)
+    records  id (u32), then (offset, length) u32 pairs into the heap for
+             topic, difficulty, language, tags, title and prompt, then the
+             calibrated difficulty score (f32, NaN before calibration)
+    heap     de-duplicated UTF-8 strings
+
+Every worker memory-maps the file, so the kernel keeps a single copy in the
+page cache and hot read paths (daily challenge, dungeon pages, topic totals)
+run without SQL. The process that commits a challenge change rebuilds the
+file and swaps it in with ``os.replace``; other workers notice the new inode
+on their next request and remap. Rebuilds hold a file lock next to the
+snapshot and stamp it with the ``challenge`` data version they read, so a
+slow rebuild never replaces a file built from newer data. Records are also sorted by difficulty once
+per mapping, for the easiest-first fallback and for recommendations that
+start from the records nearest a target difficulty.
+"""
+import logging
+import math
+from bisect import bisect_left
+import mmap
+import os
+import struct
+import threading
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, select
+
+from migrations.lock import MigrationLockTimeout, file_lock
+from models import Challenge, DataVersion
+
+MAGIC = b"SSCAT\x00\x00\x03"
+HEADER = struct.Struct("<8sIQ")
+FIELDS = ("topic", "difficulty", "language", "tags", "title", "prompt")
+RECORD = struct.Struct("<I" + "II" * len(FIELDS) + "f")
+_ID = struct.Struct("<I")
+_SPAN = struct.Struct("<II")
+_SCORE = struct.Struct("<f")
+_SCORE_OFFSET = RECORD.size - _SCORE.size
+# Where a challenge sorts before calibration has given it a score (0 easiest, 100 hardest).
+DIFFICULTY_PRIORS = {"easy": 25.0, "medium": 50.0, "hard": 75.0}
+DEFAULT_PRIOR = 50.0
+# Seconds a rebuild waits for another process's rebuild of the same file.
+BUILD_LOCK_TIMEOUT = 10.0
+
+log = logging.getLogger(__name__)
+
+
+def _text_field(position: int):
+    def read(self):
+        return self._snapshot._text(self._index, position)
+    read.__name__ = FIELDS[position]
+    return property(read)
+
+
+class CatalogRecord:
+    """One published challenge, decoded from the mapped file on attribute access."""
+
+    __slots__ = ("_snapshot", "_index")
+
+    def __init__(self, snapshot: "CatalogSnapshot", index: int):
+        self._snapshot = snapshot
+        self._index = index
+
+    @property
+    def id(self) -> int:
+        return self._snapshot._id(self._index)
+
+    topic_key = _text_field(0)
+    difficulty = _text_field(1)
+    language = _text_field(2)
+    tags = _text_field(3)
+    title = _text_field(4)
+    prompt = _text_field(5)
+
+    @property
+    def topic(self) -> str | None:
+        return self.topic_key or None
+
+    @property
+    def difficulty_score(self) -> float | None:
+        return self._snapshot._score(self._index)
+
+    @property
+    def effective_difficulty(self) -> float:
+        """The difficulty score, or the label's prior before calibration."""
+        return self._snapshot._difficulty(self._index)
+
+    def __eq__(self, other):
+        return isinstance(other, CatalogRecord) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"<CatalogRecord {self.id} {self.topic_key!r}/{self.difficulty!r}>"
+
+
+class CatalogSnapshot:
+    """A memory-mapped snapshot file, read as a sequence of ``CatalogRecord``."""
+
+    __slots__ = ("path", "stat_key", "stamp", "_map", "_count", "_heap", "_topics", "_easiest_first")
+
+    def __init__(self, path: str):
+        with open(path, "rb") as fh:
+            stat = os.fstat(fh.fileno())
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC or len(self._map) < HEADER.size:
+            self._map.close()
+            raise ValueError(f"{path} is not a catalog snapshot")
+        _magic, self._count, self.stamp = HEADER.unpack_from(self._map, 0)
+        self.path = path
+        self.stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        self._heap = HEADER.size + self._count * RECORD.size
+        self._topics = None
+        self._easiest_first = None
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index: int) -> CatalogRecord:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("catalog index out of range")
+        return CatalogRecord(self, index)
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield CatalogRecord(self, index)
+
+    def _id(self, index: int) -> int:
+        return _ID.unpack_from(self._map, HEADER.size + index * RECORD.size)[0]
+
+    def _score(self, index: int) -> float | None:
+        score = _SCORE.unpack_from(self._map, HEADER.size + index * RECORD.size + _SCORE_OFFSET)[0]
+        return None if math.isnan(score) else score
+
+    def _text(self, index: int, position: int) -> str:
+        offset, length = _SPAN.unpack_from(
+            self._map, HEADER.size + index * RECORD.size + _ID.size + position * _SPAN.size
+        )
+        start = self._heap + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def get(self, challenge_id: int) -> CatalogRecord | None:
+        """Binary search by id; ``None`` if the challenge is not published."""
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._id(mid) < challenge_id:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._id(lo) == challenge_id:
+            return CatalogRecord(self, lo)
+        return None
+
+    def _topic_index(self) -> dict[str, tuple[int, ...]]:
+        if self._topics is None:
+            topics = {}
+            for index in range(self._count):
+                topics.setdefault(self._text(index, 0), []).append(index)
+            self._topics = {key: tuple(indexes) for key, indexes in topics.items()}
+        return self._topics
+
+    def by_topic(self, topic_key: str) -> list[CatalogRecord]:
+        """Records whose lower-cased topic equals ``topic_key``, in id order."""
+        return [CatalogRecord(self, index) for index in self._topic_index().get(topic_key or "", ())]
+
+    def _difficulty(self, index: int) -> float:
+        """Record ``index``'s difficulty score, or its label's prior before calibration."""
+        score = self._score(index)
+        if score is None:
+            score = DIFFICULTY_PRIORS.get(self._text(index, 1), DEFAULT_PRIOR)
+        return score
+
+    def _difficulty_order(self):
+        """``(indexes, difficulties)`` sorted by difficulty, then id; built once per mapping."""
+        if self._easiest_first is None:
+            keyed = sorted((self._difficulty(index), self._id(index), index) for index in range(self._count))
+            self._easiest_first = (
+                tuple(index for _, _, index in keyed),
+                [difficulty for difficulty, _, _ in keyed],
+            )
+        return self._easiest_first
+
+    def easiest_first(self):
+        """Yield records by difficulty score, then id; uncalibrated ones sort by their label's prior."""
+        order, _ = self._difficulty_order()
+        for index in order:
+            yield CatalogRecord(self, index)
+
+    def closest_to(self, difficulty: float):
+        """Yield records by how far their difficulty is from ``difficulty``, nearest first."""
+        order, difficulties = self._difficulty_order()
+        right = bisect_left(difficulties, difficulty)
+        left = right - 1
+        while left >= 0 or right < len(order):
+            if right >= len(order) or (left >= 0 and difficulty - difficulties[left] <= difficulties[right] - difficulty):
+                yield CatalogRecord(self, order[left])
+                left -= 1
+            else:
+                yield CatalogRecord(self, order[right])
+                right += 1
+
+    def topic_totals(self) -> dict[str | None, int]:
+        """Number of records per topic; untopiced challenges count under ``None``."""
+        return {key or None: len(indexes) for key, indexes in self._topic_index().items()}
+
+
+def write_snapshot(path: str, rows, stamp: int = 0) -> int:
+    """Write ``rows`` of ``(id, *FIELDS[, difficulty_score])`` sorted by id to ``path`` atomically.
+
+    Repeated strings (topics, difficulties, tags) are stored once in the
+    heap. Returns the number of records written.
+    """
+    heap = bytearray()
+    offsets = {}
+    records = bytearray()
+    count = 0
+    for row in rows:
+        score = row[len(FIELDS) + 1] if len(row) > len(FIELDS) + 1 else None
+        spans = []
+        for value in row[1:len(FIELDS) + 1]:
+            data = (value or "").encode("utf-8")
+            if data not in offsets:
+                offsets[data] = len(heap)
+                heap += data
+            spans += (offsets[data], len(data))
+        records += RECORD.pack(row[0], *spans, math.nan if score is None else score)
+        count += 1
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(HEADER.pack(MAGIC, count, stamp))
+        fh.write(records)
+        fh.write(heap)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    return count
+
+
+def snapshot_stamp(path: str) -> int | None:
+    """The data version a snapshot file was built from; ``None`` if missing or in another format."""
+    try:
+        with open(path, "rb") as fh:
+            header = fh.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+        return None
+    return HEADER.unpack(header)[2]
+
+
+def challenge_stamp(connection) -> int:
+    """The ``challenge`` table's data version, bumped by every commit that writes it."""
+    table = DataVersion.__table__
+    return connection.execute(
+        select(table.c.version).where(table.c.table_name == Challenge.__tablename__)
+    ).scalar() or 0
+
+
+def published_rows(connection):
+    """``(id, *FIELDS, difficulty_score)`` for every published challenge, topic and difficulty lower-cased."""
+    table = Challenge.__table__
+    result = connection.execute(
+        select(
+            table.c.id, table.c.topic, table.c.difficulty, table.c.language,
+            table.c.tags, table.c.title, table.c.prompt, table.c.difficulty_score,
+        )
+        .where(table.c.status == "published")
+        .order_by(table.c.id)
+    )
+    for id, topic, difficulty, language, tags, title, prompt, score in result:
+        yield id, (topic or "").strip().lower(), (difficulty or "").lower(), language, tags, title, prompt, score
+
+
+class CatalogStore:
+    """Owns the snapshot file for one app and this process's mapping of it."""
+
+    def __init__(self, db, path: str):
+        self.db = db
+        self.path = path
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def build(self) -> int:
+        """Rebuild the file from the database and map the newest version.
+
+        The stamp is read before the rows, so a file is never stamped newer
+        than its records. If another process has already written a file
+        from a later stamp, that file is kept and mapped instead.
+        """
+        with self._lock, file_lock(f"{self.path}.lock", timeout=BUILD_LOCK_TIMEOUT):
+            with self.db.engine.connect() as conn:
+                stamp = challenge_stamp(conn)
+                on_disk = snapshot_stamp(self.path)
+                if on_disk is None or on_disk <= stamp:
+                    write_snapshot(self.path, published_rows(conn), stamp)
+            self._snapshot = CatalogSnapshot(self.path)
+        _forget_request_snapshot()
+        return len(self._snapshot)
+
+    def current(self) -> CatalogSnapshot:
+        """The mapped snapshot, remapped if another process replaced the file."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self.build()
+            return self._snapshot
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.stat_key != (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+            try:
+                with self._lock:
+                    # Records still held by in-flight requests keep the old map alive.
+                    self._snapshot = snapshot = CatalogSnapshot(self.path)
+            except ValueError:
+                # A file in an older format, left by the previous release.
+                self.build()
+                snapshot = self._snapshot
+        return snapshot
+
+    def invalidate(self):
+        """Delete the file so the next reader rebuilds it from the database."""
+        with self._lock:
+            self._snapshot = None
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+        _forget_request_snapshot()
+
+    def after_fork(self):
+        """Keep the inherited mapping (it is shared) but not the parent's lock."""
+        self._lock = threading.Lock()
+
+
+def _forget_request_snapshot():
+    if has_app_context():
+        g.pop("_catalog_snapshot", None)
+
+
+def current_catalog() -> CatalogSnapshot:
+    """The app's snapshot, checked against the file at most once per request."""
+    snapshot = g.get("_catalog_snapshot")
+    if snapshot is None:
+        snapshot = g._catalog_snapshot = current_app.extensions["catalog"].current()
+    return snapshot
+
+
+def _store():
+    if has_app_context():
+        return current_app.extensions.get("catalog")
+    return None
+
+
+def _after_flush(session, flush_context):
+    touched = any(isinstance(obj, Challenge) for obj in (*session.new, *session.deleted)) or any(
+        isinstance(obj, Challenge) and session.is_modified(obj) for obj in session.dirty
+    )
+    if touched:
+        session.info["catalog_stale"] = True
+
+
+def _after_commit(session):
+    if not session.info.pop("catalog_stale", False):
+        return
+    store = _store()
+    if store is None:
+        return
+    try:
+        store.build()
+    except (OSError, MigrationLockTimeout):
+        log.warning("Could not rebuild catalog snapshot at %s", store.path, exc_info=True)
+        store.invalidate()
+
+
+def _after_rollback(session):
+    session.info.pop("catalog_stale", None)
+
+
+def _table_reset(target, connection, **kw):
+    # create_all/drop_all bypass the session; the old file describes another table.
+    store = _store()
+    if store is not None:
+        store.invalidate()
+
+
+def init_catalog(app, db):
+    """Attach a ``CatalogStore`` and rebuild it whenever challenge writes commit."""
+    app.config.setdefault("CATALOG_SNAPSHOT_PATH", None)
+    path = app.config["CATALOG_SNAPSHOT_PATH"] or os.path.join(app.instance_path, "catalog.snapshot")
+    app.extensions["catalog"] = CatalogStore(db, path)
+
+    # Listeners live on the shared scoped session and table; register them once.
+    if getattr(db, "_catalog_listeners_installed", False):
+        return
+    event.listen(db.session, "after_flush", _after_flush)
+    event.listen(db.session, "after_commit", _after_commit)
+    event.listen(db.session, "after_rollback", _after_rollback)
+    event.listen(Challenge.__table__, "after_create", _table_reset)
+    event.listen(Challenge.__table__, "after_drop", _table_reset)
+    db._catalog_listeners_installed = True
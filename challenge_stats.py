@@ -0,0 +1,189 @@
+"""Per-challenge solve statistics and the calibrated difficulty score.
+
+Counters in ``ChallengeStats`` are bumped in the same transaction as the
+event that moves them, with one UPDATE each:
+
+* ``record_view``: a user is shown a challenge for the first time (the
+  dashboard's daily challenge). The ``ChallengeView`` row, on the user's
+  shard, remembers when.
+* ``record_attempt``: a test check or a self-reported submit, and whether
+  it passed.
+* ``record_solve``: a user's first solve. If the user's first view is
+  known, the time between the two is added to a log2 histogram
+  (``ChallengeSolveTime``), which is enough to estimate a median without
+  keeping every time.
+
+``calibrate`` (``flask difficulty-scores``, from cron) turns the counters
+into ``Challenge.difficulty_score``, 0 for the easiest and 100 for the
+hardest. The author's label gives a prior (easy 25, medium 50, hard 75)
+that counts as ``PRIOR_WEIGHT`` viewers; the observed difficulty takes over
+as real viewers arrive. Observed difficulty is the mean of the signals a
+challenge has:
+
+* the share of viewers who have not solved it;
+* the share of test checks that failed (challenges with tests);
+* where its median solve time ranks among challenges with at least
+  ``MIN_TIMED_SOLVES`` timed solves.
+
+The scores are copied into the catalog snapshot, which the daily
+challenge reads, so ordering by them costs no query per request.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from caching import current_versions
+from catalog import DEFAULT_PRIOR, DIFFICULTY_PRIORS
+from extensions import db
+from models import Challenge, ChallengeSolveTime, ChallengeStats, ChallengeView
+from sharding import user_rows
+
+PRIOR_WEIGHT = 20
+MIN_TIMED_SOLVES = 5
+
+
+def _bump(model, key: dict, **amounts):
+    """Add ``amounts`` to the ``model`` row with primary key ``key``, creating it at zero first."""
+    table = model.__table__
+    stmt = (
+        update(table)
+        .where(*(table.c[name] == value for name, value in key.items()))
+        .values({name: table.c[name] + amount for name, amount in amounts.items()})
+    )
+    if db.session.execute(stmt).rowcount:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert(table).values(**key, **amounts))
+    except IntegrityError:
+        # Another request created the row after our UPDATE missed it.
+        db.session.execute(stmt)
+
+
+def solve_time_bucket(seconds: float) -> int:
+    return int(max(seconds, 0)).bit_length()
+
+
+def median_seconds(histogram: dict[int, int]) -> float | None:
+    """Median of a ``ChallengeSolveTime`` histogram, interpolated geometrically within its bucket."""
+    total = sum(histogram.values())
+    if not total:
+        return None
+    half, seen = total / 2, 0
+    for bucket in sorted(histogram):
+        count = histogram[bucket]
+        if seen + count >= half:
+            if bucket == 0:
+                return 0.0
+            low = 2.0 ** (bucket - 1)
+            return low * 2 ** ((half - seen) / count)
+        seen += count
+    return None
+
+
+def record_view(user_id: int, challenge_id: int) -> bool:
+    """Remember ``user_id``'s first view of ``challenge_id`` and count it; ``True`` if it was the first.
+
+    Commits, since it runs on a page that writes nothing else.
+    """
+    if user_rows(ChallengeView, user_id).filter_by(challenge_id=challenge_id).first() is not None:
+        return False
+    db.session.add(ChallengeView(user_id=user_id, challenge_id=challenge_id))
+    _bump(ChallengeStats, {"challenge_id": challenge_id}, viewers=1)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # a concurrent request recorded it first
+        return False
+    return True
+
+
+def record_attempt(challenge_id: int, passed: bool):
+    """Count a check or submit of ``challenge_id`` in the caller's transaction."""
+    _bump(ChallengeStats, {"challenge_id": challenge_id}, attempts=1, solves=int(passed))
+
+
+def record_solve(user_id: int, challenge_id: int, solved_at: datetime | None = None):
+    """Count ``user_id``'s first solve of ``challenge_id`` in the caller's transaction."""
+    view = user_rows(ChallengeView, user_id).filter_by(challenge_id=challenge_id).first()
+    if view is None:
+        _bump(ChallengeStats, {"challenge_id": challenge_id}, solvers=1)
+        return
+    seconds = ((solved_at or datetime.utcnow()) - view.viewed_at).total_seconds()
+    _bump(ChallengeStats, {"challenge_id": challenge_id}, solvers=1, timed_solves=1)
+    _bump(ChallengeSolveTime, {"challenge_id": challenge_id, "bucket": solve_time_bucket(seconds)}, solves=1)
+
+
+def _percentile(values: list[float], value: float) -> float:
+    """Where ``value`` ranks in sorted ``values``, from 0 (fastest) to 1, ties sharing the middle."""
+    if len(values) < 2:
+        return 0.5
+    return (bisect_left(values, value) + bisect_right(values, value) - 1) / 2 / (len(values) - 1)
+
+
+def difficulty_score(label: str | None, exposure: int, signals: list[float]) -> float:
+    """Blend the label's prior with the mean of ``signals`` (each 0-1), weighted by ``exposure``."""
+    prior = DIFFICULTY_PRIORS.get((label or "").lower(), DEFAULT_PRIOR)
+    if not exposure or not signals:
+        return prior
+    observed = 100 * sum(signals) / len(signals)
+    return round((PRIOR_WEIGHT * prior + exposure * observed) / (PRIOR_WEIGHT + exposure), 1)
+
+
+def calibrate() -> int:
+    """Recompute every challenge's difficulty score and median solve time; returns how many changed."""
+    histograms = {}
+    for challenge_id, bucket, solves in db.session.execute(
+        select(ChallengeSolveTime.challenge_id, ChallengeSolveTime.bucket, ChallengeSolveTime.solves)
+    ):
+        histograms.setdefault(challenge_id, {})[bucket] = solves
+    rows = db.session.execute(
+        select(
+            ChallengeStats, Challenge.difficulty, Challenge.difficulty_score,
+            Challenge.test_cases.isnot(None).label("tested"),
+        ).join(Challenge, Challenge.id == ChallengeStats.challenge_id)
+    ).all()
+
+    medians = {stats.challenge_id: median_seconds(histograms.get(stats.challenge_id, {})) for stats, *_ in rows}
+    ranked = sorted(
+        medians[stats.challenge_id] for stats, *_ in rows
+        if stats.timed_solves >= MIN_TIMED_SOLVES and medians[stats.challenge_id] is not None
+    )
+    scores, times = [], []
+    for stats, label, old_score, tested in rows:
+        median = medians[stats.challenge_id]
+        if median != stats.median_solve_seconds:
+            times.append({"key": stats.challenge_id, "median": median})
+        exposure = max(stats.viewers, stats.solvers)
+        signals = []
+        if exposure:
+            signals.append(1 - min(stats.solvers, exposure) / exposure)
+        if tested and stats.attempts:
+            signals.append(1 - min(stats.solves, stats.attempts) / stats.attempts)
+        if stats.timed_solves >= MIN_TIMED_SOLVES and median is not None:
+            signals.append(_percentile(ranked, median))
+        score = difficulty_score(label, exposure, signals) if signals else None
+        if score != old_score:
+            scores.append({"key": stats.challenge_id, "score": score})
+
+    if times:
+        table = ChallengeStats.__table__
+        db.session.execute(
+            update(table).where(table.c.challenge_id == bindparam("key")).values(median_solve_seconds=bindparam("median")),
+            times,
+        )
+    if scores:
+        table = Challenge.__table__
+        db.session.execute(
+            update(table).where(table.c.id == bindparam("key")).values(difficulty_score=bindparam("score")),
+            scores,
+        )
+        # Core UPDATEs are invisible to the flush hooks that bump stamps and rebuild the catalog.
+        current_versions.bump(db.session.connection(), {table.name})
+    db.session.commit()
+    if scores:
+        current_app.extensions["catalog"].build()
+    return len(scores)
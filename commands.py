@@ -0,0 +1,357 @@
+import json
+from datetime import datetime, timezone
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, select
+from werkzeug.security import generate_password_hash
+
+import analytics
+import challenge_stats
+from extensions import db
+from migrations import (
+    MIGRATIONS,
+    MigrationLockTimeout,
+    current_version,
+    default_lock_path,
+    format_report,
+    run_migrations,
+)
+from models import Challenge, Dungeon, Joke, User
+from puzzles import bistro_bench
+from puzzles.td_state import rebuild_scores
+import recommend
+import reconcile
+from sharding import fan_out, rebalance, shard_metadata, sharded_models
+import xp_ledger
+
+
+def migrate_database(dry_run: bool = False, batch_size: int | None = None):
+    """Apply pending migrations to the app's database (see ``migrations/``)."""
+    config = current_app.config
+    results = run_migrations(
+        db.engine,
+        db.metadata,
+        MIGRATIONS,
+        lock_path=config["MIGRATION_LOCK_PATH"] or default_lock_path(db.engine, current_app.instance_path),
+        dry_run=dry_run,
+        batch_size=batch_size or config["MIGRATION_BATCH_SIZE"],
+        pause=config["MIGRATION_BATCH_PAUSE"],
+        lock_timeout=config["MIGRATION_LOCK_TIMEOUT"],
+    )
+    shard_tables = shard_metadata()
+    for index, engine in enumerate(current_app.extensions["shards"].engines):
+        # Shards hold only the per-user tables and keep their own schema_version.
+        shard_results = run_migrations(
+            engine,
+            shard_tables,
+            MIGRATIONS,
+            lock_path=config["MIGRATION_LOCK_PATH"] or default_lock_path(engine, current_app.instance_path),
+            dry_run=dry_run,
+            batch_size=batch_size or config["MIGRATION_BATCH_SIZE"],
+            pause=config["MIGRATION_BATCH_PAUSE"],
+            lock_timeout=config["MIGRATION_LOCK_TIMEOUT"],
+        )
+        results += [result._replace(name=f"{result.name} [shard {index}]") for result in shard_results]
+    if not dry_run and any(result.applied for result in results):
+        # Backfills write through the engine, not the session, so the
+        # catalog snapshot cannot have noticed them.
+        current_app.extensions["catalog"].invalidate()
+    return results
+
+
+@click.command("migrate")
+@click.option("--dry-run", is_flag=True, help="Show pending migrations and backfill sizes without writing.")
+@click.option("--batch-size", type=int, default=None, help="Rows per backfill transaction (MIGRATION_BATCH_SIZE).")
+@with_appcontext
+def migrate_command(dry_run, batch_size):
+    """Apply pending schema migrations and print a timing report."""
+    try:
+        results = migrate_database(dry_run=dry_run, batch_size=batch_size)
+    except MigrationLockTimeout as exc:
+        raise click.ClickException(str(exc))
+    for line in format_report(results, dry_run=dry_run):
+        click.echo(line)
+    click.echo(f"Schema version: {current_version(db.engine)}")
+
+
+# -----------------------------------------------------------------------------
+# Seed
+# -----------------------------------------------------------------------------
+def seed_data():
+    migrate_database()
+
+    # admin
+    if not User.query.filter_by(username="admin").first():
+        admin = User(
+            username="admin",
+            email="admin@example.com",
+            is_admin=True,
+            password_hash=generate_password_hash("admin123"),
+        )
+        db.session.add(admin)
+    # default challenge
+    if Challenge.query.count() == 0:
+        db.session.add(
+            Challenge(
+                title="Reverse String",
+                prompt="Write a function that reverses a string.\nExample: hello -> olleh",
+                hints="Think about slicing or stacks.",
+                solution="Python: s[::-1]\nJS: str.split('').reverse().join('')",
+                test_cases=json.dumps({
+                    "entry": "solve",
+                    "cases": [
+                        {"args": ["hello"], "expected": "olleh"},
+                        {"args": [""], "expected": ""},
+                        {"args": ["racecar!"], "expected": "!racecar", "hidden": True},
+                    ],
+                }),
+                language="General",
+                difficulty="Easy",
+                topic="strings",
+                status="published",
+                published_at=datetime.now(timezone.utc),
+            )
+        )
+    # default joke
+    if Joke.query.count() == 0:
+        db.session.add(
+            Joke(text="There are 10 kinds of people: those who understand binary and those who don't.", entry_type="fun")
+        )
+    # default dungeons
+    dungeons_to_seed = [
+        {
+            "name": "The String Sanctum",
+            "description": "A series of challenges to test your string manipulation mastery.",
+            "topic": "strings", "unlock_xp": 0, "reward_xp": 50
+        },
+        {
+            "name": "The Logic Labyrinth",
+            "description": "Puzzles that require algorithmic thinking and data structures.",
+            "topic": "algorithms", "unlock_xp": 50, "reward_xp": 100
+        },
+        {
+            "name": "The Array Archipelago",
+            "description": "Challenges focused on array manipulation and traversal.",
+            "topic": "arrays", "unlock_xp": 20, "reward_xp": 75
+        },
+        {
+            "name": "The Searching Spire",
+            "description": "Tasks involving searching and sorting algorithms.",
+            "topic": "search/sort", "unlock_xp": 30, "reward_xp": 75
+        },
+        {
+            "name": "The Stack & Queue Station",
+            "description": "Puzzles based on stack and queue data structures.",
+            "topic": "stack/queue", "unlock_xp": 40, "reward_xp": 75
+        },
+        {
+            "name": "The Mathematician's Maze",
+            "description": "Problems that require mathematical insight and algorithms.",
+            "topic": "math", "unlock_xp": 60, "reward_xp": 100
+        },
+        {
+            "name": "The Dynamic Programming Dojo",
+            "description": "A series of challenges on dynamic programming.",
+            "topic": "dp", "unlock_xp": 100, "reward_xp": 150
+        },
+        {
+            "name": "The SQL Summit",
+            "description": "Test your database skills with these SQL challenges.",
+            "topic": "sql", "unlock_xp": 80, "reward_xp": 120
+        },
+        {
+            "name": "The Regex Reef",
+            "description": "Master the art of regular expressions.",
+            "topic": "regex", "unlock_xp": 70, "reward_xp": 100
+        },
+    ]
+
+    for d_data in dungeons_to_seed:
+        if not Dungeon.query.filter_by(name=d_data["name"]).first():
+            db.session.add(Dungeon(**d_data))
+
+    db.session.commit()
+
+
+@click.command("seed")
+@with_appcontext
+def seed_command():
+    """Apply pending migrations and insert the default content."""
+    seed_data()
+    click.echo("Database seeded.")
+
+
+@click.command("catalog")
+@with_appcontext
+def catalog_command():
+    """Rebuild the published-catalog snapshot from the database."""
+    store = current_app.extensions["catalog"]
+    count = store.build()
+    click.echo(f"Wrote {count} published challenges to {store.path}")
+
+
+@click.command("difficulty-scores")
+@with_appcontext
+def difficulty_scores_command():
+    """Recalibrate challenge difficulty scores from the solve statistics. Safe to run from cron."""
+    click.echo(f"Updated {challenge_stats.calibrate()} difficulty score(s).")
+
+
+@click.group("recommendations")
+def recommendations_command():
+    """Maintain the per-user next-challenge queues."""
+
+
+@recommendations_command.command("refill")
+@click.option("--days", type=int, default=recommend.ACTIVE_DAYS, show_default=True,
+              help="Rebuild queues of users active within this many days.")
+@click.option("--batch-size", type=int, default=recommend.BATCH_SIZE, show_default=True,
+              help="Users read per query.")
+@with_appcontext
+def recommendations_refill_command(days, batch_size):
+    """Rebuild recently active users' queues ahead of their next visit. Safe to run from cron."""
+    click.echo(f"Rebuilt {recommend.refill_active(days=days, batch_size=batch_size)} queue(s).")
+
+
+@click.group("shards")
+def shards_command():
+    """Inspect and rebalance the per-user progress shards."""
+
+
+@shards_command.command("stats")
+@with_appcontext
+def shards_stats_command():
+    """Print row counts per sharded table and shard."""
+    for model in sharded_models():
+        table = model.__table__
+        counts = fan_out(lambda conn: conn.execute(select(func.count()).select_from(table)).scalar())
+        click.echo(f"{table.name}: " + ", ".join(str(count) for count in counts))
+
+
+@shards_command.command("rebalance")
+@click.option("--batch-size", type=int, default=500, help="Rows moved per transaction.")
+@with_appcontext
+def shards_rebalance_command(batch_size):
+    """Move progress rows to the shard that owns their user. Run with the app stopped."""
+    if not current_app.extensions["shards"]:
+        raise click.ClickException("SHARD_DATABASE_URLS is not set; nothing to rebalance.")
+    current_app.extensions["shards"].create_tables()
+    for table, moved in rebalance(batch_size=batch_size).items():
+        click.echo(f"{table}: moved {moved} rows")
+
+
+@click.command("td-scores")
+@with_appcontext
+def td_scores_command():
+    """Rebuild the tower-defense best-run table from saved runs."""
+    click.echo(f"Updated {rebuild_scores()} best run(s).")
+
+
+@click.group("bistro")
+def bistro_command():
+    """Benchmark the Big-O Bistro puzzle snippets."""
+
+
+@bistro_command.command("bench")
+@click.option("--level", "level_numbers", type=int, multiple=True, help="Only these levels (repeatable).")
+@click.option("--repeat", type=int, default=7, show_default=True, help="Timed calls per variant.")
+@click.option("--warmup", type=int, default=2, show_default=True, help="Untimed calls before timing.")
+@click.option("--budget", type=float, default=5.0, show_default=True,
+              help="Seconds per variant before stopping early (at least one timed call).")
+@click.option("--write/--no-write", default=False, help="Store the results for the puzzle pages.")
+def bistro_bench_command(level_numbers, repeat, warmup, budget, write):
+    """Time every original snippet and option; fail if a best option misses limit_ms."""
+    levels = [
+        level for level in bistro_bench.BIG_O_BISTRO_LEVELS
+        if not level_numbers or level["level"] in level_numbers
+    ]
+    try:
+        results = bistro_bench.bench_levels(levels, repeat=repeat, warmup=warmup, budget=budget)
+    except bistro_bench.BenchmarkError as exc:
+        raise click.ClickException(str(exc))
+
+    click.echo(f"{'level':<6} {'variant':<20} {'median ms':>10} {'stdev':>8} {'runs':>5}")
+    for level in levels:
+        measured = results["levels"][str(level["level"])]
+        rows = [("original", measured["original"])] + list(measured["options"].items())
+        for name, timing in rows:
+            marker = " *" if name == level["best_option"] else ""
+            click.echo(
+                f"{level['level']:<6} {name + marker:<20} {timing['median_ms']:>10.3f} "
+                f"{timing['stdev_ms']:>8.3f} {timing['runs']:>5}"
+            )
+        click.echo(f"{'':<6} limit_ms {level['constraints']['limit_ms']}")
+
+    if write:
+        bistro_bench.write_timings(results)
+        click.echo(f"Wrote {bistro_bench.TIMINGS_PATH}")
+    problems = bistro_bench.failures(results, levels)
+    if problems:
+        raise click.ClickException("\n".join(problems))
+
+
+@click.group("xp")
+def xp_command():
+    """Maintain the XP ledger rollups and the per-user XP and streak counters."""
+
+
+@xp_command.command("rollup")
+@click.option("--batch-size", type=int, default=xp_ledger.BATCH_SIZE, show_default=True,
+              help="Ledger events folded per transaction.")
+@click.option("--settle", type=float, default=None,
+              help="Leave events younger than this many seconds for the next run (default: XP_ROLLUP_SETTLE_SECONDS).")
+@with_appcontext
+def xp_rollup_command(batch_size, settle):
+    """Fold new XP events into the daily, weekly and monthly rollups. Safe to run from cron."""
+    if settle is None:
+        settle = current_app.config["XP_ROLLUP_SETTLE_SECONDS"]
+    click.echo(f"Folded {xp_ledger.roll_up(batch_size=batch_size, settle_seconds=settle)} XP event(s).")
+
+
+@xp_command.command("reconcile")
+@click.option("--fix/--report", default=False, help="Correct mismatched counters, or only report them (default).")
+@click.option("--batch-size", type=int, default=reconcile.BATCH_SIZE, show_default=True,
+              help="Users checked per transaction.")
+@click.option("--settle", type=float, default=reconcile.SETTLE_SECONDS, show_default=True,
+              help="Skip users with XP events younger than this many seconds.")
+@click.option("--pause", type=float, default=0.0, show_default=True, help="Seconds to sleep between chunks.")
+@click.option("--show", type=int, default=reconcile.SAMPLE_SIZE, show_default=True, help="Mismatches to list.")
+@with_appcontext
+def xp_reconcile_command(fix, batch_size, settle, pause, show):
+    """Recompute XP and streaks from submissions, completions and admin adjustments."""
+    report = reconcile.reconcile(
+        fix=fix, batch_size=batch_size, settle_seconds=settle, pause=pause, sample_size=show,
+    )
+    for row in report.sample:
+        click.echo(
+            f"user {row.user_id}: xp {row.xp} -> {row.expected_xp}, streak {row.streak} -> {row.expected_streak}"
+        )
+    click.echo(
+        f"Checked {report.checked} user(s) in {report.chunks} chunk(s): {report.mismatched} mismatched, "
+        f"{report.fixed} fixed, {report.conflicts} changed while checking, "
+        f"{report.skipped_active} skipped as recently active. Longest chunk {report.longest_chunk_ms:.0f} ms."
+    )
+
+
+@click.group("analytics")
+def analytics_command():
+    """Maintain the engagement analytics summary tables."""
+
+
+@analytics_command.command("rollup")
+@click.option("--batch-size", type=int, default=analytics.BATCH_SIZE, show_default=True,
+              help="Source rows folded per transaction.")
+@click.option("--settle", type=float, default=None,
+              help="Leave rows younger than this many seconds for the next run (default: ANALYTICS_SETTLE_SECONDS).")
+@click.option("--rebuild", is_flag=True, help="Empty the summaries and fold every row again.")
+@with_appcontext
+def analytics_rollup_command(batch_size, settle, rebuild):
+    """Fold new signups, solves and puzzle completions into the summaries. Safe to run from cron."""
+    if settle is None:
+        settle = current_app.config["ANALYTICS_SETTLE_SECONDS"]
+    if rebuild:
+        analytics.reset()
+    for name, count in analytics.roll_up(batch_size=batch_size, settle_seconds=settle).items():
+        click.echo(f"{name}: folded {count} row(s)")
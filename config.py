@@ -0,0 +1,93 @@
+import os
+from datetime import timedelta
+
+from dotenv import load_dotenv
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+load_dotenv()
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    """Interpret typical truthy strings from environment variables."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+def _parse_rate_limit(value: str) -> tuple[int, int]:
+    """Parse a rate limit string like '10 per minute' into (count, seconds)."""
+    parts = value.strip().lower().split()
+    if len(parts) < 3 or parts[1] != "per":
+        raise ValueError(f"Invalid rate limit format: {value!r}")
+    count = int(parts[0])
+    unit = parts[2]
+    if unit.endswith("s"):
+        unit = unit[:-1]
+    seconds_map = {
+        "second": 1,
+        "minute": 60,
+        "hour": 3600,
+        "day": 86400,
+    }
+    if unit not in seconds_map:
+        raise ValueError(f"Invalid rate limit unit: {unit!r}")
+    return count, seconds_map[unit]
+
+def _env_rate_limit(name: str, default: str) -> tuple[int, int]:
+    value = os.environ.get(name, default)
+    return _parse_rate_limit(value)
+
+
+class Config:
+    """Default settings, read from the environment when this module is imported."""
+
+    SECRET_KEY = os.environ.get("FLASK_SECRET_KEY", "dev-secret")
+    SQLALCHEMY_DATABASE_URI = os.environ.get(
+        "DATABASE_URL",
+        f"sqlite:///{os.path.join(BASE_DIR, 'app.db')}"
+    )
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SHARD_DATABASE_URIS = tuple(
+        uri.strip() for uri in os.environ.get("SHARD_DATABASE_URLS", "").split(",") if uri.strip()
+    )
+    SQLALCHEMY_REPLICA_URIS = tuple(
+        uri.strip() for uri in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if uri.strip()
+    )
+    FRAGMENT_CACHE_ENABLED = _env_flag("FRAGMENT_CACHE_ENABLED", default=True)
+    FRAGMENT_CACHE_TTL = int(os.environ.get("FRAGMENT_CACHE_TTL", 300))
+    APP_CACHE_MAX_ENTRIES = int(os.environ.get("APP_CACHE_MAX_ENTRIES", 2048))
+    COMPRESS_ENABLED = _env_flag("COMPRESS_ENABLED", default=True)
+    COMPRESS_MIN_SIZE = int(os.environ.get("COMPRESS_MIN_SIZE", 500))
+    COMPRESS_LEVEL = int(os.environ.get("COMPRESS_LEVEL", 6))
+    COMPRESS_BR_LEVEL = int(os.environ.get("COMPRESS_BR_LEVEL", 5))
+    ASSET_MANIFEST_ENABLED = _env_flag("ASSET_MANIFEST_ENABLED", default=True)
+    JINJA_BYTECODE_CACHE_ENABLED = _env_flag("JINJA_BYTECODE_CACHE_ENABLED", default=True)
+    JINJA_BYTECODE_CACHE_DIR = os.environ.get("JINJA_BYTECODE_CACHE_DIR")
+    CATALOG_SNAPSHOT_PATH = os.environ.get("CATALOG_SNAPSHOT_PATH")
+    IMAGE_SIZE_BUDGET_KB = int(os.environ.get("IMAGE_SIZE_BUDGET_KB", 200))
+    RATE_LIMIT_AUTH = _env_rate_limit("RATE_LIMIT_AUTH", "10 per minute")
+    RATE_LIMIT_CONTACT = _env_rate_limit("RATE_LIMIT_CONTACT", "5 per minute")
+    RATE_LIMIT_GRADER = _env_rate_limit("RATE_LIMIT_GRADER", "30 per minute")
+    REGEX_GRADER_WORKERS = int(os.environ.get("REGEX_GRADER_WORKERS", 2))
+    REGEX_GRADER_CPU_SECONDS = float(os.environ.get("REGEX_GRADER_CPU_SECONDS", 0.25))
+    RATE_LIMIT_JUDGE = _env_rate_limit("RATE_LIMIT_JUDGE", "20 per minute")
+    JUDGE_WORKERS = int(os.environ.get("JUDGE_WORKERS", 2))
+    JUDGE_QUEUE = int(os.environ.get("JUDGE_QUEUE", 8))
+    JUDGE_USER_CONCURRENCY = int(os.environ.get("JUDGE_USER_CONCURRENCY", 1))
+    JUDGE_CPU_SECONDS = float(os.environ.get("JUDGE_CPU_SECONDS", 2.0))
+    JUDGE_WALL_SECONDS = float(os.environ.get("JUDGE_WALL_SECONDS", 5.0))
+    JUDGE_MEMORY_MB = int(os.environ.get("JUDGE_MEMORY_MB", 256))
+    JUDGE_ISOLATION = _env_flag("JUDGE_ISOLATION", default=True)
+    JUDGE_CACHE_SIZE = int(os.environ.get("JUDGE_CACHE_SIZE", 4096))
+    JUDGE_CACHE_TTL = int(os.environ.get("JUDGE_CACHE_TTL", 86400))
+    XP_ROLLUP_SETTLE_SECONDS = float(os.environ.get("XP_ROLLUP_SETTLE_SECONDS", 2))
+    ANALYTICS_SETTLE_SECONDS = float(os.environ.get("ANALYTICS_SETTLE_SECONDS", 2))
+    MIGRATION_BATCH_SIZE = int(os.environ.get("MIGRATION_BATCH_SIZE", 500))
+    MIGRATION_BATCH_PAUSE = float(os.environ.get("MIGRATION_BATCH_PAUSE", 0.01))
+    MIGRATION_LOCK_TIMEOUT = float(os.environ.get("MIGRATION_LOCK_TIMEOUT", 60))
+    MIGRATION_LOCK_PATH = os.environ.get("MIGRATION_LOCK_PATH")
+    REMEMBER_COOKIE_DURATION = timedelta(days=30)
+    SESSION_COOKIE_SAMESITE = "Lax"
+    # Default to secure cookies only when explicitly requested so local dev/tests keep working.
+    SESSION_COOKIE_SECURE = _env_flag("SESSION_COOKIE_SECURE", default=False)
+    PREFERRED_URL_SCHEME = "https"
@@ -0,0 +1,9 @@
+from flask_login import LoginManager
+from flask_sqlalchemy import SQLAlchemy
+
+from routing import RoutingSession
+
+# Created unbound so models and blueprints can import them without an app;
+# ``factory.create_app`` binds both with ``init_app``.
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+login_manager = LoginManager()
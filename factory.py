@@ -0,0 +1,82 @@
+from datetime import datetime
+
+from flask import Flask, flash, redirect, url_for
+from flask_login import current_user, logout_user
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from assets import init_assets
+from blueprints import register_blueprints
+from caching import init_caching
+from catalog import init_catalog
+from commands import (
+    analytics_command,
+    bistro_command,
+    catalog_command,
+    difficulty_scores_command,
+    migrate_command,
+    recommendations_command,
+    seed_command,
+    shards_command,
+    td_scores_command,
+    xp_command,
+)
+from config import Config
+from extensions import db, login_manager
+from judge import init_judge
+from models import DataVersion
+from puzzles.regex_grader import init_regex_grader
+from ratelimit import init_rate_limits
+from replicas import init_replicas
+from sharding import init_shards
+
+
+def create_app(config=None):
+    """Build the Flask app.
+
+    Nothing here touches the database: tables and seed data are created by
+    ``flask migrate`` / ``flask seed`` (or ``python app.py``), so importing the app stays cheap
+    for every Gunicorn worker, test session and CLI call.
+    """
+    app = Flask(__name__, static_folder="static", template_folder="templates")
+    app.config.from_object(Config)
+    if config:
+        app.config.update(config)
+
+    db.init_app(app)
+    login_manager.init_app(app)
+    login_manager.login_view = "auth.login"
+
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1, x_prefix=1)
+    init_assets(app)
+    init_caching(app, db, DataVersion)
+    init_catalog(app, db)
+    init_replicas(app, db)
+    init_shards(app)
+    init_rate_limits(app)
+    init_regex_grader(app)
+    init_judge(app)
+    register_blueprints(app)
+    app.cli.add_command(migrate_command)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(catalog_command)
+    app.cli.add_command(difficulty_scores_command)
+    app.cli.add_command(recommendations_command)
+    app.cli.add_command(shards_command)
+    app.cli.add_command(td_scores_command)
+    app.cli.add_command(bistro_command)
+    app.cli.add_command(xp_command)
+    app.cli.add_command(analytics_command)
+
+    # Make now() available in templates (used by base.html footer)
+    @app.context_processor
+    def inject_now():
+        return {"now": datetime.utcnow}
+
+    @app.before_request
+    def enforce_active_account():
+        if current_user.is_authenticated and not current_user.active:
+            logout_user()
+            flash("Your account has been deactivated. Contact an admin to restore access.")
+            return redirect(url_for("auth.login"))
+
+    return app
@@ -0,0 +1,34 @@
+"""Gunicorn settings. Gunicorn reads ./gunicorn.conf.py automatically.
+
+The app is imported and warmed once in the master (``preload_app``) and the
+workers fork from it, sharing those pages copy-on-write. WEB_CONCURRENCY and
+WEB_THREADS override the derived worker/thread counts.
+"""
+import os
+
+from prefork import after_fork, effective_cpu_count, freeze_heap, warm_app, worker_settings
+
+preload_app = True
+
+_workers, _threads = worker_settings(
+    cpus=effective_cpu_count(),
+    io_ratio=float(os.environ.get("WEB_IO_RATIO", 0.5)),
+)
+workers = int(os.environ.get("WEB_CONCURRENCY", _workers))
+threads = int(os.environ.get("WEB_THREADS", _threads))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+
+
+def when_ready(server):
+    # Runs in the master after the app is loaded and before any worker is spawned.
+    if os.environ.get("WEB_WARMUP", "1") == "0":
+        return
+    timings = warm_app(server.app.wsgi())
+    freeze_heap()
+    summary = ", ".join(f"{name} {seconds * 1000:.1f}ms" for name, seconds in timings.items())
+    server.log.info("Warmed caches before fork: %s", summary)
+
+
+def post_fork(server, worker):
+    after_fork(server.app.wsgi())
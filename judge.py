@@ -0,0 +1,261 @@
+"""Check challenge solutions against the challenge's test cases.
+
+A challenge with ``test_cases`` is solved by passing its tests, not by
+clicking "Mark as Solved". The suite is JSON::
+
+    {"entry": "solve",
+     "cases": [{"args": ["hello"], "expected": "olleh"},
+               {"args": ["racecar!"], "expected": "!racecar", "hidden": true}]}
+
+Solutions run through ``sandbox.python_runner`` in a ``WorkerPool`` of warm
+interpreters (``JUDGE_WORKERS``). Each check forks a throwaway child with
+CPU, memory and output limits, so a typical check takes a few milliseconds
+of CPU instead of an interpreter start. Two limits keep a burst of checks
+from tying up the web workers:
+
+* at most ``JUDGE_QUEUE`` checks wait for a free sandbox worker; beyond
+  that ``PoolBusy`` is raised at once (503);
+* each user may have ``JUDGE_USER_CONCURRENCY`` checks in flight; more
+  raise ``TooManyChecks`` (429).
+
+Popular challenges get the same solution over and over, so verdicts are
+cached by ``(suite_version, solution_hash)``. The suite version hashes the
+test cases and limits, so editing a challenge's tests changes every key
+and old verdicts are never looked up again. The solution hash is taken
+over the AST, so whitespace, comments and docstrings do not matter. Only
+``passed`` and ``failed`` verdicts are stored: time and crash verdicts
+depend on load, and error tracebacks quote line numbers.
+"""
+import ast
+import hashlib
+import json
+import threading
+from contextlib import contextmanager
+
+from flask import current_app
+
+from caching import AppCache
+from sandbox import PoolBusy, SandboxError, WorkerPool
+from sandbox.python_runner import run_solution
+
+MAX_SOURCE_LENGTH = 20_000
+MAX_CASES = 50
+
+
+class TooManyChecks(Exception):
+    """The user already has as many checks running as they may."""
+
+
+def parse_test_cases(text: str | None) -> dict | None:
+    """Validate a test-suite JSON string; ``None`` when there is none.
+
+    Raises ``ValueError`` with a message for the admin form.
+    """
+    if not text or not text.strip():
+        return None
+    try:
+        spec = json.loads(text)
+    except ValueError as exc:
+        raise ValueError(f"Test cases are not valid JSON: {exc}") from None
+    if isinstance(spec, list):
+        spec = {"cases": spec}
+    if not isinstance(spec, dict):
+        raise ValueError("Test cases must be an object with a list of cases.")
+    entry = spec.get("entry", "solve")
+    if not isinstance(entry, str) or not entry.isidentifier():
+        raise ValueError("`entry` must be a function name.")
+    cases = spec.get("cases")
+    if not isinstance(cases, list) or not cases:
+        raise ValueError("Add at least one test case.")
+    if len(cases) > MAX_CASES:
+        raise ValueError(f"A challenge may have at most {MAX_CASES} test cases.")
+    for number, case in enumerate(cases, 1):
+        if not isinstance(case, dict) or "expected" not in case or not isinstance(case.get("args", []), list):
+            raise ValueError(f"Case {number} needs a list of `args` and an `expected` value.")
+    return {
+        "entry": entry,
+        "cases": [
+            {"args": case.get("args", []), "expected": case["expected"], "hidden": bool(case.get("hidden"))}
+            for case in cases
+        ],
+    }
+
+
+def suite_version(spec: dict, limits: dict) -> str:
+    """Changes whenever the cases, the entry point or the limits change."""
+    payload = json.dumps([spec, limits], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def solution_hash(source: str) -> str | None:
+    """Hash of ``source``'s syntax tree; ``None`` if it does not parse."""
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError, RecursionError, MemoryError):
+        return None
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)) and node.body:
+            first = node.body[0]
+            if isinstance(first, ast.Expr) and isinstance(first.value, ast.Constant) and isinstance(first.value.value, str):
+                node.body = node.body[1:] or [ast.Pass()]
+    try:
+        dumped = ast.dump(tree)
+    except RecursionError:
+        return None
+    return hashlib.sha256(dumped.encode()).hexdigest()
+
+
+class VerdictCache:
+    """Verdicts by ``(suite version, solution hash)``, with hit and CPU-saved counters."""
+
+    CACHEABLE = frozenset({"passed", "failed"})
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 86400):
+        self.enabled = max_entries > 0
+        self.store = AppCache(max_entries=max(max_entries, 1), default_ttl=ttl)
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+    def _reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.saved_cpu_ms = 0.0
+
+    def get(self, key) -> dict | None:
+        if not self.enabled or key is None:
+            return None
+        verdict = self.store.get(key)
+        with self._lock:
+            if verdict is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_cpu_ms += verdict.get("cpu_ms", 0.0)
+        return {**verdict, "cases": [dict(case) for case in verdict["cases"]], "cached": True}
+
+    def put(self, key, verdict: dict):
+        if self.enabled and key is not None and verdict["status"] in self.CACHEABLE:
+            self.store.set(key, verdict)
+
+    def clear(self):
+        self.store.clear()
+        with self._lock:
+            self._reset_stats()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.store),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_cpu_seconds": round(self.saved_cpu_ms / 1000, 3),
+            }
+
+    def after_fork(self):
+        """Keep verdicts inherited from the parent; count this worker's lookups from zero."""
+        self.store.after_fork()
+        self._lock = threading.Lock()
+        self._reset_stats()
+
+
+class Judge:
+    """A sandbox pool, the per-user cap on checks in flight and the verdict cache."""
+
+    def __init__(self, pool: WorkerPool, limits: dict, per_user: int, cache: VerdictCache | None = None):
+        self.pool = pool
+        self.limits = limits
+        self.per_user = per_user
+        self.cache = cache or VerdictCache(max_entries=0)
+        self._lock = threading.Lock()
+        self._running: dict[int, int] = {}
+
+    @contextmanager
+    def _slot(self, user_id):
+        with self._lock:
+            if self._running.get(user_id, 0) >= self.per_user:
+                raise TooManyChecks()
+            self._running[user_id] = self._running.get(user_id, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._running[user_id] -= 1
+                if not self._running[user_id]:
+                    del self._running[user_id]
+
+    def check(self, source: str, spec: dict, user_id=None) -> dict:
+        """Run ``source`` against a parsed suite and return the verdict.
+
+        A cached verdict comes back without running anything and has
+        ``cached: true``. Raises ``PoolBusy`` and ``TooManyChecks``; other
+        sandbox failures come back as a ``crashed`` verdict.
+        """
+        digest = solution_hash(source)
+        key = (suite_version(spec, self.limits), digest) if digest else None
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        with self._slot(user_id):
+            try:
+                verdict = self.pool.call(run_solution, source, spec["entry"], spec["cases"], self.limits)
+            except PoolBusy:
+                raise
+            except SandboxError:
+                current_app.logger.exception("Solution check failed")
+                return {
+                    "status": "crashed", "passed": 0, "total": len(spec["cases"]), "cases": [],
+                    "output": "", "output_truncated": False, "error": "The solution could not be checked.",
+                    "cached": False,
+                }
+        self.cache.put(key, verdict)
+        return {**verdict, "cached": False}
+
+    def start(self):
+        self.pool.start()
+
+    def close(self):
+        self.pool.close()
+
+    def after_fork(self):
+        self._lock = threading.Lock()
+        self._running = {}
+        self.cache.after_fork()
+        self.pool.after_fork()
+
+
+def init_judge(app):
+    app.config.setdefault("JUDGE_WORKERS", 2)
+    app.config.setdefault("JUDGE_QUEUE", 8)
+    app.config.setdefault("JUDGE_USER_CONCURRENCY", 1)
+    app.config.setdefault("JUDGE_CPU_SECONDS", 2.0)
+    app.config.setdefault("JUDGE_WALL_SECONDS", 5.0)
+    app.config.setdefault("JUDGE_MEMORY_MB", 256)
+    app.config.setdefault("JUDGE_ISOLATION", True)
+    app.config.setdefault("JUDGE_CACHE_SIZE", 4096)
+    app.config.setdefault("JUDGE_CACHE_TTL", 86400)
+    limits = {
+        "cpu_seconds": app.config["JUDGE_CPU_SECONDS"],
+        "wall_seconds": app.config["JUDGE_WALL_SECONDS"],
+        "memory_mb": app.config["JUDGE_MEMORY_MB"],
+        "isolation": app.config["JUDGE_ISOLATION"],
+    }
+    pool = WorkerPool(
+        size=app.config["JUDGE_WORKERS"],
+        # The worker itself only forks and waits; the child enforces the solution's limits.
+        cpu_seconds=1.0,
+        wall_seconds=limits["wall_seconds"] + 2,
+        max_waiting=app.config["JUDGE_QUEUE"],
+        preload=("sandbox.python_runner",),
+    )
+    cache = VerdictCache(max_entries=app.config["JUDGE_CACHE_SIZE"], ttl=app.config["JUDGE_CACHE_TTL"])
+    app.extensions["judge"] = Judge(pool, limits, app.config["JUDGE_USER_CONCURRENCY"], cache)
+
+
+def check_solution(challenge, source: str, user_id=None) -> dict | None:
+    """Verdict for ``source`` on ``challenge``; ``None`` if it has no tests."""
+    spec = parse_test_cases(challenge.test_cases)
+    if spec is None:
+        return None
+    return current_app.extensions["judge"].check(source, spec, user_id)
@@ -0,0 +1,30 @@
+from .lock import MigrationLockTimeout, default_lock_path, file_lock, migration_lock
+from .runner import (
+    Migration,
+    MigrationContext,
+    MigrationResult,
+    StepResult,
+    applied_versions,
+    current_version,
+    format_report,
+    run_migrations,
+    schema_version,
+)
+from .steps import MIGRATIONS
+
+__all__ = [
+    "MIGRATIONS",
+    "Migration",
+    "MigrationContext",
+    "MigrationLockTimeout",
+    "MigrationResult",
+    "StepResult",
+    "applied_versions",
+    "current_version",
+    "default_lock_path",
+    "file_lock",
+    "format_report",
+    "migration_lock",
+    "run_migrations",
+    "schema_version",
+]
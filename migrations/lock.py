@@ -0,0 +1,93 @@
+import os
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Arbitrary constant shared by every process that migrates this app.
+PG_ADVISORY_LOCK_KEY = 0x5359_4E54
+
+
+class MigrationLockTimeout(RuntimeError):
+    """Another process held the migration lock for longer than the timeout."""
+
+
+def default_lock_path(engine, instance_path: str) -> str:
+    """Lock next to a SQLite database file, otherwise in the instance folder."""
+    database = engine.url.database
+    if engine.url.get_backend_name() == "sqlite" and database and database != ":memory:":
+        return f"{os.path.abspath(database)}.migrate.lock"
+    return os.path.join(instance_path, "migrate.lock")
+
+
+def _try_lock(fd) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path: str, timeout: float = 60.0, poll: float = 0.1):
+    """Exclusive advisory lock on ``path`` that all local processes respect.
+
+    The OS releases it if the holder dies, so a crashed deploy never leaves
+    a stale lock behind.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        while not _try_lock(fd):
+            if time.monotonic() >= deadline:
+                raise MigrationLockTimeout(f"timed out after {timeout:.0f}s waiting for {path}")
+            time.sleep(poll)
+        try:
+            yield
+        finally:
+            _unlock(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def migration_lock(engine, lock_path: str, timeout: float = 60.0):
+    """Serialize migrations across processes.
+
+    PostgreSQL uses a session advisory lock so workers on different hosts are
+    covered; every other backend falls back to a file lock, which covers all
+    processes on one machine (the SQLite deployment model).
+    """
+    if engine.url.get_backend_name() != "postgresql":
+        with file_lock(lock_path, timeout=timeout):
+            yield
+        return
+    with engine.connect() as conn:
+        conn.execute(text("SELECT set_config('lock_timeout', :ms, false)"), {"ms": f"{int(timeout * 1000)}ms"})
+        try:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": PG_ADVISORY_LOCK_KEY})
+        except Exception as exc:
+            raise MigrationLockTimeout(f"timed out after {timeout:.0f}s waiting for the advisory lock") from exc
+        conn.commit()
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PG_ADVISORY_LOCK_KEY})
+            conn.commit()
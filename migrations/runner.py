@@ -0,0 +1,240 @@
+import time
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, insert, select, text
+
+from .lock import migration_lock
+
+DEFAULT_BATCH_SIZE = 500
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("name", String(120), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+    Column("duration_ms", Integer, nullable=False, default=0),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    apply: Callable
+
+
+class StepResult(NamedTuple):
+    description: str
+    rows: int | None  # None for steps that are not row backfills
+    batches: int | None
+    seconds: float
+
+
+class MigrationResult(NamedTuple):
+    version: int
+    name: str
+    applied: bool
+    seconds: float
+    steps: tuple
+
+
+class MigrationContext:
+    """Operations available to a migration.
+
+    Every operation records a ``StepResult``. In dry-run mode nothing is
+    written: schema changes are only described and backfills report how many
+    rows they would touch.
+    """
+
+    def __init__(self, engine, metadata, dry_run=False, batch_size=DEFAULT_BATCH_SIZE, pause=0.0, planned=None):
+        self.engine = engine
+        self.metadata = metadata
+        self.dry_run = dry_run
+        self.batch_size = max(1, int(batch_size))
+        self.pause = pause
+        self.steps: list[StepResult] = []
+        # Tables and columns earlier dry-run steps would have created, shared
+        # across migrations so later steps see the planned schema.
+        self._planned = planned if planned is not None else {"tables": set(), "columns": set()}
+
+    @property
+    def dialect(self) -> str:
+        return self.engine.dialect.name
+
+    def quote(self, name: str) -> str:
+        return self.engine.dialect.identifier_preparer.quote(name)
+
+    def has_table(self, table: str) -> bool:
+        return table in self._planned["tables"] or inspect(self.engine).has_table(table)
+
+    def has_column(self, table: str, column: str) -> bool:
+        if (table, column) in self._planned["columns"]:
+            return True
+        if table in self._planned["tables"]:
+            return column in self.metadata.tables[table].c
+        if not self.has_table(table):
+            return False
+        return column in {col["name"] for col in inspect(self.engine).get_columns(table)}
+
+    def _record(self, description, started, rows=None, batches=None):
+        self.steps.append(StepResult(description, rows, batches, time.perf_counter() - started))
+
+    def create_tables(self):
+        """Create any table in the metadata that does not exist yet."""
+        started = time.perf_counter()
+        missing = [t.name for t in self.metadata.sorted_tables if not self.has_table(t.name)]
+        if self.dry_run:
+            self._planned["tables"].update(missing)
+        elif missing:
+            self.metadata.create_all(self.engine)
+        names = ", ".join(missing) if len(missing) <= 3 else f"{len(missing)} tables"
+        self._record(f"create tables: {names or 'none missing'}", started)
+
+    def add_column(self, table: str, column: str, ddl: str):
+        """``ALTER TABLE ... ADD COLUMN`` unless a fresh ``create_all`` already made it.
+
+        Skipped when the database does not have ``table`` (progress shards).
+        """
+        started = time.perf_counter()
+        if self.has_column(table, column) or not self.has_table(table):
+            return
+        if self.dry_run:
+            self._planned["columns"].add((table, column))
+        else:
+            with self.engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {self.quote(table)} ADD COLUMN {self.quote(column)} {ddl}"))
+        self._record(f"add column {table}.{column}", started)
+
+    def execute(self, description: str, sql: str, params=None):
+        started = time.perf_counter()
+        if not self.dry_run:
+            with self.engine.begin() as conn:
+                conn.execute(text(sql), params or {})
+        self._record(description, started)
+
+    def backfill(self, table: str, assignments: str, where: str, params=None, key: str = "id"):
+        """Run ``UPDATE table SET assignments WHERE where`` in primary-key ranges.
+
+        Each range of ``batch_size`` keys is its own short transaction, so on
+        SQLite the write lock is released between chunks and request traffic
+        can interleave instead of stalling behind one table-wide UPDATE.
+        """
+        started = time.perf_counter()
+        description = f"backfill {table}.{assignments.split('=', 1)[0].strip()}"
+        if not self.has_table(table):
+            self._record(description, started, rows=0, batches=0)
+            return
+        quoted, quoted_key = self.quote(table), self.quote(key)
+        params = dict(params or {})
+
+        if self.dry_run:
+            if table in self._planned["tables"]:
+                rows = 0
+            else:
+                if any(t == table for t, _ in self._planned["columns"]):
+                    sql = f"SELECT COUNT(*) FROM {quoted}"  # column not added yet: assume every row
+                else:
+                    sql = f"SELECT COUNT(*) FROM {quoted} WHERE {where}"
+                with self.engine.connect() as conn:
+                    rows = conn.execute(text(sql), params).scalar() or 0
+            batches = -(-rows // self.batch_size)
+            self._record(description, started, rows=rows, batches=batches)
+            return
+
+        with self.engine.connect() as conn:
+            low, high = conn.execute(text(f"SELECT MIN({quoted_key}), MAX({quoted_key}) FROM {quoted}")).one()
+        rows = batches = 0
+        if low is not None:
+            update = text(
+                f"UPDATE {quoted} SET {assignments} "
+                f"WHERE {quoted_key} >= :_low AND {quoted_key} < :_high AND ({where})"
+            )
+            start = low
+            while start <= high:
+                with self.engine.begin() as conn:
+                    result = conn.execute(update, {**params, "_low": start, "_high": start + self.batch_size})
+                rows += max(result.rowcount, 0)
+                batches += 1
+                start += self.batch_size
+                if self.pause and start <= high:
+                    time.sleep(self.pause)
+        self._record(description, started, rows=rows, batches=batches)
+
+
+def applied_versions(engine) -> set[int]:
+    if not inspect(engine).has_table(schema_version.name):
+        return set()
+    with engine.connect() as conn:
+        return set(conn.execute(select(schema_version.c.version)).scalars())
+
+
+def current_version(engine) -> int:
+    if not inspect(engine).has_table(schema_version.name):
+        return 0
+    with engine.connect() as conn:
+        return conn.execute(select(func.max(schema_version.c.version))).scalar() or 0
+
+
+def _run_pending(engine, metadata, migrations, dry_run, batch_size, pause):
+    results = []
+    planned = {"tables": set(), "columns": set()}
+    applied = applied_versions(engine)
+    for migration in sorted(migrations):
+        if migration.version in applied:
+            continue
+        ctx = MigrationContext(engine, metadata, dry_run, batch_size, pause, planned)
+        started = time.perf_counter()
+        migration.apply(ctx)
+        seconds = time.perf_counter() - started
+        if not dry_run:
+            with engine.begin() as conn:
+                conn.execute(
+                    insert(schema_version).values(
+                        version=migration.version,
+                        name=migration.name,
+                        applied_at=datetime.now(timezone.utc),
+                        duration_ms=round(seconds * 1000),
+                    )
+                )
+        results.append(MigrationResult(migration.version, migration.name, not dry_run, seconds, tuple(ctx.steps)))
+    return results
+
+
+def run_migrations(
+    engine,
+    metadata,
+    migrations,
+    lock_path: str,
+    dry_run: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    pause: float = 0.0,
+    lock_timeout: float = 60.0,
+) -> list[MigrationResult]:
+    """Apply every migration not yet recorded in ``schema_version``, in order.
+
+    Concurrent callers (e.g. several workers running the release step) queue
+    on the migration lock; whoever gets it second re-reads ``schema_version``
+    and finds nothing left to do. A dry run takes no lock and writes nothing.
+    """
+    if dry_run:
+        return _run_pending(engine, metadata, migrations, True, batch_size, pause)
+    with migration_lock(engine, lock_path, timeout=lock_timeout):
+        schema_version.create(engine, checkfirst=True)
+        return _run_pending(engine, metadata, migrations, False, batch_size, pause)
+
+
+def format_report(results, dry_run: bool = False) -> list[str]:
+    """Human-readable timing report, one line per migration and step."""
+    if not results:
+        return ["No pending migrations."]
+    lines = []
+    status = "would apply" if dry_run else "applied"
+    for result in results:
+        lines.append(f"{result.version:04d} {result.name:<32} {status:<11} {result.seconds * 1000:9.1f} ms")
+        for step in result.steps:
+            detail = f"{step.rows} rows in {step.batches} batches" if step.rows is not None else ""
+            lines.append(f"       {step.description:<56} {detail:>24} {step.seconds * 1000:8.1f} ms")
+    total = sum(result.seconds for result in results)
+    lines.append(f"{len(results)} migration(s) {status} in {total * 1000:.1f} ms")
+    return lines
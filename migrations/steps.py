@@ -0,0 +1,157 @@
+"""Ordered schema migrations. Append new ones; never renumber or edit applied ones.
+
+Each migration must also be correct on a database that ``create_tables``
+just built from the current models, which is why column additions go
+through ``ctx.add_column`` (a no-op when the column already exists).
+Migrations also run on progress shards, which hold only the sharded tables:
+steps on a table the database does not have are skipped.
+"""
+from datetime import datetime, timezone
+
+from .runner import Migration
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, name: str):
+    def register(fn):
+        MIGRATIONS.append(Migration(version, name, fn))
+        return fn
+    return register
+
+
+@migration(1, "create_tables")
+def create_tables(ctx):
+    """Create missing tables; switch SQLite to WAL for concurrent readers."""
+    ctx.create_tables()
+    if ctx.dialect == "sqlite":
+        ctx.execute("enable WAL journal", "PRAGMA journal_mode=WAL")
+
+
+@migration(2, "user_account_columns")
+def user_account_columns(ctx):
+    ctx.add_column("user", "active", "BOOLEAN DEFAULT TRUE")
+    ctx.add_column("user", "show_on_leaderboard", "BOOLEAN DEFAULT TRUE")
+    ctx.add_column("user", "last_login", "TIMESTAMP")
+    ctx.add_column("user", "created_at", "TIMESTAMP")
+    ctx.backfill("user", "show_on_leaderboard = TRUE", "show_on_leaderboard IS NULL")
+    ctx.backfill("user", "created_at = :now", "created_at IS NULL", {"now": datetime.now(timezone.utc)})
+
+
+@migration(3, "joke_entry_type")
+def joke_entry_type(ctx):
+    ctx.add_column("joke", "entry_type", "VARCHAR(20) NOT NULL DEFAULT 'fun'")
+
+
+@migration(4, "challenge_publishing_columns")
+def challenge_publishing_columns(ctx):
+    ctx.add_column("challenge", "tags", "TEXT DEFAULT ''")
+    ctx.add_column("challenge", "status", "VARCHAR(20) NOT NULL DEFAULT 'draft'")
+    ctx.add_column("challenge", "published_at", "TIMESTAMP")
+    ctx.backfill(
+        "challenge",
+        "published_at = :now",
+        "status = 'published' AND published_at IS NULL",
+        {"now": datetime.now(timezone.utc)},
+    )
+
+
+@migration(5, "normalize_topics")
+def normalize_topics(ctx):
+    """Lower-case and trim topics once, instead of rescanning on every boot."""
+    ctx.backfill("dungeon", "topic = LOWER(TRIM(topic))", "topic <> LOWER(TRIM(topic))")
+    ctx.backfill(
+        "challenge",
+        "topic = NULLIF(LOWER(TRIM(topic)), '')",
+        "topic IS NOT NULL AND (topic <> LOWER(TRIM(topic)) OR TRIM(topic) = '')",
+    )
+
+
+@migration(6, "challenge_status_index")
+def challenge_status_index(ctx):
+    """Let list counts and status tallies scan a narrow index, not the wide rows."""
+    if not ctx.has_table("challenge"):
+        return
+    ctx.execute(
+        "index challenge.status",
+        "CREATE INDEX IF NOT EXISTS ix_challenge_status ON challenge (status)",
+    )
+
+
+@migration(7, "tower_defense_patches")
+def tower_defense_patches(ctx):
+    """Versioned, compressed tower-defense state plus its pending patch log."""
+    ctx.create_tables()
+    ctx.add_column("debugger_tower_defense_state", "version", "INTEGER NOT NULL DEFAULT 0")
+    ctx.add_column("debugger_tower_defense_state", "base_version", "INTEGER NOT NULL DEFAULT 0")
+    # CompressedJSON reads raw JSON bytes as well, so old rows only change type.
+    if ctx.dialect == "postgresql" and ctx.has_table("debugger_tower_defense_state"):
+        ctx.execute(
+            "state column to bytea",
+            "ALTER TABLE debugger_tower_defense_state "
+            "ALTER COLUMN state TYPE BYTEA USING convert_to(state::text, 'UTF8')",
+        )
+    elif ctx.dialect == "sqlite":
+        ctx.backfill("debugger_tower_defense_state", "state = CAST(state AS BLOB)", "typeof(state) = 'text'")
+
+
+@migration(8, "tower_defense_scores")
+def tower_defense_scores(ctx):
+    """Indexed best-run table; fill it with ``flask td-scores`` afterwards."""
+    ctx.create_tables()
+
+
+@migration(9, "challenge_test_cases")
+def challenge_test_cases(ctx):
+    """Per-challenge test suites for the solution checker."""
+    ctx.add_column("challenge", "test_cases", "TEXT")
+
+
+@migration(10, "xp_ledger")
+def xp_ledger(ctx):
+    """XP ledger and rollup tables, opened with each user's current XP as one event."""
+    ctx.create_tables()
+    if not ctx.has_table("user"):
+        return
+    user = ctx.quote("user")
+    ctx.execute(
+        "opening XP balances",
+        "INSERT INTO xp_event (user_id, source, delta, created_at) "
+        f"SELECT id, 'opening', xp, CURRENT_TIMESTAMP FROM {user} "
+        "WHERE xp IS NOT NULL AND xp <> 0 "
+        "AND id NOT IN (SELECT user_id FROM xp_event WHERE source = 'opening')",
+    )
+
+
+@migration(11, "progress_user_indexes")
+def progress_user_indexes(ctx):
+    """Range scans by user for ``flask xp reconcile`` and the admin audit trail."""
+    if ctx.has_table("submission"):
+        ctx.execute(
+            "index submission.user_id",
+            "CREATE INDEX IF NOT EXISTS ix_submission_user_id ON submission (user_id)",
+        )
+    if ctx.has_table("audit_log"):
+        ctx.execute(
+            "index audit_log.target_user_id",
+            "CREATE INDEX IF NOT EXISTS ix_audit_log_target_user_id ON audit_log (target_user_id)",
+        )
+
+
+@migration(12, "analytics_rollups")
+def analytics_rollups(ctx):
+    """Engagement summary tables; fill them with ``flask analytics rollup``."""
+    ctx.create_tables()
+
+
+@migration(13, "challenge_stats")
+def challenge_stats(ctx):
+    """Per-challenge solve counters and the calibrated difficulty score."""
+    ctx.add_column("challenge", "difficulty_score", "FLOAT")
+    ctx.create_tables()
+
+
+@migration(14, "challenge_queues")
+def challenge_queues(ctx):
+    """Per-user recommendation queues; ``flask recommendations refill`` fills them ahead of time."""
+    ctx.create_tables()
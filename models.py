@@ -0,0 +1,259 @@
+import json
+import zlib
+from datetime import datetime, timezone
+
+from flask_login import UserMixin
+from sqlalchemy.orm import deferred
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from extensions import db
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON stored as a zlib-compressed blob.
+
+    Also reads uncompressed JSON, as left by rows written before the column
+    was compressed.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        value = bytes(value)
+        if value[:1] == b"\x78":  # zlib header
+            value = zlib.decompress(value)
+        return json.loads(value)
+
+
+class User(db.Model, UserMixin):
+    __stamped__ = True
+    # Written by every solve, XP award and login; changes to these alone leave the stamp alone.
+    __unstamped__ = frozenset({"xp", "streak", "last_login", "last_active_date"})
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(80), unique=True, nullable=False)
+    email = db.Column(db.String(120), unique=True)
+    password_hash = db.Column(db.String(200))
+    active = db.Column(db.Boolean, default=True, nullable=False)
+    show_on_leaderboard = db.Column(db.Boolean, default=True, nullable=False)
+    xp = db.Column(db.Integer, default=0)
+    streak = db.Column(db.Integer, default=0)
+    last_login = db.Column(db.DateTime, nullable=True)
+    last_active_date = db.Column(db.Date)
+    is_admin = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+class Challenge(db.Model):
+    __stamped__ = True
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(200), nullable=False)
+    # Large bodies are loaded together on first access; list views never need them.
+    prompt = deferred(db.Column(db.Text, nullable=False), group="content")
+    solution = deferred(db.Column(db.Text), group="content")
+    hints = deferred(db.Column(db.Text), group="content")
+    # JSON test suite run by judge.py; NULL means solves are self-reported.
+    test_cases = deferred(db.Column(db.Text), group="content")
+    language = db.Column(db.String(40), default="General")
+    difficulty = db.Column(db.String(30), default="Easy")
+    # 0 (easiest) to 100, from ``flask difficulty-scores``; NULL until calibrated.
+    difficulty_score = db.Column(db.Float, nullable=True)
+    topic = db.Column(db.String(60))
+    tags = db.Column(db.Text, default="")
+    status = db.Column(db.String(20), default="draft", nullable=False, index=True)
+    published_at = db.Column(db.DateTime, nullable=True)
+    added_by = db.Column(db.Integer, db.ForeignKey("user.id"))
+
+# Per-user progress tables name their shard key; see sharding.py.
+class Submission(db.Model):
+    __shard_key__ = "user_id"
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), index=True)
+    challenge_id = db.Column(db.Integer, db.ForeignKey("challenge.id"))
+    timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ChallengeView(db.Model):
+    """When a user was first shown a challenge, the start of their time to solve it."""
+    __shard_key__ = "user_id"
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    challenge_id = db.Column(db.Integer, db.ForeignKey("challenge.id"), nullable=False)
+    viewed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    __table_args__ = (db.UniqueConstraint('user_id', 'challenge_id'),)
+
+class ChallengeQueue(db.Model):
+    """Challenges recommended to a user next, best first; kept short and refilled by ``recommend``."""
+    __shard_key__ = "user_id"
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, unique=True)
+    challenge_ids = db.Column(db.JSON, nullable=False, default=list)
+    built_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class Joke(db.Model):
+    __stamped__ = True
+    id = db.Column(db.Integer, primary_key=True)
+    text = db.Column(db.Text, nullable=False)
+    entry_type = db.Column(db.String(20), default="fun", nullable=False)
+
+# New models for Dungeons feature
+class Dungeon(db.Model):
+    __stamped__ = True
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    description = db.Column(db.Text)
+    topic = db.Column(db.String(60), nullable=False, index=True) # Links to Challenge.topic
+    unlock_xp = db.Column(db.Integer, default=0) # XP required to see/enter
+    reward_xp = db.Column(db.Integer, default=50) # Bonus XP for completion
+
+class DungeonCompletion(db.Model):
+    __shard_key__ = "user_id"
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    dungeon_id = db.Column(db.Integer, db.ForeignKey("dungeon.id"), nullable=False)
+    completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.UniqueConstraint('user_id', 'dungeon_id'),)
+
+class PuzzleCompletion(db.Model):
+    __shard_key__ = "user_id"
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    puzzle_name = db.Column(db.String(80), nullable=False) # e.g., "bit_flipper_lvl_1"
+    completed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (db.UniqueConstraint('user_id', 'puzzle_name'),)
+
+class DebuggerTowerDefenseState(db.Model):
+    __shard_key__ = "user_id"
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, unique=True)
+    # ``state`` is the snapshot as of ``base_version``; the patches after it,
+    # up to ``version``, live in DebuggerTowerDefensePatch.
+    state = db.Column(CompressedJSON, nullable=False, default=dict)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    base_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class DebuggerTowerDefensePatch(db.Model):
+    __shard_key__ = "user_id"
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    ops = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    __table_args__ = (db.UniqueConstraint('user_id', 'version'),)
+
+class TowerDefenseScore(db.Model):
+    """Best tower-defense run per user, copied out of the saved state for ranking."""
+    __stamped__ = True
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    best_wave = db.Column(db.Integer, nullable=False)
+    best_kills = db.Column(db.Integer, nullable=False)
+    reached_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+    __table_args__ = (db.Index("ix_tower_defense_score_rank", "best_wave", "best_kills", "user_id"),)
+
+
+class XpEvent(db.Model):
+    """Append-only XP ledger, written in the same transaction as each change to ``User.xp``."""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    source = db.Column(db.String(20), nullable=False)  # challenge, dungeon, puzzle, admin, opening, reconcile
+    delta = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class XpRollup(db.Model):
+    """XP gained per user per day, ISO week or month, folded in from ``XpEvent``."""
+    period = db.Column(db.String(5), primary_key=True)  # day, week, month
+    period_start = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    xp = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (db.Index("ix_xp_rollup_rank", "period", "period_start", "xp", "user_id"),)
+
+
+class RollupWatermark(db.Model):
+    """The last source row folded into a rollup, so each run only reads what is new."""
+    name = db.Column(db.String(40), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class UserActivityDay(db.Model):
+    """One row per user per UTC day with a solve or puzzle completion; lets analytics count distinct users."""
+    day = db.Column(db.Date, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    __table_args__ = (db.Index("ix_user_activity_day_user", "user_id", "day"),)
+
+
+class DailyActivity(db.Model):
+    """Engagement totals per UTC day, folded in by ``analytics.roll_up``."""
+    day = db.Column(db.Date, primary_key=True)
+    active_users = db.Column(db.Integer, nullable=False, default=0)
+    weekly_active_users = db.Column(db.Integer, nullable=True)  # NULL until recounted
+    signups = db.Column(db.Integer, nullable=False, default=0)
+    solves = db.Column(db.Integer, nullable=False, default=0)
+    puzzles = db.Column(db.Integer, nullable=False, default=0)
+
+
+class TopicSolves(db.Model):
+    """Challenge solves per UTC day by the challenge's topic and difficulty."""
+    day = db.Column(db.Date, primary_key=True)
+    topic = db.Column(db.String(60), primary_key=True)
+    difficulty = db.Column(db.String(30), primary_key=True)
+    solves = db.Column(db.Integer, nullable=False, default=0)
+
+
+class CohortActivity(db.Model):
+    """Users from the signup week ``cohort_start`` who were active in the week ``week_start``."""
+    cohort_start = db.Column(db.Date, primary_key=True)
+    week_start = db.Column(db.Date, primary_key=True)
+    users = db.Column(db.Integer, nullable=False, default=0)
+
+
+class ChallengeStats(db.Model):
+    """Counters per challenge, kept up to date on the view and solve paths by ``challenge_stats``."""
+    challenge_id = db.Column(db.Integer, db.ForeignKey("challenge.id"), primary_key=True)
+    viewers = db.Column(db.Integer, nullable=False, default=0)  # users shown it at least once
+    attempts = db.Column(db.Integer, nullable=False, default=0)  # test checks and self-reported submits
+    solves = db.Column(db.Integer, nullable=False, default=0)  # passing attempts, repeats included
+    solvers = db.Column(db.Integer, nullable=False, default=0)  # users who solved it
+    timed_solves = db.Column(db.Integer, nullable=False, default=0)  # solvers with a recorded first view
+    median_solve_seconds = db.Column(db.Float, nullable=True)  # from ChallengeSolveTime, by calibration
+
+
+class ChallengeSolveTime(db.Model):
+    """Histogram of first-view-to-solve times: ``bucket`` b holds times in [2**(b-1), 2**b) seconds."""
+    challenge_id = db.Column(db.Integer, db.ForeignKey("challenge.id"), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)
+    solves = db.Column(db.Integer, nullable=False, default=0)
+
+
+class AuditLog(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    actor_user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    target_user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
+    action = db.Column(db.String(80), nullable=False)
+    meta = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
+
+
+class Message(db.Model):
+    __stamped__ = True
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False)
+    email = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    is_read = db.Column(db.Boolean, default=False, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=True)
+
+
+class DataVersion(db.Model):
+    """Per-table change counter used for cache keys and HTTP validators."""
+    table_name = db.Column(db.String(80), primary_key=True)
+    version = db.Column(db.Integer, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), nullable=False)
@@ -0,0 +1,84 @@
+"""Warm-up and fork hooks for preloaded Gunicorn masters (see gunicorn.conf.py)."""
+import gc
+import math
+import os
+import time
+
+from assets import precompile_templates
+from extensions import db
+from services import fun_pool, published_catalog, published_topic_totals
+
+MAX_THREADS = 16
+
+
+def effective_cpu_count() -> int:
+    """CPUs this process may run on (respects container/cgroup affinity)."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def worker_settings(cpus: int | None = None, io_ratio: float = 0.5) -> tuple[int, int]:
+    """Derive ``(workers, threads)`` from CPU count and the share of request time spent waiting on I/O.
+
+    Each worker has its own GIL, so one per CPU keeps every core busy with
+    Python code, plus one spare to cover a worker that is blocked. Threads
+    only help while a request waits on I/O: at ``io_ratio`` r a thread is
+    runnable ``1 - r`` of the time, so ``1 / (1 - r)`` threads saturate the
+    worker's CPU share.
+    """
+    cpus = cpus or effective_cpu_count()
+    io_ratio = min(max(io_ratio, 0.0), 0.95)
+    workers = cpus + 1
+    threads = min(MAX_THREADS, max(1, math.ceil(1 / (1 - io_ratio) - 1e-9)))
+    return workers, threads
+
+
+def warm_app(app) -> dict[str, float]:
+    """Fill process-local caches once, before workers fork from this process.
+
+    Returns the seconds spent per step. Forked workers inherit the cached
+    objects and compiled templates copy-on-write instead of rebuilding them
+    on their first request.
+    """
+    timings = {}
+    with app.app_context():
+        for name, step in (
+            ("fun_pool", fun_pool),
+            ("published_catalog", published_catalog),
+            ("dungeon_totals", published_topic_totals),
+        ):
+            started = time.perf_counter()
+            step()
+            timings[name] = time.perf_counter() - started
+
+        timings["templates"] = sum(precompile_templates(app).values())
+
+        # Never hand pooled connections to children: they would share sockets.
+        for engine in (*db.engines.values(), *app.extensions["replicas"], *app.extensions["shards"].engines):
+            engine.dispose()
+    return timings
+
+
+def freeze_heap():
+    """Move everything allocated so far out of the GC's reach.
+
+    Otherwise the first collection in each worker writes to the GC header of
+    every inherited object, un-sharing the copy-on-write pages.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def after_fork(app):
+    """Reset per-process state that must not be shared with the parent."""
+    with app.app_context():
+        for engine in (*db.engines.values(), *app.extensions["replicas"], *app.extensions["shards"].engines):
+            # close=False: the parent's connections belong to the parent.
+            engine.dispose(close=False)
+    app.extensions["app_cache"].after_fork()
+    app.extensions["fragment_cache"].after_fork()
+    app.extensions["catalog"].after_fork()
+    app.extensions["shards"].after_fork()
+    app.extensions["regex_grader"].after_fork()
+    app.extensions["judge"].after_fork()
@@ -1,3 +1,3 @@
-from .routes import register_puzzle_routes
+from .routes import puzzles_bp
 
-__all__ = ["register_puzzle_routes"]
+__all__ = ["puzzles_bp"]
@@ -0,0 +1,167 @@
+"""Measure Big-O Bistro snippets instead of trusting their claims.
+
+Each level in ``BIG_O_BISTRO_LEVELS`` has a ``benchmark`` spec: the
+function name to call and a ``setup`` statement that builds ``args`` from
+the level's ``constraints`` (``n``, ``q``, ...). Every option carries the
+code it describes in ``snippet``. The original snippet and every option are
+timed in their own ``python -I`` subprocess, so one variant's caches,
+imports and heap cannot affect the next.
+
+Inside the subprocess the setup runs before every call, outside the
+timer. Mutating variants such as an in-place sort therefore always see
+fresh input. Warm-up calls come first, then up to ``repeat`` timed calls
+with the garbage collector off. Slow variants stop early once ``budget``
+seconds have passed, but always get at least one timed call.
+
+``flask bistro bench --write`` stores the results in
+``data/big_o_bistro_timings.json``. The registry merges them into each
+level as ``measured``.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from config import BASE_DIR
+
+from .data import BIG_O_BISTRO_LEVELS
+
+TIMINGS_PATH = os.path.join(BASE_DIR, "data", "big_o_bistro_timings.json")
+
+_RUNNER = r"""
+import gc, json, sys, time
+
+spec = json.load(sys.stdin)
+namespace = {}
+exec(compile(spec["snippet"], "<snippet>", "exec"), namespace)
+func = namespace[spec["entry"]]
+setup = compile(spec["setup"], "<setup>", "exec")
+
+
+def timed_call():
+    env = dict(spec["constraints"])
+    exec(setup, env)
+    args = env["args"]
+    gc.collect()
+    gc.disable()
+    try:
+        started = time.perf_counter_ns()
+        func(*args)
+        return time.perf_counter_ns() - started
+    finally:
+        gc.enable()
+
+
+deadline = time.perf_counter() + spec["budget"]
+for _ in range(spec["warmup"]):
+    if time.perf_counter() > deadline:
+        break
+    timed_call()
+samples = [timed_call()]
+while len(samples) < spec["repeat"] and time.perf_counter() < deadline:
+    samples.append(timed_call())
+json.dump(samples, sys.stdout)
+"""
+
+
+class BenchmarkError(RuntimeError):
+    """A snippet failed or timed out in its subprocess."""
+
+
+def summarize(samples_ns) -> dict:
+    """Milliseconds: ``runs``, ``min``, ``median``, ``mean``, ``stdev`` and ``max``."""
+    ms = [sample / 1e6 for sample in samples_ns]
+    return {
+        "runs": len(ms),
+        "min_ms": round(min(ms), 3),
+        "median_ms": round(statistics.median(ms), 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "stdev_ms": round(statistics.stdev(ms), 3) if len(ms) > 1 else 0.0,
+        "max_ms": round(max(ms), 3),
+    }
+
+
+def measure(snippet: str, entry: str, setup: str, constraints: dict, *,
+            repeat: int = 7, warmup: int = 2, budget: float = 5.0, timeout: float = 300) -> dict:
+    """Time ``entry`` from ``snippet`` in a fresh isolated interpreter."""
+    spec = {
+        "snippet": snippet, "entry": entry, "setup": setup, "constraints": constraints,
+        "repeat": max(1, repeat), "warmup": max(0, warmup), "budget": budget,
+    }
+    with tempfile.TemporaryDirectory() as scratch:
+        try:
+            proc = subprocess.run(
+                [sys.executable, "-I", "-c", _RUNNER],
+                input=json.dumps(spec), capture_output=True, text=True, timeout=timeout, cwd=scratch,
+            )
+        except subprocess.TimeoutExpired:
+            raise BenchmarkError(f"{entry} did not finish within {timeout:g}s") from None
+    if proc.returncode:
+        lines = proc.stderr.strip().splitlines() or [f"exit status {proc.returncode}"]
+        raise BenchmarkError(f"{entry} failed: {lines[-1]}")
+    return summarize(json.loads(proc.stdout))
+
+
+def bench_level(level, **options) -> dict:
+    """Timings for a level's original snippet and each option's variant."""
+    spec = level["benchmark"]
+
+    def run(snippet):
+        return measure(snippet, spec["entry"], spec["setup"], dict(level["constraints"]), **options)
+
+    return {
+        "constraints": dict(level["constraints"]),
+        "original": run(level["function_snippet"]),
+        "options": {option["id"]: run(option["snippet"]) for option in level["options"]},
+    }
+
+
+def bench_levels(levels=BIG_O_BISTRO_LEVELS, **options) -> dict:
+    about = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "measured_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+    return {"levels": {str(level["level"]): {**bench_level(level, **options), **about} for level in levels}}
+
+
+def failures(results: dict, levels=BIG_O_BISTRO_LEVELS) -> list[str]:
+    """Levels whose ``best_option`` does not run under ``limit_ms`` (median)."""
+    problems = []
+    for level in levels:
+        measured = results["levels"].get(str(level["level"]))
+        if measured is None:
+            continue
+        best = measured["options"][level["best_option"]]
+        limit = level["constraints"]["limit_ms"]
+        if best["median_ms"] >= limit:
+            problems.append(
+                f"Level {level['level']}: best option {level['best_option']!r} took "
+                f"{best['median_ms']:g} ms, limit is {limit} ms"
+            )
+    return problems
+
+
+def _read(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {}
+
+
+def write_timings(results: dict, path: str = TIMINGS_PATH):
+    """Store ``results``, keeping earlier measurements of levels this run skipped."""
+    levels = {**_read(path).get("levels", {}), **results["levels"]}
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"levels": levels}, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def load_timings(path: str = TIMINGS_PATH) -> dict[int, dict]:
+    """Stored results by level number; empty if nothing has been measured."""
+    return {int(number): measured for number, measured in _read(path).get("levels", {}).items()}
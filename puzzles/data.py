@@ -210,6 +210,10 @@ BIG_O_BISTRO_LEVELS = [
                 return True
     return False
 """,
+        "benchmark": {
+            "entry": "has_duplicate",
+            "setup": "args = ([f'label-{i}' for i in range(n)],)  # all unique: the worst case",
+        },
         "hidden_cases": [
             "Other stations reuse `labels` later and expect its original order to stay intact.",
             "Input can already be unique; we still need the worst-case path to be fast.",
@@ -224,6 +228,14 @@ BIG_O_BISTRO_LEVELS = [
                 "result": "best",
                 "speed_gain": "n^2 -> n with one pass",
                 "explanation": "Track seen labels in a set and bail on the first repeat. Order is untouched and the worst case scales linearly.",
+                "snippet": """def has_duplicate(labels):
+    seen = set()
+    for label in labels:
+        if label in seen:
+            return True
+        seen.add(label)
+    return False
+""",
             },
             {
                 "id": "sort_in_place",
@@ -233,6 +245,13 @@ BIG_O_BISTRO_LEVELS = [
                 "result": "fail",
                 "fail_reason": "Sorting in-place mutates the list. Hidden tests expect the original order for later steps.",
                 "explanation": "Sorting plus neighbor scan lowers comparisons, but the mutation breaks callers and adds log n cost.",
+                "snippet": """def has_duplicate(labels):
+    labels.sort()
+    for i in range(1, len(labels)):
+        if labels[i] == labels[i - 1]:
+            return True
+    return False
+""",
             },
             {
                 "id": "early_cutoff",
@@ -242,6 +261,14 @@ BIG_O_BISTRO_LEVELS = [
                 "result": "fail",
                 "fail_reason": "Skips tail data, so duplicates beyond 3k slip through.",
                 "explanation": "Time improves by ignoring work, but correctness collapses on long inputs.",
+                "snippet": """def has_duplicate(labels):
+    prefix = labels[:3000]
+    for i in range(len(prefix)):
+        for j in range(i + 1, len(prefix)):
+            if prefix[i] == prefix[j]:
+                return True
+    return False
+""",
             },
         ],
     },
@@ -262,6 +289,10 @@ BIG_O_BISTRO_LEVELS = [
     totals.sort(key=lambda x: x[1], reverse=True)
     return totals[:3]
 """,
+        "benchmark": {
+            "entry": "top_counts",
+            "setup": "args = ([f'item-{i % 500}' for i in range(n)], [f'item-{i}' for i in range(q)])",
+        },
         "hidden_cases": [
             "New online orders can appear between calls; cached results must notice.",
             "Some batches repeat identical `requested` lists and should not rescan everything.",
@@ -276,6 +307,14 @@ BIG_O_BISTRO_LEVELS = [
                 "result": "best",
                 "speed_gain": "n*q -> n + q",
                 "explanation": "One pass to tally orders, O(1) lookups per ingredient, and no stale data because it recomputes when orders change.",
+                "snippet": """def top_counts(orders, requested):
+    counts = {}
+    for order in orders:
+        counts[order] = counts.get(order, 0) + 1
+    totals = [(item, counts.get(item, 0)) for item in requested]
+    totals.sort(key=lambda x: x[1], reverse=True)
+    return totals[:3]
+""",
             },
             {
                 "id": "global_cache",
@@ -285,6 +324,17 @@ BIG_O_BISTRO_LEVELS = [
                 "result": "fail",
                 "fail_reason": "Ignores that `orders` mutate. Hidden tests append new orders and expect updated counts.",
                 "explanation": "Great for identical inputs, but without invalidation the cache serves stale totals.",
+                "snippet": """_last = {}
+
+def top_counts(orders, requested):
+    key = tuple(requested)
+    if key not in _last:
+        totals = [(item, sum(1 for order in orders if order == item)) for item in requested]
+        totals.sort(key=lambda x: x[1], reverse=True)
+        _last.clear()
+        _last[key] = totals[:3]
+    return _last[key]
+""",
             },
             {
                 "id": "sort_then_search",
@@ -294,6 +344,14 @@ BIG_O_BISTRO_LEVELS = [
                 "result": "ok",
                 "almost_reason": "Correct and faster than n\u00d7q, but still slower than a hash map and adds sorting overhead every minute.",
                 "explanation": "Binary searching sorted data is fine, yet it burns log n and still walks q times.",
+                "snippet": """from bisect import bisect_left, bisect_right
+
+def top_counts(orders, requested):
+    ordered = sorted(orders)
+    totals = [(item, bisect_right(ordered, item) - bisect_left(ordered, item)) for item in requested]
+    totals.sort(key=lambda x: x[1], reverse=True)
+    return totals[:3]
+""",
             },
         ],
     },
@@ -310,6 +368,10 @@ BIG_O_BISTRO_LEVELS = [
             unique.append(dish)
     return unique
 """,
+        "benchmark": {
+            "entry": "unique_lineup",
+            "setup": "args = ([f'dish-{i * 7919 % (n // 4)}' for i in range(n)],)",
+        },
         "hidden_cases": [
             "Expo screens rely on first-seen order; any sorting or set that reorders will fail.",
             "Long streaks of repeats mean `dish not in unique` must stay O(1).",
@@ -324,6 +386,9 @@ BIG_O_BISTRO_LEVELS = [
                 "result": "best",
                 "speed_gain": "n^2 membership -> n with ordered hashing",
                 "explanation": "Python dicts keep insertion order, so you dedupe in one pass and keep the first appearance intact.",
+                "snippet": """def unique_lineup(dishes):
+    return list(dict.fromkeys(dishes))
+""",
             },
             {
                 "id": "plain_set",
@@ -333,6 +398,9 @@ BIG_O_BISTRO_LEVELS = [
                 "result": "fail",
                 "fail_reason": "Sets are unordered; hidden tests compare against the original arrival order.",
                 "explanation": "Time is great, but order is destroyed so correctness fails.",
+                "snippet": """def unique_lineup(dishes):
+    return list(set(dishes))
+""",
             },
             {
                 "id": "sort_and_unique",
@@ -342,6 +410,13 @@ BIG_O_BISTRO_LEVELS = [
                 "result": "fail",
                 "fail_reason": "Sorting reorders arrivals and the hidden cases reject it.",
                 "explanation": "Even though it removes repeats quickly, it violates the order contract and adds log n time.",
+                "snippet": """def unique_lineup(dishes):
+    unique = []
+    for dish in sorted(dishes):
+        if not unique or unique[-1] != dish:
+            unique.append(dish)
+    return unique
+""",
             },
         ],
     },
@@ -0,0 +1,146 @@
+"""A small RFC 6902 (JSON Patch) implementation for puzzle save states.
+
+``apply_patch`` never mutates its input. It copies only the containers on
+the path of each operation and shares everything else with the original
+document. Applying a patch therefore costs time in proportion to the
+change, not to the document, and a document that is kept in a cache can
+be patched safely.
+"""
+
+OPS = {"add", "remove", "replace", "move", "copy", "test"}
+MAX_OPS = 200
+
+
+class PatchError(ValueError):
+    """The patch is malformed or does not apply to the document."""
+
+
+def parse_pointer(pointer) -> list[str]:
+    """Split an RFC 6901 JSON pointer into unescaped tokens."""
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise PatchError(f"invalid JSON pointer: {pointer!r}")
+    if not pointer:
+        return []
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def validate_patch(ops) -> list[dict]:
+    """Check the patch's shape without looking at any document."""
+    if not isinstance(ops, list) or not ops:
+        raise PatchError("patch must be a non-empty list of operations")
+    if len(ops) > MAX_OPS:
+        raise PatchError(f"patch has more than {MAX_OPS} operations")
+    for op in ops:
+        if not isinstance(op, dict) or op.get("op") not in OPS:
+            raise PatchError(f"unknown operation: {op!r}")
+        parse_pointer(op.get("path"))
+        if op["op"] in {"add", "replace", "test"} and "value" not in op:
+            raise PatchError(f"{op['op']} needs a value")
+        if op["op"] in {"move", "copy"}:
+            parse_pointer(op.get("from"))
+    return ops
+
+
+def _index(container: list, token: str, allow_end: bool = False) -> int:
+    if allow_end and token == "-":
+        return len(container)
+    if not token.isdigit() or (token != "0" and token.startswith("0")):
+        raise PatchError(f"invalid array index: {token!r}")
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise PatchError(f"array index out of range: {index}")
+    return index
+
+
+def _get(doc, tokens):
+    for token in tokens:
+        if isinstance(doc, dict):
+            if token not in doc:
+                raise PatchError(f"path not found: {token!r}")
+            doc = doc[token]
+        elif isinstance(doc, list):
+            doc = doc[_index(doc, token)]
+        else:
+            raise PatchError(f"cannot descend into a scalar at {token!r}")
+    return doc
+
+
+def _set(doc, tokens, change):
+    """Return a copy of ``doc`` where ``change(parent, last_token)`` was applied.
+
+    Only the containers on the path are copied.
+    """
+    if not tokens:
+        raise PatchError("operations on the whole document are not supported")
+    head, rest = tokens[0], tokens[1:]
+    if isinstance(doc, dict):
+        copy = dict(doc)
+        if rest:
+            if head not in copy:
+                raise PatchError(f"path not found: {head!r}")
+            copy[head] = _set(copy[head], rest, change)
+        else:
+            change(copy, head)
+        return copy
+    if isinstance(doc, list):
+        copy = list(doc)
+        if rest:
+            index = _index(copy, head)
+            copy[index] = _set(copy[index], rest, change)
+        else:
+            change(copy, head)
+        return copy
+    raise PatchError(f"cannot descend into a scalar at {head!r}")
+
+
+def _add(value):
+    def change(parent, token):
+        if isinstance(parent, dict):
+            parent[token] = value
+        else:
+            parent.insert(_index(parent, token, allow_end=True), value)
+    return change
+
+
+def _replace(value):
+    def change(parent, token):
+        if isinstance(parent, dict):
+            if token not in parent:
+                raise PatchError(f"path not found: {token!r}")
+            parent[token] = value
+        else:
+            parent[_index(parent, token)] = value
+    return change
+
+
+def _remove(parent, token):
+    if isinstance(parent, dict):
+        if token not in parent:
+            raise PatchError(f"path not found: {token!r}")
+        del parent[token]
+    else:
+        del parent[_index(parent, token)]
+
+
+def apply_patch(doc, ops):
+    """Return ``doc`` with the operations in ``ops`` applied, in order."""
+    for op in validate_patch(ops):
+        kind, path = op["op"], parse_pointer(op["path"])
+        if kind == "add":
+            doc = _set(doc, path, _add(op["value"]))
+        elif kind == "replace":
+            doc = _set(doc, path, _replace(op["value"]))
+        elif kind == "remove":
+            doc = _set(doc, path, _remove)
+        elif kind == "test":
+            if _get(doc, path) != op["value"]:
+                raise PatchError(f"test failed at {op['path']}")
+        else:
+            source = parse_pointer(op["from"])
+            value = _get(doc, source)
+            if kind == "move":
+                if path[: len(source)] == source and path != source:
+                    raise PatchError("cannot move a value into itself")
+                doc = _set(doc, source, _remove)
+            doc = _set(doc, path, _add(value))
+    return doc
@@ -0,0 +1,64 @@
+"""Server-side grading for Regex Rescue.
+
+The page shows patterns as JavaScript (``/.../g``) but never runs them: it
+highlights the matches the server found, and XP is only awarded after the
+server has run the pattern against the level's ``test_string`` itself.
+``sandbox.regex.to_python`` gives Python's ``re`` JavaScript's meaning for
+``$``, ``.``, ``\\s``, ``\\d`` and named groups.
+
+A user-supplied pattern can backtrack catastrophically, e.g. ``(a+)+$``
+against a long run of ``a``s, so matching runs in a ``sandbox.WorkerPool``
+worker with a CPU budget (``REGEX_GRADER_CPU_SECONDS``), never in the
+request thread.
+"""
+from typing import NamedTuple
+
+from flask import current_app
+
+from sandbox import CpuLimitExceeded, PoolBusy, SandboxError, WorkerLost, WorkerPool
+from sandbox.regex import find_all
+
+MAX_PATTERN_LENGTH = 300
+
+
+class Verdict(NamedTuple):
+    correct: bool
+    matches: tuple = ()
+    spans: tuple = ()  # (start, end) of each match, in UTF-16 code units
+    error: str | None = None
+
+
+def init_regex_grader(app):
+    app.config.setdefault("REGEX_GRADER_WORKERS", 2)
+    app.config.setdefault("REGEX_GRADER_CPU_SECONDS", 0.25)
+    app.extensions["regex_grader"] = WorkerPool(
+        size=app.config["REGEX_GRADER_WORKERS"],
+        cpu_seconds=app.config["REGEX_GRADER_CPU_SECONDS"],
+        preload=("sandbox.regex",),
+    )
+
+
+def grade(level, pattern: str, pool: WorkerPool | None = None) -> Verdict:
+    """Grade ``pattern`` against a Regex Rescue level payload.
+
+    Correct means the matches equal ``expected_matches`` as a multiset.
+    """
+    if not pattern:
+        return Verdict(False, error="Enter a pattern.")
+    if len(pattern) > MAX_PATTERN_LENGTH:
+        return Verdict(False, error=f"Patterns are limited to {MAX_PATTERN_LENGTH} characters.")
+    pool = pool or current_app.extensions["regex_grader"]
+    try:
+        result = pool.call(find_all, pattern, level["test_string"])
+    except (CpuLimitExceeded, WorkerLost):
+        return Verdict(False, error="Pattern took too long to run (catastrophic backtracking?).")
+    except PoolBusy:
+        raise
+    except SandboxError:
+        current_app.logger.exception("Regex grading failed for %r", pattern)
+        return Verdict(False, error="Pattern could not be checked.")
+    if "error" in result:
+        return Verdict(False, error=result["error"])
+    matches = tuple(result["matches"])
+    spans = tuple(tuple(span) for span in result["spans"])
+    return Verdict(sorted(matches) == sorted(level["expected_matches"]), matches, spans)
@@ -0,0 +1,128 @@
+"""Puzzle families and their level payloads, built once at import.
+
+Each level page used to copy its dict from ``data.py`` and look up its own
+completion row. The registry freezes every payload up front and fetches a
+user's completions for a whole family with one indexed ``IN`` query on
+``(user_id, puzzle_name)``. That one set drives both the page and its
+level-select strip.
+"""
+from typing import NamedTuple
+
+from models import PuzzleCompletion
+from sharding import user_rows
+
+from .bistro_bench import load_timings
+from .data import (
+    BIG_O_BISTRO_LEVELS,
+    BIT_FLIPPER_LEVELS,
+    DEFAULT_PUZZLE_XP,
+    GIT_REBASE_RESCUE_LEVELS,
+    REGEX_RESCUE_LEVELS,
+    SELECTOR_SLEUTH_LEVELS,
+)
+
+TOWER_DEFENSE_PUZZLE = "debugger_tower_defense_prototype"
+
+
+class FrozenDict(dict):
+    """A read-only dict. Unlike ``MappingProxyType`` it still serializes with ``tojson``."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("puzzle payloads are read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class LevelStatus(NamedTuple):
+    level: int
+    completed: bool
+    current: bool
+
+
+class PuzzleFamily(NamedTuple):
+    slug: str
+    endpoint: str
+    template: str
+    levels: tuple  # FrozenDict payloads, level 1 first
+
+    @property
+    def puzzle_names(self) -> tuple:
+        return tuple(level["puzzle_name"] for level in self.levels)
+
+    def level(self, level_num: int):
+        """The payload for ``level_num`` (1-based), or ``None``."""
+        return self.levels[level_num - 1] if 1 <= level_num <= len(self.levels) else None
+
+    def completed(self, user_id: int) -> frozenset:
+        """Names of this family's levels that ``user_id`` has completed."""
+        return completed_puzzles(user_id, self.puzzle_names)
+
+    def strip(self, completed, current: int) -> tuple:
+        return tuple(
+            LevelStatus(level["level"], level["puzzle_name"] in completed, level["level"] == current)
+            for level in self.levels
+        )
+
+
+def build_family(slug: str, levels, endpoint: str, template: str, extras=None) -> PuzzleFamily:
+    """Freeze ``levels`` into payloads; ``extras`` maps a level number to extra keys."""
+    extras = extras or {}
+    payloads = tuple(
+        freeze({
+            **level,
+            **extras.get(number, {}),
+            "level": number,
+            "puzzle_name": f"{slug}_lvl_{number}",
+            "xp_reward": DEFAULT_PUZZLE_XP,
+            "total_levels": len(levels),
+        })
+        for number, level in enumerate(levels, 1)
+    )
+    return PuzzleFamily(slug, endpoint, template, payloads)
+
+
+FAMILIES = {
+    family.slug: family
+    for family in (
+        build_family("bit_flipper", BIT_FLIPPER_LEVELS, "puzzles.puzzle_bit_flipper", "puzzle_bit_flipper.html"),
+        build_family(
+            "big_o_bistro",
+            BIG_O_BISTRO_LEVELS,
+            "puzzles.puzzle_big_o_bistro",
+            "puzzle_big_o_bistro.html",
+            extras={number: {"measured": measured} for number, measured in load_timings().items()},
+        ),
+        build_family(
+            "selector_sleuth", SELECTOR_SLEUTH_LEVELS, "puzzles.puzzle_selector_sleuth", "puzzle_selector_sleuth.html"
+        ),
+        build_family("regex_rescue", REGEX_RESCUE_LEVELS, "puzzles.puzzle_regex_rescue", "puzzle_regex_rescue.html"),
+        build_family(
+            "git_rebase_rescue",
+            GIT_REBASE_RESCUE_LEVELS,
+            "puzzles.puzzle_git_rebase_rescue",
+            "puzzle_git_rebase_rescue.html",
+        ),
+    )
+}
+
+# Every name /puzzles/complete will award XP for.
+PUZZLE_NAMES = frozenset(
+    name for family in FAMILIES.values() for name in family.puzzle_names
+) | {TOWER_DEFENSE_PUZZLE}
+
+
+def completed_puzzles(user_id: int, names=PUZZLE_NAMES) -> frozenset:
+    """The subset of ``names`` that ``user_id`` has completed, in one query."""
+    rows = user_rows(PuzzleCompletion, user_id).filter(
+        PuzzleCompletion.puzzle_name.in_(sorted(names))
+    ).with_entities(PuzzleCompletion.puzzle_name)
+    return frozenset(name for (name,) in rows)
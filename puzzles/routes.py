@@ -1,153 +1,222 @@
-from datetime import datetime
-
-from flask import abort, render_template, request
+from flask import Blueprint, abort, render_template, request
 from flask_login import current_user, login_required
 
-from .data import (
-    BIT_FLIPPER_LEVELS,
-    BIG_O_BISTRO_LEVELS,
-    DEFAULT_PUZZLE_XP,
-    GIT_REBASE_RESCUE_LEVELS,
-    REGEX_RESCUE_LEVELS,
-    SELECTOR_SLEUTH_LEVELS,
-)
-
-
-def register_puzzle_routes(app, db, PuzzleCompletion, DebuggerTowerDefenseState):
-    """Attach puzzle routes to the Flask app to keep app.py lean."""
-
-    def _completed_set():
-        return {
-            pc.puzzle_name
-            for pc in PuzzleCompletion.query.filter_by(user_id=current_user.id).all()
-        }
-
-    def _level_payload(levels, level_num, slug):
-        if not (1 <= level_num <= len(levels)):
-            abort(404)
-        level_data = levels[level_num - 1].copy()
-        puzzle_name = f"{slug}_lvl_{level_num}"
-        is_completed = (
-            PuzzleCompletion.query.filter_by(
-                user_id=current_user.id, puzzle_name=puzzle_name
-            ).first()
-            is not None
-        )
-        level_data.update(
-            {
-                "puzzle_name": puzzle_name,
-                "is_completed": is_completed,
-                "xp_reward": DEFAULT_PUZZLE_XP,
-                "total_levels": len(levels),
-            }
-        )
-        return level_data
-
-    @app.route("/puzzles")
-    @login_required
-    def puzzles_hub():
-        """A hub page listing all available mini-game puzzles."""
-        completed_puzzles = _completed_set()
-        return render_template("puzzles_hub.html", completed_puzzles=completed_puzzles)
-
-    @app.route("/puzzles/bit-flipper/<int:level_num>")
-    @login_required
-    def puzzle_bit_flipper(level_num):
-        """The Bit Flipper mini-game."""
-        level_data = _level_payload(BIT_FLIPPER_LEVELS, level_num, "bit_flipper")
-        return render_template("puzzle_bit_flipper.html", **level_data)
-
-    @app.route("/puzzles/big-o-bistro/<int:level_num>")
-    @login_required
-    def puzzle_big_o_bistro(level_num):
-        """Pick the right optimization for performance-sensitive functions."""
-        level_data = _level_payload(BIG_O_BISTRO_LEVELS, level_num, "big_o_bistro")
-        return render_template("puzzle_big_o_bistro.html", **level_data)
-
-    @app.route("/puzzles/selector-sleuth/<int:level_num>")
-    @login_required
-    def puzzle_selector_sleuth(level_num):
-        """The Selector Sleuth mini-game for CSS selectors."""
-        level_data = _level_payload(
-            SELECTOR_SLEUTH_LEVELS, level_num, "selector_sleuth"
-        )
-        return render_template("puzzle_selector_sleuth.html", **level_data)
-
-    @app.route("/puzzles/regex-rescue/<int:level_num>")
-    @login_required
-    def puzzle_regex_rescue(level_num):
-        """The Regex Rescue mini-game."""
-        level_data = _level_payload(REGEX_RESCUE_LEVELS, level_num, "regex_rescue")
-        return render_template("puzzle_regex_rescue.html", **level_data)
-
-    @app.route("/puzzles/git-rebase-rescue/<int:level_num>")
-    @login_required
-    def puzzle_git_rebase_rescue(level_num):
-        """Commit ordering puzzle with dependency and squash/fixup mechanics."""
-        level_data = _level_payload(
-            GIT_REBASE_RESCUE_LEVELS, level_num, "git_rebase_rescue"
-        )
-        return render_template("puzzle_git_rebase_rescue.html", **level_data)
-
-    @app.route("/puzzles/debugger-tower-defense")
-    @login_required
-    def puzzle_debugger_tower_defense():
-        """Prototype tower defense puzzle with client-side loop."""
-        state = DebuggerTowerDefenseState.query.filter_by(
-            user_id=current_user.id
-        ).first()
-        return render_template(
-            "puzzle_debugger_tower_defense.html",
-            saved_state=state.state if state else None,
-        )
-
-    @app.route("/api/debugger-td/state", methods=["GET"])
-    @login_required
-    def debugger_td_state():
-        state = DebuggerTowerDefenseState.query.filter_by(
-            user_id=current_user.id
-        ).first()
-        if not state:
-            return {"state": None}, 200
-        return {"state": state.state, "updated_at": state.updated_at.isoformat()}, 200
-
-    @app.route("/api/debugger-td/state", methods=["POST"])
-    @login_required
-    def debugger_td_state_save():
-        data = request.get_json() or {}
-        state_payload = data.get("state")
-        if state_payload is None or not isinstance(state_payload, dict):
-            return {"error": "State payload is required."}, 400
-
-        state = DebuggerTowerDefenseState.query.filter_by(
-            user_id=current_user.id
-        ).first()
-        if not state:
-            state = DebuggerTowerDefenseState(
-                user_id=current_user.id, state=state_payload
-            )
-            db.session.add(state)
+from caching import conditional, conditional_get, current_versions
+from extensions import db
+from models import DebuggerTowerDefenseState, PuzzleCompletion
+from replicas import replica_read
+from sandbox import PoolBusy
+from sharding import user_rows
+from xp_ledger import award_xp
+from .data import DEFAULT_PUZZLE_XP
+from .json_patch import PatchError
+from .regex_grader import grade
+from .registry import FAMILIES, PUZZLE_NAMES, completed_puzzles
+from .td_scores import PAGE_SIZE, Cursor, best_run, leaderboard_page
+from .td_state import VersionConflict, load_state, save_patch, save_state
+
+puzzles_bp = Blueprint("puzzles", __name__)
+
+
+def _render_level(slug, level_num):
+    family = FAMILIES[slug]
+    level = family.level(level_num)
+    if level is None:
+        abort(404)
+    completed = family.completed(current_user.id)
+    return render_template(
+        family.template,
+        **level,
+        is_completed=level["puzzle_name"] in completed,
+        level_statuses=family.strip(completed, level_num),
+        strip_endpoint=family.endpoint,
+    )
+
+
+@puzzles_bp.route("/puzzles")
+@login_required
+def puzzles_hub():
+    """A hub page listing all available mini-game puzzles."""
+    return render_template("puzzles_hub.html", completed_puzzles=completed_puzzles(current_user.id))
+
+
+@puzzles_bp.route("/puzzles/bit-flipper/<int:level_num>")
+@login_required
+def puzzle_bit_flipper(level_num):
+    """The Bit Flipper mini-game."""
+    return _render_level("bit_flipper", level_num)
+
+
+@puzzles_bp.route("/puzzles/big-o-bistro/<int:level_num>")
+@login_required
+def puzzle_big_o_bistro(level_num):
+    """Pick the right optimization for performance-sensitive functions."""
+    return _render_level("big_o_bistro", level_num)
+
+
+@puzzles_bp.route("/puzzles/selector-sleuth/<int:level_num>")
+@login_required
+def puzzle_selector_sleuth(level_num):
+    """The Selector Sleuth mini-game for CSS selectors."""
+    return _render_level("selector_sleuth", level_num)
+
+
+@puzzles_bp.route("/puzzles/regex-rescue/<int:level_num>")
+@login_required
+def puzzle_regex_rescue(level_num):
+    """The Regex Rescue mini-game."""
+    return _render_level("regex_rescue", level_num)
+
+
+@puzzles_bp.route("/puzzles/git-rebase-rescue/<int:level_num>")
+@login_required
+def puzzle_git_rebase_rescue(level_num):
+    """Commit ordering puzzle with dependency and squash/fixup mechanics."""
+    return _render_level("git_rebase_rescue", level_num)
+
+
+@puzzles_bp.route("/puzzles/debugger-tower-defense")
+@login_required
+def puzzle_debugger_tower_defense():
+    """Prototype tower defense puzzle with client-side loop."""
+    state, version = load_state(current_user.id)
+    return render_template(
+        "puzzle_debugger_tower_defense.html",
+        saved_state=state,
+        saved_version=version,
+    )
+
+
+def _state_validators():
+    row = (
+        user_rows(DebuggerTowerDefenseState, current_user.id)
+        .with_entities(DebuggerTowerDefenseState.version, DebuggerTowerDefenseState.updated_at)
+        .first()
+    )
+    if not row:
+        return ("debugger-td", current_user.id, None), None
+    return ("debugger-td", current_user.id, row.version), row.updated_at
+
+
+@puzzles_bp.route("/api/debugger-td/state", methods=["GET"])
+@login_required
+@conditional(_state_validators, private=True)
+def debugger_td_state():
+    state, version = load_state(current_user.id)
+    if state is None:
+        return {"state": None, "version": 0}, 200
+    return {"state": state, "version": version}, 200
+
+
+@puzzles_bp.route("/api/debugger-td/state", methods=["POST"])
+@login_required
+def debugger_td_state_save():
+    """Save a JSON Patch (``{version, patch}``) or a whole state (``{state}``)."""
+    data = request.get_json(silent=True) or {}
+    version = data.get("version")
+    if version is not None and (not isinstance(version, int) or isinstance(version, bool)):
+        return {"error": "Version must be an integer."}, 400
+    try:
+        if "patch" in data:
+            if version is None:
+                return {"error": "A patch needs the version it applies to."}, 400
+            version = save_patch(current_user.id, version, data["patch"])
+        elif isinstance(data.get("state"), dict):
+            version = save_state(current_user.id, data["state"], expected=version)
         else:
-            state.state = state_payload
-        state.updated_at = datetime.utcnow()
-        db.session.commit()
-        return {"message": "State saved."}, 200
-
-    @app.route("/puzzles/complete", methods=["POST"])
-    @login_required
-    def complete_puzzle():
-        """Endpoint for mini-games to call upon completion to award XP."""
-        data = request.get_json() or {}
-        puzzle_name = data.get("puzzle_name")
-        if not puzzle_name:
-            return {"error": "Puzzle name is required."}, 400
-
-        if PuzzleCompletion.query.filter_by(
-            user_id=current_user.id, puzzle_name=puzzle_name
-        ).first():
-            return {"message": "Puzzle already completed."}, 200
-
-        db.session.add(PuzzleCompletion(user_id=current_user.id, puzzle_name=puzzle_name))
-        current_user.xp = (current_user.xp or 0) + DEFAULT_PUZZLE_XP
-        db.session.commit()
-        return {"message": "XP awarded!", "new_xp": current_user.xp}, 200
+            return {"error": "State payload is required."}, 400
+    except PatchError as exc:
+        return {"error": str(exc)}, 400
+    except VersionConflict as exc:
+        return {"error": "State changed since it was loaded.", "version": exc.version}, 409
+    return {"message": "State saved.", "version": version}, 200
+
+
+@puzzles_bp.route("/puzzles/debugger-tower-defense/leaderboard")
+@replica_read
+@login_required
+def debugger_td_leaderboard():
+    """Best runs, highest wave first, paged with a keyset cursor."""
+    rows, next_cursor = leaderboard_page(Cursor.decode(request.args.get("after")))
+    return render_template(
+        "puzzle_debugger_tower_defense_leaderboard.html",
+        rows=rows,
+        next_cursor=next_cursor.encode() if next_cursor else None,
+        best=best_run(current_user.id),
+    )
+
+
+@puzzles_bp.route("/api/debugger-td/leaderboard")
+@replica_read
+@login_required
+def debugger_td_leaderboard_api():
+    after = request.args.get("after")
+    limit = request.args.get("limit", PAGE_SIZE, type=int)
+    # Only the score table's stamp: the board shows no other ``user`` column than
+    # the name and opt-out, and those edits bump the score stamp themselves.
+    not_modified = conditional_get(
+        (current_versions.token("tower_defense_score"), after, limit),
+        current_versions.last_modified("tower_defense_score"),
+    )
+    if not_modified:
+        return not_modified
+    rows, next_cursor = leaderboard_page(Cursor.decode(after), limit)
+    for row in rows:
+        row["reached_at"] = row["reached_at"].isoformat()
+    return {"runs": rows, "next": next_cursor.encode() if next_cursor else None}, 200
+
+
+@puzzles_bp.route("/api/debugger-td/best")
+@login_required
+def debugger_td_best():
+    best = best_run(current_user.id)
+    if best is None:
+        return {"best": None}, 200
+    return {"best": {"wave": best.best_wave, "kills": best.best_kills, "reached_at": best.reached_at.isoformat()}}, 200
+
+
+def _award_completion(puzzle_name):
+    if user_rows(PuzzleCompletion, current_user.id).filter_by(puzzle_name=puzzle_name).first():
+        return {"message": "Puzzle already completed."}
+
+    db.session.add(PuzzleCompletion(user_id=current_user.id, puzzle_name=puzzle_name))
+    award_xp(current_user, DEFAULT_PUZZLE_XP, "puzzle")
+    db.session.commit()
+    return {"message": "XP awarded!", "new_xp": current_user.xp}
+
+
+@puzzles_bp.route("/puzzles/regex-rescue/<int:level_num>/grade", methods=["POST"])
+@login_required
+def grade_regex_rescue(level_num):
+    """Run the submitted pattern on the server and award XP if it is right."""
+    level = FAMILIES["regex_rescue"].level(level_num)
+    if level is None:
+        abort(404)
+    pattern = (request.get_json(silent=True) or {}).get("pattern")
+    if not isinstance(pattern, str):
+        return {"error": "Pattern is required."}, 400
+    try:
+        verdict = grade(level, pattern)
+    except PoolBusy:
+        return {"error": "The grader is busy. Try again in a moment."}, 503, {"Retry-After": "1"}
+    body = {"correct": verdict.correct, "matches": list(verdict.matches), "spans": [list(span) for span in verdict.spans]}
+    if verdict.error:
+        return {**body, "error": verdict.error}, 422
+    if verdict.correct:
+        body.update(_award_completion(level["puzzle_name"]))
+    return body, 200
+
+
+@puzzles_bp.route("/puzzles/complete", methods=["POST"])
+@login_required
+def complete_puzzle():
+    """Endpoint for mini-games to call upon completion to award XP."""
+    data = request.get_json() or {}
+    puzzle_name = data.get("puzzle_name")
+    if not puzzle_name:
+        return {"error": "Puzzle name is required."}, 400
+    if puzzle_name not in PUZZLE_NAMES:
+        return {"error": "Unknown puzzle."}, 400
+    if puzzle_name in FAMILIES["regex_rescue"].puzzle_names:
+        return {"error": "Regex Rescue answers are checked by the grading endpoint."}, 403
+    return _award_completion(puzzle_name), 200
@@ -0,0 +1,128 @@
+"""Tower-defense rankings kept outside the saved-state blob.
+
+Each user's best run (highest wave, then most kills) is copied into
+``TowerDefenseScore`` whenever a save changes those numbers. The table lives
+on the primary, even when progress tables are sharded, so one composite
+index orders every player. Pages use keyset pagination: a cursor names the
+last row shown, and the next page is an index range scan that starts
+right after it. The cost does not grow with the page number.
+"""
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from sqlalchemy import select, tuple_, update
+
+from caching import current_versions
+from extensions import db
+from models import TowerDefenseScore, User
+
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+class Run(NamedTuple):
+    wave: int
+    kills: int
+
+
+class Cursor(NamedTuple):
+    wave: int
+    kills: int
+    user_id: int
+    position: int
+
+    def encode(self) -> str:
+        return ".".join(str(part) for part in self)
+
+    @classmethod
+    def decode(cls, value: str | None):
+        """Parse a cursor from a query string; ``None`` for a missing or bad one."""
+        try:
+            parts = [int(part) for part in (value or "").split(".")]
+            return cls(*parts) if len(parts) == 4 and min(parts) >= 0 else None
+        except ValueError:
+            return None
+
+
+def run_metrics(state) -> Run | None:
+    """The ranked numbers from a saved state, or ``None`` if it has none."""
+    if not isinstance(state, dict):
+        return None
+    wave = state.get("highWave", state.get("wave"))
+    kills = state.get("kills", 0)
+    if not all(isinstance(n, int) and not isinstance(n, bool) and n >= 0 for n in (wave, kills)):
+        return None
+    return Run(wave, kills)
+
+
+def record_run(user_id: int, state) -> bool:
+    """Keep ``user_id``'s best run up to date; ``True`` if it improved.
+
+    Writes in the caller's transaction. Only a better run touches the row.
+    """
+    run = run_metrics(state)
+    if run is None:
+        return False
+    table = TowerDefenseScore.__table__
+    now = datetime.now(timezone.utc)
+    result = db.session.execute(
+        update(table)
+        .where(
+            table.c.user_id == user_id,
+            tuple_(table.c.best_wave, table.c.best_kills) < tuple_(run.wave, run.kills),
+        )
+        .values(best_wave=run.wave, best_kills=run.kills, reached_at=now)
+    )
+    if result.rowcount:
+        # Core UPDATEs are invisible to the flush hook that bumps stamps.
+        current_versions.bump(db.session.connection(), {table.name})
+        return True
+    if db.session.get(TowerDefenseScore, user_id) is not None:
+        return False
+    db.session.add(TowerDefenseScore(user_id=user_id, best_wave=run.wave, best_kills=run.kills, reached_at=now))
+    return True
+
+
+def best_run(user_id: int):
+    return db.session.get(TowerDefenseScore, user_id)
+
+
+def leaderboard_page(after: Cursor | None = None, limit: int = PAGE_SIZE):
+    """One page of ``(position, username, wave, kills, reached_at)`` rows and the next cursor.
+
+    Ordered by wave, kills, then user id, all descending: the
+    ``ix_tower_defense_score_rank`` index read backwards, so the ordering
+    and the cursor seek both come from the index.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    score = TowerDefenseScore
+    stmt = (
+        select(score.user_id, score.best_wave, score.best_kills, score.reached_at, User.username)
+        .join(User, User.id == score.user_id)
+        .where(User.show_on_leaderboard.is_(True))
+        .order_by(score.best_wave.desc(), score.best_kills.desc(), score.user_id.desc())
+        .limit(limit + 1)
+    )
+    start = 0
+    if after is not None:
+        start = after.position
+        stmt = stmt.where(
+            tuple_(score.best_wave, score.best_kills, score.user_id) < tuple_(after.wave, after.kills, after.user_id)
+        )
+    rows = db.session.execute(stmt).all()
+    more, rows = len(rows) > limit, rows[:limit]
+    page = [
+        {
+            "position": start + index,
+            "username": row.username,
+            "wave": row.best_wave,
+            "kills": row.best_kills,
+            "reached_at": row.reached_at,
+        }
+        for index, row in enumerate(rows, 1)
+    ]
+    next_cursor = None
+    if more:
+        last = rows[-1]
+        next_cursor = Cursor(last.best_wave, last.best_kills, last.user_id, start + len(rows))
+    return page, next_cursor
@@ -0,0 +1,190 @@
+"""Versioned Debugger Tower Defense saves.
+
+A save is a JSON Patch against a known version of the user's state. The
+server records it as one small patch row plus a version bump guarded by
+``WHERE version = :expected``, so the database work and the request body
+both grow with the change, not with the state. A save against a stale
+version fails with ``VersionConflict`` (HTTP 409).
+
+Saves that change the best wave or kills also update the user's row in
+``TowerDefenseScore`` (see ``td_scores.py``), which backs the rankings.
+
+Bursts of saves are coalesced: the compressed snapshot in
+``DebuggerTowerDefenseState.state`` is rewritten only once every
+``FOLD_EVERY`` patches, folding the pending patches into it. Materialized
+states are kept in the app cache under ``(user, version)``. A version
+never changes meaning, so every worker can trust those entries.
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from caching import current_cache
+from extensions import db
+from models import DebuggerTowerDefensePatch, DebuggerTowerDefenseState
+from sharding import fan_out, user_rows
+
+from .json_patch import apply_patch, validate_patch
+from .td_scores import record_run, run_metrics
+
+FOLD_EVERY = 20
+CACHE_TTL = 600
+
+
+class VersionConflict(Exception):
+    """The save was based on an older version than the stored one."""
+
+    def __init__(self, version: int):
+        super().__init__(f"state is at version {version}")
+        self.version = version
+
+
+def _cache_key(user_id: int, version: int):
+    return ("debugger-td", user_id, version)
+
+
+def _head(user_id: int):
+    return (
+        user_rows(DebuggerTowerDefenseState, user_id)
+        .with_entities(DebuggerTowerDefenseState.version, DebuggerTowerDefenseState.base_version)
+        .first()
+    )
+
+
+def load_state(user_id: int, version: int | None = None):
+    """Return ``(state, version)``; ``(None, 0)`` when nothing was saved.
+
+    With ``version`` given, return that version or raise ``VersionConflict``
+    if it has already been folded away or does not exist.
+    """
+    if version is not None:
+        cached = current_cache.get(_cache_key(user_id, version))
+        if cached is not None:
+            return cached, version
+    row = user_rows(DebuggerTowerDefenseState, user_id).first()
+    if row is None:
+        if version:
+            raise VersionConflict(0)
+        return None, 0
+    target = row.version if version is None else version
+    if not row.base_version <= target <= row.version:
+        raise VersionConflict(row.version)
+    state = row.state
+    patches = (
+        user_rows(DebuggerTowerDefensePatch, user_id)
+        .filter(
+            DebuggerTowerDefensePatch.version > row.base_version,
+            DebuggerTowerDefensePatch.version <= target,
+        )
+        .order_by(DebuggerTowerDefensePatch.version)
+    )
+    for patch in patches:
+        state = apply_patch(state, patch.ops)
+    current_cache.set(_cache_key(user_id, target), state, ttl=CACHE_TTL)
+    return state, target
+
+
+def _write(user_id: int, state, version: int, write, previous=None) -> int:
+    """Run ``write()`` and commit; conflict if it matched no row or a key clashed.
+
+    The user's ranked best run is updated in the same commit when the
+    state's wave or kills moved.
+    """
+    try:
+        if not write():
+            raise VersionConflict(version - 1)
+        if previous is None or run_metrics(previous) != run_metrics(state):
+            record_run(user_id, state)
+        db.session.commit()
+    except (IntegrityError, VersionConflict):
+        # Another save created the row or claimed this version first.
+        db.session.rollback()
+        head = _head(user_id)
+        raise VersionConflict(head.version if head else 0)
+    current_cache.set(_cache_key(user_id, version), state, ttl=CACHE_TTL)
+    return version
+
+
+def _insert(user_id: int, state, version: int, now):
+    db.session.add(DebuggerTowerDefenseState(
+        user_id=user_id, state=state, version=version, base_version=version, updated_at=now,
+    ))
+    db.session.flush()
+    return True
+
+
+def _bump(user_id: int, current: int, values) -> bool:
+    return bool(
+        user_rows(DebuggerTowerDefenseState, user_id)
+        .filter(DebuggerTowerDefenseState.version == current)
+        .update(values, synchronize_session=False)
+    )
+
+
+def save_patch(user_id: int, expected: int, ops) -> int:
+    """Apply ``ops`` on top of version ``expected`` and return the new version.
+
+    Raises ``PatchError`` for a patch that does not apply and
+    ``VersionConflict`` when ``expected`` is not the stored version.
+    """
+    validate_patch(ops)
+    head = _head(user_id)
+    current = head.version if head else 0
+    if expected != current:
+        raise VersionConflict(current)
+    previous, _ = load_state(user_id, current)
+    state = apply_patch(previous if previous is not None else {}, ops)
+    version = current + 1
+    now = datetime.utcnow()
+
+    if head is None:
+        return _write(user_id, state, version, lambda: _insert(user_id, state, version, now))
+
+    def write():
+        values = {"version": version, "updated_at": now}
+        if version - head.base_version >= FOLD_EVERY:
+            values.update(state=state, base_version=version)
+            user_rows(DebuggerTowerDefensePatch, user_id).delete(synchronize_session=False)
+        else:
+            db.session.add(DebuggerTowerDefensePatch(user_id=user_id, version=version, ops=ops, created_at=now))
+        return _bump(user_id, current, values)
+
+    return _write(user_id, state, version, write, previous)
+
+
+def save_state(user_id: int, state: dict, expected: int | None = None) -> int:
+    """Replace the whole state; with ``expected``, only if it is still current."""
+    head = _head(user_id)
+    current = head.version if head else 0
+    if expected is not None and expected != current:
+        raise VersionConflict(current)
+    version = current + 1
+    now = datetime.utcnow()
+    if head is None:
+        return _write(user_id, state, version, lambda: _insert(user_id, state, version, now))
+
+    def write():
+        user_rows(DebuggerTowerDefensePatch, user_id).delete(synchronize_session=False)
+        values = {"state": state, "version": version, "base_version": version, "updated_at": now}
+        return _bump(user_id, current, values)
+
+    return _write(user_id, state, version, write)
+
+
+def rebuild_scores(batch_size: int = 500) -> int:
+    """Recompute every saved run's ``TowerDefenseScore``; return rows updated."""
+    table = DebuggerTowerDefenseState.__table__
+    user_ids = sorted(
+        user_id
+        for rows in fan_out(lambda conn: conn.execute(select(table.c.user_id)).scalars().all())
+        for user_id in rows
+    )
+    improved = 0
+    for index, user_id in enumerate(user_ids, 1):
+        state, _ = load_state(user_id)
+        improved += record_run(user_id, state)
+        if index % batch_size == 0:
+            db.session.commit()
+    db.session.commit()
+    return improved
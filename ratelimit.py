@@ -0,0 +1,50 @@
+import time
+from collections import defaultdict, deque
+
+from flask import Response, render_template, request
+
+# Endpoint -> bucket name; limits come from ``RATE_LIMIT_<BUCKET>`` in config.
+RATE_LIMITED_ENDPOINTS = {
+    "auth.login": "auth",
+    "auth.signup": "auth",
+    "dashboard.contact": "contact",
+    "puzzles.grade_regex_rescue": "grader",
+    "dashboard.check_challenge": "judge",
+}
+rate_limit_buckets: dict[str, deque[float]] = defaultdict(deque)
+
+
+def _client_ip() -> str:
+    forwarded = request.headers.get("X-Forwarded-For", "")
+    if forwarded:
+        return forwarded.split(",")[0].strip()
+    return request.remote_addr or "unknown"
+
+
+def init_rate_limits(app):
+    """Apply the sliding-window limits to login, signup, the contact form and puzzle grading."""
+
+    @app.before_request
+    def enforce_rate_limits():
+        bucket = RATE_LIMITED_ENDPOINTS.get(request.endpoint)
+        if bucket is None:
+            return None
+
+        max_requests, window_seconds = app.config[f"RATE_LIMIT_{bucket.upper()}"]
+        key = f"{bucket}:{_client_ip()}"
+        now = time.time()
+        window_start = now - window_seconds
+        timestamps = rate_limit_buckets[key]
+        while timestamps and timestamps[0] < window_start:
+            timestamps.popleft()
+        if len(timestamps) >= max_requests:
+            retry_after = max(1, int(window_seconds - (now - timestamps[0])))
+            response = render_template("rate_limited.html", retry_after=retry_after)
+            return Response(response, status=429, headers={"Retry-After": str(retry_after)})
+        timestamps.append(now)
+        return None
+
+    @app.errorhandler(429)
+    def rate_limit_exceeded(error):
+        retry_after = getattr(error, "retry_after", None)
+        return render_template("rate_limited.html", retry_after=retry_after), 429
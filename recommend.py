@@ -0,0 +1,175 @@
+"""Next-challenge recommendations, precomputed as a short queue per user.
+
+Each user has a ``ChallengeQueue`` row on their shard listing up to
+``QUEUE_SIZE`` published challenge ids, best first. The dashboard shows the
+first queued challenge that is still published: one indexed read and a few
+catalog lookups, with no scoring. A solve rebuilds the queue in the same
+transaction, so the solved challenge drops out and the next pick reflects
+it. A queue with nothing published left is kept, empty, until the catalog
+changes or ``EMPTY_RETRY`` passes, so a user who has solved everything
+does not rebuild and commit on every visit. ``flask recommendations refill`` (cron) rebuilds the queues of recently
+active users ahead of their next visit, so new challenges and recalibrated
+scores reach them without a request paying for it.
+
+Candidates are scored on what the user's solves show:
+
+* difficulty: the target is the mean difficulty of the last ``HISTORY``
+  solves plus ``STRETCH``. A user with no solves starts at the easiest;
+* topic progress: topics the user has started but not finished get a boost
+  that grows with the share solved, nudging them toward clearing a dungeon;
+* language: the share of recent solves in the challenge's language.
+
+Only the ``POOL_SIZE`` unsolved challenges nearest the target difficulty are
+scored. They are walked outward from the target in the catalog snapshot's
+difficulty order, so a rebuild costs one query for the user's submissions
+and a few dozen record reads however large the catalog grows.
+"""
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from caching import current_versions
+from catalog import CatalogRecord, current_catalog
+from extensions import db
+from models import ChallengeQueue, Submission, User
+from sharding import user_rows
+
+QUEUE_SIZE = 10
+POOL_SIZE = 50
+HISTORY = 20
+STRETCH = 5.0
+TOPIC_WEIGHT = 0.2
+LANGUAGE_WEIGHT = 0.15
+ACTIVE_DAYS = 7
+BATCH_SIZE = 500
+EMPTY_RETRY = timedelta(hours=1)
+
+
+class Profile(NamedTuple):
+    solved: frozenset
+    target: float  # difficulty to aim for, 0-100
+    topics: dict  # topic key -> share of its challenges solved, for started but unfinished topics
+    languages: dict  # language -> share of recent solves
+
+
+def profile(user_id: int) -> Profile:
+    """What ``user_id``'s solves say about the next challenge, from one query on their shard."""
+    catalog = current_catalog()
+    rows = user_rows(Submission, user_id).with_entities(Submission.challenge_id, Submission.timestamp).all()
+    solved = frozenset(challenge_id for challenge_id, _ in rows)
+    entries = {challenge_id: catalog.get(challenge_id) for challenge_id in solved}
+    newest_first = sorted(rows, key=lambda row: row.timestamp or datetime.min, reverse=True)
+    recent = [entries[challenge_id] for challenge_id, _ in newest_first if entries[challenge_id]][:HISTORY]
+
+    target = 0.0
+    languages = defaultdict(float)
+    if recent:
+        target = sum(entry.effective_difficulty for entry in recent) / len(recent) + STRETCH
+        for entry in recent:
+            languages[entry.language] += 1 / len(recent)
+    totals = catalog.topic_totals()
+    started = Counter(entry.topic_key for entry in entries.values() if entry is not None and entry.topic_key)
+    topics = {topic: count / totals[topic] for topic, count in started.items() if count < totals.get(topic, 0)}
+    return Profile(solved, target, topics, dict(languages))
+
+
+def score(entry: CatalogRecord, profile: Profile) -> float:
+    """Higher is better: nearness to the target difficulty, plus topic and language bonuses."""
+    return (
+        -abs(entry.effective_difficulty - profile.target) / 100
+        + TOPIC_WEIGHT * profile.topics.get(entry.topic_key, 0.0)
+        + LANGUAGE_WEIGHT * profile.languages.get(entry.language, 0.0)
+    )
+
+
+def recommend(profile: Profile, size: int = QUEUE_SIZE) -> list[int]:
+    """The ``size`` best unsolved challenge ids for ``profile``, best first."""
+    pool = []
+    for entry in current_catalog().closest_to(profile.target):
+        if entry.id not in profile.solved:
+            pool.append(entry)
+            if len(pool) == POOL_SIZE:
+                break
+    pool.sort(key=lambda entry: (-score(entry, profile), entry.effective_difficulty, entry.id))
+    return [entry.id for entry in pool[:size]]
+
+
+def _store(user_id: int, challenge_ids: list[int], queue: ChallengeQueue | None):
+    if queue is None:
+        db.session.add(ChallengeQueue(user_id=user_id, challenge_ids=challenge_ids))
+    else:
+        queue.challenge_ids = challenge_ids
+        queue.built_at = datetime.utcnow()
+
+
+def refill(user_id: int) -> list[int]:
+    """Rebuild ``user_id``'s queue and commit; returns it."""
+    queue = user_rows(ChallengeQueue, user_id).first()
+    challenge_ids = recommend(profile(user_id))
+    _store(user_id, challenge_ids, queue)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()  # a concurrent request created the row first
+        _store(user_id, challenge_ids, user_rows(ChallengeQueue, user_id).first())
+        db.session.commit()
+    return challenge_ids
+
+
+def after_solve(user_id: int):
+    """Rebuild an existing queue in the caller's transaction, after its solve is added.
+
+    Users without a queue get one on their next dashboard visit, so a solve
+    never races a concurrent first build.
+    """
+    queue = user_rows(ChallengeQueue, user_id).first()
+    if queue is not None:
+        _store(user_id, recommend(profile(user_id)), queue)
+
+
+def _worth_rebuilding(queue: ChallengeQueue) -> bool:
+    """Whether a queue with nothing published in it may have something now."""
+    built_at = queue.built_at.replace(tzinfo=timezone.utc)
+    changed = current_versions.last_modified("challenge")
+    return (changed is not None and changed > built_at) or built_at <= datetime.now(timezone.utc) - EMPTY_RETRY
+
+
+def next_challenge(user_id: int, difficulty: str | None = None) -> CatalogRecord | None:
+    """The first queued challenge that is still published, with label ``difficulty`` if given.
+
+    Builds the queue when the user has none. One with nothing published left
+    is rebuilt only if challenges changed since it was built, or it is older
+    than ``EMPTY_RETRY``; until then the visit reads it and writes nothing.
+    """
+    catalog = current_catalog()
+    queue = user_rows(ChallengeQueue, user_id).first()
+    entries = [catalog.get(challenge_id) for challenge_id in (queue.challenge_ids if queue else ())]
+    entries = [entry for entry in entries if entry is not None]
+    if not entries and (queue is None or _worth_rebuilding(queue)):
+        entries = [entry for entry in map(catalog.get, refill(user_id)) if entry is not None]
+    for entry in entries:
+        if difficulty is None or entry.difficulty == difficulty:
+            return entry
+    return None
+
+
+def refill_active(days: int = ACTIVE_DAYS, batch_size: int = BATCH_SIZE, today: date | None = None) -> int:
+    """Rebuild the queue of every user active in the last ``days`` days; returns how many."""
+    since = (today or date.today()) - timedelta(days=days)
+    last_id, rebuilt = 0, 0
+    while True:
+        user_ids = db.session.scalars(
+            select(User.id)
+            .where(User.id > last_id, User.active.is_(True), User.last_active_date >= since)
+            .order_by(User.id)
+            .limit(batch_size)
+        ).all()
+        for user_id in user_ids:
+            refill(user_id)
+        rebuilt += len(user_ids)
+        if len(user_ids) < batch_size:
+            return rebuilt
+        last_id = user_ids[-1]
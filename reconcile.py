@@ -0,0 +1,236 @@
+"""Recompute ``User.xp`` and ``User.streak`` from the rows that earned them.
+
+The counters on ``user`` are updated in place on every solve, so a bug, a
+half-applied deploy or a manual edit can leave them out of step with the
+progress tables. ``reconcile`` walks users in id order, ``batch_size`` at
+a time, and for each chunk ``(lo, hi]`` derives the expected values with
+a handful of grouped queries over the whole range:
+
+* XP: 10 per ``Submission``, ``DEFAULT_PUZZLE_XP`` per ``PuzzleCompletion``,
+  the dungeon's ``reward_xp`` per ``DungeonCompletion``, plus every
+  ``adjust_stats`` audit entry. Entries record ``applied_xp``, the change
+  left after clamping at zero; older entries only have ``delta_xp``.
+* Streak: the run of consecutive UTC days with a submission that ends on
+  the user's latest one, plus the admin streak adjustments made since that
+  run started.
+
+Sharded tables are read with ``fan_out``, so each shard answers for the
+whole range at once. In fix mode a mismatch is corrected with an UPDATE
+guarded by the values that were read. A user whose counters changed in the
+meantime is left alone and reported as a conflict. Users with XP events
+newer than ``settle_seconds`` are skipped: their solve may be committed on
+the primary but not yet on their shard. Every chunk ends its transaction,
+so writers wait for at most one chunk's worth of row updates.
+"""
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import NamedTuple
+
+from sqlalchemy import func, select, update
+
+from extensions import db
+from models import AuditLog, Dungeon, DungeonCompletion, PuzzleCompletion, Submission, User, XpEvent
+from puzzles.data import DEFAULT_PUZZLE_XP
+from sharding import fan_out
+from xp_ledger import RECONCILE_SOURCE
+
+CHALLENGE_XP = 10
+BATCH_SIZE = 1000
+SETTLE_SECONDS = 60.0
+SAMPLE_SIZE = 20
+
+
+class Mismatch(NamedTuple):
+    user_id: int
+    xp: int
+    expected_xp: int
+    streak: int
+    expected_streak: int
+
+
+class Report:
+    """Totals for one run, plus the first ``sample_size`` mismatches."""
+
+    def __init__(self, sample_size: int = SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self.checked = 0
+        self.chunks = 0
+        self.skipped_active = 0
+        self.mismatched = 0
+        self.fixed = 0
+        self.conflicts = 0
+        self.sample: list[Mismatch] = []
+        self.longest_chunk_ms = 0.0
+
+    def add(self, mismatch: Mismatch):
+        self.mismatched += 1
+        if len(self.sample) < self.sample_size:
+            self.sample.append(mismatch)
+
+
+def _as_date(value) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _naive_utc(value: datetime) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _progress(lo: int, hi: int):
+    """Per-user solve days, puzzle counts and dungeon ids for ``lo < user_id <= hi``, merged over shards."""
+    day = func.date(Submission.timestamp)
+    solves = (
+        select(Submission.user_id, day, func.min(Submission.timestamp), func.count())
+        .where(Submission.user_id > lo, Submission.user_id <= hi)
+        .group_by(Submission.user_id, day)
+    )
+    puzzles = (
+        select(PuzzleCompletion.user_id, func.count())
+        .where(PuzzleCompletion.user_id > lo, PuzzleCompletion.user_id <= hi)
+        .group_by(PuzzleCompletion.user_id)
+    )
+    dungeons = select(DungeonCompletion.user_id, DungeonCompletion.dungeon_id).where(
+        DungeonCompletion.user_id > lo, DungeonCompletion.user_id <= hi
+    )
+
+    def query(conn):
+        return conn.execute(solves).all(), conn.execute(puzzles).all(), conn.execute(dungeons).all()
+
+    days, puzzle_counts, completed = defaultdict(dict), defaultdict(int), defaultdict(list)
+    for solve_rows, puzzle_rows, dungeon_rows in fan_out(query):
+        for user_id, solved_on, first_at, count in solve_rows:
+            days[user_id][_as_date(solved_on)] = (_naive_utc(first_at), count)
+        for user_id, count in puzzle_rows:
+            puzzle_counts[user_id] += count
+        for user_id, dungeon_id in dungeon_rows:
+            completed[user_id].append(dungeon_id)
+    return days, puzzle_counts, completed
+
+
+def _adjustments(lo: int, hi: int):
+    """``adjust_stats`` audit entries for the range as ``{user_id: [(at, xp, streak)]}``."""
+    rows = db.session.execute(
+        select(AuditLog.target_user_id, AuditLog.created_at, AuditLog.meta).where(
+            AuditLog.action == "adjust_stats", AuditLog.target_user_id > lo, AuditLog.target_user_id <= hi
+        )
+    ).all()
+    adjustments = defaultdict(list)
+    for user_id, created_at, meta in rows:
+        meta = meta or {}
+        xp = meta.get("applied_xp", meta.get("delta_xp")) or 0
+        streak = meta.get("applied_streak", meta.get("delta_streak")) or 0
+        adjustments[user_id].append((_naive_utc(created_at), int(xp), int(streak)))
+    return adjustments
+
+
+def current_run(days: dict) -> tuple[int, datetime | None]:
+    """Length of the consecutive-day run ending on the latest day, and when its first solve happened."""
+    if not days:
+        return 0, None
+    day = max(days)
+    length = 0
+    while day in days:
+        length += 1
+        day -= timedelta(days=1)
+    return length, days[day + timedelta(days=1)][0]
+
+
+def expected_counters(days: dict, puzzles: int, dungeon_xp: int, adjustments: list) -> tuple[int, int]:
+    """``(xp, streak)`` implied by one user's progress rows and admin adjustments."""
+    xp = CHALLENGE_XP * sum(count for _, count in days.values()) + DEFAULT_PUZZLE_XP * puzzles + dungeon_xp
+    xp += sum(delta for _, delta, _ in adjustments)
+    streak, run_started = current_run(days)
+    streak += sum(delta for at, _, delta in adjustments if run_started is None or at >= run_started)
+    return max(0, xp), max(0, streak)
+
+
+def _fix(mismatch: Mismatch) -> bool:
+    """Set one user's counters if they still hold the values that were checked."""
+    fixed = db.session.execute(
+        update(User)
+        .where(
+            User.id == mismatch.user_id,
+            func.coalesce(User.xp, 0) == mismatch.xp,
+            func.coalesce(User.streak, 0) == mismatch.streak,
+        )
+        .values(xp=mismatch.expected_xp, streak=mismatch.expected_streak)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if fixed and mismatch.expected_xp != mismatch.xp:
+        db.session.add(XpEvent(
+            user_id=mismatch.user_id, source=RECONCILE_SOURCE, delta=mismatch.expected_xp - mismatch.xp,
+        ))
+    return bool(fixed)
+
+
+def reconcile_chunk(lo: int, hi: int, users, rewards: dict, report: Report, fix: bool, settle_seconds: float):
+    """Check (and with ``fix``, correct) the users with ``lo < id <= hi``; ends the transaction."""
+    days, puzzles, completed = _progress(lo, hi)
+    adjustments = _adjustments(lo, hi)
+    active = set()
+    if settle_seconds:
+        since = datetime.utcnow() - timedelta(seconds=settle_seconds)
+        active = set(db.session.scalars(
+            select(XpEvent.user_id).where(XpEvent.user_id > lo, XpEvent.user_id <= hi, XpEvent.created_at > since)
+        ))
+
+    fixed = 0
+    for user_id, xp, streak in users:
+        report.checked += 1
+        if user_id in active:
+            report.skipped_active += 1
+            continue
+        dungeon_xp = sum(rewards.get(dungeon_id, 0) for dungeon_id in completed.get(user_id, ()))
+        expected_xp, expected_streak = expected_counters(
+            days.get(user_id, {}), puzzles.get(user_id, 0), dungeon_xp, adjustments.get(user_id, [])
+        )
+        if (xp or 0, streak or 0) == (expected_xp, expected_streak):
+            continue
+        mismatch = Mismatch(user_id, xp or 0, expected_xp, streak or 0, expected_streak)
+        report.add(mismatch)
+        if not fix:
+            continue
+        if _fix(mismatch):
+            fixed += 1
+        else:
+            report.conflicts += 1
+    if fixed:
+        db.session.commit()
+        report.fixed += fixed
+    else:
+        db.session.rollback()
+
+
+def reconcile(
+    fix: bool = False,
+    batch_size: int = BATCH_SIZE,
+    settle_seconds: float = SETTLE_SECONDS,
+    pause: float = 0.0,
+    sample_size: int = SAMPLE_SIZE,
+    start_after: int = 0,
+) -> Report:
+    """Check every user after ``start_after`` in chunks of ``batch_size``; with ``fix``, correct them."""
+    report = Report(sample_size)
+    rewards = dict(db.session.execute(select(Dungeon.id, Dungeon.reward_xp)).all())
+    lo = start_after
+    while True:
+        started = time.perf_counter()
+        users = db.session.execute(
+            select(User.id, User.xp, User.streak).where(User.id > lo).order_by(User.id).limit(batch_size)
+        ).all()
+        if not users:
+            db.session.rollback()
+            break
+        hi = users[-1].id
+        reconcile_chunk(lo, hi, users, rewards, report, fix, settle_seconds)
+        report.chunks += 1
+        report.longest_chunk_ms = max(report.longest_chunk_ms, (time.perf_counter() - started) * 1000)
+        lo = hi
+        if len(users) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    return report
@@ -0,0 +1,87 @@
+"""Send read-only requests to replica databases.
+
+Views marked with ``@replica_read`` run their GET/HEAD requests against a
+replica engine from ``SQLALCHEMY_REPLICA_URIS``; ``routing.RoutingSession``
+applies the choice. Everything else, and any statement that writes, uses
+the primary.
+
+Replicas lag behind the primary, so a client that has just written must not
+be sent to one that has not caught up. After a request writes, the primary's
+``data_version`` stamps for the written tables are stored in the client's
+session as a fence. A routed request first checks the chosen replica's
+stamps against that fence. If the replica is behind, the request stays on
+the primary. Once a replica has caught up, the fence is dropped.
+"""
+import random
+
+from flask import g, has_app_context, request, session
+from sqlalchemy import create_engine, event, select
+
+FENCE_KEY = "_db_fence"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+def replica_read(view):
+    """Allow ``view`` to be served from a replica for safe HTTP methods.
+
+    Place it directly under the route decorator so the flag lands on the
+    function Flask registers.
+    """
+    view.replica_read = True
+    return view
+
+
+def _after_flush(session, flush_context):
+    if has_app_context():
+        g.pop("_db_replica", None)
+
+
+def _read_versions(engine, table, names) -> dict[str, int]:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(table.c.table_name, table.c.version).where(table.c.table_name.in_(names))
+        ).all()
+    return {name: version for name, version in rows}
+
+
+def init_replicas(app, db):
+    """Create replica engines and install per-request routing."""
+    app.config.setdefault("SQLALCHEMY_REPLICA_URIS", ())
+    options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    engines = [create_engine(uri, **options) for uri in app.config["SQLALCHEMY_REPLICA_URIS"]]
+    app.extensions["replicas"] = engines
+
+    if not getattr(db, "_replica_listeners_installed", False):
+        event.listen(db.session, "after_flush", _after_flush)
+        db._replica_listeners_installed = True
+
+    if not engines:
+        return
+
+    @app.before_request
+    def route_reads():
+        if request.method not in SAFE_METHODS:
+            return
+        view = app.view_functions.get(request.endpoint)
+        if not getattr(view, "replica_read", False):
+            return
+        replica = random.choice(engines)
+        fence = session.get(FENCE_KEY)
+        if fence:
+            table = app.extensions["data_versions"].table
+            seen = _read_versions(replica, table, list(fence))
+            if any(seen.get(name, 0) < version for name, version in fence.items()):
+                return
+            session.pop(FENCE_KEY)
+        g._db_replica = replica
+
+    @app.after_request
+    def set_fence(response):
+        written = g.pop("_data_bumped", None)
+        if written:
+            table = app.extensions["data_versions"].table
+            fence = dict(session.get(FENCE_KEY) or {})
+            for name, version in _read_versions(db.engine, table, sorted(written)).items():
+                fence[name] = max(version, fence.get(name, 0))
+            session[FENCE_KEY] = fence
+        return response
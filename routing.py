@@ -0,0 +1,80 @@
+"""Session that picks an engine per statement: shard, replica or primary.
+
+Kept free of app imports because ``extensions.py`` needs it to build ``db``.
+"""
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.sql.dml import UpdateBase
+
+SHARD_KEY_OPTION = "shard_key"
+
+
+class ShardKeyMissing(LookupError):
+    """A statement on a sharded model did not say whose rows it reads."""
+
+
+class RoutingSession(Session):
+    """Route statements to the right engine.
+
+    - Models that declare ``__shard_key__`` go to the shard that owns the
+      row's user, when ``SHARD_DATABASE_URIS`` is set. Reads name the user
+      with the ``shard_key`` execution option (see ``sharding.user_rows``);
+      flushes read the attribute from each instance. Ids repeat across
+      shards, so loaded and flushed rows carry the shard number as their
+      identity token and never collide in the identity map.
+    - Other reads go to the request's replica, if ``replicas.py`` chose one.
+    - Flushes and DML always go to the primary. After the first flush in a
+      request, the rest of that request reads from the primary as well, so
+      it sees its own writes.
+    """
+
+    def __init__(self, db, **kwargs):
+        super().__init__(db, **kwargs)
+        shards = current_app.extensions.get("shards") if has_app_context() else None
+        if shards:
+            self.connection_callable = self._flush_connection
+
+    def _shards(self):
+        return current_app.extensions.get("shards") if has_app_context() else None
+
+    def _flush_connection(self, mapper=None, instance=None, **kwargs):
+        shard_key = getattr(mapper.class_, "__shard_key__", None) if mapper is not None else None
+        if shard_key and instance is not None:
+            shards = self._shards()
+            index = shards.index_for(getattr(instance, shard_key))
+            state = inspect(instance)
+            if state.key is None:
+                state.identity_token = index
+            return self.connection(bind_arguments={"bind": shards.engines[index]})
+        return self.connection(bind_arguments={"mapper": mapper})
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and mapper is not None:
+            shards = self._shards()
+            cls = inspect(mapper).class_ if shards else None
+            if shards and getattr(cls, "__shard_key__", None):
+                options = clause.get_execution_options() if clause is not None else {}
+                options = {**options, **kwargs}
+                if SHARD_KEY_OPTION not in options:
+                    raise ShardKeyMissing(
+                        f"{cls.__name__} is sharded; pass .execution_options({SHARD_KEY_OPTION}=user_id)"
+                    )
+                return shards.engine_for(options[SHARD_KEY_OPTION])
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase):
+            replica = g.get("_db_replica") if has_app_context() else None
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _shard_identity(orm_context):
+    shard_key = orm_context.execution_options.get(SHARD_KEY_OPTION)
+    shards = current_app.extensions.get("shards") if has_app_context() else None
+    if shards and shard_key is not None:
+        # Query.update()/delete() pass their options to execute(), not on the
+        # statement, so hand the key to get_bind() directly.
+        orm_context.bind_arguments[SHARD_KEY_OPTION] = shard_key
+        if orm_context.is_select:
+            orm_context.update_execution_options(identity_token=shards.index_for(shard_key))
@@ -0,0 +1,3 @@
+from .pool import CpuLimitExceeded, PoolBusy, SandboxError, WorkerLost, WorkerPool
+
+__all__ = ["CpuLimitExceeded", "PoolBusy", "SandboxError", "WorkerLost", "WorkerPool"]
@@ -0,0 +1,123 @@
+"""Kernel-enforced confinement for a forked solution child (Linux).
+
+``confine`` runs in the child before any untrusted code does. It:
+
+* moves the child into a new network namespace, whose only interface is a
+  loopback that is down, so nothing can be reached or bound. Without the
+  privilege to do that directly, the child first enters a new user
+  namespace, which unprivileged users may create;
+* restricts the filesystem with Landlock: read-only access beneath the
+  given directories, full access beneath the working directory, nothing
+  anywhere else. Where the kernel supports it (Landlock ABI 6), the child
+  also cannot signal processes or reach abstract sockets outside itself;
+* drops root to ``nobody``, after handing it the working directory, so no
+  capability is left and ``RLIMIT_NPROC`` applies.
+
+None of this can be undone from inside: a Landlock domain lasts for the
+life of the process, ``no_new_privs`` cannot be cleared, and without
+capabilities there is no way back to the host's network namespace. Code
+that gets around the runner's audit hook still cannot read the app's
+files or open a connection.
+
+``confine`` raises ``IsolationUnavailable`` naming the first step the
+kernel refused.
+"""
+import ctypes
+import os
+
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+PR_SET_NO_NEW_PRIVS = 38
+NOBODY = 65534
+
+# Landlock syscalls have the same numbers on every architecture.
+SYS_LANDLOCK_CREATE_RULESET = 444
+SYS_LANDLOCK_ADD_RULE = 445
+SYS_LANDLOCK_RESTRICT_SELF = 446
+LANDLOCK_CREATE_RULESET_VERSION = 1
+LANDLOCK_RULE_PATH_BENEATH = 1
+
+FS_EXECUTE = 1 << 0
+FS_READ_FILE = 1 << 2
+FS_READ_DIR = 1 << 3
+FS_REFER = 1 << 13  # ABI 2
+FS_TRUNCATE = 1 << 14  # ABI 3
+FS_IOCTL_DEV = 1 << 15  # ABI 5
+NET_BIND_TCP = 1 << 0  # ABI 4
+NET_CONNECT_TCP = 1 << 1
+SCOPE_ABSTRACT_UNIX_SOCKET = 1 << 0  # ABI 6
+SCOPE_SIGNAL = 1 << 1
+
+
+class IsolationUnavailable(OSError):
+    """The kernel refused one of the confinement steps."""
+
+
+class _RulesetAttr(ctypes.Structure):
+    _fields_ = [("handled_access_fs", ctypes.c_uint64), ("handled_access_net", ctypes.c_uint64),
+                ("scoped", ctypes.c_uint64)]
+
+
+class _PathBeneathAttr(ctypes.Structure):
+    _pack_ = 1
+    _fields_ = [("allowed_access", ctypes.c_uint64), ("parent_fd", ctypes.c_int32)]
+
+
+def _check(result: int, step: str) -> int:
+    if result < 0:
+        errno = ctypes.get_errno()
+        raise IsolationUnavailable(errno, f"{step}: {os.strerror(errno)}")
+    return result
+
+
+def _fs_rights(abi: int) -> int:
+    rights = (1 << 13) - 1
+    for needed, right in ((2, FS_REFER), (3, FS_TRUNCATE), (5, FS_IOCTL_DEV)):
+        if abi >= needed:
+            rights |= right
+    return rights
+
+
+def _landlock(libc, readable, workdir: str):
+    abi = _check(libc.syscall(SYS_LANDLOCK_CREATE_RULESET, None, 0, LANDLOCK_CREATE_RULESET_VERSION), "landlock")
+    handled = _fs_rights(abi)
+    attr = _RulesetAttr(handled, NET_BIND_TCP | NET_CONNECT_TCP if abi >= 4 else 0,
+                        SCOPE_ABSTRACT_UNIX_SOCKET | SCOPE_SIGNAL if abi >= 6 else 0)
+    size = 24 if abi >= 6 else 16 if abi >= 4 else 8
+    ruleset = _check(libc.syscall(SYS_LANDLOCK_CREATE_RULESET, ctypes.byref(attr), size, 0), "landlock ruleset")
+    try:
+        rules = [(path, FS_READ_FILE | FS_READ_DIR) for path in readable] + [(workdir, handled & ~FS_EXECUTE)]
+        for path, rights in rules:
+            try:
+                fd = os.open(path, os.O_PATH | os.O_CLOEXEC)
+            except FileNotFoundError:
+                continue
+            try:
+                rule = _PathBeneathAttr(rights, fd)
+                _check(libc.syscall(SYS_LANDLOCK_ADD_RULE, ruleset, LANDLOCK_RULE_PATH_BENEATH, ctypes.byref(rule), 0),
+                       f"landlock rule for {path}")
+            finally:
+                os.close(fd)
+        _check(libc.prctl(PR_SET_NO_NEW_PRIVS, 1, 0, 0, 0), "no_new_privs")
+        _check(libc.syscall(SYS_LANDLOCK_RESTRICT_SELF, ruleset, 0), "landlock restrict")
+    finally:
+        os.close(ruleset)
+
+
+def confine(workdir: str, readable=()):
+    """Confine this process for good: no network, no files outside ``readable`` and ``workdir``, no root.
+
+    Must run in a single-threaded process, such as a freshly forked child.
+    """
+    libc = ctypes.CDLL(None, use_errno=True)
+    root, isolated = os.geteuid() == 0, False
+    if root:
+        os.chown(workdir, NOBODY, NOBODY)
+        isolated = libc.unshare(CLONE_NEWNET) == 0
+    _landlock(libc, readable, workdir)  # while the rule paths can still be opened
+    if root:
+        os.setgroups([])
+        os.setresgid(NOBODY, NOBODY, NOBODY)
+        os.setresuid(NOBODY, NOBODY, NOBODY)
+    if not isolated:
+        _check(libc.unshare(CLONE_NEWUSER | CLONE_NEWNET), "network namespace")
@@ -0,0 +1,203 @@
+"""Long-lived worker processes for code that must not run in a web thread.
+
+A ``WorkerPool`` keeps a few spawned interpreters and sends them one task
+at a time over a pipe. Each task runs under three limits, from the most
+graceful to the bluntest:
+
+1. A ``SIGPROF`` interval timer measures the worker's CPU time. When the
+   task's budget runs out the handler raises ``CpuLimitExceeded``. Python
+   code and the ``re`` engine both check for signals, so the worker
+   survives and keeps its warm caches.
+2. ``RLIMIT_CPU`` is raised a second or more past the task's budget. If the
+   task is stuck in C code that never checks for signals, the kernel kills
+   the worker with ``SIGXCPU``.
+3. The caller waits at most ``wall_seconds`` for a reply, then kills the
+   worker. This also covers tasks that block without using CPU.
+
+A killed worker is replaced the next time its slot is checked out, so the
+cost of a bad task is one respawn, not a stuck Gunicorn thread.
+
+This module is imported by every worker, so it must stay free of Flask and
+the app's models. Task functions must also live in modules that import
+quickly, such as ``sandbox.regex``.
+"""
+import importlib
+import math
+import multiprocessing
+import queue
+import resource
+import signal
+import threading
+
+DEFAULT_CPU_SECONDS = 0.5
+
+
+class SandboxError(Exception):
+    """A task could not produce a result."""
+
+
+class CpuLimitExceeded(SandboxError):
+    """The task used up its CPU budget."""
+
+
+class WorkerLost(SandboxError):
+    """The worker died or missed its deadline and was killed."""
+
+
+class PoolBusy(SandboxError):
+    """No worker became free in time."""
+
+
+def _on_cpu_limit(signum, frame):
+    raise CpuLimitExceeded()
+
+
+def _cap_cpu(seconds: float):
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    soft = math.ceil(usage.ru_utime + usage.ru_stime + seconds) + 1
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _serve(conn, preload=()):
+    """Worker loop: run ``(func, args, cpu_seconds)`` tasks until the pipe closes."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGPROF, _on_cpu_limit)
+    for name in preload:
+        importlib.import_module(name)
+    while True:
+        try:
+            func, args, cpu_seconds = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            _cap_cpu(cpu_seconds)
+            signal.setitimer(signal.ITIMER_PROF, cpu_seconds)
+            try:
+                reply = ("ok", func(*args))
+            finally:
+                signal.setitimer(signal.ITIMER_PROF, 0)
+        except CpuLimitExceeded:
+            reply = ("cpu", None)
+        except Exception as exc:
+            reply = ("error", f"{type(exc).__name__}: {exc}")
+        conn.send(reply)
+
+
+class _Worker:
+    def __init__(self, context, preload):
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child, preload), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class WorkerPool:
+    """``size`` worker processes, started lazily and reused across tasks.
+
+    ``call`` is thread-safe. Workers are spawned, not forked, so they never
+    inherit a Gunicorn worker's threads, sockets or database connections.
+    ``preload`` names modules each worker imports as it starts, so the first
+    task does not pay for them. At most ``max_waiting`` callers queue for a
+    free worker; beyond that ``call`` raises ``PoolBusy`` at once instead of
+    tying up another request thread.
+    """
+
+    def __init__(self, size: int = 2, cpu_seconds: float = DEFAULT_CPU_SECONDS,
+                 wall_seconds: float | None = None, checkout_timeout: float = 5.0,
+                 max_waiting: int | None = None, preload=()):
+        self.size = max(1, size)
+        self.cpu_seconds = cpu_seconds
+        self.wall_seconds = wall_seconds
+        self.checkout_timeout = checkout_timeout
+        self.max_waiting = max_waiting
+        self.preload = tuple(preload)
+        self._context = multiprocessing.get_context("spawn")
+        self._waiting_lock = threading.Lock()
+        self._waiting = 0
+        self._reset()
+
+    def _reset(self):
+        # LIFO: the most recently used worker has the warmest caches.
+        self._idle = queue.LifoQueue()
+        for _ in range(self.size):
+            self._idle.put(None)  # None: a slot with no process yet
+
+    def start(self):
+        """Spawn every worker now rather than on first use."""
+        slots = [self._idle.get() for _ in range(self.size)]
+        for slot in slots:
+            self._idle.put(slot or _Worker(self._context, self.preload))
+
+    def _checkout(self):
+        with self._waiting_lock:
+            if self.max_waiting is not None and self._waiting >= self.max_waiting and self._idle.empty():
+                raise PoolBusy("sandbox queue is full")
+            self._waiting += 1
+        try:
+            return self._idle.get(timeout=self.checkout_timeout)
+        except queue.Empty:
+            raise PoolBusy("all sandbox workers are busy") from None
+        finally:
+            with self._waiting_lock:
+                self._waiting -= 1
+
+    def call(self, func, *args, cpu_seconds: float | None = None):
+        """Run ``func(*args)`` in a worker and return its result.
+
+        Raises ``CpuLimitExceeded``, ``WorkerLost``, ``PoolBusy`` or
+        ``SandboxError`` (for an exception raised by ``func``).
+        """
+        cpu_seconds = cpu_seconds or self.cpu_seconds
+        wall_seconds = self.wall_seconds or cpu_seconds * 4 + 1
+        worker = self._checkout()
+        try:
+            if worker is not None and not worker.process.is_alive():
+                worker.kill()
+                worker = None
+            if worker is None:
+                worker = _Worker(self._context, self.preload)
+            worker.conn.send((func, args, cpu_seconds))
+            if not worker.conn.poll(wall_seconds):
+                worker.kill()
+                worker = None
+                raise WorkerLost(f"no reply within {wall_seconds:g}s")
+            status, value = worker.conn.recv()
+        except (EOFError, OSError) as exc:
+            if worker is not None:
+                worker.kill()
+                worker = None
+            raise WorkerLost(f"worker exited: {exc or type(exc).__name__}") from None
+        finally:
+            self._idle.put(worker)
+        if status == "cpu":
+            raise CpuLimitExceeded(f"used more than {cpu_seconds:g}s of CPU")
+        if status == "error":
+            raise SandboxError(value)
+        return value
+
+    def close(self):
+        """Stop the idle workers. Their slots respawn if the pool is used again."""
+        drained = []
+        while True:
+            try:
+                drained.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in drained:
+            if worker is not None:
+                worker.kill()
+            self._idle.put(None)
+
+    def after_fork(self):
+        """Forget workers inherited from the parent; they belong to it."""
+        self._waiting_lock = threading.Lock()
+        self._waiting = 0
+        self._reset()
@@ -0,0 +1,340 @@
+"""Run an untrusted Python solution against test cases.
+
+``run_solution`` executes inside a ``WorkerPool`` worker. The worker is a
+warm, single-threaded interpreter that has already imported the stdlib
+modules solutions usually need. For each submission it forks a child,
+which costs about a millisecond, against tens of milliseconds to start a
+fresh interpreter. The child is thrown away afterwards, so no submission
+sees another's state.
+
+The child runs with:
+
+* ``sandbox.isolation.confine``: a network namespace with no interfaces,
+  a Landlock ruleset that only allows reading the stdlib and using its
+  temp dir, and the ``nobody`` uid when the worker is root. These are
+  enforced by the kernel and hold even if the solution defeats the audit
+  hook below. A kernel that refuses any of them fails the check as
+  ``crashed`` unless the ``isolation`` limit is off;
+* ``RLIMIT_CPU``, plus a ``SIGPROF`` timer for sub-second budgets;
+* ``RLIMIT_AS`` for memory, ``RLIMIT_FSIZE`` for anything written to
+  disk, and ``RLIMIT_NPROC``/``RLIMIT_NOFILE``/``RLIMIT_CORE`` caps.
+  ``RLIMIT_NPROC`` only binds a process that is not root, which is why
+  the child never stays root;
+* a private temporary directory as its working directory, an empty
+  environment, and no inherited file descriptors except its result pipe;
+* an audit hook that refuses sockets, subprocesses, ``fork``/``exec``,
+  ``ctypes``, the ``gc`` walks that reach the hook itself, changes to
+  function objects, and file access outside the temp dir and the stdlib.
+  Its policy is copied into the hook when it is installed, so rebinding
+  this module's constants does not change it. It is a first line that
+  gives clear errors, not the boundary.
+
+The child only reports what the solution returned. Expected values never
+enter the child, and results are compared here in the worker. Code that
+writes to the result pipe directly can at most misreport its own answers.
+"""
+import copy
+import io
+import json
+import math
+import os
+import resource
+import select
+import shutil
+import signal
+import sys
+import sysconfig
+import tempfile
+import time
+import traceback
+import types
+
+# Imported once per worker so solutions that use them start instantly.
+import bisect  # noqa: F401
+import collections  # noqa: F401
+import functools  # noqa: F401
+import heapq  # noqa: F401
+import itertools  # noqa: F401
+import random  # noqa: F401
+import re  # noqa: F401
+import statistics  # noqa: F401
+import string  # noqa: F401
+
+from .isolation import confine
+
+DEFAULT_LIMITS = {
+    "cpu_seconds": 2.0, "wall_seconds": 5.0, "memory_mb": 256, "output_bytes": 64 * 1024, "isolation": True,
+}
+BLOCKED_MODULES = frozenset({
+    "_ctypes", "_posixsubprocess", "_socket", "asyncio", "ctypes", "ftplib", "http", "multiprocessing",
+    "pty", "smtplib", "socket", "ssl", "subprocess", "urllib",
+})
+BLOCKED_EVENTS = frozenset({
+    "ctypes.dlopen", "os.exec", "os.fork", "os.forkpty", "os.kill", "os.killpg", "os.posix_spawn",
+    "os.spawn", "os.system", "pty.spawn", "socket.__new__", "socket.bind", "socket.connect",
+    "socket.getaddrinfo", "subprocess.Popen", "sys.addaudithook",
+    # gc walks reach every live object, the audit hook included.
+    "gc.get_objects", "gc.get_referents", "gc.get_referrers",
+})
+_READABLE = tuple({os.path.realpath(sysconfig.get_paths()[key]) for key in ("stdlib", "platstdlib")})
+
+
+class _TimeLimit(BaseException):
+    pass
+
+
+class _CappedText(io.TextIOBase):
+    """A text sink that keeps the first ``limit`` characters and drops the rest."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.parts = []
+        self.size = 0
+        self.truncated = False
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        room = self.limit - self.size
+        if len(text) > room:
+            self.truncated = True
+            text = text[:max(room, 0)]
+        if text:
+            self.parts.append(text)
+            self.size += len(text)
+        return len(text)
+
+    def getvalue(self) -> str:
+        return "".join(self.parts)
+
+
+_PATH_EVENTS = frozenset({
+    "os.chmod", "os.chown", "os.link", "os.mkdir", "os.remove", "os.rename", "os.rmdir",
+    "os.symlink", "os.truncate", "os.utime", "shutil.rmtree",
+})
+_WRITE_FLAGS = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_TRUNC
+
+
+def _guard(workdir: str):
+    # Everything the hook needs is bound here, so code that rebinds this
+    # module's globals or os.path functions afterwards cannot loosen it.
+    blocked_events, blocked_modules, path_events = BLOCKED_EVENTS, BLOCKED_MODULES, _PATH_EVENTS
+    readable, write_flags, prefix = _READABLE, _WRITE_FLAGS, workdir + os.sep
+    realpath, fsdecode, function = os.path.realpath, os.fsdecode, types.FunctionType
+
+    def inside(path) -> bool:
+        if not isinstance(path, (str, bytes, os.PathLike)):
+            return True  # file descriptors and dir_fd arguments
+        path = realpath(fsdecode(path))
+        return path == workdir or path.startswith(prefix)
+
+    def audit(event, args):
+        if event in blocked_events:
+            raise PermissionError(f"{event} is not allowed in the sandbox")
+        if event in ("object.__setattr__", "object.__delattr__") and isinstance(args[0], function):
+            raise PermissionError(f"changing {args[1]} of a function is not allowed in the sandbox")
+        if event == "import" and args[0].partition(".")[0] in blocked_modules:
+            raise ImportError(f"module {args[0]!r} is not available in the sandbox")
+        if event in path_events and not all(inside(arg) for arg in args if not isinstance(arg, int)):
+            raise PermissionError(f"{event} outside the working directory is not allowed")
+        if event == "open" and not inside(args[0]):
+            path, mode, flags = args
+            writes = set(mode) & set("wax+") if isinstance(mode, str) else (flags or 0) & write_flags
+            if writes or not realpath(fsdecode(path)).startswith(readable):
+                raise PermissionError(f"cannot open {path!r} in the sandbox")
+    return audit
+
+
+def _limit(kind, value):
+    try:
+        resource.setrlimit(kind, (value, value))
+    except (ValueError, OSError):
+        pass
+
+
+def _address_space_bytes() -> int:
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[0]) * resource.getpagesize()
+
+
+def _jsonable(value):
+    try:
+        return json.loads(json.dumps(value))
+    except (TypeError, ValueError, RecursionError):
+        return repr(value)
+
+
+def _run_child(write_fd: int, source: str, entry: str, arg_lists, limits: dict, workdir: str):
+    """Runs in the forked child; writes one JSON report and exits."""
+    os.closerange(3, write_fd)
+    os.closerange(write_fd + 1, 1 << 16)
+    os.chdir(workdir)
+    os.environ.clear()
+    cpu = limits["cpu_seconds"]
+    _limit(resource.RLIMIT_CPU, math.ceil(cpu) + 1)
+    _limit(resource.RLIMIT_CORE, 0)
+    _limit(resource.RLIMIT_FSIZE, limits["output_bytes"])
+    _limit(resource.RLIMIT_NOFILE, 32)
+    _limit(resource.RLIMIT_NPROC, 0)
+    try:
+        _limit(resource.RLIMIT_AS, _address_space_bytes() + limits["memory_mb"] * 1024 * 1024)
+    except OSError:
+        pass
+    if limits["isolation"]:
+        try:
+            confine(workdir, _READABLE)
+        except OSError as exc:
+            _send(write_fd, {"unavailable": str(exc)})
+
+    def on_timer(signum, frame):
+        raise _TimeLimit()
+
+    signal.signal(signal.SIGPROF, on_timer)
+    out = _CappedText(limits["output_bytes"])
+    sys.stdout = sys.stderr = out
+    sys.stdin = io.StringIO("")
+    report = {"results": [], "limit": None, "error": None}
+    for name in [name for name in sys.modules if name.partition(".")[0] in BLOCKED_MODULES]:
+        del sys.modules[name]
+    sys.addaudithook(_guard(workdir))
+    signal.setitimer(signal.ITIMER_PROF, cpu)
+    try:
+        namespace = {"__name__": "__main__"}
+        try:
+            exec(compile(source, "<solution>", "exec"), namespace)
+            func = namespace.get(entry)
+            if not callable(func):
+                report["error"] = f"Define a function named {entry}()."
+        except Exception:
+            report["error"] = traceback.format_exc(limit=-3)
+            func = None
+        for args in arg_lists if func else ():
+            printed = out.size
+            try:
+                got = func(*copy.deepcopy(args))
+                if got is None and out.size > printed:
+                    got = out.getvalue()[printed:].strip()
+                report["results"].append({"got": _jsonable(got)})
+            except (_TimeLimit, MemoryError):
+                raise
+            except Exception as exc:
+                report["results"].append({"error": f"{type(exc).__name__}: {exc}"})
+    except _TimeLimit:
+        report["limit"] = "time"
+    except MemoryError:
+        report["limit"] = "memory"
+    finally:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+    report["output"] = out.getvalue()
+    report["truncated"] = out.truncated
+    _send(write_fd, report)
+
+
+def _send(write_fd: int, report: dict):
+    """Write the child's report to the worker and exit."""
+    view = memoryview(json.dumps(report).encode())
+    while view:
+        view = view[os.write(write_fd, view):]
+    os._exit(0)
+
+
+def _collect(pid: int, read_fd: int, wall_seconds: float):
+    """Read the child's report; kill it at the deadline. Returns ``(raw, status, rusage, timed_out)``."""
+    deadline = time.monotonic() + wall_seconds
+    chunks, timed_out = [], False
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            timed_out = True
+            os.kill(pid, signal.SIGKILL)
+            break
+        ready, _, _ = select.select([read_fd], [], [], remaining)
+        if ready:
+            chunk = os.read(read_fd, 65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    os.close(read_fd)
+    _, status, rusage = os.wait4(pid, 0)
+    return b"".join(chunks), status, rusage, timed_out
+
+
+def run_solution(source: str, entry: str, cases, limits=None) -> dict:
+    """Run ``entry`` from ``source`` once per case and return a verdict.
+
+    ``cases`` are ``{"args": [...], "expected": ..., "hidden": bool}``. The
+    verdict has ``status`` (``passed``, ``failed``, ``error``,
+    ``time_limit``, ``memory_limit`` or ``crashed``), ``passed``, ``total``,
+    per-case results (hidden cases show only their status), captured
+    ``output`` and the child's ``cpu_ms`` and ``wall_ms``.
+    """
+    limits = {**DEFAULT_LIMITS, **(limits or {})}
+    workdir = os.path.realpath(tempfile.mkdtemp(prefix="sandbox-"))
+    started = time.perf_counter()
+    read_fd, write_fd = os.pipe()
+    try:
+        pid = os.fork()
+        if pid == 0:
+            try:
+                os.close(read_fd)
+                _run_child(write_fd, source, entry, [case.get("args", []) for case in cases], limits, workdir)
+            finally:
+                os._exit(1)
+        os.close(write_fd)
+        raw, status, rusage, timed_out = _collect(pid, read_fd, limits["wall_seconds"])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+    cpu_ms = (rusage.ru_utime + rusage.ru_stime) * 1000
+    try:
+        report = json.loads(raw)
+    except ValueError:
+        report = None
+    return _verdict(cases, report, status, timed_out, cpu_ms, wall_ms)
+
+
+def _verdict(cases, report, status, timed_out, cpu_ms, wall_ms) -> dict:
+    verdict = {
+        "status": "passed", "passed": 0, "total": len(cases), "cases": [], "output": "",
+        "output_truncated": False, "error": None, "cpu_ms": round(cpu_ms, 2), "wall_ms": round(wall_ms, 2),
+    }
+    killed = os.WIFSIGNALED(status) and os.WTERMSIG(status) in (signal.SIGXCPU, signal.SIGKILL)
+    if not isinstance(report, dict):
+        verdict["status"] = "time_limit" if timed_out or killed else "crashed"
+        verdict["error"] = "The solution was stopped before it reported a result."
+        return verdict
+
+    if report.get("unavailable"):
+        verdict["status"] = "crashed"
+        verdict["error"] = f"The sandbox could not isolate the solution ({report['unavailable']})."
+        return verdict
+
+    verdict["output"] = str(report.get("output", ""))
+    verdict["output_truncated"] = bool(report.get("truncated"))
+    results = report.get("results") if isinstance(report.get("results"), list) else []
+    for index, case in enumerate(cases):
+        result = results[index] if index < len(results) and isinstance(results[index], dict) else None
+        if result is None:
+            outcome = {"status": "skipped"}
+        elif "error" in result:
+            outcome = {"status": "error", "error": str(result["error"])}
+        else:
+            ok = result.get("got") == case.get("expected")
+            verdict["passed"] += ok
+            outcome = {"status": "pass" if ok else "fail", "got": result.get("got")}
+        if case.get("hidden"):
+            outcome = {"status": outcome["status"], "hidden": True}
+        else:
+            outcome.update(args=case.get("args", []), expected=case.get("expected"))
+        verdict["cases"].append(outcome)
+
+    if report.get("error"):
+        verdict.update(status="error", error=str(report["error"]))
+    elif report.get("limit") == "time":
+        verdict.update(status="time_limit", error="Time limit exceeded.")
+    elif report.get("limit") == "memory":
+        verdict.update(status="memory_limit", error="Memory limit exceeded.")
+    elif verdict["passed"] < verdict["total"]:
+        verdict["status"] = "failed"
+    return verdict
@@ -0,0 +1,150 @@
+"""Regex matching that runs inside a sandbox worker.
+
+Players write JavaScript patterns (the page shows them as ``/.../g``), but
+the grader runs Python's ``re``. ``to_python`` rewrites the syntax whose
+meaning differs so both engines agree on what a pattern matches, and
+rejects Python-only syntax that JavaScript would refuse.
+
+Compiled patterns are kept in a bounded LRU cache per worker. A pool
+reuses its workers, so a popular answer is compiled once per worker, not
+once per attempt.
+"""
+import re
+from functools import lru_cache
+
+PATTERN_CACHE_SIZE = 256
+
+# What JavaScript's \s matches; Python's, under re.ASCII, is only the ASCII six.
+JS_SPACE = "\\t\\n\\v\\f\\r \\u00a0\\u1680\\u2000-\\u200a\\u2028\\u2029\\u202f\\u205f\\u3000\\ufeff"
+# JavaScript's "." stops at every line terminator, not only "\n".
+JS_DOT = "[^\\n\\r\\u2028\\u2029]"
+# Escapes that mean something in a JavaScript pattern without the u flag;
+# any other escaped letter is the letter itself.
+JS_ESCAPES = set("dDwWsSbBnrtfvcxuk0123456789")
+JS_CLASS_ESCAPES = set("dDwWsSbnrtfvcxu0123456789")
+_HEX = re.compile(r"[0-9a-fA-F]+")
+
+
+def _hex_digits(pattern: str, start: int, count: int) -> bool:
+    digits = pattern[start:start + count]
+    return len(digits) == count and _HEX.fullmatch(digits) is not None
+
+
+def to_python(pattern: str) -> str:
+    """Rewrite a JavaScript pattern (flags: ``g`` only) for ``re.compile(..., re.ASCII)``.
+
+    Raises ``ValueError`` for syntax JavaScript rejects but Python accepts:
+    inline flags, ``(?P...)``, comments, atomic groups and possessive
+    quantifiers.
+    """
+    out = []
+    i, end = 0, len(pattern)
+    in_class = False
+    while i < end:
+        char = pattern[i]
+        if char == "\\":
+            if i + 1 == end:
+                raise ValueError("pattern ends with a backslash")
+            escape = pattern[i + 1]
+            i += 2
+            if escape == "s":
+                out.append(JS_SPACE if in_class else f"[{JS_SPACE}]")
+            elif escape == "S":
+                if in_class:
+                    raise ValueError(r"\S inside [...] is not supported")
+                out.append(f"[^{JS_SPACE}]")
+            elif escape == "k" and not in_class and pattern.startswith("<", i):
+                close = pattern.find(">", i)
+                if close == -1:
+                    raise ValueError(r"unterminated \k<name>")
+                out.append(f"(?P={pattern[i + 1:close]})")
+                i = close + 1
+            elif escape == "c" and i < end and pattern[i].isascii() and pattern[i].isalpha():
+                out.append(f"\\x{ord(pattern[i]) % 32:02x}")
+                i += 1
+            elif (escape == "x" and not _hex_digits(pattern, i, 2)) or (
+                escape == "u" and not _hex_digits(pattern, i, 4)
+            ):
+                out.append(escape)
+            elif escape.isascii() and escape.isalpha() and escape not in (JS_CLASS_ESCAPES if in_class else JS_ESCAPES):
+                out.append(escape)
+            else:
+                out.append("\\" + escape)
+            continue
+        if in_class:
+            if char == "]":
+                in_class = False
+            out.append("\\[" if char == "[" else char)
+            i += 1
+            continue
+        if char == "[":
+            if pattern.startswith("[^]", i):
+                out.append("[\\d\\D]")
+                i += 3
+                continue
+            if pattern.startswith("[]", i):
+                out.append("(?!)")
+                i += 2
+                continue
+            in_class = True
+            out.append("[^" if pattern.startswith("[^", i) else "[")
+            i += 2 if pattern.startswith("[^", i) else 1
+            if pattern.startswith("]", i):
+                raise ValueError("empty character class")
+            continue
+        if char == "(" and pattern.startswith("(?", i):
+            rest = pattern[i + 2:i + 4]
+            if rest[:1] in (":", "=", "!") or rest in ("<=", "<!"):
+                out.append("(?")
+                i += 2
+            elif rest[:1] == "<":
+                out.append("(?P<")
+                i += 3
+            else:
+                raise ValueError(f"(?{rest[:1]} is not JavaScript regex syntax")
+            continue
+        if char in "*+?" and pattern.startswith("+", i + 1):
+            raise ValueError(f"nothing to repeat at position {i + 1}")
+        if char == ".":
+            out.append(JS_DOT)
+        elif char == "$":
+            # Python's $ also matches before a final "\n"; JavaScript's does not.
+            out.append("\\Z")
+        else:
+            out.append(char)
+        i += 1
+    return "".join(out)
+
+
+@lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def _compiled(pattern: str) -> re.Pattern:
+    # re.ASCII: JavaScript's \d, \w and \b only know ASCII digits and letters.
+    return re.compile(to_python(pattern), re.ASCII)
+
+
+def _utf16_offset(text: str, index: int) -> int:
+    return len(text[:index].encode("utf-16-le")) // 2
+
+
+def find_all(pattern: str, text: str) -> dict:
+    """Every non-overlapping match of ``pattern`` in ``text``, like JavaScript's ``String.match`` with ``g``.
+
+    Returns ``{"matches": [...], "spans": [[start, end], ...]}``, with spans
+    in UTF-16 code units as the browser counts them, or ``{"error": ...}``
+    for a pattern that does not compile. Whole matches are returned even
+    when the pattern has groups, unlike ``re.findall``.
+    """
+    try:
+        compiled = _compiled(pattern)
+    except (re.error, ValueError, RecursionError, OverflowError) as exc:
+        return {"error": f"Invalid pattern: {exc}"}
+    found = list(compiled.finditer(text))
+    spans = [list(match.span()) for match in found]
+    if not text.isascii():
+        spans = [[_utf16_offset(text, start), _utf16_offset(text, stop)] for start, stop in spans]
+    return {"matches": [match.group(0) for match in found], "spans": spans}
+
+
+def cache_info() -> dict:
+    info = _compiled.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
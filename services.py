@@ -0,0 +1,136 @@
+import random
+from datetime import date, timedelta
+
+from flask_login import current_user
+from sqlalchemy import func
+
+from caching import current_cache, current_versions
+from catalog import current_catalog
+from extensions import db, login_manager
+from models import AuditLog, Challenge, Dungeon, DungeonCompletion, Joke, Submission, User
+from recommend import next_challenge
+from sharding import user_rows
+from xp_ledger import award_xp
+
+
+def fun_pool():
+    """All fun cards as (type, text) tuples, cached until the joke table changes."""
+    return current_cache.get_or_set(
+        ("fun-pool", current_versions.token("joke")),
+        lambda: tuple(
+            (entry_type or "fun", text)
+            for entry_type, text in db.session.query(Joke.entry_type, Joke.text).order_by(Joke.id)
+        ),
+    )
+
+def published_catalog():
+    """Published challenges as ``CatalogRecord`` objects ordered by id.
+
+    Served from the memory-mapped snapshot (see ``catalog.py``), so
+    per-request lookups (daily challenge, dungeon progress) run no SQL.
+    """
+    return current_catalog()
+
+def published_topic_totals():
+    """Number of published challenges per lower-cased topic."""
+    return current_catalog().topic_totals()
+
+def random_fun():
+    pool = fun_pool()
+    if pool:
+        entry_type, text = random.choice(pool)
+        return {"type": entry_type, "text": text}
+    return {"type": "fun", "text": "Welcome to SyntaxSnacks!"}
+
+# -----------------------------------------------------------------------------
+# Helpers
+# -----------------------------------------------------------------------------
+@login_manager.user_loader
+def load_user(user_id):
+    return db.session.get(User, int(user_id))
+
+def solved_challenge_ids(user_id: int) -> set[int]:
+    """Ids of every challenge the user has solved, read from the user's shard."""
+    return {
+        challenge_id
+        for (challenge_id,) in user_rows(Submission, user_id).with_entities(Submission.challenge_id)
+    }
+
+def get_daily_challenge_for_user(user: User, difficulty: str | None = None):
+    """Return the challenge recommended to the user next, optionally with one difficulty label.
+
+    Read from the user's precomputed queue (see ``recommend.py``). When no
+    queued challenge has the requested label, fall back to the easiest
+    unsolved one with it, by calibrated difficulty score.
+    """
+    difficulty = difficulty.lower() if difficulty else None
+    entry = next_challenge(user.id, difficulty)
+    if entry is None and difficulty is not None:
+        solved_ids = solved_challenge_ids(user.id)
+        entry = next(
+            (e for e in published_catalog().easiest_first() if e.id not in solved_ids and e.difficulty == difficulty),
+            None,
+        )
+    return db.session.get(Challenge, entry.id) if entry is not None else None
+
+def update_streak_and_xp(user: User):
+    """Add +10 XP and update streak based on last active date."""
+    today = date.today()
+    if user.last_active_date is None:
+        user.streak = 1
+    else:
+        if user.last_active_date == today - timedelta(days=1):
+            user.streak += 1
+        elif user.last_active_date == today:
+            pass
+        else:
+            user.streak = 1
+    user.last_active_date = today
+    award_xp(user, 10, "challenge")
+    db.session.commit()
+
+def check_and_complete_dungeon(user: User, challenge: Challenge):
+    """After a challenge is solved, check if it completes a dungeon."""
+    if not challenge.topic:
+        return None # Challenge isn't part of a topic/dungeon
+
+    dungeon = Dungeon.query.filter(func.lower(Dungeon.topic) == challenge.topic.lower()).first()
+    if not dungeon:
+        return None # No dungeon for this topic
+
+    # Check if user has already completed this dungeon
+    if user_rows(DungeonCompletion, user.id).filter_by(dungeon_id=dungeon.id).first():
+        return None
+
+    # Get all challenge IDs for this dungeon's topic
+    topic = dungeon.topic.lower()
+    dungeon_challenge_ids = {entry.id for entry in published_catalog().by_topic(topic)}
+    if dungeon_challenge_ids.issubset(solved_challenge_ids(user.id)):
+        # User has solved all challenges in this dungeon!
+        db.session.add(DungeonCompletion(user_id=user.id, dungeon_id=dungeon.id))
+        award_xp(user, dungeon.reward_xp, "dungeon")
+        db.session.commit()
+        return dungeon # Return the completed dungeon to flash a message
+
+def admin_required():
+    return current_user.is_authenticated and current_user.is_admin
+
+
+def add_audit_log(actor_user_id: int, target_user_id: int, action: str, meta=None):
+    """Queue an audit log row (commit at caller)."""
+    log = AuditLog(
+        actor_user_id=actor_user_id,
+        target_user_id=target_user_id,
+        action=action,
+        meta=meta or {},
+    )
+    db.session.add(log)
+
+
+def normalize_tags(raw: str) -> str:
+    parts = [p.strip() for p in (raw or "").split(",") if p and p.strip()]
+    return ",".join(parts)
+
+def normalize_topic(raw: str) -> str:
+    cleaned = (raw or "").strip().lower()
+    return cleaned or None
@@ -0,0 +1,229 @@
+"""Optional horizontal partitioning of the per-user progress tables.
+
+Models that declare ``__shard_key__`` (submissions, puzzle and dungeon
+completions, tower-defense saves) grow with users × activity. With
+``SHARD_DATABASE_URIS`` set, their rows live in one of N shard databases,
+chosen by a stable hash of the user id. Global tables (users, challenges,
+dungeons, jokes, ...) stay on the primary. Without the setting every table
+stays on the primary and the helpers below behave exactly the same.
+
+Reads of a sharded model must name the user: use ``user_rows(Model, user_id)``
+or add ``.execution_options(shard_key=user_id)``. Aggregates across users go
+through ``fan_out``/``count_rows``/``grouped_counts``, which query every shard
+concurrently and merge the results. Rows from different shards share id
+ranges, so fan-out helpers return plain rows, never ORM entities.
+"""
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from sqlalchemy import (
+    Column,
+    MetaData,
+    Table,
+    UniqueConstraint,
+    create_engine,
+    delete,
+    func,
+    insert,
+    select,
+    text,
+)
+
+from extensions import db
+from routing import SHARD_KEY_OPTION, ShardKeyMissing
+
+__all__ = [
+    "ShardKeyMissing",
+    "ShardSet",
+    "count_rows",
+    "fan_out",
+    "grouped_counts",
+    "init_shards",
+    "shard_index",
+    "sharded_models",
+    "user_rows",
+]
+
+# Threads for ``fan_out``, one per shard, shared by every request in the process.
+# The lock makes checking and replacing the pool one step for concurrent requests.
+_executor: ThreadPoolExecutor | None = None
+_executor_size = 0
+_executor_lock = threading.Lock()
+
+
+def _executor_for(size: int) -> ThreadPoolExecutor | None:
+    """The fan-out pool, first replaced by one of ``size`` threads if it is smaller."""
+    global _executor, _executor_size
+    with _executor_lock:
+        if _executor_size < size:
+            _executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="shard-fan-out")
+            _executor_size = size
+        return _executor
+
+
+def _restart_executor(size: int):
+    """Start a new pool in a forked child: the parent's threads did not survive, and its lock may be held."""
+    global _executor, _executor_size, _executor_lock
+    _executor, _executor_size, _executor_lock = None, 0, threading.Lock()
+    _executor_for(size)
+
+
+def shard_index(user_id: int, count: int) -> int:
+    """Stable shard number for ``user_id``; the same in every process and release."""
+    return zlib.crc32(int(user_id).to_bytes(8, "little", signed=True)) % count
+
+
+def sharded_models() -> list:
+    return sorted(
+        (m.class_ for m in db.Model.registry.mappers if getattr(m.class_, "__shard_key__", None)),
+        key=lambda cls: cls.__tablename__,
+    )
+
+
+def shard_metadata() -> MetaData:
+    """Sharded tables only, without foreign keys to tables that live elsewhere."""
+    metadata = MetaData()
+    for model in sharded_models():
+        table = model.__table__
+        columns = [
+            Column(
+                col.name, col.type, primary_key=col.primary_key, nullable=col.nullable,
+                unique=col.unique, index=col.index,
+                server_default=col.server_default.arg if col.server_default is not None else None,
+            )
+            for col in table.columns
+        ]
+        constraints = [
+            UniqueConstraint(*(col.name for col in c.columns))
+            for c in table.constraints
+            if isinstance(c, UniqueConstraint)
+        ]
+        Table(table.name, metadata, *columns, *constraints)
+    return metadata
+
+
+class ShardSet:
+    """The shard engines for one app. Empty (and falsy) when sharding is off."""
+
+    def __init__(self, engines):
+        self.engines = list(engines)
+
+    def __len__(self):
+        return len(self.engines)
+
+    def index_for(self, user_id) -> int:
+        if user_id is None:
+            raise ShardKeyMissing("sharded rows need a user id")
+        return shard_index(user_id, len(self.engines))
+
+    def engine_for(self, user_id):
+        return self.engines[self.index_for(user_id)]
+
+    def create_tables(self):
+        metadata = shard_metadata()
+        for engine in self.engines:
+            metadata.create_all(engine)
+            if engine.dialect.name == "sqlite":
+                with engine.begin() as conn:
+                    conn.execute(text("PRAGMA journal_mode=WAL"))
+
+    def dispose(self, close: bool = True):
+        for engine in self.engines:
+            engine.dispose(close=close)
+
+    def after_fork(self):
+        """Start this process's own fan-out threads; the parent's did not survive the fork."""
+        _restart_executor(len(self))
+
+
+def user_rows(model, user_id):
+    """``model.query`` for one user's rows, pinned to that user's shard."""
+    return model.query.execution_options(**{SHARD_KEY_OPTION: user_id}).filter(
+        getattr(model, model.__shard_key__) == user_id
+    )
+
+
+def fan_out(fn) -> list:
+    """Call ``fn(connection)`` once per shard, concurrently, and return the results.
+
+    Without shards ``fn`` runs once on the session's own connection, so it
+    sees the request's uncommitted writes and honours replica routing.
+    """
+    shards = current_app.extensions["shards"]
+    if not shards:
+        return [fn(db.session.connection())]
+
+    def run(engine):
+        with engine.connect() as conn:
+            return fn(conn)
+
+    return list(_executor_for(len(shards)).map(run, shards.engines))
+
+
+def count_rows(model, *criteria) -> int:
+    """``COUNT(*)`` of ``model`` rows matching ``criteria`` across every shard."""
+    stmt = select(func.count()).select_from(model.__table__).where(*criteria)
+    return sum(fan_out(lambda conn: conn.execute(stmt).scalar() or 0))
+
+
+def grouped_counts(column, *criteria) -> dict:
+    """Row counts per value of ``column`` across every shard."""
+    stmt = select(column, func.count()).select_from(column.table).where(*criteria).group_by(column)
+    totals = {}
+    for rows in fan_out(lambda conn: conn.execute(stmt).all()):
+        for key, count in rows:
+            totals[key] = totals.get(key, 0) + count
+    return totals
+
+
+def rebalance(batch_size: int = 500) -> dict[str, int]:
+    """Move sharded rows that sit on the wrong database to their owning shard.
+
+    Covers turning sharding on (rows still on the primary) and changing the
+    number of shards. Moved rows get new ids on their target shard. Run it
+    with the app stopped: each batch is copied, then deleted from its source.
+    """
+    shards = current_app.extensions["shards"]
+    if not shards:
+        return {}
+    moved = {}
+    for model in sharded_models():
+        table = model.__table__
+        key = table.c[model.__shard_key__]
+        payload = [c for c in table.columns if not c.primary_key]
+        count = 0
+        for source in [db.engine, *shards.engines]:
+            last_id = 0
+            while True:
+                with source.connect() as conn:
+                    rows = conn.execute(
+                        select(table).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+                    ).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                by_target = {}
+                for row in rows:
+                    target = shards.engine_for(row._mapping[key])
+                    if target is not source:
+                        by_target.setdefault(target, []).append(row)
+                for target, batch in by_target.items():
+                    with target.begin() as conn:
+                        conn.execute(insert(table), [{c.name: row._mapping[c] for c in payload} for row in batch])
+                    with source.begin() as conn:
+                        conn.execute(delete(table).where(table.c.id.in_([row.id for row in batch])))
+                    count += len(batch)
+        moved[table.name] = count
+    return moved
+
+
+def init_shards(app):
+    """Create shard engines from ``SHARD_DATABASE_URIS`` (none: sharding off)."""
+    app.config.setdefault("SHARD_DATABASE_URIS", ())
+    options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})
+    shards = app.extensions["shards"] = ShardSet(
+        create_engine(uri, **options) for uri in app.config["SHARD_DATABASE_URIS"]
+    )
+    _executor_for(len(shards))
@@ -26,7 +26,15 @@
     towers: [],
   };
 
-  let state = { ...baseState };
+  const saveDelay = 1500;
+
+  let state = { ...baseState, towers: [] };
+  // Last state the server acknowledged, and its version; saves send the diff.
+  let savedSnapshot = null;
+  let savedVersion = 0;
+  let saveTimer = null;
+  let saving = false;
+  let saveAgain = false;
   let bugs = [];
   let shots = [];
   let waveInProgress = false;
@@ -162,12 +170,42 @@
     kills: state.kills,
     highWave: state.highWave,
     awardedXp: state.awardedXp,
-    towers: state.towers.map((tower) => ({ ...tower })),
+    towers: state.towers.map(({ x, y, range, fireRate, damage }) => ({ x, y, range, fireRate, damage })),
   });
 
   const hydrateState = (payload) => {
     if (!payload) return;
-    state = { ...baseState, ...payload };
+    state = {
+      ...baseState,
+      ...payload,
+      towers: (payload.towers || []).map((tower) => ({ ...tower, cooldown: 0 })),
+    };
+  };
+
+  const sameValue = (a, b) => JSON.stringify(a) === JSON.stringify(b);
+
+  // JSON Patch from the saved snapshot to `next`: changed counters, plus
+  // appended towers (or the whole list when earlier towers changed).
+  const diffState = (prev, next) => {
+    const ops = [];
+    Object.keys(next).forEach((key) => {
+      if (key === "towers") return;
+      if (!(key in prev)) ops.push({ op: "add", path: `/${key}`, value: next[key] });
+      else if (!sameValue(prev[key], next[key])) ops.push({ op: "replace", path: `/${key}`, value: next[key] });
+    });
+    const before = prev.towers || [];
+    const keepsPrefix =
+      Array.isArray(prev.towers) &&
+      next.towers.length >= before.length &&
+      before.every((tower, index) => sameValue(tower, next.towers[index]));
+    if (keepsPrefix) {
+      next.towers.slice(before.length).forEach((tower) => {
+        ops.push({ op: "add", path: "/towers/-", value: tower });
+      });
+    } else {
+      ops.push({ op: "add", path: "/towers", value: next.towers });
+    }
+    return ops;
   };
 
   const createBug = () => ({
@@ -206,6 +244,7 @@
       awardXp();
       state.awardedXp = true;
     }
+    scheduleSave();
   };
 
   const awardXp = async () => {
@@ -221,26 +260,70 @@
     }
   };
 
+  const postSave = async (body) => {
+    const response = await fetch(boot.saveUrl, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(body),
+    });
+    const payload = await response.json().catch(() => ({}));
+    return { status: response.status, payload };
+  };
+
   const saveState = async () => {
     if (!boot.saveUrl) return;
+    clearTimeout(saveTimer);
+    saveTimer = null;
+    if (saving) {
+      saveAgain = true;
+      return;
+    }
+    const next = serializeState();
+    const body = savedSnapshot
+      ? { version: savedVersion, patch: diffState(savedSnapshot, next) }
+      : { version: savedVersion, state: next };
+    if (body.patch && !body.patch.length) {
+      formatStatus("Progress already saved.");
+      return;
+    }
+    saving = true;
     formatStatus("Saving progress...");
     try {
-      const response = await fetch(boot.saveUrl, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ state: serializeState() }),
-      });
-      if (!response.ok) throw new Error("Save failed");
+      let result = await postSave(body);
+      if (result.status === 409) {
+        // Saved elsewhere since we loaded: this run is the one being played.
+        savedVersion = result.payload.version;
+        result = await postSave({ version: savedVersion, state: next });
+      }
+      if (result.status !== 200) throw new Error("Save failed");
+      savedVersion = result.payload.version;
+      savedSnapshot = next;
       formatStatus("Progress saved to server.");
     } catch (error) {
       console.error(error);
+      savedSnapshot = null;
       formatStatus("Save failed. Try again.");
+    } finally {
+      saving = false;
+      if (saveAgain) {
+        saveAgain = false;
+        scheduleSave();
+      }
     }
   };
 
+  // Collapse bursts of changes (tower spam, wave ends) into one save.
+  const scheduleSave = () => {
+    if (!boot.saveUrl) return;
+    clearTimeout(saveTimer);
+    saveTimer = setTimeout(saveState, saveDelay);
+  };
+
   const loadState = async () => {
     if (boot.savedState) {
       hydrateState(boot.savedState);
+      savedSnapshot = serializeState();
+      savedVersion = boot.savedVersion || 0;
       syncUI();
       return;
     }
@@ -250,6 +333,8 @@
       if (!response.ok) throw new Error("Load failed");
       const payload = await response.json();
       hydrateState(payload.state);
+      if (payload.state) savedSnapshot = serializeState();
+      savedVersion = payload.version || 0;
       syncUI();
     } catch (error) {
       console.error(error);
@@ -258,13 +343,14 @@
   };
 
   const resetRun = () => {
-    state = { ...baseState };
+    state = { ...baseState, towers: [] };
     bugs = [];
     shots = [];
     waveInProgress = false;
     spawnRemaining = 0;
     syncUI();
     formatStatus("Run reset. Ready to deploy.");
+    scheduleSave();
   };
 
   const drawGrid = () => {
@@ -536,6 +622,7 @@
       cooldown: 0,
     });
     formatStatus("Tower deployed.");
+    scheduleSave();
     playSequence([
       { freq: 460, duration: 0.07, type: "triangle", level: 0.45 },
       { freq: 620, duration: 0.09, type: "triangle", level: 0.45, gap: 0.02 },
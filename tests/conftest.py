@@ -1,15 +1,12 @@
-import os
-import tempfile
-
 import pytest
 
-from app import app, db
+from extensions import db
+from support import make_app
 
 
 @pytest.fixture(scope="session")
-def app_instance():
-    app.config.update(TESTING=True)
-    return app
+def app_instance(tmp_path_factory):
+    return make_app(str(tmp_path_factory.mktemp("app")))
 
 
 @pytest.fixture(autouse=True)
@@ -27,9 +24,6 @@ def client(app_instance):
 
 @pytest.fixture
 def db_session(app_instance):
-    # Use a file-based sqlite DB to keep data across request contexts.
-    db_fd, db_path = tempfile.mkstemp()
-    app_instance.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
     db.session.remove()
     db.drop_all()
     db.create_all()
@@ -38,5 +32,3 @@ def db_session(app_instance):
     finally:
         db.session.remove()
         db.drop_all()
-        os.close(db_fd)
-        os.unlink(db_path)
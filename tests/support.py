@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from extensions import db
+from factory import create_app
+from ratelimit import rate_limit_buckets
+
+
+def make_app(folder, **config):
+    """An app whose database and catalog snapshot live in ``folder``.
+
+    A file rather than ``sqlite://`` because several tests open more than one
+    connection (threads, ``engine.connect()``) and expect them to share data.
+    """
+    return create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(folder, 'app.db')}",
+        "CATALOG_SNAPSHOT_PATH": os.path.join(folder, "catalog.snapshot"),
+        **config,
+    })
+
+
+class DatabaseTestCase(unittest.TestCase):
+    """Runs each test against a fresh app and an empty database.
+
+    ``self.app`` is the app, with its context pushed, and ``self.client`` its
+    test client. Subclasses add settings through ``config``.
+    """
+
+    config = {}
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.app = make_app(self.tmpdir.name, **self.config)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        rate_limit_buckets.clear()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.app_context.pop()
+        self.app.extensions["regex_grader"].close()
+        self.app.extensions["judge"].close()
+        self.tmpdir.cleanup()
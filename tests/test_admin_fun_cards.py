@@ -1,26 +1,15 @@
-import os
-import tempfile
 import unittest
 import io
 
 from werkzeug.security import generate_password_hash
 
-from app import app, db, User, Joke
+from app import db, User, Joke
+from support import DatabaseTestCase
 
 
-class AdminFunCardsTestCase(unittest.TestCase):
+class AdminFunCardsTestCase(DatabaseTestCase):
     def setUp(self):
-        self.db_fd, self.db_path = tempfile.mkstemp()
-        app.config.update(
-            TESTING=True,
-            SQLALCHEMY_DATABASE_URI=f"sqlite:///{self.db_path}",
-        )
-        self.app_context = app.app_context()
-        self.app_context.push()
-        db.session.remove()
-        db.drop_all()
-        db.create_all()
-        self.client = app.test_client()
+        super().setUp()
 
         admin = User(
             username="admin",
@@ -31,13 +20,6 @@ class AdminFunCardsTestCase(unittest.TestCase):
         db.session.add(admin)
         db.session.commit()
 
-    def tearDown(self):
-        db.session.remove()
-        db.drop_all()
-        self.app_context.pop()
-        os.close(self.db_fd)
-        os.unlink(self.db_path)
-
     def login_admin(self):
         return self.client.post(
             "/login",
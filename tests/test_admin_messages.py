@@ -1,27 +1,16 @@
-import os
-import tempfile
 import unittest
 
 from datetime import datetime, timezone
 
 from werkzeug.security import generate_password_hash
 
-from app import app, db, Message, User
+from app import db, Message, User
+from support import DatabaseTestCase
 
 
-class AdminMessageTestCase(unittest.TestCase):
+class AdminMessageTestCase(DatabaseTestCase):
     def setUp(self):
-        self.db_fd, self.db_path = tempfile.mkstemp()
-        app.config.update(
-            TESTING=True,
-            SQLALCHEMY_DATABASE_URI=f"sqlite:///{self.db_path}",
-        )
-        self.app_context = app.app_context()
-        self.app_context.push()
-        db.session.remove()
-        db.drop_all()
-        db.create_all()
-        self.client = app.test_client()
+        super().setUp()
 
         admin = User(
             username="admin",
@@ -32,13 +21,6 @@ class AdminMessageTestCase(unittest.TestCase):
         db.session.add(admin)
         db.session.commit()
 
-    def tearDown(self):
-        db.session.remove()
-        db.drop_all()
-        self.app_context.pop()
-        os.close(self.db_fd)
-        os.unlink(self.db_path)
-
     def login_admin(self):
         return self.client.post(
             "/login",
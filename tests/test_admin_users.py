@@ -1,26 +1,15 @@
-import os
-import tempfile
 import unittest
 
 from werkzeug.security import generate_password_hash
 from flask_login import current_user
 
-from app import app, db, User, AuditLog
+from app import db, User, AuditLog
+from support import DatabaseTestCase
 
 
-class AdminUserManagementTestCase(unittest.TestCase):
+class AdminUserManagementTestCase(DatabaseTestCase):
     def setUp(self):
-        self.db_fd, self.db_path = tempfile.mkstemp()
-        app.config.update(
-            TESTING=True,
-            SQLALCHEMY_DATABASE_URI=f"sqlite:///{self.db_path}",
-        )
-        self.app_context = app.app_context()
-        self.app_context.push()
-        db.session.remove()
-        db.drop_all()
-        db.create_all()
-        self.client = app.test_client()
+        super().setUp()
 
         admin = User(
             username="admin",
@@ -37,13 +26,6 @@ class AdminUserManagementTestCase(unittest.TestCase):
         db.session.commit()
         self.user_id = user.id
 
-    def tearDown(self):
-        db.session.remove()
-        db.drop_all()
-        self.app_context.pop()
-        os.close(self.db_fd)
-        os.unlink(self.db_path)
-
     def login_admin(self):
         return self.client.post(
             "/login",
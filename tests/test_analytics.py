@@ -0,0 +1,136 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app import db, Challenge, PuzzleCompletion, Submission, User
+from analytics import report, reset, roll_up
+from models import CohortActivity, DailyActivity, TopicSolves
+from support import DatabaseTestCase
+from xp_ledger import period_start
+
+# A Monday three weeks back, so every day used below is in the past.
+MONDAY = period_start("week", datetime.utcnow().date()) - timedelta(weeks=3)
+
+
+def at(offset_days: int, hour: int = 12) -> datetime:
+    day = MONDAY + timedelta(days=offset_days)
+    return datetime(day.year, day.month, day.day, hour)
+
+
+class AnalyticsTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        db.session.add(User(username="admin", email="admin@example.com", is_admin=True,
+                            password_hash=generate_password_hash("pw"), created_at=at(-30)))
+        for i in range(2, 5):
+            db.session.add(User(username=f"player{i}", email=f"player{i}@example.com",
+                                password_hash=generate_password_hash("pw"), created_at=at(0, 8)))
+        db.session.add(Challenge(title="Strings", prompt="x", status="published", topic="strings", difficulty="Easy"))
+        db.session.add(Challenge(title="Graphs", prompt="x", status="published", topic="graphs", difficulty="Hard"))
+        db.session.commit()
+
+    def solve(self, user_id, challenge_id, offset_days, hour=12):
+        db.session.add(Submission(user_id=user_id, challenge_id=challenge_id, timestamp=at(offset_days, hour)))
+
+    def daily(self, offset_days):
+        return db.session.get(DailyActivity, MONDAY + timedelta(days=offset_days))
+
+    def test_rollup_folds_each_row_once(self):
+        self.solve(2, 1, 0, 9)
+        self.solve(2, 2, 0, 18)
+        self.solve(3, 2, 1)
+        db.session.add(PuzzleCompletion(user_id=2, puzzle_name="bit_flipper_lvl_1", completed_at=at(0)))
+        db.session.commit()
+
+        folded = roll_up(batch_size=1)
+        self.assertEqual(folded, {"analytics:user": 4, "analytics:submission": 3, "analytics:puzzle_completion": 1})
+        self.assertEqual(set(roll_up().values()), {0})
+
+        monday = self.daily(0)
+        self.assertEqual((monday.active_users, monday.solves, monday.puzzles, monday.signups), (1, 2, 1, 3))
+        self.assertEqual((self.daily(1).active_users, self.daily(1).solves), (1, 1))
+        self.assertEqual(
+            {(row.topic, row.difficulty): row.solves for row in TopicSolves.query.filter_by(day=MONDAY)},
+            {("strings", "Easy"): 1, ("graphs", "Hard"): 1},
+        )
+
+    def test_weekly_active_users_are_distinct_over_seven_days(self):
+        self.solve(2, 1, 0)
+        self.solve(3, 1, 2)
+        self.solve(2, 2, 4)
+        db.session.commit()
+        roll_up()
+        self.assertEqual([self.daily(day).weekly_active_users for day in (0, 2, 4, 6, 7, 9)], [1, 2, 2, 2, 2, 1])
+
+        # Later activity clears and recounts only the days it touches.
+        self.solve(4, 1, 8)
+        db.session.commit()
+        roll_up()
+        self.assertEqual([self.daily(day).weekly_active_users for day in (4, 8, 9)], [2, 3, 2])
+
+    def test_cohorts_count_users_once_per_active_week(self):
+        self.solve(2, 1, 0)
+        self.solve(2, 2, 1)
+        self.solve(3, 1, 1)
+        self.solve(2, 1, 8)
+        db.session.commit()
+        roll_up()
+        self.assertEqual(
+            {(row.week_start - row.cohort_start).days: row.users for row in CohortActivity.query.filter_by(cohort_start=MONDAY)},
+            {0: 2, 7: 1},
+        )
+        data = report(today=MONDAY + timedelta(days=9), cohorts=2)
+        self.assertEqual(data["cohorts"][0]["start"], MONDAY)
+        self.assertEqual(data["cohorts"][0]["signups"], 3)
+        self.assertEqual([round(week["share"], 2) for week in data["cohorts"][0]["weeks"]], [0.67, 0.33])
+
+    def test_young_rows_wait_for_the_next_run(self):
+        db.session.add(Submission(user_id=2, challenge_id=1, timestamp=datetime.utcnow()))
+        db.session.commit()
+        self.assertEqual(roll_up(settle_seconds=60)["analytics:submission"], 0)
+        self.assertEqual(roll_up()["analytics:submission"], 1)
+
+    def test_rebuild_reproduces_the_summaries(self):
+        self.solve(2, 1, 0)
+        self.solve(3, 2, 3)
+        db.session.commit()
+        roll_up()
+        before = report(today=MONDAY + timedelta(days=5))
+        reset()
+        self.assertIsNone(self.daily(0))
+        roll_up()
+        after = report(today=MONDAY + timedelta(days=5))
+        self.assertEqual((after["topics"], after["difficulties"]), (before["topics"], before["difficulties"]))
+        self.assertEqual([row.weekly_active_users for row in after["daily"]],
+                         [row.weekly_active_users for row in before["daily"]])
+
+    def test_admin_page_reads_only_the_summaries(self):
+        self.solve(2, 1, 0)
+        db.session.commit()
+        roll_up()
+        self.client.post("/login", data={"username": "admin", "password": "pw"})
+
+        statements = []
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            page = self.client.get("/admin/analytics")
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertEqual(page.status_code, 200)
+        self.assertIn("strings", page.get_data(as_text=True))
+        queried = " ".join(statements).lower()
+        for table in ("from submission", "from puzzle_completion", "from user_activity_day"):
+            self.assertNotIn(table, queried)
+
+        self.client.get("/logout")
+        self.client.post("/login", data={"username": "player2", "password": "pw"})
+        self.assertEqual(self.client.get("/admin/analytics").status_code, 403)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,30 +1,9 @@
-import os
-import tempfile
 import unittest
 
-from app import app, db, Joke
-
-class AppTestCase(unittest.TestCase):
-    def setUp(self):
-        self.db_fd, self.db_path = tempfile.mkstemp()
-        app.config.update(
-            TESTING=True,
-            SQLALCHEMY_DATABASE_URI=f"sqlite:///{self.db_path}",
-        )
-        self.app = app.test_client()
-        self.app_context = app.app_context()
-        self.app_context.push()
-        db.session.remove()
-        db.drop_all()
-        db.create_all()
-
-    def tearDown(self):
-        db.session.remove()
-        db.drop_all()
-        self.app_context.pop()
-        os.close(self.db_fd)
-        os.unlink(self.db_path)
+from app import db, Joke
+from support import DatabaseTestCase
 
+class AppTestCase(DatabaseTestCase):
     def test_random_fun_with_jokes_in_db(self):
         # Add a joke to the database
         joke = Joke(text="This is a test joke", entry_type="fun")
@@ -32,8 +11,8 @@ class AppTestCase(unittest.TestCase):
         db.session.commit()
 
         # Call the random_fun function
-        with app.test_request_context():
-            fun = app.view_functions['api_fun']()
+        with self.app.test_request_context():
+            fun = self.app.view_functions['api.api_fun']()
 
         # Check that the returned fun fact is the one from the database
         self.assertEqual(fun['text'], "This is a test joke")
@@ -41,8 +20,8 @@ class AppTestCase(unittest.TestCase):
 
     def test_random_fun_without_jokes_in_db(self):
         # Call the random_fun function
-        with app.test_request_context():
-            fun = app.view_functions['api_fun']()
+        with self.app.test_request_context():
+            fun = self.app.view_functions['api.api_fun']()
 
         # Check that the returned fun fact is the default one
         self.assertEqual(fun['text'], "Welcome to SyntaxSnacks!")
@@ -0,0 +1,83 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import url_for
+
+from app import app
+from assets import build_assets, minify_css, minify_js
+from assets.pipeline import load_manifest, set_manifest
+
+
+class AssetPipelineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.folder, "css"))
+        os.makedirs(os.path.join(self.folder, "images"))
+        with open(os.path.join(self.folder, "images", "dot.png"), "wb") as fh:
+            fh.write(b"\x89PNG fake")
+        self.write_css("/* theme */\nbody {\n  color: red;\n  background: url('../images/dot.png');\n}\n")
+        self.original_manifest = app.extensions["asset_manifest"]
+
+    def tearDown(self):
+        set_manifest(app, self.original_manifest)
+        shutil.rmtree(self.folder)
+
+    def write_css(self, text):
+        with open(os.path.join(self.folder, "css", "site.css"), "w") as fh:
+            fh.write(text)
+
+    def test_minify_css_keeps_strings(self):
+        css = '/* c */ a  >  b {\n  content: "a  b";\n  margin: 0 auto;\n}\n'
+        self.assertEqual(minify_css(css), 'a>b{content:"a  b";margin:0 auto}')
+
+    def test_minify_js_keeps_multiline_templates(self):
+        js = "// header\nconst a = 1;\n\n  const t = `line one\n    line two`;\n/* block\n comment */\nfoo();\n"
+        self.assertEqual(minify_js(js), "const a = 1;\nconst t = `line one\n    line two`;\nfoo();\n")
+
+    def test_build_fingerprints_rewrites_urls_and_cleans_up(self):
+        manifest, removed = build_assets(self.folder)
+        self.assertEqual(removed, [])
+        css_target = manifest["css/site.css"]
+        png_target = manifest["images/dot.png"]
+        self.assertRegex(css_target, r"^dist/css/site\.[0-9a-f]{12}\.css$")
+        with open(os.path.join(self.folder, css_target)) as fh:
+            built = fh.read()
+        self.assertIn(os.path.basename(png_target), built)
+        self.assertNotIn("theme", built)
+        with open(os.path.join(self.folder, "dist", "manifest.json")) as fh:
+            self.assertEqual(json.load(fh), manifest)
+
+        self.write_css("body { color: blue; }\n")
+        new_manifest, removed = build_assets(self.folder)
+        self.assertNotEqual(new_manifest["css/site.css"], css_target)
+        self.assertEqual(removed, [os.path.join(self.folder, css_target)])
+        self.assertEqual(load_manifest(self.folder), new_manifest)
+
+    def test_url_for_and_immutable_caching(self):
+        set_manifest(app, {"css/custom.css": "dist/css/custom.0123456789ab.css"})
+        with app.test_request_context():
+            self.assertEqual(
+                url_for("static", filename="css/custom.css"),
+                "/static/dist/css/custom.0123456789ab.css",
+            )
+            self.assertEqual(url_for("static", filename="js/other.js"), "/static/js/other.js")
+
+        # Point the manifest at a real file to check the served headers.
+        set_manifest(app, {"css/custom.css": "css/custom.css"})
+        client = app.test_client()
+        resp = client.get("/static/css/custom.css")
+        self.assertIn("immutable", resp.headers["Cache-Control"])
+        self.assertIn("max-age=31536000", resp.headers["Cache-Control"])
+        resp.close()
+
+        set_manifest(app, {})
+        resp = client.get("/static/css/custom.css")
+        self.assertNotIn("immutable", resp.headers.get("Cache-Control", ""))
+        resp.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
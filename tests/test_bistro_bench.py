@@ -0,0 +1,95 @@
+import os
+import tempfile
+import unittest
+
+from werkzeug.security import generate_password_hash
+
+from app import db, User
+from puzzles import bistro_bench
+from puzzles.data import BIG_O_BISTRO_LEVELS
+from puzzles.registry import FAMILIES
+from support import DatabaseTestCase
+
+TINY_LEVEL = {
+    "level": 1,
+    "constraints": {"n": 200, "limit_ms": 50},
+    "function_snippet": "def first_sorted(items):\n    return sorted(items)[0]\n",
+    "benchmark": {"entry": "first_sorted", "setup": "args = (list(range(n, 0, -1)),)"},
+    "best_option": "in_place",
+    "options": [
+        # Sorting in place would hand the next call sorted input if setup were shared.
+        {"id": "in_place", "snippet": "def first_sorted(items):\n    assert items[0] == 200\n    items.sort()\n    return items[0]\n"},
+        {"id": "slow", "snippet": "import time\n\ndef first_sorted(items):\n    time.sleep(0.06)\n    return min(items)\n"},
+    ],
+}
+
+
+class BistroBenchTestCase(unittest.TestCase):
+    def test_summary_statistics(self):
+        summary = bistro_bench.summarize([2_000_000, 1_000_000, 3_000_000, 6_000_000])
+        self.assertEqual(summary, {
+            "runs": 4, "min_ms": 1.0, "median_ms": 2.5, "mean_ms": 3.0, "stdev_ms": 2.16, "max_ms": 6.0,
+        })
+        self.assertEqual(bistro_bench.summarize([1_500_000])["stdev_ms"], 0.0)
+
+    def test_each_variant_runs_in_its_own_process_with_fresh_input(self):
+        results = bistro_bench.bench_levels([TINY_LEVEL], repeat=3, warmup=1)
+        measured = results["levels"]["1"]
+        self.assertEqual(measured["original"]["runs"], 3)
+        self.assertEqual(measured["options"]["in_place"]["runs"], 3)
+        self.assertGreaterEqual(measured["options"]["slow"]["min_ms"], 60)
+        self.assertEqual(bistro_bench.failures(results, [TINY_LEVEL]), [])
+
+        slow_is_best = {**TINY_LEVEL, "best_option": "slow"}
+        problems = bistro_bench.failures(results, [slow_is_best])
+        self.assertEqual(len(problems), 1)
+        self.assertIn("best option 'slow'", problems[0])
+
+    def test_budget_stops_slow_variants_after_one_call(self):
+        timing = bistro_bench.measure(
+            TINY_LEVEL["options"][1]["snippet"], "first_sorted", "args = ([3, 1, 2],)", {},
+            repeat=50, warmup=5, budget=0.1,
+        )
+        self.assertLess(timing["runs"], 5)
+
+    def test_a_failing_snippet_is_reported(self):
+        with self.assertRaises(bistro_bench.BenchmarkError) as ctx:
+            bistro_bench.measure("def f(x):\n    return 1 / 0\n", "f", "args = (1,)", {})
+        self.assertIn("ZeroDivisionError", str(ctx.exception))
+
+    def test_stored_timings_merge_by_level(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "timings.json")
+            self.assertEqual(bistro_bench.load_timings(path), {})
+            bistro_bench.write_timings({"levels": {"1": {"a": 1}, "2": {"a": 2}}}, path)
+            bistro_bench.write_timings({"levels": {"2": {"a": 3}}}, path)
+            self.assertEqual(bistro_bench.load_timings(path), {1: {"a": 1}, 2: {"a": 3}})
+
+    def test_every_level_defines_runnable_variants(self):
+        for level in BIG_O_BISTRO_LEVELS:
+            self.assertIn(level["best_option"], {option["id"] for option in level["options"]})
+            for snippet in [level["function_snippet"]] + [option["snippet"] for option in level["options"]]:
+                namespace = {}
+                exec(snippet, namespace)
+                self.assertTrue(callable(namespace[level["benchmark"]["entry"]]))
+
+
+class BistroPageTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        db.session.add(User(username="chef", email="chef@example.com", password_hash=generate_password_hash("pw")))
+        db.session.commit()
+        self.client.post("/login", data={"username": "chef", "password": "pw"})
+
+    def test_page_shows_the_stored_measurements(self):
+        measured = FAMILIES["big_o_bistro"].level(1).get("measured")
+        if measured is None:
+            self.skipTest("no stored timings; run `flask bistro bench --write`")
+        html = self.client.get("/puzzles/big-o-bistro/1").get_data(as_text=True)
+        self.assertIn("Measured at n=8000:", html)
+        self.assertEqual(html.count("Measured: "), len(BIG_O_BISTRO_LEVELS[0]["options"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+
+from flask_login import login_user
+from sqlalchemy import event
+
+from app import db, Challenge, Dungeon, User
+from blueprints.dungeons import dungeon_view
+from caching import current_versions
+from catalog import CatalogSnapshot, CatalogStore, snapshot_stamp, write_snapshot
+from services import published_catalog, published_topic_totals
+from support import DatabaseTestCase
+
+
+class CatalogSnapshotTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for name in os.listdir(self.folder):
+            os.remove(os.path.join(self.folder, name))
+        os.rmdir(self.folder)
+        super().tearDown()
+
+    def test_round_trip_lookup_and_shared_strings(self):
+        path = os.path.join(self.folder, "catalog.snapshot")
+        rows = [
+            (3, "strings", "easy", "Python", "a,b", "Reverse", "Écrivez une fonction"),
+            (7, "strings", "hard", "Python", "a,b", "Palindromes", "Check it"),
+            (9, "", "easy", None, None, "Loose", "No topic"),
+        ]
+        self.assertEqual(write_snapshot(path, rows), 3)
+        snapshot = CatalogSnapshot(path)
+
+        self.assertEqual([r.id for r in snapshot], [3, 7, 9])
+        self.assertEqual(snapshot.get(3).prompt, "Écrivez une fonction")
+        self.assertIsNone(snapshot.get(4))
+        self.assertEqual(snapshot[-1].title, "Loose")
+        self.assertIsNone(snapshot[-1].topic)
+        self.assertEqual(snapshot[-1].language, "")
+        self.assertEqual([r.title for r in snapshot.by_topic("strings")], ["Reverse", "Palindromes"])
+        self.assertEqual(snapshot.topic_totals(), {"strings": 2, None: 1})
+        with self.assertRaises(AttributeError):
+            snapshot[0].extra = 1
+        # "strings", "easy", "Python" and "a,b" are stored once each.
+        self.assertLess(os.path.getsize(path), 8 + 4 + 3 * 52 + 120)
+
+    def test_scores_order_easiest_first_and_old_files_are_rebuilt(self):
+        path = os.path.join(self.folder, "catalog.snapshot")
+        write_snapshot(path, [
+            (1, "", "hard", None, None, "Scored easy", "", 12.5),
+            (2, "", "medium", None, None, "Unscored", ""),
+            (3, "", "easy", None, None, "Scored hard", "", 90.0),
+        ])
+        snapshot = CatalogSnapshot(path)
+        self.assertEqual(snapshot.get(1).difficulty_score, 12.5)
+        self.assertIsNone(snapshot.get(2).difficulty_score)
+        self.assertEqual([r.title for r in snapshot.easiest_first()], ["Scored easy", "Unscored", "Scored hard"])
+        self.assertEqual([r.id for r in snapshot.closest_to(80)], [3, 2, 1])
+
+        store = self.app.extensions["catalog"]
+        db.session.add(Challenge(title="A", prompt="P", status="published"))
+        db.session.commit()
+        with open(store.path, "wb") as fh:
+            fh.write(b"SSCAT\x00\x00\x02" + bytes(4))
+        self.assertEqual(len(CatalogStore(db, store.path).current()), 1)
+
+    def test_commits_rebuild_and_other_workers_remap(self):
+        store = self.app.extensions["catalog"]
+        other_worker = CatalogStore(db, store.path)
+        ch = Challenge(title="A", prompt="P", topic="Strings", difficulty="Easy", status="published")
+        db.session.add(ch)
+        db.session.commit()
+        self.assertEqual([r.topic for r in published_catalog()], ["strings"])
+        self.assertEqual(len(other_worker.current()), 1)
+
+        ch.status = "draft"
+        db.session.commit()
+        self.assertEqual(len(other_worker.current()), 0)
+        self.assertEqual(published_topic_totals(), {})
+
+    def test_rebuilds_never_replace_a_newer_snapshot(self):
+        store = self.app.extensions["catalog"]
+        db.session.add(Challenge(title="A", prompt="P", status="published"))
+        db.session.commit()
+        stamp = current_versions.stamps("challenge")["challenge"].version
+        self.assertEqual(store.current().stamp, stamp)
+
+        # A rebuild that read an older version finishes after one that read a newer one.
+        write_snapshot(store.path, [], stamp=stamp + 5)
+        self.assertEqual(store.build(), 0)
+        self.assertEqual(store.current().stamp, stamp + 5)
+
+        write_snapshot(store.path, [], stamp=stamp - 1)
+        self.assertEqual(store.build(), 1)
+        self.assertEqual(snapshot_stamp(store.path), stamp)
+
+    def test_table_reset_invalidates_snapshot(self):
+        db.session.add(Challenge(title="A", prompt="P", status="published"))
+        db.session.commit()
+        store = self.app.extensions["catalog"]
+        self.assertTrue(os.path.exists(store.path))
+        db.drop_all()
+        self.assertFalse(os.path.exists(store.path))
+        db.create_all()
+        self.assertEqual(len(published_catalog()), 0)
+
+    def test_dungeon_view_reads_challenges_without_sql(self):
+        user = User(username="u", xp=10)
+        db.session.add_all([
+            user,
+            Dungeon(name="Strings", description="d", topic="strings", unlock_xp=0, reward_xp=5),
+            Challenge(title="Reverse", prompt="Reverse it", topic="strings", status="published"),
+            Challenge(title="Hidden", prompt="Draft", topic="strings", status="draft"),
+        ])
+        db.session.commit()
+        published_catalog()
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            with self.app.test_request_context():
+                login_user(user)
+                html = dungeon_view(1)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertIn("Reverse it", html)
+        self.assertNotIn("Draft", html)
+        self.assertFalse([s for s in statements if "FROM challenge" in s])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+from datetime import timedelta
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app import db, Challenge, User
+from challenge_stats import calibrate, median_seconds, record_attempt, record_solve, record_view
+from models import ChallengeSolveTime, ChallengeStats, ChallengeView
+from services import get_daily_challenge_for_user, published_catalog
+from support import DatabaseTestCase
+
+
+class ChallengeStatsTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        db.session.add(User(username="admin", email="admin@example.com", is_admin=True,
+                            password_hash=generate_password_hash("pw")))
+        db.session.add(User(username="player", email="player@example.com",
+                            password_hash=generate_password_hash("pw")))
+        for title, difficulty in (("Labelled easy", "Easy"), ("Labelled hard", "Hard"), ("Unplayed", "Medium")):
+            db.session.add(Challenge(title=title, prompt="x", difficulty=difficulty, status="published"))
+        db.session.commit()
+
+    def stats(self, challenge_id):
+        db.session.expire_all()
+        return db.session.get(ChallengeStats, challenge_id)
+
+    def test_median_is_interpolated_within_a_log2_bucket(self):
+        self.assertIsNone(median_seconds({}))
+        self.assertEqual(median_seconds({0: 3}), 0.0)
+        # Bucket 7 holds 64-127 s; the median sits halfway through its solves.
+        self.assertAlmostEqual(median_seconds({5: 2, 7: 2, 9: 2}), 64 * 2 ** 0.5)
+
+    def test_dashboard_views_and_solves_update_counters(self):
+        self.client.post("/login", data={"username": "player", "password": "pw"})
+        self.assertIn("Labelled easy", self.client.get("/dashboard").get_data(as_text=True))
+        self.client.get("/dashboard")
+        self.assertEqual(self.stats(1).viewers, 1)
+        self.assertEqual(ChallengeView.query.count(), 1)
+
+        self.client.post("/submit/1")
+        self.client.post("/submit/1")
+        stats = self.stats(1)
+        self.assertEqual((stats.viewers, stats.attempts, stats.solves, stats.solvers, stats.timed_solves),
+                         (1, 2, 2, 1, 1))
+        self.assertEqual([row.bucket for row in ChallengeSolveTime.query.filter_by(challenge_id=1)], [0])
+
+        # The next daily challenge is a new first view; a solve without one is counted but untimed.
+        self.client.get("/dashboard")
+        self.assertEqual(self.stats(3).viewers, 1)
+        self.client.post("/submit/2")
+        self.assertEqual((self.stats(2).solvers, self.stats(2).timed_solves), (1, 0))
+
+    def test_repeat_views_and_solve_time_buckets(self):
+        self.assertTrue(record_view(2, 1))
+        self.assertFalse(record_view(2, 1))
+        view = ChallengeView.query.one()
+        record_attempt(1, passed=False)
+        record_solve(2, 1, solved_at=view.viewed_at + timedelta(seconds=100))
+        db.session.commit()
+        stats = self.stats(1)
+        self.assertEqual((stats.viewers, stats.attempts, stats.solves, stats.solvers), (1, 1, 0, 1))
+        self.assertEqual(
+            [(row.bucket, row.solves) for row in ChallengeSolveTime.query.filter_by(challenge_id=1)], [(7, 1)]
+        )
+
+    def seed_counters(self):
+        # Few of the users shown "Labelled easy" solve it, slowly; nearly all solve "Labelled hard", fast.
+        db.session.add_all([
+            ChallengeStats(challenge_id=1, viewers=100, attempts=10, solves=10, solvers=10, timed_solves=10),
+            ChallengeSolveTime(challenge_id=1, bucket=10, solves=10),
+            ChallengeStats(challenge_id=2, viewers=100, attempts=95, solves=95, solvers=95, timed_solves=95),
+            ChallengeSolveTime(challenge_id=2, bucket=5, solves=95),
+        ])
+        db.session.commit()
+
+    def test_calibration_outweighs_labels_and_orders_the_daily_challenge(self):
+        self.seed_counters()
+        self.assertEqual(calibrate(), 2)
+        self.assertEqual(calibrate(), 0)
+        scores = {c.id: c.difficulty_score for c in Challenge.query}
+        self.assertEqual(scores, {1: 83.3, 2: 14.6, 3: None})
+        self.assertAlmostEqual(self.stats(1).median_solve_seconds, 512 * 2 ** 0.5, places=3)
+
+        catalog = published_catalog()
+        self.assertAlmostEqual(catalog.get(2).difficulty_score, 14.6, places=4)
+        self.assertIsNone(catalog.get(3).difficulty_score)
+        # Uncalibrated challenges sort by their label's prior.
+        self.assertEqual([entry.id for entry in catalog.easiest_first()], [2, 3, 1])
+
+        get_daily_challenge_for_user(db.session.get(User, 2))  # builds the recommendation queue
+        user = db.session.get(User, 2)
+        statements = []
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            daily = get_daily_challenge_for_user(user)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertEqual(daily.id, 2)
+        self.assertLessEqual(len(statements), 2)
+        self.assertNotIn("challenge_stats", " ".join(statements))
+        self.assertEqual(get_daily_challenge_for_user(user, difficulty="easy").id, 1)
+
+    def test_command_and_admin_list_show_scores(self):
+        self.seed_counters()
+        result = self.app.test_cli_runner().invoke(args=["difficulty-scores"])
+        self.assertIn("Updated 2 difficulty score(s).", result.output)
+
+        self.client.post("/login", data={"username": "admin", "password": "pw"})
+        page = self.client.get("/admin/challenges").get_data(as_text=True)
+        self.assertIn("Hard · 15", page)
+        self.assertIn("10 / 100", page)
+        self.assertIn("12 min", page)
+
+
+if __name__ == "__main__":
+    unittest.main()
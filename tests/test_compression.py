@@ -0,0 +1,81 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from werkzeug.exceptions import NotFound
+
+from assets import compress_static, send_static
+from support import DatabaseTestCase
+
+
+class CompressionTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+        self.sibling = os.path.join(self.app.static_folder, "css", "custom.css.gz")
+
+    def tearDown(self):
+        if os.path.exists(self.sibling):
+            os.remove(self.sibling)
+        super().tearDown()
+
+    def test_html_is_gzipped_when_accepted(self):
+        resp = self.client.get("/about", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.headers.get("Content-Encoding"), "gzip")
+        self.assertIn("Accept-Encoding", resp.headers.get("Vary", ""))
+        self.assertIn(b"SyntaxSnacks", gzip.decompress(resp.data))
+
+    def test_identity_when_not_accepted(self):
+        resp = self.client.get("/about")
+        self.assertNotIn("Content-Encoding", resp.headers)
+        self.assertIn(b"SyntaxSnacks", resp.data)
+
+    def test_small_responses_are_left_alone(self):
+        resp = self.client.get("/api/fun", headers={"Accept-Encoding": "gzip"})
+        self.assertNotIn("Content-Encoding", resp.headers)
+
+    def test_compress_static_writes_smaller_siblings(self):
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, "site.css")
+            with open(path, "w") as fh:
+                fh.write("body { color: red; }\n" * 200)
+            written = compress_static(folder)
+            self.assertIn((path, "gzip"), [(w[0], w[1]) for w in written])
+            with open(path + ".gz", "rb") as fh:
+                self.assertEqual(gzip.decompress(fh.read()), ("body { color: red; }\n" * 200).encode())
+            # Up-to-date siblings are not rewritten.
+            self.assertEqual(compress_static(folder), [])
+
+    def test_static_serves_precompressed_sibling(self):
+        with open(os.path.join(self.app.static_folder, "css", "custom.css"), "rb") as fh:
+            original = fh.read()
+        with open(self.sibling, "wb") as fh:
+            fh.write(gzip.compress(original))
+
+        resp = self.client.get("/static/css/custom.css", headers={"Accept-Encoding": "gzip, br;q=0"})
+        self.assertEqual(resp.headers.get("Content-Encoding"), "gzip")
+        self.assertEqual(resp.mimetype, "text/css")
+        self.assertEqual(gzip.decompress(resp.data), original)
+        resp.close()
+
+        plain = self.client.get("/static/css/custom.css")
+        self.assertNotIn("Content-Encoding", plain.headers)
+        self.assertEqual(plain.data, original)
+        plain.close()
+
+    def test_static_names_outside_the_folder_are_never_probed(self):
+        folder = os.path.realpath(self.app.static_folder)
+        with mock.patch("assets.compression.os.path.isfile", wraps=os.path.isfile) as isfile:
+            for name in ("../config.py", "css/../../app.py", "/etc/passwd"):
+                with self.app.test_request_context(headers={"Accept-Encoding": "gzip"}):
+                    with self.assertRaises(NotFound):
+                        send_static(self.app, name)
+            resp = self.client.get("/static/css/../../config.py", headers={"Accept-Encoding": "gzip"})
+        self.assertEqual(resp.status_code, 404)
+        probed = [os.path.realpath(call.args[0]) for call in isfile.call_args_list]
+        self.assertTrue(all(path.startswith(folder + os.sep) for path in probed), probed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+from unittest.mock import patch
+
+from werkzeug.security import generate_password_hash
+
+from app import db, Challenge, Joke, User
+from support import DatabaseTestCase
+
+
+class ConditionalGetTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        admin = User(
+            username="admin",
+            email="admin@example.com",
+            is_admin=True,
+            password_hash=generate_password_hash("password"),
+        )
+        db.session.add(admin)
+        db.session.commit()
+
+    def login_admin(self):
+        return self.client.post(
+            "/login",
+            data={"username": "admin", "password": "password"},
+            follow_redirects=True,
+        )
+
+    def test_fun_api_revalidates_until_jokes_change(self):
+        joke = Joke(text="Only joke", entry_type="fun")
+        db.session.add(joke)
+        db.session.commit()
+
+        first = self.client.get("/api/fun")
+        etag = first.headers["ETag"]
+        self.assertEqual(first.get_json()["text"], "Only joke")
+
+        cached = self.client.get("/api/fun", headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.data, b"")
+
+        joke.text = "Edited joke"
+        db.session.commit()
+        fresh = self.client.get("/api/fun", headers={"If-None-Match": etag})
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.get_json()["text"], "Edited joke")
+
+    def test_show_another_draws_new_cards_keyed_by_etag(self):
+        db.session.add_all([Joke(text=f"Joke {i}", entry_type="fun") for i in range(20)])
+        db.session.commit()
+        # What the "Show another" button does: refetch, sending the last ETag.
+        first = self.client.get("/api/fun")
+        cards, etag = {first.get_json()["text"]: first.headers["ETag"]}, first.headers["ETag"]
+        for _ in range(10):
+            resp = self.client.get("/api/fun", headers={"If-None-Match": etag})
+            if resp.status_code == 200:
+                cards[resp.get_json()["text"]] = resp.headers["ETag"]
+                etag = resp.headers["ETag"]
+        self.assertGreater(len(cards), 1)
+        self.assertEqual(len(set(cards.values())), len(cards))
+        self.assertIsNone(first.last_modified)
+
+        with patch("services.random.choice", return_value=("fun", "Joke 3")):
+            drawn = self.client.get("/api/fun")
+            again = self.client.get("/api/fun", headers={"If-None-Match": drawn.headers["ETag"]})
+        self.assertEqual(again.status_code, 304)
+
+    def test_tower_defense_state_short_circuits(self):
+        self.login_admin()
+        self.client.post("/api/debugger-td/state", json={"state": {"wave": 1}})
+
+        first = self.client.get("/api/debugger-td/state")
+        self.assertEqual(first.status_code, 200)
+        self.assertIsNotNone(first.last_modified)
+
+        cached = self.client.get(
+            "/api/debugger-td/state", headers={"If-None-Match": first.headers["ETag"]}
+        )
+        self.assertEqual(cached.status_code, 304)
+
+        self.client.post("/api/debugger-td/state", json={"state": {"wave": 2}})
+        fresh = self.client.get(
+            "/api/debugger-td/state", headers={"If-None-Match": first.headers["ETag"]}
+        )
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.get_json()["state"], {"wave": 2})
+
+    def test_challenge_export_uses_table_version(self):
+        db.session.add(Challenge(title="One", prompt="First", status="published"))
+        db.session.commit()
+        self.login_admin()
+
+        first = self.client.get("/admin/challenges/export.csv")
+        etag = first.headers["ETag"]
+        self.assertEqual(
+            self.client.get(
+                "/admin/challenges/export.csv", headers={"If-None-Match": etag}
+            ).status_code,
+            304,
+        )
+        filtered = self.client.get(
+            "/admin/challenges/export.csv?status=draft", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(filtered.status_code, 200)
+
+        db.session.add(Challenge(title="Two", prompt="Second"))
+        db.session.commit()
+        fresh = self.client.get("/admin/challenges/export.csv", headers={"If-None-Match": etag})
+        self.assertEqual(fresh.status_code, 200)
+        self.assertIn(b"Second", fresh.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
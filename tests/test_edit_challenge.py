@@ -1,40 +1,22 @@
-import os
-import tempfile
 import unittest
 
-from app import app, db, Challenge, User
+from app import db, Challenge, User
+from support import DatabaseTestCase
 
-class AdminEditChallengeTestCase(unittest.TestCase):
+class AdminEditChallengeTestCase(DatabaseTestCase):
     def setUp(self):
-        self.db_fd, self.db_path = tempfile.mkstemp()
-        app.config.update(
-            TESTING=True,
-            SQLALCHEMY_DATABASE_URI=f"sqlite:///{self.db_path}",
-        )
-        self.app = app.test_client()
-        self.app_context = app.app_context()
-        self.app_context.push()
-        db.session.remove()
-        db.drop_all()
-        db.create_all()
+        super().setUp()
 
         # Create a test user and log in
         self.admin = User(username='admin', password_hash='admin', is_admin=True)
         db.session.add(self.admin)
         db.session.commit()
 
-        with self.app as c:
+        with self.client as c:
             with c.session_transaction() as sess:
                 sess['user_id'] = self.admin.id
                 sess['_fresh'] = True
 
-    def tearDown(self):
-        db.session.remove()
-        db.drop_all()
-        self.app_context.pop()
-        os.close(self.db_fd)
-        os.unlink(self.db_path)
-
     def test_edit_challenge(self):
         # Create a challenge
         challenge = Challenge(title='Test Challenge', prompt='Test Prompt')
@@ -42,7 +24,7 @@ class AdminEditChallengeTestCase(unittest.TestCase):
         db.session.commit()
 
         # Edit the challenge
-        response = self.app.post(f'/admin/challenge/{challenge.id}/edit', data={
+        response = self.client.post(f'/admin/challenge/{challenge.id}/edit', data={
             'title': 'Updated Challenge',
             'prompt': 'Updated Prompt',
         }, follow_redirects=True)
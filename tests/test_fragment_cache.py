@@ -0,0 +1,96 @@
+import unittest
+from datetime import date, datetime, timezone
+
+from werkzeug.security import generate_password_hash
+
+from app import db, Dungeon, DungeonCompletion, User
+from caching import current_fragments, current_versions
+from support import DatabaseTestCase
+
+
+class FragmentCacheTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        admin = User(
+            username="admin",
+            email="admin@example.com",
+            is_admin=True,
+            password_hash=generate_password_hash("password"),
+        )
+        db.session.add(admin)
+        db.session.commit()
+
+    def login_admin(self):
+        return self.client.post(
+            "/login",
+            data={"username": "admin", "password": "password"},
+            follow_redirects=True,
+        )
+
+    def test_fragment_is_rendered_once_per_key(self):
+        calls = []
+
+        def tick():
+            calls.append(1)
+            return len(calls)
+
+        template = self.app.jinja_env.from_string(
+            '{% cache ("unit-demo", key), 60 %}render {{ tick() }}{% endcache %}'
+        )
+        self.assertEqual(template.render(key=1, tick=tick), "render 1")
+        self.assertEqual(template.render(key=1, tick=tick), "render 1")
+        self.assertEqual(template.render(key=2, tick=tick), "render 2")
+
+        stats = current_fragments.stats()["unit-demo"]
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+
+    def test_data_stamp_changes_when_table_is_written(self):
+        with self.app.test_request_context():
+            before = current_versions.token("dungeon")
+            db.session.add(Dungeon(name="Stamp Isle", topic="strings"))
+            db.session.commit()
+            after = current_versions.token("dungeon")
+        self.assertNotEqual(before, after)
+
+    def test_progress_writes_leave_stamps_alone(self):
+        dungeon = Dungeon(name="Quiet Keep", topic="strings")
+        db.session.add(dungeon)
+        db.session.commit()
+        before = current_versions.stamps("dungeon", "dungeon_completion")
+        db.session.add(DungeonCompletion(user_id=1, dungeon_id=dungeon.id))
+        db.session.commit()
+        self.assertEqual(current_versions.stamps("dungeon", "dungeon_completion"), before)
+        self.assertEqual(before["dungeon_completion"].version, 0)
+
+    def test_xp_and_login_writes_leave_the_user_stamp_alone(self):
+        user = User.query.first()
+        before = current_versions.stamps("user")["user"].version
+        user.xp = (user.xp or 0) + 10
+        user.streak = 3
+        user.last_active_date = date.today()
+        user.last_login = datetime.now(timezone.utc)
+        db.session.commit()
+        self.assertEqual(current_versions.stamps("user")["user"].version, before)
+
+        user.username = "renamed"
+        db.session.commit()
+        self.assertEqual(current_versions.stamps("user")["user"].version, before + 1)
+
+    def test_dungeon_cards_are_cached_and_reported(self):
+        db.session.add(Dungeon(name="Cache Cove", description="Cached card", topic="strings"))
+        db.session.commit()
+        self.login_admin()
+
+        first = self.client.get("/dungeons")
+        second = self.client.get("/dungeons")
+        self.assertEqual(first.status_code, 200)
+        self.assertIn(b"Cache Cove", second.data)
+
+        metrics = self.client.get("/admin/metrics").get_json()
+        self.assertGreaterEqual(metrics["fragments"]["dungeon-card"]["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
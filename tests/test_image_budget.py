@@ -0,0 +1,52 @@
+import os
+import unittest
+
+from flask import render_template_string
+
+from app import app
+
+IMAGE_EXTENSIONS = {".avif", ".gif", ".ico", ".jpeg", ".jpg", ".png", ".svg", ".webp"}
+
+
+class ImageBudgetTestCase(unittest.TestCase):
+    def test_shipped_images_fit_the_budget(self):
+        budget = app.config["IMAGE_SIZE_BUDGET_KB"] * 1024
+        over = []
+        for root, _dirs, files in os.walk(app.static_folder):
+            for name in files:
+                if os.path.splitext(name)[1].lower() not in IMAGE_EXTENSIONS:
+                    continue
+                path = os.path.join(root, name)
+                size = os.path.getsize(path)
+                if size > budget:
+                    over.append(f"{os.path.relpath(path, app.static_folder)} ({size // 1024} KB)")
+        self.assertEqual(over, [], f"Images over {budget // 1024} KB budget")
+
+    def test_variants_manifest_matches_files(self):
+        variants = app.extensions["image_variants"]
+        self.assertIn("logo", variants)
+        self.assertIn("hero", variants)
+        for entry in variants.values():
+            self.assertIn(entry["fallback"], entry["variants"])
+            for files in entry["variants"].values():
+                for variant in files:
+                    self.assertTrue(
+                        os.path.isfile(os.path.join(app.static_folder, variant["file"])),
+                        variant["file"],
+                    )
+
+    def test_pages_emit_picture_markup_with_dimensions(self):
+        with app.test_request_context():
+            html = render_template_string(
+                '{% from "partials/_picture.html" import picture %}'
+                '{{ picture("logo", "logo", 26, loading="eager") }}{{ picture("hero", "hero", 640) }}'
+            )
+        self.assertIn("<picture>", html)
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('width="26" height="26"', html)
+        self.assertIn('loading="lazy"', html)
+        self.assertNotIn("images/logo.png", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
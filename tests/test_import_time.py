@@ -0,0 +1,52 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Cumulative microseconds for ``import app`` as reported by ``-X importtime``.
+IMPORT_TIME_BUDGET_US = int(os.environ.get("IMPORT_TIME_BUDGET_MS", 1500)) * 1000
+
+
+def _import_app(db_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in result.stderr.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == "app":
+            return int(parts[1])
+    raise AssertionError(f"no importtime entry for app:\n{result.stderr[-2000:]}")
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "import.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_import_does_not_touch_database(self):
+        _import_app(self.db_path)
+        self.assertFalse(os.path.exists(self.db_path))
+
+    def test_import_time_within_budget(self):
+        # Best of three so a cold bytecode cache or a busy machine doesn't flake.
+        best = min(_import_app(self.db_path) for _ in range(3))
+        self.assertLessEqual(
+            best,
+            IMPORT_TIME_BUDGET_US,
+            f"import app took {best / 1000:.0f}ms (budget {IMPORT_TIME_BUDGET_US / 1000:.0f}ms)",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,308 @@
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+import unittest
+
+from werkzeug.security import generate_password_hash
+
+from app import db, Challenge, Submission, User
+from judge import Judge, TooManyChecks, VerdictCache, parse_test_cases, solution_hash
+from sandbox import PoolBusy, WorkerPool
+from sandbox.isolation import IsolationUnavailable, confine
+from sandbox.python_runner import _READABLE, run_solution
+from support import DatabaseTestCase
+
+CASES = [
+    {"args": ["hello"], "expected": "olleh"},
+    {"args": [""], "expected": ""},
+    {"args": ["racecar!"], "expected": "!racecar", "hidden": True},
+]
+CORRECT = "def solve(s):\n    return s[::-1]\n"
+
+
+def statuses(verdict):
+    return [case["status"] for case in verdict["cases"]]
+
+
+class PythonRunnerTestCase(unittest.TestCase):
+    def run_code(self, source, **limits):
+        return run_solution(source, "solve", CASES, limits)
+
+    def test_correct_and_wrong_solutions(self):
+        verdict = self.run_code(CORRECT)
+        self.assertEqual((verdict["status"], verdict["passed"], verdict["total"]), ("passed", 3, 3))
+        self.assertEqual(verdict["cases"][0], {"status": "pass", "got": "olleh", "args": ["hello"], "expected": "olleh"})
+
+        verdict = self.run_code("def solve(s):\n    return s\n")
+        self.assertEqual(verdict["status"], "failed")
+        self.assertEqual(statuses(verdict), ["fail", "pass", "fail"])
+
+    def test_hidden_cases_only_report_their_status(self):
+        verdict = self.run_code("def solve(s):\n    return s\n")
+        self.assertEqual(verdict["cases"][2], {"status": "fail", "hidden": True})
+        self.assertNotIn("racecar", json.dumps(verdict))
+
+    def test_printed_output_counts_as_the_answer_and_is_capped(self):
+        verdict = self.run_code("def solve(s):\n    print(s[::-1])\n")
+        self.assertEqual(verdict["status"], "passed")
+
+        verdict = self.run_code("def solve(s):\n    print('x' * 10_000)\n", output_bytes=100)
+        self.assertTrue(verdict["output_truncated"])
+        self.assertEqual(len(verdict["output"]), 100)
+
+    def test_cpu_wall_and_memory_limits(self):
+        started = time.monotonic()
+        verdict = self.run_code("def solve(s):\n    while True:\n        pass\n", cpu_seconds=0.3)
+        self.assertEqual(verdict["status"], "time_limit")
+        self.assertLess(time.monotonic() - started, 2)
+
+        verdict = self.run_code("import time\ndef solve(s):\n    time.sleep(10)\n", wall_seconds=0.5)
+        self.assertEqual(verdict["status"], "time_limit")
+
+        verdict = self.run_code("def solve(s):\n    return len('x' * 10**9)\n", memory_mb=64)
+        self.assertEqual(verdict["status"], "memory_limit")
+
+    def test_network_processes_and_outside_files_are_blocked(self):
+        for body in (
+            "import socket\n    socket.socket()",
+            "import os\n    os.system('true')",
+            "import subprocess\n    subprocess.run(['true'])",
+            "import os\n    os.fork()",
+            "open('/etc/passwd').read()",
+            f"open({os.path.abspath(__file__)!r}).read()",
+            "open('/tmp/escaped.txt', 'w').write('x')",
+        ):
+            verdict = self.run_code(f"def solve(s):\n    {body}\n    return s[::-1]\n")
+            self.assertEqual(verdict["passed"], 0, body)
+            self.assertIn(verdict["status"], {"failed", "error"}, body)
+        self.assertFalse(os.path.exists("/tmp/escaped.txt"))
+
+        # The private temp dir is writable.
+        verdict = self.run_code("def solve(s):\n    open('scratch', 'w').write(s)\n    return open('scratch').read()[::-1]\n")
+        self.assertEqual(verdict["status"], "passed")
+
+    def test_the_audit_hook_cannot_be_found_or_rewritten(self):
+        escape = (
+            "import gc\n"
+            "def solve(s):\n"
+            "    hooks = [f for f in gc.get_objects() if getattr(f, '__qualname__', '') == '_guard.<locals>.audit']\n"
+            "    hooks[0].__code__ = (lambda event, args: None).__code__\n"
+            f"    return open({os.path.abspath(__file__)!r}).read()\n"
+        )
+        verdict = self.run_code(escape)
+        self.assertEqual(statuses(verdict), ["error"] * 3)
+        self.assertIn("gc.get_objects is not allowed", verdict["cases"][0]["error"])
+        verdict = self.run_code("def solve(s):\n    solve.__code__ = (lambda s: s).__code__\n    return s[::-1]\n")
+        self.assertIn("not allowed", verdict["cases"][0]["error"])
+
+        # Rebinding the runner's policy does not loosen the installed hook.
+        rebind = (
+            "import sys\n"
+            "def solve(s):\n"
+            "    sys.modules['sandbox.python_runner'].BLOCKED_EVENTS = frozenset()\n"
+            "    sys.modules['sandbox.python_runner']._READABLE = ('/',)\n"
+            f"    return open({os.path.abspath(__file__)!r}).read()\n"
+        )
+        self.assertEqual(statuses(self.run_code(rebind)), ["error"] * 3)
+
+    def test_syntax_errors_and_missing_entry(self):
+        self.assertEqual(self.run_code("def solve(s) return s")["status"], "error")
+        verdict = self.run_code("def other(s):\n    return s\n")
+        self.assertEqual(verdict["error"], "Define a function named solve().")
+        self.assertEqual(statuses(verdict), ["skipped"] * 3)
+
+
+class IsolationTestCase(unittest.TestCase):
+    """What the kernel enforces in a confined child, with no audit hook at all."""
+
+    def confined(self, check):
+        workdir = os.path.realpath(self.enterContext(tempfile.TemporaryDirectory()))
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                confine(workdir, _READABLE)
+                code = 0 if check(workdir) else 2
+            except IsolationUnavailable:
+                code = 77
+            finally:
+                os._exit(code)
+        status = os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+        if status == 77:
+            self.skipTest("this kernel cannot confine the child")
+        return status == 0
+
+    def test_files_outside_the_stdlib_and_workdir_are_unreadable(self):
+        def check(workdir):
+            with open(os.path.join(workdir, "scratch"), "w") as fh:
+                fh.write("ok")
+            try:
+                open(os.path.abspath(__file__)).close()
+            except PermissionError:
+                return os.getuid() != 0
+            return False
+        self.assertTrue(self.confined(check))
+
+    def test_there_is_no_network(self):
+        def check(workdir):
+            if [name for _, name in socket.if_nameindex()] != ["lo"]:
+                return False
+            try:
+                socket.socket().connect(("127.0.0.1", 80))
+            except OSError:
+                return True
+            return False
+        self.assertTrue(self.confined(check))
+
+
+class JudgePoolTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = WorkerPool(size=1, cpu_seconds=1.0, wall_seconds=5, max_waiting=1,
+                              preload=("sandbox.python_runner",))
+        cls.pool.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_warm_workers_check_in_tens_of_milliseconds(self):
+        self.pool.call(run_solution, CORRECT, "solve", CASES)
+        started = time.perf_counter()
+        for _ in range(5):
+            self.assertEqual(self.pool.call(run_solution, CORRECT, "solve", CASES)["status"], "passed")
+        self.assertLess((time.perf_counter() - started) / 5, 0.1)
+
+    def test_full_queue_is_rejected_at_once(self):
+        slow = "import time\ndef solve(s):\n    time.sleep(0.3)\n    return s[::-1]\n"
+        threads = [threading.Thread(target=self.pool.call, args=(run_solution, slow, "solve", CASES[:1]))
+                   for _ in range(2)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        started = time.monotonic()
+        with self.assertRaises(PoolBusy):
+            self.pool.call(run_solution, CORRECT, "solve", CASES)
+        self.assertLess(time.monotonic() - started, 0.1)
+        for thread in threads:
+            thread.join()
+
+    def test_per_user_cap(self):
+        judge = Judge(self.pool, {"cpu_seconds": 1.0, "wall_seconds": 2.0}, per_user=1)
+        spec = {"entry": "solve", "cases": CASES[:1]}
+        slow = "import time\ndef solve(s):\n    time.sleep(0.3)\n    return s[::-1]\n"
+        thread = threading.Thread(target=judge.check, args=(slow, spec, 7))
+        thread.start()
+        time.sleep(0.05)
+        with self.assertRaises(TooManyChecks):
+            judge.check(CORRECT, spec, 7)
+        thread.join()
+        self.assertEqual(judge.check(CORRECT, spec, 7)["status"], "passed")
+
+
+class VerdictCacheTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = WorkerPool(size=1, cpu_seconds=1.0, wall_seconds=5, preload=("sandbox.python_runner",))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def setUp(self):
+        self.judge = Judge(self.pool, {"cpu_seconds": 0.5, "wall_seconds": 2.0}, per_user=1, cache=VerdictCache())
+        self.spec = {"entry": "solve", "cases": CASES}
+
+    def test_formatting_comments_and_docstrings_do_not_change_the_hash(self):
+        variant = 'def solve( s ):\n    """Reverse."""\n    # slicing\n    return s[ : : -1 ]\n'
+        self.assertEqual(solution_hash(CORRECT), solution_hash(variant))
+        self.assertNotEqual(solution_hash(CORRECT), solution_hash("def solve(s):\n    return s[::1]\n"))
+        self.assertIsNone(solution_hash("def solve(s) return s"))
+
+    def test_repeat_submissions_skip_execution(self):
+        first = self.judge.check(CORRECT, self.spec)
+        self.assertFalse(first["cached"])
+        # A dead pool proves the repeat never reaches a worker.
+        self.judge.pool = None
+        again = self.judge.check("def solve(s):\n    # same idea\n    return s[::-1]\n", self.spec)
+        self.assertTrue(again["cached"])
+        self.assertEqual(again["cases"], first["cases"])
+        self.judge.pool = self.pool
+
+        stats = self.judge.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_ratio"]), (1, 1, 0.5))
+        self.assertEqual(stats["saved_cpu_seconds"], round(first["cpu_ms"] / 1000, 3))
+
+    def test_changed_tests_and_load_dependent_verdicts_miss(self):
+        self.judge.check(CORRECT, self.spec)
+        changed = {"entry": "solve", "cases": CASES + [{"args": ["ab"], "expected": "ba"}]}
+        self.assertFalse(self.judge.check(CORRECT, changed)["cached"])
+
+        spin = "def solve(s):\n    while True:\n        pass\n"
+        self.assertEqual(self.judge.check(spin, self.spec)["status"], "time_limit")
+        self.assertFalse(self.judge.check(spin, self.spec)["cached"])
+
+
+class ParseTestCasesTestCase(unittest.TestCase):
+    def test_valid_and_invalid_suites(self):
+        self.assertIsNone(parse_test_cases("  "))
+        self.assertEqual(parse_test_cases('[{"args": [1], "expected": 2}]'),
+                         {"entry": "solve", "cases": [{"args": [1], "expected": 2, "hidden": False}]})
+        for bad in ("{", '{"cases": []}', '{"entry": "not a name", "cases": [{"expected": 1}]}',
+                    '{"cases": [{"args": 1, "expected": 1}]}', '{"cases": [{"args": []}]}'):
+            with self.assertRaises(ValueError, msg=bad):
+                parse_test_cases(bad)
+
+
+class CheckRouteTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        db.session.add(User(username="coder", email="coder@example.com", password_hash=generate_password_hash("pw")))
+        db.session.add(Challenge(title="Reverse", prompt="Reverse it.", status="published",
+                                 test_cases=json.dumps({"entry": "solve", "cases": CASES})))
+        db.session.add(Challenge(title="Untested", prompt="Anything.", status="published"))
+        db.session.commit()
+        self.client.post("/login", data={"username": "coder", "password": "pw"})
+
+    def check(self, challenge_id, code):
+        return self.client.post(f"/challenges/{challenge_id}/check", json={"code": code})
+
+    def test_passing_solution_awards_xp_once(self):
+        resp = self.check(1, "def solve(s):\n    return s\n")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.get_json()["status"], "failed")
+        self.assertEqual(Submission.query.count(), 0)
+
+        body = self.check(1, CORRECT).get_json()
+        self.assertEqual((body["status"], body["new_xp"]), ("passed", 10))
+        self.assertEqual(self.check(1, CORRECT).get_json()["message"], "You already solved this one.")
+        self.assertEqual(Submission.query.count(), 1)
+        self.assertEqual(db.session.get(User, 1).xp, 10)
+
+    def test_editing_the_tests_invalidates_cached_verdicts(self):
+        self.assertFalse(self.check(1, CORRECT).get_json()["cached"])
+        self.assertTrue(self.check(1, CORRECT).get_json()["cached"])
+        challenge = db.session.get(Challenge, 1)
+        challenge.test_cases = json.dumps({"entry": "solve", "cases": CASES[:2]})
+        db.session.commit()
+        self.assertFalse(self.check(1, CORRECT).get_json()["cached"])
+        self.assertEqual(self.app.extensions["judge"].cache.stats()["hits"], 1)
+
+    def test_tested_challenges_cannot_be_marked_solved(self):
+        self.client.post("/submit/1")
+        self.assertEqual(Submission.query.count(), 0)
+        self.client.post("/submit/2")
+        self.assertEqual(Submission.query.count(), 1)
+
+    def test_bad_requests(self):
+        self.assertEqual(self.check(2, CORRECT).status_code, 404)
+        self.assertEqual(self.check(1, "").status_code, 400)
+        self.assertEqual(self.check(1, "x" * 20_001).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app import db, Challenge, Joke, User
+from support import DatabaseTestCase
+
+
+class ListProjectionTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        db.session.add(
+            User(
+                username="admin",
+                email="admin@example.com",
+                is_admin=True,
+                password_hash=generate_password_hash("password"),
+            )
+        )
+        db.session.add(
+            Challenge(
+                title="Long one",
+                prompt="p" * 300,
+                solution="SECRET SOLUTION",
+                hints="secret hint",
+                status="published",
+            )
+        )
+        db.session.commit()
+        self.statements = []
+        event.listen(db.engine, "before_cursor_execute", self.record)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self.record)
+        super().tearDown()
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def login_admin(self):
+        self.client.post("/login", data={"username": "admin", "password": "password"})
+        self.statements.clear()
+
+    def test_admin_challenge_list_skips_large_columns(self):
+        self.login_admin()
+        resp = self.client.get("/admin/challenges")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b"Long one", resp.data)
+        self.assertIn(("p" * 120 + "…").encode(), resp.data)
+        sql = "\n".join(self.statements)
+        self.assertNotIn("challenge.solution", sql)
+        self.assertNotIn("challenge.hints", sql)
+
+    def test_deferred_columns_load_together_on_access(self):
+        ch = Challenge.query.first()
+        self.assertNotIn("prompt", ch.__dict__)
+        self.statements.clear()
+        self.assertEqual(ch.solution, "SECRET SOLUTION")
+        self.assertEqual(ch.hints, "secret hint")
+        self.assertEqual(len(self.statements), 1)
+
+    def test_leaderboard_selects_only_rendered_columns(self):
+        resp = self.client.get("/leaderboard")
+        self.assertEqual(resp.status_code, 200)
+        self.assertIn(b"admin", resp.data)
+        self.assertNotIn("password_hash", "\n".join(self.statements))
+
+    def test_fun_cards_are_paginated(self):
+        db.session.add_all(Joke(text=f"card {i:03d}") for i in range(60))
+        db.session.commit()
+        self.login_admin()
+        first = self.client.get("/admin/fun")
+        self.assertIn(b"card 059", first.data)
+        self.assertNotIn(b"card 009", first.data)
+        self.assertIn(b"Page 1 of 2", first.data)
+        second = self.client.get("/admin/fun?page=2")
+        self.assertIn(b"card 009", second.data)
+        self.assertNotIn(b"card 010", second.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from sqlalchemy import create_engine, inspect, select, text
+
+from app import db, DebuggerTowerDefenseState
+from migrations import (
+    MIGRATIONS,
+    MigrationLockTimeout,
+    applied_versions,
+    file_lock,
+    format_report,
+    run_migrations,
+)
+from sharding import shard_metadata
+
+LEGACY_SCHEMA = [
+    """CREATE TABLE user (
+        id INTEGER PRIMARY KEY, username VARCHAR(80) UNIQUE NOT NULL, email VARCHAR(120),
+        password_hash VARCHAR(200), xp INTEGER, streak INTEGER, last_active_date DATE, is_admin BOOLEAN
+    )""",
+    "CREATE TABLE joke (id INTEGER PRIMARY KEY, text TEXT NOT NULL)",
+    """CREATE TABLE challenge (
+        id INTEGER PRIMARY KEY, title VARCHAR(200) NOT NULL, prompt TEXT NOT NULL, solution TEXT,
+        hints TEXT, language VARCHAR(40), difficulty VARCHAR(30), topic VARCHAR(60), added_by INTEGER
+    )""",
+]
+
+
+class MigrationRunnerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmpdir.name, "legacy.db")
+        self.lock_path = self.db_path + ".migrate.lock"
+        self.engine = create_engine(f"sqlite:///{self.db_path}")
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.tmpdir.cleanup()
+
+    def migrate(self, **kwargs):
+        kwargs.setdefault("lock_path", self.lock_path)
+        return run_migrations(self.engine, db.metadata, MIGRATIONS, **kwargs)
+
+    def make_legacy_db(self, users=5):
+        with self.engine.begin() as conn:
+            for ddl in LEGACY_SCHEMA:
+                conn.execute(text(ddl))
+            for i in range(1, users + 1):
+                conn.execute(text("INSERT INTO user (id, username, xp) VALUES (:id, :name, 0)"), {"id": i, "name": f"u{i}"})
+            conn.execute(text("INSERT INTO joke (text) VALUES ('ha')"))
+            conn.execute(text("INSERT INTO challenge (title, prompt, topic) VALUES ('a', 'p', ' Strings ')"))
+            conn.execute(text("INSERT INTO challenge (title, prompt, topic) VALUES ('b', 'p', '  ')"))
+
+    def columns(self, table):
+        return {col["name"] for col in inspect(self.engine).get_columns(table)}
+
+    def test_fresh_database_runs_every_migration_once(self):
+        results = self.migrate()
+        self.assertEqual([r.version for r in results], sorted(m.version for m in MIGRATIONS))
+        self.assertTrue(inspect(self.engine).has_table("user"))
+        self.assertEqual(applied_versions(self.engine), {m.version for m in MIGRATIONS})
+        self.assertEqual(self.migrate(), [])
+        self.assertEqual(format_report([]), ["No pending migrations."])
+
+    def test_legacy_database_is_upgraded_in_batches(self):
+        self.make_legacy_db(users=5)
+        results = self.migrate(batch_size=2)
+
+        self.assertTrue({"active", "show_on_leaderboard", "last_login", "created_at"} <= self.columns("user"))
+        self.assertIn("entry_type", self.columns("joke"))
+        self.assertTrue({"tags", "status", "published_at"} <= self.columns("challenge"))
+
+        steps = {s.description: s for r in results for s in r.steps}
+        created = steps["backfill user.created_at"]
+        self.assertEqual((created.rows, created.batches), (5, 3))
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("SELECT COUNT(*) FROM user WHERE created_at IS NULL")).scalar(), 0)
+            self.assertEqual(
+                conn.execute(text("SELECT COUNT(*) FROM user WHERE active = TRUE AND show_on_leaderboard = TRUE")).scalar(), 5
+            )
+            topics = conn.execute(text("SELECT topic FROM challenge ORDER BY id")).scalars().all()
+        self.assertEqual(topics, ["strings", None])
+
+    def test_tower_defense_state_is_read_after_compression_migration(self):
+        self.make_legacy_db(users=1)
+        with self.engine.begin() as conn:
+            conn.execute(text(
+                "CREATE TABLE debugger_tower_defense_state "
+                "(id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL UNIQUE, state JSON NOT NULL, updated_at DATETIME NOT NULL)"
+            ))
+            conn.execute(text(
+                "INSERT INTO debugger_tower_defense_state (user_id, state, updated_at) "
+                "VALUES (1, '{\"wave\": 4}', '2024-01-01 00:00:00')"
+            ))
+        self.migrate()
+
+        self.assertTrue({"version", "base_version"} <= self.columns("debugger_tower_defense_state"))
+        self.assertTrue(inspect(self.engine).has_table("debugger_tower_defense_patch"))
+        state = DebuggerTowerDefenseState.__table__
+        with self.engine.connect() as conn:
+            self.assertEqual(conn.execute(select(state.c.state, state.c.version)).one(), ({"wave": 4}, 0))
+
+    def test_shards_get_only_progress_tables(self):
+        results = run_migrations(self.engine, shard_metadata(), MIGRATIONS, lock_path=self.lock_path)
+
+        self.assertEqual(len(results), len(MIGRATIONS))
+        tables = set(inspect(self.engine).get_table_names())
+        self.assertIn("debugger_tower_defense_patch", tables)
+        self.assertFalse({"user", "challenge", "joke"} & tables)
+
+    def test_dry_run_reports_without_writing(self):
+        self.make_legacy_db(users=3)
+        results = self.migrate(dry_run=True, batch_size=2)
+
+        self.assertFalse(any(r.applied for r in results))
+        self.assertFalse(inspect(self.engine).has_table("schema_version"))
+        self.assertNotIn("created_at", self.columns("user"))
+        steps = {s.description: s for r in results for s in r.steps}
+        self.assertEqual((steps["backfill user.created_at"].rows, steps["backfill user.created_at"].batches), (3, 2))
+        self.assertIn("would apply", "\n".join(format_report(results, dry_run=True)))
+
+    def test_lock_timeout_when_another_process_is_migrating(self):
+        with file_lock(self.lock_path):
+            with self.assertRaises(MigrationLockTimeout):
+                self.migrate(lock_timeout=0.2)
+        self.assertFalse(inspect(self.engine).has_table("schema_version"))
+
+    def test_concurrent_runners_apply_each_migration_once(self):
+        self.make_legacy_db()
+        results, errors = [], []
+
+        def worker():
+            engine = create_engine(f"sqlite:///{self.db_path}", connect_args={"timeout": 30})
+            try:
+                results.append(run_migrations(engine, db.metadata, MIGRATIONS, lock_path=self.lock_path))
+            except Exception as exc:  # surfaced below
+                errors.append(exc)
+            finally:
+                engine.dispose()
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        applied = [r.version for batch in results for r in batch]
+        self.assertEqual(sorted(applied), sorted(m.version for m in MIGRATIONS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+
+from app import db, Challenge, User
+from prefork import after_fork, warm_app, worker_settings
+from services import get_daily_challenge_for_user, published_catalog
+from support import DatabaseTestCase
+
+
+class PreforkTestCase(DatabaseTestCase):
+    def test_worker_settings_follow_cpu_and_io_ratio(self):
+        self.assertEqual(worker_settings(cpus=4, io_ratio=0.0), (5, 1))
+        self.assertEqual(worker_settings(cpus=4, io_ratio=0.5), (5, 2))
+        self.assertEqual(worker_settings(cpus=2, io_ratio=0.75), (3, 4))
+        self.assertEqual(worker_settings(cpus=1, io_ratio=1.0)[1], 16)
+
+    def test_warm_app_fills_caches_and_survives_fork_reset(self):
+        db.session.add(Challenge(title="T", prompt="P", topic="Strings", difficulty="Easy", status="published"))
+        db.session.commit()
+        self.app.jinja_env.cache.clear()
+
+        app_cache = self.app.extensions["app_cache"]
+        timings = warm_app(self.app)
+
+        self.assertEqual(set(timings), {"fun_pool", "published_catalog", "dungeon_totals", "templates"})
+        self.assertIn("base.html", {key[1] for key in self.app.jinja_env.cache.keys()})
+        warmed = len(app_cache)
+        self.assertGreaterEqual(warmed, 1)
+        catalog = self.app.extensions["catalog"]
+        mapped = catalog.current()
+        self.assertEqual([entry.title for entry in mapped], ["T"])
+        old_lock = app_cache._lock
+        after_fork(self.app)
+        self.assertIsNot(app_cache._lock, old_lock)
+        self.assertEqual(len(app_cache), warmed)
+        self.assertIs(catalog.current(), mapped)
+
+    def test_catalog_drives_daily_challenge_and_tracks_changes(self):
+        user = User(username="u")
+        easy = Challenge(title="E", prompt="P", difficulty="Easy", status="published")
+        hard = Challenge(title="H", prompt="P", difficulty="Hard", status="published")
+        db.session.add_all([user, easy, hard])
+        db.session.commit()
+
+        self.assertEqual(get_daily_challenge_for_user(user, difficulty="hard").id, hard.id)
+        self.assertEqual([entry.id for entry in published_catalog()], [easy.id, hard.id])
+
+        hard.status = "draft"
+        db.session.commit()
+        self.assertIsNone(get_daily_challenge_for_user(user, difficulty="Hard"))
+        self.assertEqual([entry.id for entry in published_catalog()], [easy.id])
+
+
+if __name__ == "__main__":
+    unittest.main()
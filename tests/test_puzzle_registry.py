@@ -0,0 +1,63 @@
+import unittest
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app import db, PuzzleCompletion, User
+from puzzles.data import BIT_FLIPPER_LEVELS
+from puzzles.registry import FAMILIES, PUZZLE_NAMES, completed_puzzles
+from support import DatabaseTestCase
+
+
+class PuzzleRegistryTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        db.session.add(User(username="player", email="player@example.com", password_hash=generate_password_hash("pw")))
+        db.session.commit()
+        db.session.add_all([
+            PuzzleCompletion(user_id=1, puzzle_name="bit_flipper_lvl_2"),
+            PuzzleCompletion(user_id=1, puzzle_name="regex_rescue_lvl_1"),
+        ])
+        db.session.commit()
+        self.client.post("/login", data={"username": "player", "password": "pw"})
+        self.statements = []
+        event.listen(db.engine, "before_cursor_execute", self.record)
+
+    def tearDown(self):
+        event.remove(db.engine, "before_cursor_execute", self.record)
+        super().tearDown()
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def test_payloads_are_built_once_and_read_only(self):
+        family = FAMILIES["bit_flipper"]
+        level = family.level(2)
+        self.assertEqual(
+            (level["level"], level["puzzle_name"], level["total_levels"]),
+            (2, "bit_flipper_lvl_2", len(BIT_FLIPPER_LEVELS)),
+        )
+        self.assertIsNone(family.level(0))
+        self.assertIsNone(family.level(len(BIT_FLIPPER_LEVELS) + 1))
+        with self.assertRaises(TypeError):
+            level["title"] = "changed"
+        self.assertIn("debugger_tower_defense_prototype", PUZZLE_NAMES)
+        self.assertEqual(completed_puzzles(1), {"bit_flipper_lvl_2", "regex_rescue_lvl_1"})
+
+    def test_level_page_and_strip_use_one_completion_query(self):
+        resp = self.client.get("/puzzles/bit-flipper/2")
+        self.assertEqual(resp.status_code, 200)
+        completion_queries = [s for s in self.statements if "FROM puzzle_completion" in s]
+        self.assertEqual(len(completion_queries), 1)
+        self.assertIn(" IN ", completion_queries[0])
+
+        html = resp.get_data(as_text=True)
+        self.assertIn('class="level-pip done current" aria-current="page"', html)
+        self.assertIn('href="/puzzles/bit-flipper/1" class="level-pip"', html)
+        self.assertEqual(html.count('class="level-pip'), len(BIT_FLIPPER_LEVELS))
+        self.assertEqual(self.client.get("/puzzles/bit-flipper/99").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
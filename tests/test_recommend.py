@@ -0,0 +1,152 @@
+import unittest
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app import db, Challenge, Submission, User
+from models import ChallengeQueue
+from recommend import EMPTY_RETRY, QUEUE_SIZE, after_solve, next_challenge, profile, refill, refill_active
+from support import DatabaseTestCase
+
+
+class RecommendTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        for i in range(1, 4):
+            db.session.add(User(username=f"player{i}", email=f"player{i}@example.com",
+                                password_hash=generate_password_hash("pw")))
+        db.session.commit()
+
+    def add(self, title, score, topic=None, language="Python", status="published"):
+        challenge = Challenge(title=title, prompt="x", difficulty_score=score, topic=topic,
+                              language=language, status=status)
+        db.session.add(challenge)
+        db.session.commit()
+        return challenge.id
+
+    def solve(self, user_id, *challenge_ids):
+        start = datetime.utcnow() - timedelta(hours=len(challenge_ids))
+        for offset, challenge_id in enumerate(challenge_ids):
+            db.session.add(Submission(user_id=user_id, challenge_id=challenge_id,
+                                      timestamp=start + timedelta(hours=offset)))
+        db.session.commit()
+
+    def queue(self, user_id):
+        db.session.expire_all()
+        row = ChallengeQueue.query.filter_by(user_id=user_id).first()
+        return row.challenge_ids if row else None
+
+    def test_new_users_start_easiest_and_get_a_short_queue(self):
+        ids = [self.add(f"C{score}", score) for score in range(5, 100, 5)]
+        self.assertIsNone(self.queue(1))
+        self.assertEqual(next_challenge(1).id, ids[0])
+        queue = self.queue(1)
+        self.assertEqual(len(queue), QUEUE_SIZE)
+        self.assertEqual(queue[:3], ids[:3])
+
+    def test_target_follows_recent_difficulty(self):
+        ids = {score: self.add(f"C{score}", score) for score in range(10, 100, 10)}
+        self.solve(1, ids[50], ids[60], ids[70])
+        self.assertEqual(profile(1).target, 65.0)
+        # 80 is nearest to 65 among the unsolved; 40 and 90 tie, and the easier goes first.
+        self.assertEqual(refill(1)[:3], [ids[80], ids[40], ids[90]])
+
+    def test_unfinished_topics_and_languages_break_ties(self):
+        strings = [self.add(f"Strings {i}", 30, topic="strings") for i in range(3)]
+        graphs = self.add("Graphs", 30, topic="graphs", language="SQL")
+        other = self.add("Other", 30, topic="math", language="SQL")
+        self.solve(1, strings[0])
+        self.assertEqual(set(refill(1)[:2]), set(strings[1:]))
+
+        sql = [self.add(f"SQL {i}", 20, language="SQL") for i in range(2)]
+        self.solve(2, *sql)
+        self.assertEqual(profile(2).languages, {"SQL": 1.0})
+        self.assertEqual(set(refill(2)[:2]), {graphs, other})
+
+    def test_solves_refill_the_queue_and_the_dashboard_reads_only_its_head(self):
+        first, second, third = (self.add(f"C{score}", score) for score in (10, 20, 30))
+        self.client.post("/login", data={"username": "player1", "password": "pw"})
+        self.assertIn("C10", self.client.get("/dashboard").get_data(as_text=True))
+        self.assertEqual(self.queue(1), [first, second, third])
+
+        self.client.post(f"/submit/{first}")
+        self.assertEqual(self.queue(1), [second, third])
+
+        statements = []
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            page = self.client.get("/dashboard").get_data(as_text=True)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertIn("C20", page)
+        self.assertNotIn("FROM submission", " ".join(statements))
+
+    def test_unpublished_entries_are_skipped_and_solves_never_build_a_queue(self):
+        first, second = self.add("Easy one", 10), self.add("Hard one", 90)
+        refill(1)
+        challenge = db.session.get(Challenge, first)
+        challenge.status = "draft"
+        db.session.commit()
+        self.assertEqual(next_challenge(1).id, second)
+        self.assertIsNone(next_challenge(1, difficulty="medium"))
+
+        # A solve without a queue leaves the first build to the next visit.
+        self.solve(2, second)
+        after_solve(2)
+        db.session.commit()
+        self.assertIsNone(self.queue(2))
+
+    def test_an_exhausted_queue_waits_for_new_challenges_or_the_retry(self):
+        only = self.add("Only one", 10)
+        self.solve(1, only)
+        self.assertIsNone(next_challenge(1))
+        self.assertEqual(self.queue(1), [])
+
+        statements = []
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            for _ in range(3):
+                db.session.expire_all()
+                self.assertIsNone(next_challenge(1))
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertFalse([s for s in statements if not s.lstrip().upper().startswith("SELECT")])
+
+        newest = self.add("New", 20)
+        self.assertEqual(next_challenge(1).id, newest)
+
+        self.solve(1, newest)
+        after_solve(1)
+        db.session.commit()
+        self.assertEqual(self.queue(1), [])
+        row = ChallengeQueue.query.filter_by(user_id=1).one()
+        row.built_at -= EMPTY_RETRY
+        db.session.commit()
+        self.assertIsNone(next_challenge(1))
+        self.assertGreater(ChallengeQueue.query.filter_by(user_id=1).one().built_at, datetime.utcnow() - EMPTY_RETRY)
+
+    def test_cron_refill_rebuilds_recently_active_users(self):
+        self.add("Old", 40)
+        refill(1)
+        refill(2)
+        newest = self.add("New and easy", 5)
+        today = date.today()
+        db.session.get(User, 1).last_active_date = today
+        db.session.get(User, 2).last_active_date = today - timedelta(days=30)
+        db.session.commit()
+
+        result = self.app.test_cli_runner().invoke(args=["recommendations", "refill"])
+        self.assertIn("Rebuilt 1 queue(s).", result.output)
+        self.assertEqual(self.queue(1)[0], newest)
+        self.assertNotIn(newest, self.queue(2))
+        self.assertEqual(refill_active(days=60, batch_size=1), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
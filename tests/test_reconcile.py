@@ -0,0 +1,134 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+
+from app import db, AuditLog, Challenge, Submission, User, XpEvent
+from models import Dungeon, DungeonCompletion, PuzzleCompletion
+from reconcile import Mismatch, Report, reconcile, reconcile_chunk
+from support import DatabaseTestCase
+from xp_ledger import roll_up
+
+NOW = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+
+
+class ReconcileTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        for i in range(1, 6):
+            db.session.add(User(
+                username=f"player{i}", email=f"player{i}@example.com", is_admin=i == 1,
+                password_hash=generate_password_hash("pw"),
+            ))
+        for i in range(1, 4):
+            db.session.add(Challenge(title=f"Challenge {i}", prompt="Anything.", status="published"))
+        db.session.add(Dungeon(name="Strings", topic="strings", reward_xp=50))
+        db.session.commit()
+
+    def login(self, user_id):
+        self.client.post("/login", data={"username": f"player{user_id}", "password": "pw"})
+
+    def set_counters(self, user_id, xp, streak):
+        db.session.execute(text("UPDATE user SET xp = :xp, streak = :streak WHERE id = :id"),
+                           {"xp": xp, "streak": streak, "id": user_id})
+        db.session.commit()
+
+    def counters(self, user_id):
+        db.session.expire_all()
+        user = db.session.get(User, user_id)
+        return user.xp, user.streak
+
+    def test_counters_earned_through_the_app_reconcile_cleanly(self):
+        self.login(2)
+        self.client.post("/submit/1")
+        self.client.post("/submit/2")
+        self.client.post("/puzzles/complete", json={"puzzle_name": "bit_flipper_lvl_1"})
+        self.login(1)
+        self.client.post("/admin/users/2/adjust_stats", data={"delta_xp": "-100", "delta_streak": "4"})
+        self.client.post("/admin/users/3/adjust_stats", data={"delta_xp": "7", "delta_streak": "0"})
+        self.assertEqual(self.counters(2), (0, 5))
+
+        report = reconcile(settle_seconds=0)
+        self.assertEqual((report.checked, report.mismatched), (5, 0))
+
+    def test_report_lists_drift_and_fix_corrects_it_once(self):
+        db.session.add_all([
+            Submission(user_id=2, challenge_id=1, timestamp=NOW - timedelta(days=1)),
+            Submission(user_id=2, challenge_id=2, timestamp=NOW),
+            PuzzleCompletion(user_id=2, puzzle_name="bit_flipper_lvl_1"),
+            DungeonCompletion(user_id=2, dungeon_id=1),
+        ])
+        db.session.commit()
+        self.set_counters(2, 500, 9)
+
+        report = reconcile(settle_seconds=0)
+        self.assertEqual(report.sample, [Mismatch(2, 500, 75, 9, 2)])
+        self.assertEqual((report.fixed, self.counters(2)), (0, (500, 9)))
+
+        report = reconcile(fix=True, settle_seconds=0)
+        self.assertEqual((report.mismatched, report.fixed), (1, 1))
+        self.assertEqual(self.counters(2), (75, 2))
+        event = XpEvent.query.one()
+        self.assertEqual((event.user_id, event.source, event.delta), (2, "reconcile", -425))
+        # A correction is not XP gained in any period.
+        roll_up()
+        self.assertEqual(db.session.execute(text("SELECT COUNT(*) FROM xp_rollup")).scalar(), 0)
+        self.assertEqual(reconcile(fix=True, settle_seconds=0).mismatched, 0)
+
+    def test_streak_counts_the_latest_run_and_admin_changes_during_it(self):
+        for days_ago in (5, 2, 1, 0):
+            db.session.add(Submission(user_id=3, challenge_id=1, timestamp=NOW - timedelta(days=days_ago)))
+        for days_ago, applied in ((4, 10), (1, 3)):
+            db.session.add(AuditLog(
+                actor_user_id=1, target_user_id=3, action="adjust_stats",
+                meta={"delta_xp": -50, "applied_xp": -20, "delta_streak": applied, "applied_streak": applied},
+                created_at=NOW - timedelta(days=days_ago),
+            ))
+        # Entries from before applied values were recorded fall back to the requested change.
+        db.session.add(AuditLog(actor_user_id=1, target_user_id=3, action="adjust_stats",
+                                meta={"delta_xp": 5, "delta_streak": 0}))
+        db.session.commit()
+        self.set_counters(3, 0, 0)
+
+        # 4 solves - 2 * 20 applied + 5 legacy XP; a 3-day run + the 3 streak points given during it.
+        report = reconcile(fix=True, settle_seconds=0)
+        self.assertEqual(report.sample, [Mismatch(3, 0, 5, 0, 6)])
+        self.assertEqual(self.counters(3), (5, 6))
+
+    def test_counters_changed_since_the_read_are_left_alone(self):
+        self.set_counters(2, 40, 1)
+        report = Report()
+        reconcile_chunk(1, 2, [(2, 999, 1)], {}, report, fix=True, settle_seconds=0)
+        self.assertEqual((report.mismatched, report.fixed, report.conflicts), (1, 0, 1))
+        self.assertEqual(self.counters(2), (40, 1))
+
+    def test_recently_active_users_are_skipped(self):
+        self.login(2)
+        self.client.post("/submit/1")
+        self.set_counters(2, 0, 0)
+        report = reconcile(fix=True)
+        self.assertEqual((report.skipped_active, report.mismatched), (1, 0))
+        self.assertEqual(reconcile(fix=True, settle_seconds=0).fixed, 1)
+        self.assertEqual(self.counters(2), (10, 1))
+
+    def test_users_are_walked_in_bounded_chunks(self):
+        self.set_counters(4, 30, 0)
+        report = reconcile(batch_size=2, settle_seconds=0)
+        self.assertEqual((report.checked, report.chunks, report.mismatched), (5, 3, 1))
+        self.assertEqual(reconcile(settle_seconds=0, start_after=4).checked, 1)
+
+    def test_command_reports_and_fixes(self):
+        self.set_counters(5, 12, 3)
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(args=["xp", "reconcile", "--settle", "0"])
+        self.assertIn("user 5: xp 12 -> 0, streak 3 -> 0", result.output)
+        self.assertIn("1 mismatched, 0 fixed", result.output)
+        result = runner.invoke(args=["xp", "reconcile", "--fix", "--settle", "0"])
+        self.assertIn("1 fixed", result.output)
+        self.assertEqual(self.counters(5), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
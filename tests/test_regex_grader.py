@@ -0,0 +1,138 @@
+import os
+import time
+import unittest
+
+from werkzeug.security import generate_password_hash
+
+from app import db, PuzzleCompletion, User
+from sandbox import CpuLimitExceeded, WorkerLost, WorkerPool
+from sandbox.regex import cache_info, find_all
+from support import DatabaseTestCase
+
+# Known catastrophic-backtracking patterns and inputs that trigger them.
+PATHOLOGICAL = [
+    (r"(a+)+$", "a" * 40 + "!"),
+    (r"(a|aa)+$", "a" * 60 + "!"),
+    (r"^(\w+\s?)*$", "an unusually long sentence that will never end in a match" + "!"),
+    (r"(x+x+)+y", "x" * 40),
+]
+
+
+class WorkerPoolTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = WorkerPool(size=1, cpu_seconds=0.2)
+        cls.pool.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def test_pathological_patterns_hit_the_cpu_limit_and_the_worker_survives(self):
+        pid = self.pool.call(os.getpid)
+        for pattern, text in PATHOLOGICAL:
+            started = time.monotonic()
+            with self.assertRaises(CpuLimitExceeded, msg=pattern):
+                self.pool.call(find_all, pattern, text)
+            self.assertLess(time.monotonic() - started, 1.5)
+
+        self.assertEqual(self.pool.call(os.getpid), pid)
+        self.assertEqual(self.pool.call(find_all, r"\d+", "Order 66 at 14:00")["matches"], ["66", "14", "00"])
+        self.assertIn("error", self.pool.call(find_all, "(", "text"))
+
+    def test_compiled_patterns_are_cached_in_the_worker(self):
+        before = self.pool.call(cache_info)
+        for _ in range(3):
+            self.pool.call(find_all, r"[cbh]at", "cat bat hat")
+        after = self.pool.call(cache_info)
+        self.assertEqual(after["hits"] - before["hits"], 2)
+        self.assertLessEqual(after["size"], after["max_size"])
+
+    def test_a_task_that_never_replies_is_killed_and_replaced(self):
+        pool = WorkerPool(size=1, cpu_seconds=0.2, wall_seconds=0.5)
+        try:
+            with self.assertRaises(WorkerLost):
+                pool.call(time.sleep, 5)
+            self.assertEqual(pool.call(find_all, "a", "banana")["matches"], ["a", "a", "a"])
+        finally:
+            pool.close()
+
+
+class JavaScriptSyntaxTestCase(unittest.TestCase):
+    """Patterns match what the same pattern matches with JavaScript's ``RegExp(pattern, "g")``."""
+
+    def matches(self, pattern, text):
+        return find_all(pattern, text)["matches"]
+
+    def test_named_groups_and_backreferences(self):
+        self.assertEqual(self.matches(r"(?<d>\d)\k<d>", "11 12 33"), ["11", "33"])
+        self.assertEqual(self.matches(r"(?<=\$)\d+", "$5 and 6"), ["5"])
+        self.assertIn("error", find_all(r"(?P<d>\d)", "1"))
+
+    def test_classes_are_ascii_except_whitespace(self):
+        self.assertEqual(self.matches(r"\d+", "٣٤ 34"), ["34"])
+        self.assertEqual(self.matches(r"\w+", "café"), ["caf"])
+        self.assertEqual(self.matches(r"\s", "a\u00a0b\u2003c"), ["\u00a0", "\u2003"])
+        self.assertEqual(self.matches(r"a.c", "a\rc a\u2028c abc"), ["abc"])
+
+    def test_dollar_only_matches_at_the_end(self):
+        self.assertEqual(self.matches(r"end$", "the end\n"), [])
+        self.assertEqual(self.matches(r"end$", "the end"), ["end"])
+
+    def test_python_only_syntax_and_flags_are_rejected(self):
+        for pattern in [r"(?i)abc", r"(?s:.)", r"(?#note)a", r"(?>a)", r"a++", r"x*+"]:
+            self.assertIn("error", find_all(pattern, "abc"), msg=pattern)
+
+    def test_escapes_javascript_reads_as_letters(self):
+        self.assertEqual(self.matches(r"\A\x4", "A x4"), [])
+        self.assertEqual(self.matches(r"\Ax", "Ax"), ["Ax"])
+        self.assertEqual(self.matches(r"[^]", "ab"), ["a", "b"])
+        self.assertEqual(self.matches(r"a[]", "a"), [])
+
+    def test_spans_count_utf16_code_units(self):
+        self.assertEqual(find_all(r"\d", "😀1é2")["spans"], [[2, 3], [4, 5]])
+
+
+class RegexRescueGradingTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        db.session.add(User(username="player", email="player@example.com", password_hash=generate_password_hash("pw")))
+        db.session.commit()
+        self.client.post("/login", data={"username": "player", "password": "pw"})
+
+    def grade(self, level, pattern):
+        return self.client.post(f"/puzzles/regex-rescue/{level}/grade", json={"pattern": pattern})
+
+    def test_correct_pattern_awards_xp_once(self):
+        resp = self.grade(2, r"\d")
+        self.assertEqual(resp.get_json()["correct"], False)
+        self.assertEqual(PuzzleCompletion.query.count(), 0)
+
+        resp = self.grade(2, r"\d+")
+        self.assertEqual(resp.get_json(), {
+            "correct": True, "matches": ["66", "14", "00"], "spans": [[6, 8], [25, 27], [28, 30]], "message": "XP awarded!", "new_xp": 5,
+        })
+        self.assertEqual(self.grade(2, r"[0-9]+").get_json()["message"], "Puzzle already completed.")
+        self.assertEqual(db.session.get(User, 1).xp, 5)
+
+    def test_bad_patterns_are_rejected_without_xp(self):
+        resp = self.grade(1, r"((\w|\s)*)*!")
+        self.assertEqual(resp.status_code, 422)
+        self.assertIn("too long", resp.get_json()["error"])
+        self.assertEqual(self.grade(1, "(").status_code, 422)
+        self.assertEqual(self.grade(1, "a" * 301).status_code, 422)
+        self.assertEqual(self.grade(9, "code").status_code, 404)
+        self.assertEqual(PuzzleCompletion.query.count(), 0)
+
+    def test_complete_endpoint_no_longer_trusts_regex_answers(self):
+        resp = self.client.post("/puzzles/complete", json={"puzzle_name": "regex_rescue_lvl_1"})
+        self.assertEqual(resp.status_code, 403)
+        resp = self.client.post("/puzzles/complete", json={"puzzle_name": "made_up_lvl_1"})
+        self.assertEqual(resp.status_code, 400)
+        resp = self.client.post("/puzzles/complete", json={"puzzle_name": "bit_flipper_lvl_1"})
+        self.assertEqual(resp.get_json()["new_xp"], 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
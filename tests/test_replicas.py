@@ -0,0 +1,114 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from flask import g
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+
+from app import db, rate_limit_buckets, Joke, User
+from factory import create_app
+from replicas import FENCE_KEY
+
+
+class ReplicaRoutingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.primary_path = os.path.join(self.folder, "primary.db")
+        self.replica_path = os.path.join(self.folder, "replica.db")
+        self.app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{self.primary_path}",
+            "SQLALCHEMY_REPLICA_URIS": [f"sqlite:///{self.replica_path}"],
+            "CATALOG_SNAPSHOT_PATH": os.path.join(self.folder, "catalog.snapshot"),
+        })
+        self.replica = self.app.extensions["replicas"][0]
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        db.session.add(
+            User(username="alice", email="alice@example.com", xp=10, password_hash=generate_password_hash("pw"))
+        )
+        db.session.commit()
+        self.sync_replica()
+        rate_limit_buckets.clear()
+        self.client = self.app.test_client()
+        self.replica_statements = []
+        event.listen(self.replica, "before_cursor_execute", self.record)
+
+    def tearDown(self):
+        event.remove(self.replica, "before_cursor_execute", self.record)
+        db.session.remove()
+        self.app_context.pop()
+        with self.app.app_context():
+            db.engine.dispose()
+        self.replica.dispose()
+        for name in os.listdir(self.folder):
+            os.remove(os.path.join(self.folder, name))
+        os.rmdir(self.folder)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        self.replica_statements.append(statement)
+
+    def sync_replica(self):
+        """Stand-in for replication: copy the primary over the replica file."""
+        self.replica.dispose()
+        source, target = sqlite3.connect(self.primary_path), sqlite3.connect(self.replica_path)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+    def set_xp(self, xp):
+        db.session.get(User, 1).xp = xp
+        db.session.commit()
+        db.session.remove()
+
+    def test_read_only_views_use_replica_and_tolerate_lag(self):
+        self.set_xp(99)
+        resp = self.client.get("/leaderboard")
+        self.assertIn(b"<td>10</td>", resp.data)
+        self.assertTrue(self.replica_statements)
+
+        self.sync_replica()
+        self.assertIn(b"<td>99</td>", self.client.get("/leaderboard").data)
+
+    def test_writes_fence_reads_until_replica_catches_up(self):
+        self.set_xp(99)
+        # Signing up inserts a user, which fences the user table.
+        self.client.post("/signup", data={"username": "bob", "password": "pw", "confirm": "pw"})
+        with self.client.session_transaction() as sess:
+            self.assertIn("user", sess[FENCE_KEY])
+
+        self.replica_statements.clear()
+        resp = self.client.get("/leaderboard")
+        self.assertIn(b"<td>99</td>", resp.data)
+        self.assertFalse([s for s in self.replica_statements if "FROM user" in s])
+
+        self.sync_replica()
+        self.assertIn(b"<td>99</td>", self.client.get("/leaderboard").data)
+        self.assertTrue([s for s in self.replica_statements if "FROM user" in s])
+        with self.client.session_transaction() as sess:
+            self.assertNotIn(FENCE_KEY, sess)
+
+    def test_unmarked_views_and_writes_stay_on_primary(self):
+        self.client.get("/about")
+        self.assertEqual(self.replica_statements, [])
+
+        with self.app.test_request_context():
+            g._db_replica = self.replica
+            self.assertIs(db.session.get_bind(), self.replica)
+            db.session.add(Joke(text="written"))
+            db.session.flush()
+            self.assertIsNot(db.session.get_bind(), self.replica)
+            db.session.commit()
+            db.session.remove()
+        self.assertEqual(Joke.query.count(), 1)
+        with sqlite3.connect(self.replica_path) as replica:
+            self.assertEqual(replica.execute("SELECT COUNT(*) FROM joke").fetchone(), (0,))
+
+
+if __name__ == "__main__":
+    unittest.main()
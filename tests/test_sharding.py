@@ -0,0 +1,158 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from werkzeug.security import generate_password_hash
+
+from app import db, rate_limit_buckets, Challenge, Submission, User
+from factory import create_app
+import sharding
+from sharding import ShardKeyMissing, count_rows, fan_out, grouped_counts, rebalance, shard_index, user_rows
+
+
+class ShardingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.shard_paths = [os.path.join(self.folder, f"shard{i}.db") for i in range(2)]
+        self.config = {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(self.folder, 'primary.db')}",
+            "CATALOG_SNAPSHOT_PATH": os.path.join(self.folder, "catalog.snapshot"),
+        }
+        self.app = create_app({**self.config, "SHARD_DATABASE_URIS": [f"sqlite:///{p}" for p in self.shard_paths]})
+        self.shards = self.app.extensions["shards"]
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.shards.create_tables()
+        for i in range(1, 5):
+            db.session.add(User(
+                username=f"user{i}", email=f"user{i}@example.com", xp=100 - i,
+                password_hash=generate_password_hash("pw"),
+            ))
+        for i in range(1, 4):
+            db.session.add(Challenge(title=f"Challenge {i}", prompt="p", status="published"))
+        db.session.commit()
+        rate_limit_buckets.clear()
+
+    def tearDown(self):
+        db.session.remove()
+        self.app_context.pop()
+        with self.app.app_context():
+            db.engine.dispose()
+        self.shards.dispose()
+        for name in os.listdir(self.folder):
+            os.remove(os.path.join(self.folder, name))
+        os.rmdir(self.folder)
+
+    def rows_on(self, index, table="submission"):
+        with sqlite3.connect(self.shard_paths[index]) as conn:
+            return conn.execute(f"SELECT user_id, challenge_id FROM {table} ORDER BY user_id, challenge_id").fetchall()
+
+    def test_rows_are_written_to_the_owning_shard(self):
+        for user_id in range(1, 5):
+            db.session.add(Submission(user_id=user_id, challenge_id=1))
+        db.session.commit()
+
+        for index in range(2):
+            expected = [(u, 1) for u in range(1, 5) if shard_index(u, 2) == index]
+            self.assertEqual(self.rows_on(index), expected)
+        with sqlite3.connect(os.path.join(self.folder, "primary.db")) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM submission").fetchone(), (0,))
+
+        self.assertEqual(user_rows(Submission, 3).count(), 1)
+        self.assertEqual(user_rows(Submission, 3).one().user_id, 3)
+        with self.assertRaises(ShardKeyMissing):
+            Submission.query.all()
+
+    def test_fan_out_aggregates_cover_every_shard(self):
+        for user_id, challenges in ((1, [1, 2, 3]), (2, [1]), (3, [1, 2]), (4, [])):
+            for challenge_id in challenges:
+                db.session.add(Submission(user_id=user_id, challenge_id=challenge_id))
+        db.session.commit()
+
+        self.assertEqual(count_rows(Submission), 6)
+        self.assertEqual(count_rows(Submission, Submission.challenge_id == 1), 3)
+        self.assertEqual(grouped_counts(Submission.user_id), {1: 3, 2: 1, 3: 2})
+
+        html = self.app.test_client().get("/leaderboard").get_data(as_text=True)
+        self.assertIn("<td>user1</td>\n      <td>99</td>\n      <td>0</td>\n      <td>3</td>", html)
+        self.assertIn("<td>user4</td>\n      <td>96</td>\n      <td>0</td>\n      <td>0</td>", html)
+
+    def test_fan_out_reuses_one_pool_until_a_fork(self):
+        names = lambda: fan_out(lambda conn: threading.current_thread().name)  # noqa: E731
+        pool = sharding._executor
+        self.assertTrue(all(name.startswith("shard-fan-out") for name in names()))
+        names()
+        self.assertIs(sharding._executor, pool)
+        self.shards.after_fork()
+        self.assertIsNot(sharding._executor, pool)
+        self.assertEqual(len(names()), 2)
+
+    def test_concurrent_fan_outs_start_one_pool(self):
+        self.shards.after_fork()
+        sharding._executor, sharding._executor_size = None, 0  # as if no request had needed it yet
+        barrier = threading.Barrier(8)
+        pools = []
+
+        def request():
+            barrier.wait()
+            pools.append(sharding._executor_for(len(self.shards)))
+            fan_out(lambda conn: None)
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({id(pool) for pool in pools}), 1)
+        self.assertIs(sharding._executor, pools[0])
+
+    def test_submit_view_records_progress_on_shard(self):
+        client = self.app.test_client()
+        client.post("/login", data={"username": "user2", "password": "pw"})
+        client.post("/submit/2")
+        client.post("/submit/2")
+
+        self.assertEqual(self.rows_on(shard_index(2, 2)), [(2, 2)])
+        self.assertEqual(self.rows_on(1 - shard_index(2, 2)), [])
+        db.session.remove()
+        self.assertEqual(db.session.get(User, 2).xp, 108)
+
+    def test_tower_defense_saves_update_rows_on_shard(self):
+        client = self.app.test_client()
+        client.post("/login", data={"username": "user3", "password": "pw"})
+        client.post("/api/debugger-td/state", json={"state": {"wave": 1}})
+        resp = client.post(
+            "/api/debugger-td/state", json={"version": 1, "patch": [{"op": "replace", "path": "/wave", "value": 2}]}
+        )
+        self.assertEqual(resp.get_json()["version"], 2)
+
+        with sqlite3.connect(self.shard_paths[shard_index(3, 2)]) as conn:
+            self.assertEqual(conn.execute("SELECT user_id, version FROM debugger_tower_defense_state").fetchall(), [(3, 2)])
+        self.assertEqual(client.get("/api/debugger-td/state").get_json()["state"], {"wave": 2})
+
+    def test_rebalance_moves_primary_rows_onto_shards(self):
+        # Start unsharded, then turn sharding on and move the rows.
+        unsharded = create_app(self.config)
+        with unsharded.app_context():
+            for user_id in range(1, 5):
+                db.session.add(Submission(user_id=user_id, challenge_id=2))
+            db.session.commit()
+            self.assertEqual(rebalance(), {})
+            db.session.remove()
+            db.engine.dispose()
+
+        moved = rebalance(batch_size=3)
+        self.assertEqual(moved["submission"], 4)
+        self.assertEqual(moved["puzzle_completion"], 0)
+        self.assertEqual(sorted(self.rows_on(0) + self.rows_on(1)), [(u, 2) for u in range(1, 5)])
+        with sqlite3.connect(os.path.join(self.folder, "primary.db")) as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM submission").fetchone(), (0,))
+        self.assertEqual(rebalance()["submission"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+
+from sqlalchemy import text
+from werkzeug.security import generate_password_hash
+
+from app import db, TowerDefenseScore, User
+from puzzles.td_scores import Cursor, leaderboard_page
+from puzzles.td_state import rebuild_scores, save_state
+from support import DatabaseTestCase
+
+URL = "/api/debugger-td/state"
+
+
+class TowerDefenseScoreTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        for i in range(1, 8):
+            db.session.add(User(
+                username=f"player{i}", email=f"player{i}@example.com",
+                password_hash=generate_password_hash("pw"), show_on_leaderboard=i != 7,
+            ))
+        db.session.commit()
+
+    def login(self, user_id):
+        self.client.post("/login", data={"username": f"player{user_id}", "password": "pw"})
+
+    def best(self, user_id):
+        db.session.expire_all()
+        score = db.session.get(TowerDefenseScore, user_id)
+        return (score.best_wave, score.best_kills) if score else None
+
+    def test_saves_keep_the_best_run(self):
+        self.login(1)
+        self.client.post(URL, json={"state": {"wave": 3, "highWave": 3, "kills": 20, "towers": []}})
+        self.assertEqual(self.best(1), (3, 20))
+
+        etag = self.client.get("/api/debugger-td/leaderboard").headers["ETag"]
+        self.client.post(URL, json={"version": 1, "patch": [{"op": "replace", "path": "/kills", "value": 25}]})
+        self.assertEqual(self.best(1), (3, 25))
+        resp = self.client.get("/api/debugger-td/leaderboard", headers={"If-None-Match": etag})
+        self.assertEqual(resp.get_json()["runs"][0]["kills"], 25)
+
+        # A reset run is worse than the best, so the score stays.
+        self.client.post(URL, json={"version": 2, "state": {"wave": 1, "highWave": 1, "kills": 0, "towers": []}})
+        self.assertEqual(self.best(1), (3, 25))
+        self.assertEqual(self.client.get("/api/debugger-td/best").get_json()["best"]["wave"], 3)
+
+        stamp = self.app.extensions["data_versions"].token("tower_defense_score")
+        self.client.post(URL, json={"version": 3, "patch": [{"op": "add", "path": "/towers/-", "value": {"x": 1}}]})
+        self.assertEqual(self.app.extensions["data_versions"].token("tower_defense_score"), stamp)
+
+    def test_leaderboard_etag_ignores_xp_but_follows_renames(self):
+        self.login(1)
+        self.client.post(URL, json={"state": {"wave": 3, "highWave": 3, "kills": 20, "towers": []}})
+        etag = self.client.get("/api/debugger-td/leaderboard").headers["ETag"]
+
+        db.session.get(User, 2).xp += 50
+        db.session.commit()
+        resp = self.client.get("/api/debugger-td/leaderboard", headers={"If-None-Match": etag})
+        self.assertEqual(resp.status_code, 304)
+
+        db.session.get(User, 2).is_admin = True
+        db.session.commit()
+        self.login(2)
+        self.client.post("/admin/users/1/update_profile", data={"username": "renamed", "show_on_leaderboard": "on"})
+        resp = self.client.get("/api/debugger-td/leaderboard", headers={"If-None-Match": etag})
+        self.assertEqual(resp.get_json()["runs"][0]["username"], "renamed")
+
+    def test_keyset_pages_cover_every_visible_run_once(self):
+        runs = {1: (5, 10), 2: (5, 10), 3: (5, 30), 4: (2, 99), 5: (9, 0), 6: (5, 10), 7: (50, 50)}
+        for user_id, (wave, kills) in runs.items():
+            save_state(user_id, {"highWave": wave, "kills": kills})
+
+        seen, cursor = [], None
+        while True:
+            rows, cursor = leaderboard_page(cursor, limit=2)
+            seen += rows
+            if cursor is None:
+                break
+        self.assertEqual(
+            [(row["position"], row["username"]) for row in seen],
+            [(1, "player5"), (2, "player3"), (3, "player6"), (4, "player2"), (5, "player1"), (6, "player4")],
+        )
+
+        self.login(1)
+        first = self.client.get("/api/debugger-td/leaderboard?limit=3").get_json()
+        self.assertEqual(first["next"], "5.10.6.3")
+        second = self.client.get(f"/api/debugger-td/leaderboard?limit=3&after={first['next']}").get_json()
+        self.assertEqual([run["username"] for run in second["runs"]], ["player2", "player1", "player4"])
+        self.assertIsNone(second["next"])
+        page = self.client.get("/puzzles/debugger-tower-defense/leaderboard").get_data(as_text=True)
+        self.assertIn("Your best run: wave 5, 10 bugs", page)
+        self.assertNotIn("player7", page)
+        self.assertIsNone(Cursor.decode("5.x.1.1"))
+
+    def test_pages_seek_the_rank_index(self):
+        stmt = text(
+            "EXPLAIN QUERY PLAN SELECT user_id FROM tower_defense_score "
+            "WHERE (best_wave, best_kills, user_id) < (5, 10, 3) "
+            "ORDER BY best_wave DESC, best_kills DESC, user_id DESC LIMIT 25"
+        )
+        plan = " ".join(row[-1] for row in db.session.execute(stmt))
+        self.assertIn("ix_tower_defense_score_rank", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_rebuild_recomputes_scores_from_saved_runs(self):
+        save_state(1, {"highWave": 4, "kills": 7})
+        save_state(2, {"wave": 2})
+        TowerDefenseScore.query.delete()
+        db.session.commit()
+
+        self.assertEqual(rebuild_scores(), 2)
+        self.assertEqual((self.best(1), self.best(2)), ((4, 7), (2, 0)))
+        self.assertEqual(rebuild_scores(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
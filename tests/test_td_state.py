@@ -0,0 +1,103 @@
+import json
+import unittest
+import zlib
+
+from sqlalchemy import LargeBinary, select, type_coerce
+from werkzeug.security import generate_password_hash
+
+from app import db, DebuggerTowerDefensePatch, DebuggerTowerDefenseState, User
+from caching import current_cache
+from puzzles import td_state
+from puzzles.json_patch import PatchError, apply_patch
+from support import DatabaseTestCase
+
+URL = "/api/debugger-td/state"
+
+
+class JsonPatchTestCase(unittest.TestCase):
+    def test_operations_copy_only_the_changed_path(self):
+        towers = [{"x": 1}, {"x": 2}]
+        doc = {"wave": 1, "towers": towers, "meta": {"seed": 7}}
+        patched = apply_patch(doc, [
+            {"op": "replace", "path": "/wave", "value": 2},
+            {"op": "add", "path": "/towers/-", "value": {"x": 3}},
+            {"op": "move", "from": "/meta/seed", "path": "/seed"},
+            {"op": "test", "path": "/towers/2/x", "value": 3},
+            {"op": "remove", "path": "/towers/0"},
+        ])
+
+        self.assertEqual(patched, {"wave": 2, "towers": [{"x": 2}, {"x": 3}], "meta": {}, "seed": 7})
+        self.assertEqual(doc, {"wave": 1, "towers": [{"x": 1}, {"x": 2}], "meta": {"seed": 7}})
+        self.assertIs(patched["towers"][0], towers[1])
+
+    def test_invalid_patches_are_rejected(self):
+        doc = {"towers": []}
+        for ops in (
+            [],
+            [{"op": "explode", "path": "/towers"}],
+            [{"op": "replace", "path": "/missing", "value": 1}],
+            [{"op": "add", "path": "/towers/3", "value": 1}],
+            [{"op": "test", "path": "/towers", "value": [1]}],
+            [{"op": "add", "path": "towers", "value": 1}],
+        ):
+            with self.assertRaises(PatchError, msg=ops):
+                apply_patch(doc, ops)
+
+
+class TowerDefenseSaveTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        db.session.add(
+            User(username="player", email="player@example.com", password_hash=generate_password_hash("pw"))
+        )
+        db.session.commit()
+        self.client.post("/login", data={"username": "player", "password": "pw"})
+
+    def patch(self, version, ops):
+        return self.client.post(URL, json={"version": version, "patch": ops})
+
+    def test_patches_apply_on_top_of_the_saved_state(self):
+        resp = self.client.post(URL, json={"state": {"wave": 1, "towers": []}})
+        self.assertEqual(resp.get_json()["version"], 1)
+
+        resp = self.patch(1, [{"op": "add", "path": "/towers/-", "value": {"x": 40, "y": 80}}])
+        self.assertEqual(resp.status_code, 200)
+        resp = self.patch(2, [{"op": "replace", "path": "/wave", "value": 2}])
+        self.assertEqual(resp.get_json()["version"], 3)
+
+        current_cache.clear()
+        body = self.client.get(URL).get_json()
+        self.assertEqual(body, {"state": {"wave": 2, "towers": [{"x": 40, "y": 80}]}, "version": 3})
+        self.assertEqual(DebuggerTowerDefensePatch.query.execution_options(shard_key=1).count(), 2)
+
+    def test_stale_version_conflicts(self):
+        self.client.post(URL, json={"state": {"wave": 1}})
+        self.patch(1, [{"op": "replace", "path": "/wave", "value": 2}])
+
+        resp = self.patch(1, [{"op": "replace", "path": "/wave", "value": 5}])
+        self.assertEqual(resp.status_code, 409)
+        self.assertEqual(resp.get_json()["version"], 2)
+        resp = self.client.post(URL, json={"version": 1, "state": {"wave": 5}})
+        self.assertEqual(resp.status_code, 409)
+
+        self.assertEqual(self.patch(2, [{"op": "remove", "path": "/nope"}]).status_code, 400)
+        self.assertEqual(self.client.post(URL, json={"patch": []}).status_code, 400)
+        self.assertEqual(self.client.get(URL).get_json()["state"], {"wave": 2})
+
+    def test_bursts_fold_into_one_compressed_snapshot(self):
+        self.client.post(URL, json={"state": {"kills": 0}})
+        for version in range(1, td_state.FOLD_EVERY + 1):
+            resp = self.patch(version, [{"op": "replace", "path": "/kills", "value": version}])
+            self.assertEqual(resp.status_code, 200)
+
+        patches = DebuggerTowerDefensePatch.query.execution_options(shard_key=1).count()
+        self.assertEqual(patches, 0)
+        table = DebuggerTowerDefenseState.__table__
+        raw = db.session.execute(select(type_coerce(table.c.state, LargeBinary))).scalar()
+        self.assertEqual(json.loads(zlib.decompress(raw)), {"kills": td_state.FOLD_EVERY})
+        self.assertEqual(self.client.get(URL).get_json()["version"], td_state.FOLD_EVERY + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
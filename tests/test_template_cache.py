@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+
+from assets import precompile_templates, template_load_report
+from factory import create_app
+
+
+class TemplateBytecodeCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.app = create_app({"TESTING": True, "JINJA_BYTECODE_CACHE_DIR": self.cache_dir.name})
+
+    def tearDown(self):
+        self.cache_dir.cleanup()
+
+    def test_auto_reload_is_off_outside_debug(self):
+        self.assertFalse(self.app.config["TEMPLATES_AUTO_RELOAD"])
+        self.assertFalse(self.app.jinja_env.auto_reload)
+
+    def test_precompile_writes_bytecode_for_every_template(self):
+        timings = precompile_templates(self.app)
+        self.assertIn("base.html", timings)
+        self.assertIn("admin/users.html", timings)
+        cached = [name for name in os.listdir(self.cache_dir.name) if name.endswith(".cache")]
+        self.assertEqual(len(cached), len(timings))
+
+    def test_report_compares_cold_and_warm_loads(self):
+        rows = template_load_report(self.app, repeat=1)
+        names = [row[0] for row in rows]
+        self.assertEqual(names, sorted(names))
+        self.assertTrue(all(cold > 0 and warm is not None for _, cold, warm in rows))
+
+    def test_bytecode_cache_can_be_disabled(self):
+        app = create_app({"TESTING": True, "JINJA_BYTECODE_CACHE_ENABLED": False})
+        self.assertIsNone(app.jinja_env.bytecode_cache)
+        self.assertTrue(all(warm is None for _, _, warm in template_load_report(app, repeat=1)[:3]))
+
+
+if __name__ == "__main__":
+    unittest.main()
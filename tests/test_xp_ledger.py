@@ -0,0 +1,162 @@
+import unittest
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text, update
+from werkzeug.security import generate_password_hash
+
+from app import db, Challenge, User, XpEvent, XpRollup
+from models import RollupWatermark
+from support import DatabaseTestCase
+from xp_ledger import Cursor, award_xp, leaderboard_page, period_start, roll_up
+
+# A Wednesday, so the week started on Monday the 12th and the month on the 1st.
+TODAY = date(2026, 10, 14)
+
+
+def at(day: date, hour: int = 12) -> datetime:
+    return datetime(day.year, day.month, day.day, hour)
+
+
+class XpLedgerTestCase(DatabaseTestCase):
+    def setUp(self):
+        super().setUp()
+
+        for i in range(1, 6):
+            db.session.add(User(
+                username=f"player{i}", email=f"player{i}@example.com", is_admin=i == 1,
+                password_hash=generate_password_hash("pw"), show_on_leaderboard=i != 5,
+            ))
+        db.session.commit()
+
+    def login(self, user_id):
+        self.client.post("/login", data={"username": f"player{user_id}", "password": "pw"})
+
+    def events(self):
+        return [(e.user_id, e.source, e.delta) for e in XpEvent.query.order_by(XpEvent.id)]
+
+    def add_events(self, *rows):
+        for user_id, delta, created_at in rows:
+            db.session.add(XpEvent(user_id=user_id, source="challenge", delta=delta, created_at=created_at))
+        db.session.commit()
+
+    def rollup(self, period, start):
+        return {r.user_id: r.xp for r in XpRollup.query.filter_by(period=period, period_start=start)}
+
+    def test_every_award_writes_a_ledger_event_with_the_xp(self):
+        db.session.add(Challenge(title="Untested", prompt="Anything.", status="published"))
+        db.session.commit()
+        self.login(2)
+        self.client.post("/submit/1")
+        self.client.post("/puzzles/complete", json={"puzzle_name": "bit_flipper_lvl_1"})
+        self.login(1)
+        self.client.post("/admin/users/2/adjust_stats", data={"delta_xp": "-100", "delta_streak": "0"})
+
+        # The admin deduction is clamped at zero, and the ledger records what was applied.
+        self.assertEqual(self.events(), [(2, "challenge", 10), (2, "puzzle", 5), (2, "admin", -15)])
+        self.assertEqual(db.session.get(User, 2).xp, 0)
+
+    def test_unflushed_awards_roll_back_with_the_xp(self):
+        user = db.session.get(User, 3)
+        award_xp(user, 25, "admin")
+        db.session.rollback()
+        self.assertEqual((db.session.get(User, 3).xp, XpEvent.query.count()), (0, 0))
+
+    def test_awards_increment_in_sql_not_from_a_stale_copy(self):
+        user = db.session.get(User, 3)
+        self.assertEqual(user.xp, 0)
+        # Another request's award commits while this one still holds the old total.
+        db.session.execute(update(User).where(User.id == 3).values(xp=40),
+                           execution_options={"synchronize_session": False})
+        self.assertEqual(award_xp(user, 10, "challenge"), 10)
+        self.assertEqual(user.xp, 50)
+        self.assertEqual(award_xp(user, -80, "admin"), -50)
+        db.session.commit()
+        self.assertEqual((db.session.get(User, 3).xp, self.events()), (0, [(3, "challenge", 10), (3, "admin", -50)]))
+
+    def test_rollups_fold_each_event_once(self):
+        self.add_events(
+            (2, 10, at(TODAY)),
+            (2, 5, at(TODAY - timedelta(days=2))),   # Monday: same week
+            (3, 20, at(TODAY - timedelta(days=3))),  # Sunday: last week, same month
+            (3, 7, at(date(2026, 9, 30))),           # last month
+        )
+        db.session.add(XpEvent(user_id=4, source="opening", delta=500, created_at=at(TODAY)))
+        db.session.commit()
+
+        self.assertEqual(roll_up(batch_size=2), 5)
+        self.assertEqual(roll_up(), 0)
+        self.assertEqual(self.rollup("day", TODAY), {2: 10})
+        self.assertEqual(self.rollup("week", period_start("week", TODAY)), {2: 15})
+        self.assertEqual(self.rollup("week", date(2026, 10, 5)), {3: 20})
+        self.assertEqual(self.rollup("month", date(2026, 10, 1)), {2: 15, 3: 20})
+        self.assertEqual(self.rollup("month", date(2026, 9, 1)), {3: 7})
+
+        self.add_events((2, 1, at(TODAY)), (4, 3, at(TODAY)))
+        self.assertEqual(roll_up(), 2)
+        self.assertEqual(self.rollup("week", period_start("week", TODAY)), {2: 16, 4: 3})
+        self.assertEqual(db.session.get(RollupWatermark, "xp_rollup").last_id, XpEvent.query.count())
+
+    def test_young_events_wait_for_the_next_run(self):
+        self.add_events((2, 10, datetime.utcnow() - timedelta(minutes=5)), (3, 10, datetime.utcnow()))
+        self.assertEqual(roll_up(settle_seconds=60), 1)
+        self.assertEqual(roll_up(), 1)
+
+    def test_stale_runner_does_not_fold_twice(self):
+        roll_up()
+        self.add_events((2, 10, at(TODAY)))
+        stale = db.session.get(RollupWatermark, "xp_rollup")
+        self.assertEqual(stale.last_id, 0)
+        # Another runner folds the event between our read of the mark and our claim.
+        with db.engine.begin() as conn:
+            conn.execute(text("UPDATE rollup_watermark SET last_id = 1"))
+        self.assertEqual(roll_up(), 0)
+        self.assertEqual(self.rollup("day", TODAY), {})
+
+    def test_period_leaderboards_page_with_a_keyset_cursor(self):
+        self.add_events(
+            (1, 30, at(TODAY)), (2, 30, at(TODAY)), (3, 50, at(TODAY)), (4, 5, at(TODAY)),
+            (5, 99, at(TODAY)), (4, 100, at(TODAY - timedelta(days=3))),
+        )
+        roll_up()
+        seen, cursor = [], None
+        while True:
+            rows, cursor = leaderboard_page("week", cursor, limit=2, today=TODAY)
+            seen += rows
+            if cursor is None:
+                break
+        self.assertEqual(
+            [(row["position"], row["username"], row["xp"]) for row in seen],
+            [(1, "player3", 50), (2, "player2", 30), (3, "player1", 30), (4, "player4", 5)],
+        )
+        rows, _ = leaderboard_page("month", today=TODAY)
+        self.assertEqual(rows[0]["username"], "player4")
+        self.assertIsNone(Cursor.decode("5.x.1"))
+
+    def test_pages_seek_the_rank_index(self):
+        stmt = text(
+            "EXPLAIN QUERY PLAN SELECT user_id FROM xp_rollup "
+            "WHERE period = 'week' AND period_start = '2026-10-12' AND xp > 0 AND (xp, user_id) < (30, 2) "
+            "ORDER BY xp DESC, user_id DESC LIMIT 25"
+        )
+        plan = " ".join(row[-1] for row in db.session.execute(stmt))
+        self.assertIn("ix_xp_rollup_rank", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    def test_period_page_only_reads_the_rollups(self):
+        self.add_events((2, 40, datetime.utcnow() - timedelta(seconds=10)))
+        page = self.client.get("/leaderboard/week").get_data(as_text=True)
+        # The page folds nothing itself; the events wait for `flask xp rollup`.
+        self.assertNotIn("player2", page)
+        self.assertNotIn("Updated", page)
+        self.assertIsNone(db.session.get(RollupWatermark, "xp_rollup"))
+
+        roll_up()
+        page = self.client.get("/leaderboard/week").get_data(as_text=True)
+        self.assertIn("player2", page)
+        self.assertIn("XP this week", page)
+        self.assertIn("Updated", page)
+        self.assertEqual(self.client.get("/leaderboard/year").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,228 @@
+"""XP history: an append-only ledger plus incremental per-period rollups.
+
+Every change to ``User.xp`` goes through ``award_xp``, which increments
+the total in SQL and adds an ``XpEvent`` to the caller's session, so the
+event commits or rolls back with the XP change itself. The ledger lives
+on the primary next to ``user``, even when progress tables are sharded.
+
+``roll_up`` folds new events into ``XpRollup`` rows, one per user per
+UTC day, ISO week (starting Monday) and month. A ``RollupWatermark`` row
+remembers the last event id folded, so each run reads only the events
+after it, in id order and in bounded batches. A batch claims its range by
+moving the watermark with a compare-and-set before it writes. A second
+runner that started from the same mark updates no row and backs off
+instead of counting the events twice.
+
+Ids are handed out before commit, so on databases with concurrent writers
+a just-inserted event may become visible after a higher id has been
+folded. ``settle_seconds`` keeps the watermark behind events younger than
+that. Opening balances recorded when the ledger was introduced are XP
+from before any window, and ``reconcile`` corrections repair totals
+rather than award XP, so both are skipped.
+
+Weekly and monthly leaderboards read one period's rollup rows through
+``ix_xp_rollup_rank``, with the same keyset cursor scheme as the
+tower-defense board. The cost of a page is independent of how many events
+or pages came before it.
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import bindparam, func, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+
+from extensions import db
+from models import RollupWatermark, User, XpEvent, XpRollup
+
+PERIODS = ("day", "week", "month")
+LEADERBOARD_PERIODS = ("week", "month")
+OPENING_SOURCE = "opening"
+RECONCILE_SOURCE = "reconcile"
+UNPERIODED_SOURCES = frozenset({OPENING_SOURCE, RECONCILE_SOURCE})
+WATERMARK = "xp_rollup"
+BATCH_SIZE = 5000
+PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+class Cursor(NamedTuple):
+    xp: int
+    user_id: int
+    position: int
+
+    def encode(self) -> str:
+        return ".".join(str(part) for part in self)
+
+    @classmethod
+    def decode(cls, value: str | None):
+        """Parse a cursor from a query string; ``None`` for a missing or bad one."""
+        try:
+            parts = [int(part) for part in (value or "").split(".")]
+            return cls(*parts) if len(parts) == 3 and min(parts) >= 0 else None
+        except ValueError:
+            return None
+
+
+def award_xp(user: User, delta: int, source: str) -> int:
+    """Change ``user.xp`` by ``delta`` (never below zero) and log it; returns the applied change.
+
+    Commit at the caller, so the event and the new total land together.
+    The total is incremented in SQL, so concurrent awards never overwrite
+    each other; ``user.xp`` is reloaded on next access.
+    """
+    xp = func.coalesce(User.xp, 0)
+    applied = delta
+    while True:
+        stmt = update(User).where(User.id == user.id).values(xp=xp + applied)
+        if applied < 0:
+            stmt = stmt.where(xp >= -applied)
+        if db.session.execute(stmt, execution_options={"synchronize_session": False}).rowcount:
+            break
+        # Not enough XP left for the deduction: take what there is, unless it changes under us.
+        applied = max(delta, -db.session.scalar(select(xp).where(User.id == user.id)))
+    db.session.expire(user, ["xp"])
+    if applied:
+        db.session.add(XpEvent(user_id=user.id, source=source, delta=applied))
+    return applied
+
+
+def period_start(period: str, day: date) -> date:
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    if period == "month":
+        return day.replace(day=1)
+    return day
+
+
+def watermark(name: str = WATERMARK) -> RollupWatermark:
+    """The named watermark row, created at 0 on first use."""
+    mark = db.session.get(RollupWatermark, name)
+    if mark is None:
+        db.session.add(RollupWatermark(name=name, last_id=0))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()  # another runner created it first
+        mark = db.session.get(RollupWatermark, name)
+    return mark
+
+
+def claim(name: str, start_id: int, last_id: int) -> bool:
+    """Move watermark ``name`` from ``start_id`` to ``last_id``; ``False`` if another runner moved it first."""
+    return bool(db.session.execute(
+        update(RollupWatermark)
+        .where(RollupWatermark.name == name, RollupWatermark.last_id == start_id)
+        .values(last_id=last_id, updated_at=datetime.utcnow())
+    ).rowcount)
+
+
+def _roll_up_batch(batch_size: int, settle_seconds: float) -> int:
+    start_id = watermark().last_id
+    events = db.session.execute(
+        select(XpEvent.id, XpEvent.user_id, XpEvent.source, XpEvent.delta, XpEvent.created_at)
+        .where(XpEvent.id > start_id)
+        .order_by(XpEvent.id)
+        .limit(batch_size)
+    ).all()
+    cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    totals = defaultdict(int)
+    last_id, folded = start_id, 0
+    for event in events:
+        if settle_seconds and event.created_at > cutoff:
+            break
+        last_id, folded = event.id, folded + 1
+        if event.source in UNPERIODED_SOURCES or not event.delta:
+            continue
+        for period in PERIODS:
+            totals[(period, period_start(period, event.created_at.date()), event.user_id)] += event.delta
+    if not folded:
+        db.session.rollback()
+        return 0
+
+    if not claim(WATERMARK, start_id, last_id):
+        db.session.rollback()  # another runner folded this range first
+        return 0
+
+    if totals:
+        starts = {start for _, start, _ in totals}
+        user_ids = {user_id for _, _, user_id in totals}
+        existing = set(db.session.execute(
+            select(XpRollup.period, XpRollup.period_start, XpRollup.user_id)
+            .where(XpRollup.period_start.in_(starts), XpRollup.user_id.in_(user_ids))
+        ).all())
+        updates = [
+            {"p": period, "s": start, "u": user_id, "d": delta}
+            for (period, start, user_id), delta in totals.items() if (period, start, user_id) in existing
+        ]
+        inserts = [
+            {"period": period, "period_start": start, "user_id": user_id, "xp": delta}
+            for (period, start, user_id), delta in totals.items() if (period, start, user_id) not in existing
+        ]
+        table = XpRollup.__table__
+        if updates:
+            db.session.execute(
+                table.update()
+                .where(
+                    table.c.period == bindparam("p"),
+                    table.c.period_start == bindparam("s"),
+                    table.c.user_id == bindparam("u"),
+                )
+                .values(xp=table.c.xp + bindparam("d")),
+                updates,
+            )
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+    db.session.commit()
+    return folded
+
+
+def roll_up(batch_size: int = BATCH_SIZE, settle_seconds: float = 0.0, max_batches: int | None = None) -> int:
+    """Fold events after the watermark into the rollups; returns how many were folded."""
+    total = batches = 0
+    while max_batches is None or batches < max_batches:
+        folded = _roll_up_batch(batch_size, settle_seconds)
+        total += folded
+        batches += 1
+        if folded < batch_size:
+            break
+    return total
+
+
+def rolled_up_at() -> datetime | None:
+    """When the rollups last advanced, or ``None`` if they never have."""
+    mark = db.session.get(RollupWatermark, WATERMARK)
+    return mark.updated_at if mark and mark.last_id else None
+
+
+def leaderboard_page(period: str, after: Cursor | None = None, limit: int = PAGE_SIZE, today: date | None = None):
+    """One page of ``(position, user_id, username, xp)`` rows for the current week or month, plus the next cursor."""
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    start = period_start(period, today or datetime.utcnow().date())
+    stmt = (
+        select(XpRollup.user_id, XpRollup.xp, User.username)
+        .join(User, User.id == XpRollup.user_id)
+        .where(
+            XpRollup.period == period,
+            XpRollup.period_start == start,
+            XpRollup.xp > 0,
+            User.show_on_leaderboard.is_(True),
+        )
+        .order_by(XpRollup.xp.desc(), XpRollup.user_id.desc())
+        .limit(limit + 1)
+    )
+    position = 0
+    if after is not None:
+        position = after.position
+        stmt = stmt.where(tuple_(XpRollup.xp, XpRollup.user_id) < tuple_(after.xp, after.user_id))
+    rows = db.session.execute(stmt).all()
+    more, rows = len(rows) > limit, rows[:limit]
+    page = [
+        {"position": position + index, "user_id": row.user_id, "username": row.username, "xp": row.xp}
+        for index, row in enumerate(rows, 1)
+    ]
+    next_cursor = None
+    if more:
+        last = rows[-1]
+        next_cursor = Cursor(last.xp, last.user_id, position + len(rows))
+    return page, next_cursor